@@ -0,0 +1,188 @@
+"""
+Post-ride analytics over a day of riding. Builds a telemetry.db in a temporary directory
+with a synthetic track day (50 Hz sensor rows: rpm rising through each gear and shifting,
+a lean pattern with left and right corners, 10 Hz GPS, laps and checkpoints), then times
+storage.analytics end to end (load + analyze + export) from SQLite and from a
+TimeSeriesStore built by migrate_sqlite.
+
+Results are checked against a plain Python loop over the rows (first --check-minutes
+of the day) and against themselves with a different chunk size, so a corner or shift
+split across chunks is counted the same.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_analytics --hours 6
+Exits non-zero if any check fails.
+"""
+import argparse
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from storage import sqlite_logger
+from storage.analytics import analyze, export, iter_sqlite, iter_store, load_gps, load_laps
+from storage.timeseries import TimeSeriesStore, migrate_sqlite
+
+RATE = 50
+LAP_S = 90
+
+
+def sample(i):
+    phase = i / RATE
+    in_lap = phase % LAP_S
+    gear = 1 + int(in_lap / 12) % 6
+    rpm = 5000 + (in_lap % 12) * 700
+    speed = 30 + gear * 25 + (in_lap % 12) * 3
+    lean = 45 * math.sin(2 * math.pi * in_lap / 15)
+    return rpm, speed, gear, lean
+
+
+def build_db(path, hours):
+    conn = sqlite_logger.get_connection(path)
+    sqlite_logger.create_tables(conn)
+    t0 = datetime(2024, 6, 1, 8, 0, tzinfo=timezone.utc)
+    n = hours * 3600 * RATE
+    stamp = lambda i: (t0 + timedelta(microseconds=i * 1_000_000 // RATE)).isoformat()
+    batch = []
+    for i in range(n):
+        batch.append((stamp(i),) + sample(i))
+        if len(batch) == 100000:
+            conn.executemany("INSERT INTO sensor_data (timestamp, rpm, speed, gear, lean_angle) VALUES (?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO sensor_data (timestamp, rpm, speed, gear, lean_angle) VALUES (?, ?, ?, ?, ?)", batch)
+    gps = []
+    for i in range(0, n, RATE // 10):
+        a = 2 * math.pi * (i / RATE % LAP_S) / LAP_S
+        gps.append((None, stamp(i), 48.2 + 0.003 * math.sin(a), 11.6 + 0.004 * math.cos(a)))
+    conn.executemany("INSERT INTO gps_path (lap_id, timestamp, latitude, longitude) VALUES (?, ?, ?, ?)", gps)
+    laps = n // (LAP_S * RATE)
+    for lap in range(laps):
+        start = lap * LAP_S * RATE
+        conn.execute("INSERT INTO laps (start_time, end_time, best, track_name) VALUES (?, ?, ?, ?)",
+                     (stamp(start), stamp(start + LAP_S * RATE), lap == laps // 2, "synthetic"))
+        lap_id = lap + 1
+        for k, split in enumerate((30, 60)):
+            conn.execute("INSERT INTO checkpoints (lap_id, checkpoint_name, timestamp, delta_vs_best) VALUES (?, ?, ?, ?)",
+                         (lap_id, f"S{k + 1}", stamp(start + split * RATE), 0.01 * (lap % 7 - 3)))
+    conn.commit()
+    conn.close()
+    return n, laps
+
+
+def reference(rows, threshold=20.0, min_corner_s=0.5, rpm_band=1000, max_gap_s=0.5):
+    """
+    The same statistics with a row-at-a-time loop.
+    """
+    rpm_seconds = {}
+    shifts = []
+    corners = []
+    run = None
+    for k, (t, rpm, speed, gear, lean) in enumerate(rows):
+        if k + 1 < len(rows):
+            dt = min(rows[k + 1][0] - t, int(max_gap_s * 1e9)) / 1e9
+            band = int(rpm // rpm_band)
+            rpm_seconds[band] = rpm_seconds.get(band, 0.0) + dt
+            if gear >= 1 and rows[k + 1][3] == gear + 1:
+                shifts.append((int(gear), rpm))
+        if abs(lean) >= threshold:
+            if run is None:
+                run = [t, t, lean]
+            run[1] = t
+            if abs(lean) > abs(run[2]):
+                run[2] = lean
+        elif run is not None:
+            if run[1] - run[0] >= min_corner_s * 1e9:
+                corners.append(run[2])
+            run = None
+    if run is not None and run[1] - run[0] >= min_corner_s * 1e9:
+        corners.append(run[2])
+    return rpm_seconds, shifts, corners
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=int, default=6, help="length of the synthetic day")
+    parser.add_argument("--check-minutes", type=int, default=20, help="span compared against the Python loop")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="r3_analytics_")
+    ok = True
+    try:
+        db = os.path.join(tmp, "telemetry.db")
+        start = time.perf_counter()
+        rows, laps = build_db(db, args.hours)
+        print(f"telemetry.db: {rows} sensor rows, {laps} laps over {args.hours} h "
+              f"(built in {time.perf_counter() - start:.1f}s)")
+
+        start = time.perf_counter()
+        lap_cols, checkpoints = load_laps(db)
+        gps = load_gps(db)
+        analyzer, tables = analyze(iter_sqlite(db), lap_cols, checkpoints, gps)
+        analyzed = time.perf_counter() - start
+        written = export(tables, os.path.join(tmp, "out"), "both")
+        total = time.perf_counter() - start
+        print(f"  sqlite: load + analyze {analyzed:.2f}s ({rows / analyzed:,.0f} rows/s), "
+              f"with export {total:.2f}s ({len(written)} files)")
+        print(f"        {len(tables['shifts']['t'])} shifts, {len(tables['corners']['start'])} corners, "
+              f"{len(tables['laps']['lap_id'])} laps, {len(tables['checkpoints']['lap_id'])} checkpoints")
+
+        # Chunk boundaries must not change anything
+        _, small = analyze(iter_sqlite(db, chunk_rows=7777), lap_cols, checkpoints, gps)
+        same = all(
+            np.array_equal(np.asarray(tables[name][col]), np.asarray(small[name][col]))
+            if np.asarray(tables[name][col]).dtype.kind not in 'f' else
+            np.allclose(tables[name][col], small[name][col], equal_nan=True)
+            for name in tables for col in tables[name]
+        )
+        print(f"  7777-row chunks give identical tables: {same}")
+        ok = ok and same
+
+        store = TimeSeriesStore(os.path.join(tmp, "ts"))
+        session = migrate_sqlite(db, store)[0]
+        start = time.perf_counter()
+        _, from_store = analyze(iter_store(store, session), lap_cols, checkpoints, gps)
+        elapsed = time.perf_counter() - start
+        agree = (np.allclose(tables['rpm_bands']['seconds'], from_store['rpm_bands']['seconds'])
+                 and len(tables['corners']['start']) == len(from_store['corners']['start'])
+                 and np.array_equal(tables['shifts']['t'], from_store['shifts']['t']))
+        print(f"  timeseries store: analyze {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s), agrees with sqlite: {agree}")
+        ok = ok and agree
+
+        # Python loop over the first minutes
+        end = (datetime(2024, 6, 1, 8, 0, tzinfo=timezone.utc) + timedelta(minutes=args.check_minutes)).isoformat()
+        subset = [row for chunk in iter_sqlite(db, end=end) for row in zip(*(chunk[k].tolist() for k in
+                  ('t', 'rpm', 'speed', 'gear', 'lean_angle')))]
+        start = time.perf_counter()
+        ref_rpm, ref_shifts, ref_corners = reference(subset)
+        ref_t = time.perf_counter() - start
+        start = time.perf_counter()
+        _, sub = analyze(iter_sqlite(db, end=end))
+        vec_t = time.perf_counter() - start
+        bands = sub['rpm_bands']
+        rpm_ok = all(abs(bands['seconds'][b] - s) < 1e-6 for b, s in ref_rpm.items()) \
+            and abs(bands['seconds'].sum() - sum(ref_rpm.values())) < 1e-6
+        shift_ok = ref_shifts == list(zip(sub['shifts']['from_gear'].tolist(), sub['shifts']['rpm'].tolist()))
+        corner_ok = np.allclose(ref_corners, sub['corners']['max_lean'])
+        print(f"  first {args.check_minutes} min vs Python loop ({ref_t:.2f}s loop, {vec_t:.2f}s vectorized incl. load): "
+              f"rpm bands {rpm_ok}, {len(ref_shifts)} shifts {shift_ok}, {len(ref_corners)} corners {corner_ok}")
+        ok = ok and rpm_ok and shift_ok and corner_ok
+
+        # Lap joins: every full lap has LAP_S * RATE samples and both checkpoints
+        lap_ok = (np.all(tables['laps']['samples'] == LAP_S * RATE)
+                  and np.allclose(tables['laps']['lap_time_s'], LAP_S)
+                  and np.allclose(np.sort(np.unique(tables['checkpoints']['split_s'])), (30, 60)))
+        print(f"  per-lap summary and checkpoint splits consistent: {lap_ok}")
+        ok = ok and lap_ok
+    finally:
+        shutil.rmtree(tmp)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Time to first frame: starts the whole dash through supervisor.py (headless, with the
+dummy SDL video driver and the mock sensors of a dev config) in a scratch directory,
+waits for the display to report its first frame showing rpm, stops it and repeats.
+Every process appends its startup phases to a report file (utils/startup.py), all timed
+from the supervisor's start; the medians per phase are printed.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_boot --runs 5
+Add --drop-caches (root) to start every run with a cold page cache, as after power-on.
+Exits non-zero if the median time to the first rpm on screen reaches --max-ms.
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def drop_caches():
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+        return True
+    except OSError as e:
+        print(f"Cannot drop the page cache: {e}")
+        return False
+
+
+def read_reports(path):
+    reports = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                report = json.loads(line)
+                reports[report['process']] = report
+    except FileNotFoundError:
+        pass
+    return reports
+
+
+def boot_once(timeout_s):
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = os.path.join(tmp, "startup.jsonl")
+        env = dict(os.environ, SDL_VIDEODRIVER="dummy", PYTHONPATH=ROOT, R3_STARTUP_REPORT=report_path)
+        env.pop("R3_BOOT_NS", None)
+        with open(os.path.join(tmp, "supervisor.log"), "w") as log:
+            proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "supervisor.py")], cwd=tmp, env=env,
+                                    stdout=log, stderr=subprocess.STDOUT)
+            deadline = time.monotonic() + timeout_s
+            reports = {}
+            while time.monotonic() < deadline and proc.poll() is None:
+                reports = read_reports(report_path)
+                if {'acquisition', 'display'} <= reports.keys():
+                    break
+                time.sleep(0.05)
+            proc.send_signal(signal.SIGINT)
+            try:
+                proc.wait(30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        return read_reports(report_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=20.0, help="seconds to wait for the first frame")
+    parser.add_argument("--max-ms", type=float, default=2000.0, help="budget for the first rpm on screen")
+    parser.add_argument("--drop-caches", action="store_true")
+    args = parser.parse_args()
+
+    runs = []
+    for n in range(args.runs):
+        if args.drop_caches:
+            drop_caches()
+        reports = boot_once(args.timeout)
+        first_rpm = reports.get('display', {}).get('marks', {}).get('first_rpm')
+        print(f"run {n + 1}: first rpm on screen " + (f"{first_rpm:.0f} ms" if first_rpm is not None else "never"))
+        runs.append(reports)
+
+    # (process, kind, name) -> values across runs, in the order first seen
+    samples = {}
+    for reports in runs:
+        for process in ('acquisition', 'storage', 'display'):
+            report = reports.get(process)
+            if report is None:
+                continue
+            for kind in ('phases', 'marks'):
+                for name, value in report[kind].items():
+                    samples.setdefault((process, kind, name), []).append(value)
+    process = None
+    for (proc, kind, name), values in samples.items():
+        if proc != process:
+            process = proc
+            print(f"{proc}:")
+        label = f"* {name}" if kind == 'marks' else name
+        suffix = "at" if kind == 'marks' else "took"
+        print(f"  {label:<24} {suffix} median {statistics.median(values):8.1f} ms  max {max(values):8.1f} ms")
+
+    first = samples.get(('display', 'marks', 'first_rpm'), [])
+    ok = len(first) == args.runs and statistics.median(first) < args.max_ms
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
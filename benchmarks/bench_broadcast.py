@@ -0,0 +1,140 @@
+"""
+Compares the two broadcast modes of DataAcquisition over the socket hub: "periodic"
+(a full frame every 100 ms) and "change" (a delta as soon as a channel updates,
+coalesced per channel, plus a keyframe every second). Synthetic sensors update rpm at
+500 Hz, lean at 50 Hz and position at 10 Hz; a receiver thread applies every message
+to one state dict like display_gui does, and a 60 Hz "display" tick records how old
+the rpm it would draw is. Periodic mode is also run at 60 Hz, the rate change mode
+caps rpm at, to compare bytes at similar freshness.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_broadcast --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+from utils import frame
+from utils.pubsub import Coalescer, FrameHub
+from utils.scheduler import Scheduler
+
+MAX_HZ = {"can": 60, "imu": 30, "gps": 25}
+
+
+class Sim:
+    def __init__(self):
+        self.rpm = 8000
+        self.lean = 0.0
+        self.lat, self.lon = 44.4268, 26.1025
+        self.rpm_ns = time.monotonic_ns()
+        self.seq = 0
+        self.last = None
+
+    def values(self):
+        return frame.frame_values(self.seq + 1, time.monotonic_ns(), self.rpm, 120, 4, self.lean, self.lat, self.lon, self.rpm_ns)
+
+    def publish(self, hub, keyframe=True):
+        # Same decision as DataAcquisition._publish
+        values = self.values()
+        mask = frame.changed_mask(self.last, values)
+        if not keyframe and not mask:
+            return
+        self.seq = values[3]
+        self.last = values
+        hub.publish(frame.encode(values) if keyframe else frame.encode_delta(values, mask))
+
+
+def receiver(sock, state, stop):
+    rx = bytearray(frame.MAX_MESSAGE_SIZE)
+    view = memoryview(rx)
+    sock.settimeout(0.2)
+    while not stop.is_set():
+        try:
+            nbytes = sock.recv_into(rx)
+        except socket.timeout:
+            continue
+        frame.apply(view[:nbytes], state)
+
+
+async def run(mode, tmp, seconds, period=0.1):
+    sim = Sim()
+    dest = os.path.join(tmp, f"{mode}_rx.sock")
+    rx = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    rx.bind(dest)
+    rx.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    hub = FrameHub(os.path.join(tmp, f"{mode}_hub.sock"), subscribers=[dest])
+    hub.start()
+    ages = []
+    state = {}
+    stop_rx = threading.Event()
+    thread = threading.Thread(target=receiver, args=(rx, state, stop_rx))
+    thread.start()
+
+    stop = asyncio.Event()
+    scheduler = Scheduler()
+    coalescer = Coalescer(lambda: sim.publish(hub, keyframe=False), MAX_HZ) if mode == "change" else None
+
+    def changed(channel):
+        if coalescer is not None:
+            coalescer.changed(channel)
+
+    def can_tick():
+        sim.rpm = min(max(sim.rpm + random.randint(-150, 150), 2000), 14000)
+        sim.rpm_ns = time.monotonic_ns()
+        changed("can")
+
+    def imu_tick():
+        sim.lean = round(random.uniform(-45, 45), 1)
+        changed("imu")
+
+    def gps_tick():
+        sim.lat += 1e-5
+        changed("gps")
+
+    scheduler.every("can", 0.002, can_tick)
+    scheduler.every("imu", 0.02, imu_tick)
+    scheduler.every("gps", 0.1, gps_tick)
+    scheduler.every("display", 1 / 60, lambda: state and ages.append(time.monotonic_ns() - state["sampled"]))
+    if mode == "change":
+        scheduler.every("keyframe", 1.0, lambda: sim.publish(hub))
+    else:
+        scheduler.every("broadcast", period, lambda: sim.publish(hub))
+    asyncio.get_running_loop().call_later(seconds, stop.set)
+    await scheduler.run(stop)
+    await asyncio.sleep(0.1)
+    stats = hub.stats()[dest]
+    stop_rx.set()
+    thread.join()
+    hub.close()
+    rx.close()
+    return ages, stats
+
+
+def report(mode, ages, stats, seconds):
+    ages = sorted(a / 1e6 for a in ages)
+    print(f"{mode}:")
+    print(f"  messages          {stats['sent'] / seconds:7.1f}/s  dropped {stats['dropped']}")
+    print(f"  bytes             {stats['bytes'] / seconds:7.0f}/s  ({stats['bytes'] / max(stats['sent'], 1):.1f} per message)")
+    print(f"  shown rpm age ms  mean={statistics.fmean(ages):.2f} p50={ages[len(ages) // 2]:.2f} "
+          f"p99={ages[int(len(ages) * 0.99)]:.2f} max={ages[-1]:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, mode, period in (("periodic 10 Hz", "periodic", 0.1), ("periodic 60 Hz", "periodic60", 1 / 60),
+                                    ("change", "change", None)):
+            ages, stats = asyncio.run(run(mode, tmp, args.seconds, period))
+            report(label, ages, stats, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
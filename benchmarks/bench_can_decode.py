@@ -0,0 +1,107 @@
+"""
+Throughput of the compiled signal table (sensors/can_signals.py) against the original
+if/elif decoding chain, for the stock rpm/speed/gear set and for a larger table with
+fuel, coolant, throttle, wheel speed and similar signals spread over many IDs.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_can_decode --frames 200000
+Exits non-zero if the two decoders disagree. Decoding itself is covered by
+tests/test_can_signals.py.
+"""
+import argparse
+import random
+import sys
+import time
+
+from sensors.can_signals import Signal, SignalDecoder, default_signals
+
+RPM_ID, SPEED_ID, GEAR_ID = 0x100, 0x101, 0x102
+
+
+def chain_decode(can_id, data, result):
+    # The decoding CANReader.read_can_data used before the signal table
+    if can_id == RPM_ID:
+        result['rpm'] = int.from_bytes(data[0:2], byteorder='big')
+    elif can_id == SPEED_ID:
+        result['speed'] = data[0]
+    elif can_id == GEAR_ID:
+        result['gear'] = data[0]
+
+
+def extended_signals(extra_ids):
+    signals = default_signals(RPM_ID, SPEED_ID, GEAR_ID)
+    for i in range(extra_ids):
+        can_id = 0x200 + i
+        signals += [
+            Signal(f'sig{i}_a', can_id, start_bit=0, length=8, byte_order='little', offset=-40),
+            Signal(f'sig{i}_b', can_id, start_bit=8, length=10, byte_order='little', scale=0.1),
+            Signal(f'sig{i}_c', can_id, start_bit=39, length=16, byte_order='big', scale=0.01),
+        ]
+    return signals
+
+
+def extended_chain(extra_ids):
+    """
+    Builds the if/elif chain one would hand-write for the same extended table.
+    """
+    lines = ["def decode(can_id, data, result):", "    if False: pass"]
+    lines += [
+        "    elif can_id == %d: result['rpm'] = int.from_bytes(data[0:2], 'big')" % RPM_ID,
+        "    elif can_id == %d: result['speed'] = data[0]" % SPEED_ID,
+        "    elif can_id == %d: result['gear'] = data[0]" % GEAR_ID,
+    ]
+    for i in range(extra_ids):
+        lines += [
+            "    elif can_id == %d:" % (0x200 + i),
+            "        raw = int.from_bytes(data, 'little')",
+            "        result['sig%d_a'] = (raw & 0xFF) - 40" % i,
+            "        result['sig%d_b'] = ((raw >> 8) & 0x3FF) * 0.1" % i,
+            "        result['sig%d_c'] = int.from_bytes(data[4:6], 'big') * 0.01" % i,
+        ]
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace["decode"]
+
+
+def run(label, decode, frames):
+    result = {}
+    start = time.perf_counter()
+    for can_id, data in frames:
+        decode(can_id, data, result)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {len(frames) / elapsed / 1000:8.0f} kframes/s  {elapsed * 1e9 / len(frames):6.0f} ns/frame")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200000)
+    parser.add_argument("--extra-ids", type=int, default=12, help="extra IDs (3 signals each) in the large table")
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    stock_ids = [RPM_ID, SPEED_ID, GEAR_ID]
+    stock = [(rng.choice(stock_ids), bytearray(rng.randbytes(8))) for _ in range(args.frames)]
+    decoder = SignalDecoder(default_signals(RPM_ID, SPEED_ID, GEAR_ID))
+    a = run("stock: if/elif chain", chain_decode, stock)
+    b = run("stock: compiled table", decoder.decode, stock)
+    failures = 0
+    if a != b:
+        failures += 1
+        print(f"stock decoders disagree: {a} vs {b}")
+
+    all_ids = stock_ids + [0x200 + i for i in range(args.extra_ids)]
+    large = [(rng.choice(all_ids), bytearray(rng.randbytes(8))) for _ in range(args.frames)]
+    decoder = SignalDecoder(extended_signals(args.extra_ids))
+    signal_count = len(decoder.names)
+    a = run(f"{signal_count} signals: if/elif chain", extended_chain(args.extra_ids), large)
+    b = run(f"{signal_count} signals: compiled table", decoder.decode, large)
+    if a.keys() != b.keys() or any(abs(a[k] - b[k]) >= 1e-9 for k in a):
+        failures += 1
+        print(f"{signal_count} signal decoders disagree")
+    print("PASS" if not failures else "FAIL")
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
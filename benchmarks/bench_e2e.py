@@ -0,0 +1,430 @@
+"""
+End-to-end load test of the whole dash. For each load level a synthetic session is
+recorded (storage/session_log.py) with rpm/speed/gear CAN frames, raw IMU samples and
+GPS fixes at the level's rate, and replayed in a loop at real time through
+data_acquisition.py (replay mode), which logs sensor rows at the same rate into a
+SQLite database in a scratch directory. A headless display_gui.py (dummy SDL video
+driver) reads the shm ring. Once both are up the metrics are reset; after --seconds the
+bench collects:
+
+  throughput   CAN frames in, frames published, frames picked up and drawn by the display
+  latency      sensor-to-glass, transport and sample-age percentiles (utils/metrics.py)
+  cpu / rss    per process, from /proc (CPU in % of one core, RSS and peak RSS in MB)
+  sqlite       sensor_data rows written per second
+
+Results go to a JSON file (--output) together with the commit, host, CPU and Python
+version, so runs on the Pi and on x86 dev boxes can be kept side by side. --compare
+reads an earlier file and reports each metric against it.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_e2e --rates 10,100,1000 --seconds 10
+    python3 -m benchmarks.bench_e2e --compare bench_e2e-pi-1a2b3c4.json
+Exits non-zero if a level falls short (CAN frames or rows not keeping up with the
+offered rate, nothing drawn) or, with --compare, a metric regressed beyond --tolerance.
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import runpy
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = {"acquisition": "data_acquisition.py", "display": "display_gui.py"}
+RPM_ID, SPEED_ID, GEAR_ID = 0x100, 0x101, 0x102
+SESSION_S = 10.0  # Length of the recorded session; it is replayed in a loop
+
+# (section, key, better): what --compare looks at; "lower" or "higher" is better
+COMPARED = (
+    ("latency", "glass_p50_ms", "lower"),
+    ("latency", "glass_p99_ms", "lower"),
+    ("latency", "transport_p99_ms", "lower"),
+    ("throughput", "published_per_s", "higher"),
+    ("throughput", "display_fps", "higher"),
+    ("sqlite", "rows_per_s", "higher"),
+    ("cpu", "acquisition_pct", "lower"),
+    ("cpu", "display_pct", "lower"),
+    ("rss", "acquisition_peak_mb", "lower"),
+    ("rss", "display_peak_mb", "lower"),
+)
+# Differences smaller than these are noise, whatever the percentage
+FLOOR = {"_ms": 1.0, "_pct": 2.0, "_mb": 2.0, "_per_s": 5.0, "_fps": 2.0}
+
+
+def record_session(path, seconds, can_hz, imu_hz, gps_hz):
+    """
+    Writes a synthetic ride: rpm sweeping through the rev range and shifting, a lean
+    pattern of left and right corners, and fixes around a 1 km circle.
+    """
+    from storage.session_log import SessionRecorder
+    events = []
+    for k in range(int(seconds * can_hz)):
+        t = k / can_hz
+        rpm = int(9000 + 5000 * math.sin(t * 1.3))
+        gear = 1 + int(t / 2) % 6
+        speed = min(int(rpm / 100 * gear / 3), 255)
+        events.append((t, 0, RPM_ID, rpm.to_bytes(2, "big")))
+        events.append((t, 0, SPEED_ID, bytes((speed,))))
+        events.append((t, 0, GEAR_ID, bytes((gear,))))
+    for k in range(int(seconds * imu_hz)):
+        t = k / imu_hz
+        lean = math.radians(45 * math.sin(t * 0.8))
+        roll_rate = math.degrees(math.radians(45) * 0.8 * math.cos(t * 0.8))
+        events.append((t, 1, (0.0, 9.81 * math.sin(lean), 9.81 * math.cos(lean)), (roll_rate, 0.0, 0.0)))
+    start = datetime.datetime(2024, 6, 1, 10, 0, tzinfo=datetime.timezone.utc)
+    for k in range(int(seconds * gps_hz)):
+        t = k / gps_hz
+        angle = t * 0.1
+        fix = {
+            'lat': 44.4268 + 0.0045 * math.sin(angle), 'lon': 26.1025 + 0.0063 * math.cos(angle),
+            'fix_time': (start + datetime.timedelta(seconds=t)).isoformat(), 'alt': 80.0, 'speed': 30.0,
+            'track': math.degrees(angle) % 360
+        }
+        events.append((t, 2, fix))
+    events.sort(key=lambda e: (e[0], e[1]))
+    recorder = SessionRecorder(path, compress=False, max_buffer=1 << 30)
+    for event in events:
+        t_ns = int(event[0] * 1e9)
+        if event[1] == 0:
+            recorder.record_can(t_ns, event[2], event[3])
+        elif event[1] == 1:
+            recorder.record_imu(t_ns, event[2], event[3])
+        else:
+            recorder.record_gps(t_ns, event[2])
+    recorder.close()
+    return len(events)
+
+
+def overrides(tmp, session, log_hz):
+    return {
+        "replay_path": session,
+        "replay_speed": 1.0,
+        "replay_loop": True,
+        "logging_enabled": True,
+        "log_backend": "sqlite",
+        "log_interval_ms": 1000.0 / log_hz,
+        "log_queue_size": max(5000, int(log_hz * 5)),
+        "ts_root": os.path.join(tmp, "timeseries"),
+        "record_enabled": False,
+        "track_start_line": None,
+        "transport": "shm",
+        # The ring outlives its writer by design; run_level removes it
+        "shm_path": f"/dev/shm/r3_bench_{os.path.basename(tmp)}",
+        "hub_socket": os.path.join(tmp, "hub.sock"),
+        "display_socket": os.path.join(tmp, "display.sock"),
+        "debug_socket": os.path.join(tmp, "debug.sock"),
+        "metrics_enabled": True,
+        "metrics_socket": os.path.join(tmp, "acquisition_metrics.sock"),
+        "display_metrics_socket": os.path.join(tmp, "display_metrics.sock"),
+        "startup_report": os.path.join(tmp, "startup.jsonl"),
+    }
+
+
+def run_child(role, config_json):
+    """
+    Runs acquisition or display in this process with the bench's CONFIG overrides.
+    """
+    from config import CONFIG
+    CONFIG.update(json.loads(config_json))
+    runpy.run_path(os.path.join(ROOT, SCRIPTS[role]), run_name="__main__")
+
+
+def spawn(role, tmp, config):
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", PYTHONPATH=ROOT, PYTHONUNBUFFERED="1")
+    env.pop("R3_BOOT_NS", None)
+    log = open(os.path.join(tmp, f"{role}.log"), "w")
+    proc = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_e2e", "--child", role, json.dumps(config)],
+                            cwd=tmp, env=env, stdout=log, stderr=subprocess.STDOUT)
+    proc.log = log
+    return proc
+
+
+def stop(proc, sig, timeout=15):
+    if proc.poll() is None:
+        proc.send_signal(sig)
+        try:
+            proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+    proc.log.close()
+
+
+def started(report_path):
+    processes = set()
+    try:
+        with open(report_path) as f:
+            for line in f:
+                report = json.loads(line)
+                if 'ready' in report['marks'] or 'first_rpm' in report['marks']:
+                    processes.add(report['process'])
+    except FileNotFoundError:
+        pass
+    return {'acquisition', 'display'} <= processes
+
+
+def cpu_seconds(pid):
+    """
+    User + system CPU time of a process so far, or None where /proc is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def rss_mb(pid):
+    """
+    (current, peak) resident set size in MB, or (None, None).
+    """
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":", 1)
+                    values[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return values.get("VmRSS"), values.get("VmHWM")
+
+
+def sensor_rows(db_path):
+    try:
+        with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=5) as conn:
+            return conn.execute("SELECT COUNT(*) FROM sensor_data").fetchone()[0]
+    except sqlite3.Error:
+        return 0
+
+
+def can_frames(stats):
+    return sum(s['frames'] for s in stats.get('can', {}).get('ids', {}).values())
+
+
+def histogram(stats, name, key):
+    return stats.get('latency', {}).get(name, {}).get(key)
+
+
+def run_level(label, rates, log_hz, seconds, startup_timeout):
+    from utils.metrics import query
+    with tempfile.TemporaryDirectory() as tmp:
+        session = os.path.join(tmp, "session")
+        record_session(session, SESSION_S, rates['can'], rates['imu'], rates['gps'])
+        config = overrides(tmp, session, log_hz)
+        procs = {}
+        try:
+            procs['acquisition'] = spawn("acquisition", tmp, config)
+            procs['display'] = spawn("display", tmp, config)
+            deadline = time.monotonic() + startup_timeout
+            while not started(config["startup_report"]):
+                if time.monotonic() > deadline or any(p.poll() is not None for p in procs.values()):
+                    raise RuntimeError(f"{label}: processes did not start, see the logs in {tmp}")
+                time.sleep(0.1)
+            time.sleep(1.0)  # Let the first replay pass and the display settle
+
+            acq_socket, display_socket = config["metrics_socket"], config["display_metrics_socket"]
+            acq_before = query(acq_socket, b"RESET")
+            query(display_socket, b"RESET")
+            cpu_before = {role: cpu_seconds(p.pid) for role, p in procs.items()}
+            rows_before = sensor_rows(os.path.join(tmp, "telemetry.db"))
+            start = time.monotonic()
+            time.sleep(seconds)
+            acq = query(acq_socket)
+            display = query(display_socket)
+            elapsed = time.monotonic() - start
+            cpu_after = {role: cpu_seconds(p.pid) for role, p in procs.items()}
+            rss = {role: rss_mb(p.pid) for role, p in procs.items()}
+            rows_after = sensor_rows(os.path.join(tmp, "telemetry.db"))
+        finally:
+            if 'display' in procs:
+                stop(procs['display'], signal.SIGTERM)
+            if 'acquisition' in procs:
+                stop(procs['acquisition'], signal.SIGINT)
+            try:
+                os.unlink(config["shm_path"])
+            except FileNotFoundError:
+                pass
+
+    def per_s(n):
+        return round(n / elapsed, 1)
+
+    frames = display.get('frames', {})
+    result = {
+        'label': label,
+        'rates_hz': rates,
+        'log_hz': log_hz,
+        'seconds': round(elapsed, 2),
+        'throughput': {
+            'can_frames_per_s': per_s(can_frames(acq) - can_frames(acq_before)),
+            'can_frames_offered_per_s': 3 * rates['can'],
+            'published_per_s': per_s(histogram(acq, 'publish', 'count') or 0),
+            'display_frames_per_s': per_s(histogram(display, 'transport', 'count') or 0),
+            'display_fps': frames.get('achieved_fps'),
+            'display_dropped': frames.get('dropped'),
+        },
+        'latency': {},
+        'cpu': {},
+        'rss': {},
+        # Flushed in batches (log_flush_interval_ms), so the count lags by up to a batch
+        'sqlite': {'rows_per_s': per_s(max(rows_after - rows_before, 0)), 'rows_offered_per_s': log_hz},
+    }
+    for prefix, stats, name in (('glass', display, 'glass'), ('transport', display, 'transport'),
+                                ('sample_age', acq, 'sample_age'), ('frame_time', display, 'frame_time')):
+        for q in ('p50_ms', 'p99_ms', 'max_ms'):
+            result['latency'][f"{prefix}_{q}"] = histogram(stats, name, q)
+    for role in procs:
+        if cpu_before[role] is not None and cpu_after[role] is not None:
+            result['cpu'][f"{role}_pct"] = round((cpu_after[role] - cpu_before[role]) / elapsed * 100, 1)
+        current, peak = rss[role]
+        result['rss'][f"{role}_mb"] = None if current is None else round(current, 1)
+        result['rss'][f"{role}_peak_mb"] = None if peak is None else round(peak, 1)
+    return result
+
+
+def check(result):
+    """
+    Ways a level can fall short of the load it was offered.
+    """
+    problems = []
+    t = result['throughput']
+    if t['can_frames_per_s'] < 0.9 * t['can_frames_offered_per_s']:
+        problems.append(f"CAN frames {t['can_frames_per_s']}/s of {t['can_frames_offered_per_s']}/s offered")
+    if not t['display_frames_per_s']:
+        problems.append("display drew no frames")
+    sql = result['sqlite']
+    # The window's rows are counted as flushed, so allow for one batch interval either side
+    if sql['rows_per_s'] < 0.8 * sql['rows_offered_per_s']:
+        problems.append(f"SQLite rows {sql['rows_per_s']}/s of {sql['rows_offered_per_s']}/s offered")
+    return problems
+
+
+def print_result(result):
+    t, lat, sql = result['throughput'], result['latency'], result['sqlite']
+    print(f"{result['label']}: can {result['rates_hz']['can']} Hz, imu {result['rates_hz']['imu']} Hz, "
+          f"gps {result['rates_hz']['gps']} Hz, log {result['log_hz']} Hz")
+    print(f"  CAN in        {t['can_frames_per_s']:9.1f}/s  (offered {t['can_frames_offered_per_s']}/s)")
+    print(f"  published     {t['published_per_s']:9.1f}/s  display picked up {t['display_frames_per_s']}/s, "
+          f"{t['display_fps']} fps, dropped {t['display_dropped']}")
+    for prefix in ('glass', 'transport', 'sample_age', 'frame_time'):
+        p50, p99, top = (lat.get(f"{prefix}_{q}") for q in ('p50_ms', 'p99_ms', 'max_ms'))
+        if p50 is not None:
+            print(f"  {prefix:<13} p50 {p50:7.2f}  p99 {p99:7.2f}  max {top:7.2f} ms")
+    print(f"  SQLite rows   {sql['rows_per_s']:9.1f}/s  (offered {sql['rows_offered_per_s']}/s)")
+    for role in ('acquisition', 'display'):
+        cpu = result['cpu'].get(f"{role}_pct")
+        rss, peak = result['rss'].get(f"{role}_mb"), result['rss'].get(f"{role}_peak_mb")
+        print(f"  {role:<13} cpu {cpu if cpu is not None else '-':>6} %  rss {rss} MB (peak {peak} MB)")
+
+
+def metadata(args):
+    def git(*cmd):
+        try:
+            return subprocess.run(("git",) + cmd, cwd=ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+    model = None
+    try:
+        with open("/proc/device-tree/model") as f:
+            model = f.read().strip("\0\n")
+    except OSError:
+        pass
+    return {
+        'commit': git("rev-parse", "--short", "HEAD") or None,
+        'dirty': bool(git("status", "--porcelain", "--untracked-files=no")),
+        'host': socket.gethostname(),
+        'machine': platform.machine(),
+        'model': model,
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        'args': vars(args),
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Prints every COMPARED metric against the baseline file's run of the same label and
+    returns the regressions beyond tolerance (a fraction) and the metric's noise floor.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old_runs = {r['label']: r for r in baseline['runs']}
+    meta = baseline.get('meta', {})
+    print(f"Against {baseline_path} (commit {meta.get('commit')}, {meta.get('host')}, {meta.get('machine')}):")
+    regressions = []
+    for result in results:
+        old = old_runs.get(result['label'])
+        if old is None:
+            print(f"  {result['label']}: not in the baseline")
+            continue
+        for section, key, better in COMPARED:
+            new_value, old_value = result[section].get(key), old[section].get(key)
+            if new_value is None or old_value is None:
+                continue
+            change = new_value - old_value
+            pct = change / old_value * 100 if old_value else 0.0
+            worse = change > 0 if better == "lower" else change < 0
+            floor = next((v for suffix, v in FLOOR.items() if key.endswith(suffix)), 0.0)
+            flag = ""
+            if worse and abs(change) > floor and abs(change) > tolerance * abs(old_value):
+                flag = "  REGRESSION"
+                regressions.append(f"{result['label']} {key}")
+            print(f"  {result['label']:<8} {key:<22} {old_value:10.2f} -> {new_value:10.2f} ({pct:+6.1f}%){flag}")
+    return regressions
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], sys.argv[3])
+        return 0
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", default="10,100,1000", help="load levels in Hz, comma separated")
+    parser.add_argument("--seconds", type=float, default=10.0, help="measurement window per level")
+    parser.add_argument("--can-hz", type=float, help="fixed CAN rate per ID instead of the level's")
+    parser.add_argument("--imu-hz", type=float, help="fixed raw IMU sample rate instead of the level's")
+    parser.add_argument("--gps-hz", type=float, help="fixed GPS fix rate instead of the level's")
+    parser.add_argument("--log-hz", type=float, help="fixed sensor_data row rate instead of the level's")
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="results file (default bench_e2e-<host>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression as a fraction")
+    args = parser.parse_args()
+
+    meta = metadata(args)
+    results = []
+    problems = []
+    for level in (float(r) for r in args.rates.split(",")):
+        label = f"{level:g}hz"
+        rates = {'can': args.can_hz or level, 'imu': args.imu_hz or level, 'gps': args.gps_hz or level}
+        result = run_level(label, rates, args.log_hz or level, args.seconds, args.startup_timeout)
+        result['problems'] = check(result)
+        problems += [f"{label}: {p}" for p in result['problems']]
+        print_result(result)
+        results.append(result)
+
+    output = args.output or f"bench_e2e-{meta['host']}-{meta['commit'] or 'unknown'}.json"
+    with open(output, "w") as f:
+        json.dump({'meta': meta, 'runs': results}, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        problems += [f"regressed: {r}" for r in compare(results, args.compare, args.tolerance)]
+    for problem in problems:
+        print(f"  {problem}")
+    print("PASS" if not problems else "FAIL")
+    return 0 if not problems else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
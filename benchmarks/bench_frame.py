@@ -0,0 +1,44 @@
+"""
+Micro-benchmark of per-frame encode/decode cost for the binary dashboard frame
+versus the JSON debug encoding.
+
+Run from the repository root (ideally on the Pi itself):
+    python3 -m benchmarks.bench_frame --iterations 200000
+"""
+import argparse
+import time
+import timeit
+
+from utils import frame
+
+
+def bench(label, stmt, iterations, size=None):
+    seconds = min(timeit.repeat(stmt, number=iterations, repeat=3))
+    extra = f"  {size} bytes" if size is not None else ""
+    print(f"{label:<28} {seconds * 1e9 / iterations:8.0f} ns/frame{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    values = frame.frame_values(1, time.monotonic_ns(), 8450, 132, 4, 37.25, 44.4268, 26.1025)
+    binary = frame.FRAME.pack(*values)
+    encoded_json = frame.encode_json(values)
+    rx = bytearray(frame.MAX_MESSAGE_SIZE)
+    rx[:len(binary)] = binary
+    view = memoryview(rx)[:len(binary)]
+
+    bench("encode binary (pack)", lambda: frame.FRAME.pack(*values), n, len(binary))
+    bench("encode binary (pack_into)", lambda: frame.FRAME.pack_into(rx, 0, *values), n, len(binary))
+    bench("encode json", lambda: frame.encode_json(values), n, len(encoded_json))
+    bench("decode binary (memoryview)", lambda: frame.unpack_frame(view), n)
+    bench("decode binary -> dict", lambda: frame.decode(view), n)
+    bench("decode json -> dict", lambda: frame.decode(encoded_json), n)
+    bench("frame_values (normalize)", lambda: frame.frame_values(1, 0, 8450, 132, 4, 37.25, 44.4268, 26.1025), n)
+
+
+if __name__ == "__main__":
+    main()
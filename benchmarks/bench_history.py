@@ -0,0 +1,131 @@
+"""
+Checks and times utils/history.py. A synthetic ride (rpm, speed, gear, lean and a GPS
+that drops out now and then) is pushed at the display rate; along the way the rolling
+windows and ad-hoc means are compared with a brute-force scan of the same samples. Then,
+for several history lengths, times a push, a windowed query against a NumPy scan of the
+window, and a TraceWidget redraw (headless), which should not grow with the history.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_history --minutes 5
+Exits non-zero if a windowed result disagrees with the brute-force one.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from utils.history import History
+
+RATE_HZ = 60
+STEP_NS = 1_000_000_000 // RATE_HZ
+
+
+def sample(k):
+    t = k / RATE_HZ
+    rpm = 8000 + 5000 * math.sin(t / 3.0) + (k * 7919) % 300
+    lean = 50 * math.sin(t / 5.0)
+    fix = (k // RATE_HZ) % 20 != 0  # No fix for one second in every twenty
+    return (rpm, rpm / 100, 1 + int(t) % 6, lean, 45.0 + t * 1e-5 if fix else None, 9.0 if fix else None)
+
+
+def fill(capacity, count, windows=()):
+    history = History(capacity)
+    tracked = [history.window(channel, seconds) for channel, seconds in windows]
+    for k in range(count):
+        history.push(k * STEP_NS, sample(k))
+    return history, tracked
+
+
+def brute(history, channel, seconds):
+    t = history.times()
+    v = history.values(channel)
+    v = v[t >= t[-1] - int(seconds * 1e9)]
+    v = v[np.isfinite(v)]
+    if not len(v):
+        return None, None, None
+    return v.min(), v.max(), v.mean()
+
+
+def close(a, b):
+    return (a is None and b is None) or (a is not None and b is not None and abs(a - b) <= 1e-6 * max(1.0, abs(b)))
+
+
+def check():
+    errors = 0
+    windows = (("rpm", 10.0), ("lean_angle", 2.5), ("lat", 3.0), ("speed", 120.0))
+    history = History(RATE_HZ * 60)
+    tracked = [history.window(channel, seconds) for channel, seconds in windows]
+    # Past the capacity several times, so eviction and wrap-around are covered
+    for k in range(RATE_HZ * 60 * 3 + 17):
+        history.push(k * STEP_NS, sample(k))
+        if k % 997:
+            continue
+        for (channel, seconds), w in zip(windows, tracked):
+            lo, hi, mean = brute(history, channel, seconds)
+            got = (w.min(), w.max(), w.mean())
+            if not all(close(a, b) for a, b in zip(got, (lo, hi, mean))):
+                errors += 1
+                print(f"sample {k} {channel} {seconds} s: window {got}, scan {(lo, hi, mean)}")
+            if not close(history.mean(channel, seconds), mean) or \
+                    not all(close(a, b) for a, b in zip(history.extremes(channel, seconds), (lo, hi))):
+                errors += 1
+                print(f"sample {k} {channel} {seconds} s: ad-hoc query disagrees with the scan")
+    view = history.values("rpm", 100)
+    if view.base is None or not np.shares_memory(view, history.v):
+        errors += 1
+        print("values() returned a copy")
+    return errors
+
+
+def per_call_us(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def time_sizes(minutes_list, window_s):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from display.trace import TraceWidget
+    pygame.display.init()
+    screen = pygame.display.set_mode((800, 480))
+    print(f"{'history':>9} {'push':>10} {'window max':>11} {'window scan':>11} {'mean':>8} {'trace redraw':>13}")
+    for minutes in minutes_list:
+        count = int(minutes * 60 * RATE_HZ)
+        history, (peak,) = fill(max(count, 2), count, (("rpm", window_s),))
+        trace = TraceWidget((20, 340, 400, 120), history,
+                            (("rpm", 0, 16000, (255, 200, 0)), ("lean_angle", -60, 60, (0, 200, 255))))
+        k = [count]
+
+        def push():
+            history.push(k[0] * STEP_NS, sample(k[0]))
+            k[0] += 1
+
+        push_us = per_call_us(push, 2000)
+        window_us = per_call_us(peak.max, 20000)
+        scan_us = per_call_us(lambda: brute(history, "rpm", window_s), 200)
+        mean_us = per_call_us(lambda: history.mean("rpm", window_s), 20000)
+        trace_us = per_call_us(lambda: trace.render(screen), 500)
+        print(f"{minutes:7.1f} m {push_us:7.2f} us {window_us:8.3f} us {scan_us:8.1f} us {mean_us:5.2f} us "
+              f"{trace_us:10.1f} us")
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=5.0, help="longest history to time")
+    parser.add_argument("--window", type=float, default=10.0, help="seconds in the timed window")
+    args = parser.parse_args()
+    errors = check()
+    print(f"windowed queries vs scan: {errors} mismatches")
+    time_sizes([m for m in (0.5, 1.0, args.minutes / 2, args.minutes) if m <= args.minutes], args.window)
+    print("PASS" if not errors else "FAIL")
+    return 0 if not errors else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
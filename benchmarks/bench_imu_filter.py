@@ -0,0 +1,63 @@
+"""
+Offline check and cost of the IMU lean estimator. Feeds a synthetic coordinated
+right-hand corner (with gyro bias and noise) through ComplementaryLeanFilter and
+compares it with the old accelerometer-only atan2(y, z) lean. The road is level, so
+the fused pitch must stay near 0 through the corner, where yaw rate shows up on the
+leaned gyro's y axis. Then times the filter per sample to confirm it fits a 200-500 Hz
+sampling budget.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_imu_filter --rate 250 --max-lean 50
+Exits non-zero if the fused lean's RMS error exceeds --tolerance degrees or the pitch
+error ever exceeds --pitch-tolerance degrees.
+"""
+import argparse
+import math
+import sys
+import time
+
+from sensors.lean_estimator import ComplementaryLeanFilter, estimate_trace, synthetic_corner_trace
+
+
+def rms(errors):
+    return math.sqrt(sum(e * e for e in errors) / len(errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=250)
+    parser.add_argument("--speed", type=float, default=25.0, help="m/s through the corner")
+    parser.add_argument("--max-lean", type=float, default=45.0)
+    parser.add_argument("--tau", type=float, default=0.5)
+    parser.add_argument("--tolerance", type=float, default=2.0)
+    parser.add_argument("--pitch-tolerance", type=float, default=1.0)
+    args = parser.parse_args()
+
+    samples, truth = synthetic_corner_trace(rate_hz=args.rate, speed=args.speed, max_lean=args.max_lean)
+    trace = estimate_trace(samples, tau=args.tau)
+    fused = [lean for _, lean, _ in trace]
+    pitch = [p for _, _, p in trace]
+    no_speed = [lean for _, lean, _ in estimate_trace([(t, a, g, None) for t, a, g, _ in samples], tau=args.tau)]
+    accel_only = [math.degrees(math.atan2(a[1], a[2])) for _, a, _, _ in samples]
+
+    print(f"{len(samples)} samples at {args.rate} Hz, corner at {args.max_lean} deg / {args.speed} m/s")
+    for label, est in (("accel only (old)", accel_only), ("fused, no speed", no_speed), ("fused with speed", fused)):
+        errors = [e - t for e, t in zip(est, truth)]
+        print(f"  {label:<18} rms={rms(errors):6.2f} deg  max={max(abs(e) for e in errors):6.2f} deg")
+    print(f"  {'fused pitch':<18} rms={rms(pitch):6.2f} deg  max={max(abs(p) for p in pitch):6.2f} deg (true pitch 0)")
+
+    f = ComplementaryLeanFilter(tau=args.tau)
+    dt = 1.0 / args.rate
+    start = time.perf_counter()
+    for _, accel, gyro, speed in samples:
+        f.update(accel, gyro, dt, speed)
+    per_sample = (time.perf_counter() - start) / len(samples)
+    print(f"  filter cost {per_sample * 1e6:.1f} us/sample ({per_sample * args.rate * 100:.2f}% of one core at {args.rate} Hz)")
+
+    lean_ok = rms([e - t for e, t in zip(fused, truth)]) <= args.tolerance
+    pitch_ok = max(abs(p) for p in pitch) <= args.pitch_tolerance
+    return 0 if lean_ok and pitch_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+Replay check of the lap timing engine. Simulates laps of a synthetic oval (two straights
+joined by semicircles) with a different speed on every lap, samples the rider's position
+at the GPS rate with a random phase, and feeds the fixes through LapTimer. Lap times,
+checkpoint splits and the live delta-vs-best are compared against the exact values from
+the simulation, and the reference lap's grid lookup is timed against a linear scan.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_lap_timer --laps 6 --rate 10
+Exits non-zero if any lap or split is off by more than --tolerance seconds.
+"""
+import argparse
+import bisect
+import math
+import random
+import sys
+import time
+
+from display.trackmode.lap_timer import LapTimer
+from utils.helpers import LocalProjection, project_onto_segment
+
+ORIGIN = (48.2000, 11.6000)
+STRAIGHT = 400.0
+RADIUS = 80.0
+LENGTH = 2 * STRAIGHT + 2 * math.pi * RADIUS
+
+
+def track_xy(s):
+    """
+    Position in metres at distance s along the oval, starting mid-way along the
+    bottom straight and running anticlockwise.
+    """
+    s %= LENGTH
+    half = STRAIGHT / 2
+    arc = math.pi * RADIUS
+    if s < half:
+        return s, 0.0
+    s -= half
+    if s < arc:
+        a = s / RADIUS
+        return half + RADIUS * math.sin(a), RADIUS - RADIUS * math.cos(a)
+    s -= arc
+    if s < STRAIGHT:
+        return half - s, 2 * RADIUS
+    s -= STRAIGHT
+    if s < arc:
+        a = s / RADIUS
+        return -half - RADIUS * math.sin(a), RADIUS + RADIUS * math.cos(a)
+    s -= arc
+    return -half + s, 0.0
+
+
+def line_across(proj, s, width=30.0):
+    # A timing line perpendicular to the track at distance s
+    x0, y0 = track_xy(s - 0.5)
+    x1, y1 = track_xy(s + 0.5)
+    x, y = track_xy(s)
+    nx, ny = -(y1 - y0), x1 - x0
+    n = math.hypot(nx, ny)
+    nx, ny = nx / n * width / 2, ny / n * width / 2
+    return proj.to_latlon(x - nx, y - ny), proj.to_latlon(x + nx, y + ny)
+
+
+def simulate(laps, rate, noise, seed, dt=0.0005):
+    """
+    Returns (fixes, lap_times, splits, profiles): fixes as (t, lat, lon, lap, s, elapsed),
+    exact lap times, exact split at LENGTH / 2 per lap, and per-lap (distances, elapsed)
+    profiles for the true delta.
+    """
+    rng = random.Random(seed)
+    proj = LocalProjection(*ORIGIN)
+    factors = [1.0 + rng.uniform(-0.06, 0.06) for _ in range(laps)]
+    t = 0.0
+    s = -50.0  # roll in from before the line
+    lap = -1
+    lap_start = None
+    lap_times, splits, profiles = [], [], []
+    next_fix = rng.uniform(0, 1.0 / rate)
+    fixes = []
+    while lap < laps or t < lap_start + 1.0:
+        factor = factors[min(max(lap, 0), laps - 1)]
+        v = 40.0 * factor * (1.0 + 0.3 * math.sin(2 * math.pi * s / LENGTH))
+        prev_s, prev_t = s, t
+        s += v * dt
+        t += dt
+        if prev_s < 0.0 <= s:
+            tc = prev_t + (0.0 - prev_s) / (s - prev_s) * dt
+            if lap_start is not None:
+                lap_times.append(tc - lap_start)
+            lap += 1
+            lap_start = tc
+            if lap < laps:
+                profiles.append(([0.0], [0.0]))
+        if lap >= 0 and prev_s < LENGTH / 2 <= s:
+            tc = prev_t + (LENGTH / 2 - prev_s) / (s - prev_s) * dt
+            splits.append(tc - lap_start)
+        if s >= LENGTH:
+            s -= LENGTH
+            prev_s -= LENGTH
+            if prev_s < 0.0 <= s:
+                tc = prev_t + (0.0 - prev_s) / (s - prev_s) * dt
+                lap_times.append(tc - lap_start)
+                lap += 1
+                lap_start = tc
+                if lap < laps:
+                    profiles.append(([0.0], [0.0]))
+        if 0 <= lap < laps:
+            dist, el = profiles[lap]
+            if s > dist[-1]:
+                dist.append(s)
+                el.append(t - lap_start)
+        if t >= next_fix:
+            x, y = track_xy(s)
+            x += rng.gauss(0, noise)
+            y += rng.gauss(0, noise)
+            lat, lon = proj.to_latlon(x, y)
+            elapsed = t - lap_start if lap_start is not None else None
+            fixes.append((t, lat, lon, lap, s, elapsed))
+            next_fix += 1.0 / rate
+    return fixes, lap_times, splits, profiles
+
+
+def profile_elapsed(profile, s):
+    dist, el = profile
+    i = min(max(bisect.bisect_right(dist, s), 1), len(dist) - 1)
+    f = (s - dist[i - 1]) / (dist[i] - dist[i - 1])
+    return el[i - 1] + f * (el[i] - el[i - 1])
+
+
+def linear_locate(ref, x, y):
+    best = None
+    for a in range(len(ref.xy) - 1):
+        t, d2 = project_onto_segment((x, y), ref.xy[a], ref.xy[a + 1])
+        if best is None or d2 < best[0]:
+            best = (d2, a, t)
+    _, a, t = best
+    return ref.elapsed[a] + t * (ref.elapsed[a + 1] - ref.elapsed[a])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--laps", type=int, default=6)
+    parser.add_argument("--rate", type=float, default=10.0, help="GPS fix rate in Hz")
+    parser.add_argument("--noise", type=float, default=0.0, help="position noise in metres (1 sigma)")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.01, help="max lap/split error in seconds")
+    args = parser.parse_args()
+
+    proj = LocalProjection(*ORIGIN)
+    fixes, lap_times, splits, profiles = simulate(args.laps, args.rate, args.noise, args.seed)
+    timer = LapTimer(line_across(proj, 0.0), checkpoints=[("half", line_across(proj, LENGTH / 2))], min_lap_s=10)
+
+    measured_laps, measured_splits = [], []
+    delta_errors = []
+    best_lap = None
+    update_time = 0.0
+    for t, lat, lon, lap, s, elapsed in fixes:
+        start = time.perf_counter()
+        events = timer.update(t, lat, lon)
+        update_time += time.perf_counter() - start
+        for event in events:
+            if event.kind == 'lap_end':
+                measured_laps.append(event.elapsed)
+            elif event.kind == 'checkpoint':
+                measured_splits.append(event.elapsed)
+        # Skip fixes where noise puts the timer on the other side of the line than the simulation
+        if best_lap is not None and timer.lap == lap + 1 and lap < len(profiles) and timer.delta is not None:
+            true_delta = elapsed - profile_elapsed(profiles[best_lap], s)
+            delta_errors.append(timer.delta - true_delta)
+        if any(e.kind == 'lap_end' and e.best for e in events):
+            best_lap = lap - 1
+
+    print(f"{len(fixes)} fixes at {args.rate:g} Hz over {args.laps} laps of a {LENGTH:.0f} m oval, noise {args.noise:g} m")
+    lap_errors = [m - e for m, e in zip(measured_laps, lap_times)]
+    split_errors = [m - e for m, e in zip(measured_splits, splits)]
+    for i, (m, e) in enumerate(zip(measured_laps, lap_times), 1):
+        print(f"  lap {i}: {m:8.3f}s  exact {e:8.3f}s  error {(m - e) * 1000:+6.1f} ms")
+    ok = len(measured_laps) == len(lap_times) and len(measured_splits) == len(splits)
+    if not ok:
+        print(f"  detected {len(measured_laps)} laps / {len(measured_splits)} splits, expected {len(lap_times)} / {len(splits)}")
+    max_lap = max((abs(e) for e in lap_errors), default=0.0)
+    max_split = max((abs(e) for e in split_errors), default=0.0)
+    print(f"  max lap error {max_lap * 1000:.1f} ms, max split error {max_split * 1000:.1f} ms")
+    if delta_errors:
+        rms = math.sqrt(sum(e * e for e in delta_errors) / len(delta_errors))
+        print(f"  live delta vs exact: rms {rms * 1000:.1f} ms, max {max(abs(e) for e in delta_errors) * 1000:.1f} ms")
+    print(f"  update() {update_time / len(fixes) * 1e6:.1f} us/fix")
+
+    ref = timer.reference
+    if ref is not None:
+        points = [track_xy(random.uniform(0, LENGTH)) for _ in range(2000)]
+        start = time.perf_counter()
+        grid = [ref.locate(x, y)[1] for x, y in points]
+        grid_t = time.perf_counter() - start
+        start = time.perf_counter()
+        linear = [linear_locate(ref, x, y) for x, y in points]
+        linear_t = time.perf_counter() - start
+        # Around the finish line the start and end of the lap are equally near; treat those as equal
+        mismatch = max(min(abs(a - b), abs(ref.elapsed[-1] - abs(a - b))) for a, b in zip(grid, linear))
+        print(f"  reference lookup ({len(ref.xy)} points): grid {grid_t / len(points) * 1e6:.1f} us, "
+              f"linear scan {linear_t / len(points) * 1e6:.1f} us, max difference {mismatch * 1000:.2f} ms")
+
+    ok = ok and max_lap <= args.tolerance and max_split <= args.tolerance
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
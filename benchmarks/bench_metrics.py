@@ -0,0 +1,43 @@
+"""
+Cost of recording into and reading from the latency histograms (utils/metrics.py),
+and how close their percentiles are to the exact ones.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_metrics --iterations 200000
+"""
+import argparse
+import random
+import timeit
+
+from utils.metrics import Histogram
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    # Latencies in ns: mostly a few ms with an occasional long stall
+    samples = [int(random.lognormvariate(15, 0.6)) for _ in range(n)]
+    samples[::1000] = [random.randint(50_000_000, 200_000_000) for _ in samples[::1000]]
+
+    h = Histogram()
+    it = iter(samples)
+    seconds = timeit.timeit(lambda: h.record_ns(next(it)), number=n)
+    print(f"record_ns                 {seconds * 1e9 / n:8.0f} ns/sample")
+    seconds = min(timeit.repeat(h.summary, number=100, repeat=3))
+    print(f"summary                   {seconds * 1e6 / 100:8.0f} us")
+
+    exact = sorted(samples)
+    worst = 0.0
+    for q in (0.5, 0.9, 0.99, 0.999):
+        want = exact[min(n - 1, int(q * n))] / 1000
+        got = h.percentile(q)
+        worst = max(worst, abs(got - want) / want)
+        print(f"p{q * 100:<5g} exact {want / 1000:9.3f} ms  histogram {got / 1000:9.3f} ms")
+    print(f"worst relative error {worst * 100:.1f}%, {len(h.counts) * 8} bytes per histogram")
+
+
+if __name__ == "__main__":
+    main()
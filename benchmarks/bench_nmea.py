@@ -0,0 +1,122 @@
+"""
+NMEA parser throughput and correctness. Generates a large synthetic capture (RMC, VTG,
+GGA and GSA per epoch, like a receiver at 10-25 Hz, with a fraction of corrupted
+sentences), or reads a real one with --capture, and feeds it to NMEAParser in random
+chunk sizes as the serial port would deliver it. Then replays the same bytes through
+GPSReader with a file-like stream to check every fix is pushed to on_fix.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_nmea --epochs 100000
+    python3 -m benchmarks.bench_nmea --capture drive.nmea
+Exits non-zero if a synthetic capture does not yield exactly one fix per epoch.
+"""
+import argparse
+import io
+import math
+import random
+import sys
+import time
+
+from sensors.gps_reader import GPSReader
+from sensors.nmea import NMEAParser, sentence
+
+
+def _ddmm(value, width):
+    value = abs(value)
+    degrees = int(value)
+    return f"{degrees:0{width}d}{(value - degrees) * 60:07.4f}"
+
+
+def synthetic_capture(epochs, rate_hz=10, corrupt=0.001, seed=1):
+    """
+    Returns (capture bytes, list of (lat, lon) per epoch, number of corrupted sentences).
+    """
+    rng = random.Random(seed)
+    out = []
+    truth = []
+    corrupted = 0
+    lat0, lon0 = 48.2, 11.6
+    for i in range(epochs):
+        t = i / rate_hz
+        lat = lat0 + 0.004 * math.sin(t / 30)
+        lon = lon0 + 0.006 * math.cos(t / 30)
+        truth.append((lat, lon))
+        hh, rem = divmod(t, 3600)
+        mm, ss = divmod(rem, 60)
+        hms = f"{int(hh) % 24:02d}{int(mm):02d}{ss:05.2f}"
+        ns, ew = ('N' if lat >= 0 else 'S'), ('E' if lon >= 0 else 'W')
+        knots = 60 + 20 * math.sin(t / 7)
+        course = (t * 3) % 360
+        sentences = [
+            sentence(f"GNRMC,{hms},A,{_ddmm(lat, 2)},{ns},{_ddmm(lon, 3)},{ew},{knots:.2f},{course:.1f},170626,,,A"),
+            sentence(f"GNVTG,{course:.1f},T,,M,{knots:.2f},N,{knots * 1.852:.2f},K,A"),
+            sentence(f"GNGGA,{hms},{_ddmm(lat, 2)},{ns},{_ddmm(lon, 3)},{ew},1,12,0.8,512.3,M,47.0,M,,"),
+            sentence("GNGSA,A,3,01,03,06,09,12,17,19,22,,,,,1.4,0.8,1.1"),
+        ]
+        for s in sentences:
+            if rng.random() < corrupt:
+                s = s[:10] + b'X' + s[11:]
+                corrupted += 1
+            out.append(s)
+    return b''.join(out), truth, corrupted
+
+
+def chunks(data, rng, low=16, high=512):
+    i = 0
+    while i < len(data):
+        n = rng.randint(low, high)
+        yield data[i:i + n]
+        i += n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--epochs", type=int, default=100000)
+    parser.add_argument("--capture", help="parse a recorded NMEA file instead of a synthetic one")
+    parser.add_argument("--corrupt", type=float, default=0.001, help="fraction of synthetic sentences to corrupt")
+    args = parser.parse_args()
+
+    if args.capture:
+        with open(args.capture, 'rb') as f:
+            data = f.read()
+        truth, corrupted = None, 0
+    else:
+        data, truth, corrupted = synthetic_capture(args.epochs, corrupt=args.corrupt)
+    rng = random.Random(2)
+    pieces = list(chunks(data, rng))
+
+    nmea = NMEAParser()
+    fixes = []
+    start = time.perf_counter()
+    for piece in pieces:
+        fixes.extend(nmea.feed(piece, 0))
+    elapsed = time.perf_counter() - start
+    total = nmea.sentences + nmea.checksum_errors
+    print(f"{len(data) / 1e6:.1f} MB, {total} sentences in {len(pieces)} chunks")
+    print(f"  parse {elapsed:.2f}s: {total / elapsed:,.0f} sentences/s, {len(data) / elapsed / 1e6:.1f} MB/s, "
+          f"{elapsed / total * 1e6:.2f} us/sentence")
+    print(f"  fixes {len(fixes)}, checksum errors {nmea.checksum_errors}, parse errors {nmea.parse_errors}, "
+          f"unhandled {nmea.unknown}")
+    # A 25 Hz receiver sends ~100 sentences/s; report the CPU share that costs
+    print(f"  at 25 Hz x 4 sentences: {100 * elapsed / total * 100:.3f}% of one core")
+
+    ok = True
+    if truth is not None:
+        # An epoch only goes missing if both its RMC and GGA were corrupted
+        err = max(max(abs(f['lat'] - truth[i][0]), abs(f['lon'] - truth[i][1])) for i, f in enumerate(fixes[:1000]))
+        print(f"  corrupted {corrupted}, max position error over first 1000 fixes {err * 111e3:.3f} m")
+        ok = nmea.checksum_errors == corrupted and len(fixes) >= len(truth) - corrupted // 2 and err < 1e-5
+
+    received = []
+    start = time.perf_counter()
+    reader = GPSReader(stream=io.BufferedReader(io.BytesIO(data)), on_fix=received.append)
+    reader._thread.join()
+    elapsed = time.perf_counter() - start
+    print(f"  GPSReader replay: {len(received)} fixes pushed in {elapsed:.2f}s, stats {reader.get_stats()}")
+    reader.stop()
+    ok = ok and len(received) == len(fixes)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Checks display/pacing.py. Smoothing: a 10 Hz rpm signal stepping up and down is drawn
+at 60 fps (simulated time) raw, critically damped and interpolated; prints the largest
+jump between two frames and how far each trails the newest sample. Pacing: runs a
+FramePacer in real time through three phases: 10 Hz data (frames at the full rate), no
+data (the idle rate, with a sample injected near the end that must be drawn within a few
+ms), and one slow frame (missed slots counted as dropped, no burst of short frames after).
+
+Run from the repository root:
+    python3 -m benchmarks.bench_pacing
+Exits non-zero if the pacer misses any of those.
+"""
+import argparse
+import sys
+import threading
+import time
+
+from display.pacing import DAMP, INTERPOLATE, OFF, FramePacer, SmoothedValue
+
+FRAME_NS = 1_000_000_000 // 60
+SAMPLE_NS = 100_000_000
+
+
+def signal(t_ns):
+    # 10 Hz samples of a ramp between 4000 and 12000 rpm, 400 rpm per sample
+    k = t_ns // SAMPLE_NS
+    phase = k % 40
+    return 4000 + 400 * (phase if phase < 20 else 40 - phase)
+
+
+def smoothing(seconds=4.0):
+    print(f"{'mode':<12} {'max jump/frame':>15} {'mean behind':>12}")
+    for mode in (OFF, DAMP, INTERPOLATE):
+        value = SmoothedValue(mode, 0.08)
+        shown = None
+        max_jump = lag_sum = 0.0
+        frames = int(seconds * 1e9 / FRAME_NS)
+        for n in range(frames):
+            now = n * FRAME_NS
+            sample_ns = now // SAMPLE_NS * SAMPLE_NS
+            if now - sample_ns < FRAME_NS:
+                value.set(signal(sample_ns), sample_ns)
+            drawn = value.update(now)
+            if shown is not None:
+                max_jump = max(max_jump, abs(drawn - shown))
+            lag_sum += abs(signal(sample_ns) - drawn)
+            shown = drawn
+        print(f"{mode:<12} {max_jump:11.0f} rpm {lag_sum / frames:8.0f} rpm")
+
+
+def run_phase(pacer, seconds, data_hz=None, slow_frame_s=None, inject_at=None):
+    """
+    Runs the pacer for seconds; returns the frame start times, and the time a sample
+    injected from another thread inject_at seconds in was sent and reached a frame.
+    """
+    starts = []
+    end = time.monotonic_ns() + int(seconds * 1e9)
+    next_sample = time.monotonic_ns()
+    pending = [None]
+    seen_after = None
+
+    def inject():
+        pending[0] = time.monotonic_ns()
+
+    if inject_at is not None:
+        threading.Timer(inject_at, inject).start()
+    injected_at = None
+    while time.monotonic_ns() < end:
+        now = pacer.begin()
+        starts.append(now)
+        new_data = False
+        if data_hz and now >= next_sample:
+            new_data = True
+            next_sample += int(1e9 / data_hz)
+        if pending[0] is not None:
+            new_data = True
+            injected_at = pending[0]
+            seen_after = now - injected_at
+            pending[0] = None
+        if slow_frame_s and len(starts) == 10:
+            time.sleep(slow_frame_s)
+        pacer.end(new_data)
+        pacer.wait(lambda: pending[0] is not None)
+    return starts, injected_at, seen_after
+
+
+def pacing(fps, idle_fps):
+    failures = []
+    pacer = FramePacer(fps, idle_fps, idle_after_s=0.5, poll_s=0.005)
+
+    starts, _, _ = run_phase(pacer, 2.0, data_hz=10)
+    active_fps = (len(starts) - 1) * 1e9 / (starts[-1] - starts[0])
+    print(f"10 Hz data:   {active_fps:5.1f} fps, dropped {pacer.dropped}")
+    if active_fps < fps * 0.9:
+        failures.append("full frame rate not held with data arriving")
+
+    starts, injected_at, seen_after = run_phase(pacer, 2.5, inject_at=2.2)
+    # From once the pacer has gone idle to the injected sample
+    idle_starts = [t for t in starts if starts[0] + 700_000_000 < t < (injected_at or starts[-1])]
+    idle_rate = (len(idle_starts) - 1) * 1e9 / (idle_starts[-1] - idle_starts[0]) if len(idle_starts) > 1 else 0.0
+    print(f"static:       {idle_rate:5.1f} fps once idle, sample drawn after "
+          + (f"{seen_after / 1e6:.1f} ms" if seen_after is not None else "never"))
+    if idle_rate > idle_fps * 1.5:
+        failures.append("did not drop to the idle rate")
+    if seen_after is None or seen_after > 20_000_000:
+        failures.append("new data while idle was not drawn promptly")
+
+    dropped = pacer.dropped
+    starts, _, _ = run_phase(pacer, 1.0, data_hz=10, slow_frame_s=0.05)
+    intervals = [b - a for a, b in zip(starts, starts[1:])]
+    after = intervals[10:20]
+    burst = sum(1 for i in after if i < pacer.period_ns * 0.5)
+    print(f"slow frame:   dropped {pacer.dropped - dropped}, short frames after it {burst}, "
+          f"next intervals {' '.join(f'{i / 1e6:.1f}' for i in after[:5])} ms")
+    if pacer.dropped - dropped < 2:
+        failures.append("slow frame not counted as dropped")
+    if burst:
+        failures.append("catch-up burst after the slow frame")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--idle-fps", type=int, default=10)
+    args = parser.parse_args()
+    smoothing()
+    failures = pacing(args.fps, args.idle_fps)
+    for failure in failures:
+        print(f"  {failure}")
+    print("PASS" if not failures else "FAIL")
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Headless (SDL dummy driver) frame-time benchmark of the dashboard renderer.
+Compares the original full-screen redraw (SysFont per widget per frame + flip) with
+the cached widget layer that only pushes dirty rects, and measures RPM bar cost across
+the rpm range for the immediate-mode draw_rpm_bar versus the pre-rendered RpmGauge.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_render --frames 1200 --size 800x480 --change-every 6
+--change-every 6 mimics 10 Hz data at 60 FPS; use 1 to change values every frame.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import statistics
+import time
+
+import pygame
+
+from display.rpm_bar import draw_rpm_bar
+from display.rpm_gauge import RpmGauge
+from display.widgets import GearWidget, RpmBarWidget, SpeedWidget, WidgetLayer
+
+
+def legacy_frame(screen, rpm, speed, gear, max_rpm=16000):
+    # The renderer as it was before the widget layer
+    screen.fill((0, 0, 0))
+    x, y, width, height = 50, 100, 600, 40
+    pygame.draw.rect(screen, (50, 50, 50), (x, y, width, height), border_radius=8)
+    fill_width = int(width * min(rpm / max_rpm, 1.0))
+    if rpm < max_rpm * 0.7:
+        color = (0, 200, 0)
+    elif rpm < max_rpm * 0.9:
+        color = (255, 200, 0)
+    else:
+        color = (255, 0, 0)
+    pygame.draw.rect(screen, color, (x, y, fill_width, height), border_radius=8)
+    font = pygame.font.SysFont(None, 32)
+    screen.blit(font.render(f"RPM: {rpm}", True, (255, 255, 255)), (x + width + 20, y))
+    font = pygame.font.SysFont(None, 72, bold=True)
+    screen.blit(font.render(f"{speed} km/h", True, (0, 200, 255)), (50, 180))
+    pygame.draw.circle(screen, (30, 30, 30), (700, 100), 40)
+    font = pygame.font.SysFont(None, 80, bold=True)
+    text = font.render(str(gear), True, (255, 255, 0))
+    screen.blit(text, text.get_rect(center=(700, 100)))
+    pygame.display.flip()
+
+
+def make_widget_frame(screen):
+    rpm_widget, speed_widget, gear_widget = RpmBarWidget(), SpeedWidget(), GearWidget()
+    layer = WidgetLayer([rpm_widget, speed_widget, gear_widget])
+
+    def widget_frame(screen, rpm, speed, gear):
+        rpm_widget.set_value(rpm)
+        speed_widget.set_value(speed)
+        gear_widget.set_value(gear)
+        rects = layer.draw(screen)
+        if rects:
+            pygame.display.update(rects)
+    return widget_frame
+
+
+def sample(i, change_every):
+    step = i // change_every
+    rpm = 4000 + (step * 250) % 9000
+    speed = (step * 3) % 200
+    gear = 1 + (step // 8) % 6
+    return rpm, speed, gear
+
+
+def run(label, screen, draw, frames, change_every):
+    times = []
+    for i in range(frames):
+        start = time.perf_counter()
+        draw(screen, *sample(i, change_every))
+        times.append(time.perf_counter() - start)
+    report(label, times)
+    return times
+
+
+def report(label, times):
+    ms = sorted(t * 1000 for t in times)
+    mean = statistics.mean(ms)
+    print(f"{label:<28} mean={mean:6.3f} ms p50={ms[len(ms) // 2]:6.3f} p99={ms[int(len(ms) * 0.99) - 1]:6.3f} "
+          f"max={ms[-1]:6.3f}  ~{1000 / mean:6.0f} FPS uncapped")
+
+
+def rpm_sweep(screen, frames, max_rpm=16000, buckets=4):
+    """
+    Changes rpm every frame across the full range and reports mean cost per rpm bucket;
+    a flat profile means the cost is independent of rpm.
+    """
+    gauge = RpmGauge(max_rpm=max_rpm, redline_rpm=14000, shift_rpm=13000)
+    rect = gauge.rect
+
+    def immediate(rpm):
+        screen.fill((0, 0, 0), rect)
+        draw_rpm_bar(screen, rpm, max_rpm)
+
+    def sprite(rpm):
+        # Opaque widget: paints its whole rect, no clear needed
+        gauge.set_rpm(rpm, time.perf_counter())
+        gauge.render(screen)
+
+    for label, draw in (("rpm bar: draw_rpm_bar", immediate), ("rpm bar: RpmGauge sprites", sprite)):
+        per_bucket = [[] for _ in range(buckets)]
+        for i in range(frames):
+            rpm = (i * 37) % max_rpm
+            start = time.perf_counter()
+            draw(rpm)
+            per_bucket[rpm * buckets // max_rpm].append(time.perf_counter() - start)
+        cells = "  ".join(
+            f"{b * max_rpm // buckets:>5}-{(b + 1) * max_rpm // buckets:<5} {statistics.mean(t) * 1e6:6.1f} us"
+            for b, t in enumerate(per_bucket) if t
+        )
+        print(f"{label:<28} {cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=1200)
+    parser.add_argument("--size", default="800x480")
+    parser.add_argument("--change-every", type=int, default=6, help="frames between value changes")
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split("x"))
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode(size)
+    print(f"{size[0]}x{size[1]}, {args.frames} frames, values change every {args.change_every} frame(s)")
+    run("legacy full redraw", screen, legacy_frame, args.frames, args.change_every)
+    run("widget layer (dirty rects)", screen, make_widget_frame(screen), args.frames, args.change_every)
+    rpm_sweep(screen, args.frames * 4)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
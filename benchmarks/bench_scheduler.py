@@ -0,0 +1,159 @@
+"""
+Checks the acquisition scheduler (utils/scheduler.py) against the old
+"work, then asyncio.sleep(interval)" loops. Runs the same task mix as
+DataAcquisition (CAN 5 Hz, IMU 5 Hz, log 50 Hz, broadcast 10 Hz) with random work
+in every tick, plus a blocking reader on its own thread, and measures how far each
+tick starts from its ideal time t0 + n * period. Lateness is the mean of that offset
+(for the scheduler, the start lateness TaskStats reports): epoll's millisecond timer
+rounding alone makes it ~1 ms, and it does not build up. Drift is how much the offset
+grows over the run (median of the last 10% of ticks minus the first 10%): a
+sleep(interval) loop drifts by its work every tick. Then checks both overrun policies.
+tests/test_scheduler.py checks the same on a simulated clock.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_scheduler --seconds 60
+Exits non-zero if any scheduled task drifts by --max-drift-ms or more, or an overrun
+policy misbehaves.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from utils.scheduler import CATCH_UP, SKIP, Scheduler
+
+TASKS = (("can", 0.2), ("imu", 0.2), ("log", 0.02), ("broadcast", 0.1))
+
+
+def _work(max_ms):
+    # Busy work stands in for decoding/packing; it holds the loop like the real ticks do
+    end = time.perf_counter() + random.uniform(0, max_ms) / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+def _offsets_ms(starts, period):
+    t0 = starts[0]
+    return [(t - t0 - n * period * 1e9) / 1e6 for n, t in enumerate(starts)]
+
+
+def _drift_ms(offsets):
+    tenth = max(1, len(offsets) // 10)
+    # Medians, so one stray late tick does not read as drift
+    return statistics.median(offsets[-tenth:]) - statistics.median(offsets[:tenth])
+
+
+async def run_naive(seconds, work_ms):
+    starts = {name: [] for name, _ in TASKS}
+    stop = asyncio.Event()
+
+    async def loop(name, interval):
+        while not stop.is_set():
+            starts[name].append(time.monotonic_ns())
+            _work(work_ms)
+            await asyncio.sleep(interval)
+
+    tasks = [asyncio.create_task(loop(name, interval)) for name, interval in TASKS]
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return starts
+
+
+async def run_scheduled(seconds, work_ms):
+    starts = {name: [] for name, _ in TASKS}
+    delivered = []
+    stop = asyncio.Event()
+    scheduler = Scheduler()
+    for name, interval in TASKS:
+        def tick(name=name):
+            starts[name].append(time.monotonic_ns())
+            _work(work_ms)
+        scheduler.every(name, interval, tick)
+
+    def blocking_read():
+        starts["thread"].append(time.monotonic_ns())
+        time.sleep(random.uniform(0, 0.05))
+        return len(starts["thread"])
+
+    starts["thread"] = []
+    scheduler.every_in_thread("thread", 0.1, blocking_read, delivered.append)
+    asyncio.get_running_loop().call_later(seconds, stop.set)
+    await scheduler.run(stop)
+    return starts, scheduler.stats(), delivered
+
+
+async def check_policies():
+    """
+    A 10 ms task whose third tick stalls for 55 ms: SKIP must drop the missed ticks and
+    stay on the grid, CATCH_UP must run them all.
+    """
+    ok = True
+    for policy in (SKIP, CATCH_UP):
+        stop = asyncio.Event()
+        scheduler = Scheduler()
+        starts = []
+
+        def tick():
+            starts.append(time.monotonic_ns())
+            if len(starts) == 3:
+                time.sleep(0.055)
+
+        task = scheduler.every(policy, 0.01, tick, policy=policy)
+        asyncio.get_running_loop().call_later(0.2, stop.set)
+        await scheduler.run(stop)
+        stats = task.stats
+        # The 55 ms stall would shift a sleep(interval) loop by 5 ms against the 10 ms grid
+        offsets = [((t - starts[0]) / 1e6) % 10 for t in starts[4:]]
+        on_grid = statistics.fmean(min(o, 10 - o) for o in offsets) < 2.5
+        expected = stats.runs + stats.overruns
+        print(f"{policy:<9} runs {stats.runs:3d}  overruns {stats.overruns:2d}  on grid after stall: {on_grid}")
+        if policy == SKIP:
+            ok &= stats.overruns >= 4 and on_grid and abs(expected - 20) <= 2
+        else:
+            ok &= stats.overruns == 0 and abs(stats.runs - 20) <= 2
+    return ok
+
+
+def report(label, starts, period_by_name, stats=None):
+    """
+    Prints lateness and drift per task; returns the worst drift. Without the scheduler's
+    stats the first tick's start stands in for t0.
+    """
+    worst = 0.0
+    print(label)
+    for name, ticks in starts.items():
+        offsets = _offsets_ms(ticks, period_by_name[name])
+        drift = _drift_ms(offsets)
+        late = stats[name]['mean_late_us'] / 1000 if stats is not None else statistics.fmean(offsets)
+        worst = max(worst, abs(drift))
+        print(f"  {name:<10} ticks {len(ticks):5d}  late {late:9.3f} ms  drift {drift:9.3f} ms")
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--work-ms", type=float, default=3.0, help="max busy work per tick")
+    parser.add_argument("--max-drift-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    periods = dict(TASKS, thread=0.1)
+    report("sleep(interval) loops", asyncio.run(run_naive(args.seconds, args.work_ms)), periods)
+    starts, stats, delivered = asyncio.run(run_scheduled(args.seconds, args.work_ms))
+    worst = report("scheduler", starts, periods, stats)
+    for name, s in stats.items():
+        print(f"  {name:<10} achieved {s['achieved_hz']:6.1f}/{s['target_hz']:.1f} Hz  "
+              f"late mean {s['mean_late_us']:7.1f} us max {s['max_late_us']:8.1f} us  overruns {s['overruns']}")
+    print(f"  thread task delivered {len(delivered)} results to the loop")
+    policies_ok = asyncio.run(check_policies())
+    # The last result may still be in flight when the loop stops
+    ok = worst < args.max_drift_ms and policies_ok and len(starts["thread"]) - len(delivered) <= 1
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Session recorder and replay check. Records a synthetic ride (rpm/speed/gear CAN frames
+at 100 Hz each, 250 Hz raw IMU samples, 10 Hz GPS fixes) into a temporary session,
+reports the per-record cost on the producer side and the on-disk size with and without
+compression, reads it back and compares every record, then replays it through
+SessionReplay at max speed (twice, to check the fused IMU output is deterministic) and
+a short slice at real time and Nx to check pacing.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_session_log --seconds 600
+Exits non-zero if anything read back or replayed differs from what was recorded.
+"""
+import argparse
+import math
+import shutil
+import sys
+import tempfile
+import time
+
+from sensors.replay import SessionReplay
+from storage.session_log import REC_CAN, REC_GPS, REC_IMU, SessionRecorder, read_session
+
+
+def synthetic_ride(seconds):
+    """
+    Yields (kind, t_ns, payload) in time order, payloads in the shape record_*() takes.
+    """
+    events = []
+    t0 = 1_000_000_000
+    for i in range(int(seconds * 100)):
+        t = t0 + i * 10_000_000
+        rpm = int(8000 + 4000 * math.sin(i / 50))
+        events.append((t, REC_CAN, (0x100, rpm.to_bytes(2, 'big'))))
+        events.append((t + 1_000_000, REC_CAN, (0x101, bytes([int(100 + 60 * math.sin(i / 300))]))))
+        events.append((t + 2_000_000, REC_CAN, (0x102, bytes([1 + (i // 200) % 6]))))
+    for i in range(int(seconds * 250)):
+        phase = i / 250 / 5
+        events.append((t0 + i * 4_000_000, REC_IMU, (
+            (0.1, 9.8 * math.sin(phase) * 0.3, 9.8), (20 * math.cos(phase), 0.5, -8 * math.sin(phase)))))
+    for i in range(int(seconds * 10)):
+        epoch = 1_780_000_000 + i / 10
+        events.append((t0 + i * 100_000_000, REC_GPS, {
+            'lat': 48.2 + 0.001 * math.sin(i / 300), 'lon': 11.6 + 0.001 * math.cos(i / 300), 'alt': 512.0,
+            'speed': 30.0, 'track': 90.0, 'fix_time': epoch}))
+    events.sort(key=lambda e: e[0])
+    for t, kind, payload in events:
+        yield kind, t, payload
+
+
+def record(path, events, compress):
+    recorder = SessionRecorder(path, chunk_bytes=4 << 20, compress=compress, max_buffer=64 << 20)
+    start = time.perf_counter()
+    for kind, t_ns, payload in events:
+        if kind == REC_CAN:
+            recorder.record_can(t_ns, payload[0], payload[1])
+        elif kind == REC_IMU:
+            recorder.record_imu(t_ns, *payload)
+        else:
+            recorder.record_gps(t_ns, payload)
+    produce = time.perf_counter() - start
+    recorder.close()
+    return recorder, produce
+
+
+def same(recorded, read):
+    kind, t_ns, payload = recorded
+    rkind, rt_ns, rpayload = read
+    if kind != rkind or t_ns != rt_ns:
+        return False
+    if kind == REC_CAN:
+        return rpayload[0] == payload[0] and rpayload[2] == payload[1]
+    if kind == REC_IMU:
+        return all(abs(a - b) < 1e-4 for a, b in zip(payload[0] + payload[1], rpayload[0] + rpayload[1]))
+    return abs(rpayload['lat'] - payload['lat']) < 1e-12 and rpayload['fix_time'] is not None
+
+
+def replay(path, speed, limit_s=None):
+    fused = []
+    r = SessionReplay(path, speed=speed)
+    r.gps.on_fix = lambda fix: fused.append(r.imu.get_lean_angle())
+    start = time.perf_counter()
+    r.start()
+    r.wait(limit_s)
+    elapsed = time.perf_counter() - start
+    r.stop()
+    return r, fused, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=int, default=600, help="length of the synthetic ride")
+    parser.add_argument("--speed", type=float, default=5.0, help="Nx replay speed for the pacing check")
+    args = parser.parse_args()
+
+    events = list(synthetic_ride(args.seconds))
+    tmp = tempfile.mkdtemp(prefix="r3_session_")
+    ok = True
+    try:
+        print(f"{len(events)} records, {args.seconds}s ride")
+        for compress in (False, True):
+            path = f"{tmp}/{'zlib' if compress else 'raw'}"
+            recorder, produce = record(path, events, compress)
+            s = recorder.stats()
+            print(f"  {'zlib' if compress else 'raw ':<4}: record {produce / len(events) * 1e6:.2f} us/record, "
+                  f"{s['bytes_written'] / 1e6:.2f} MB on disk ({s['bytes_written'] / len(events):.1f} B/record, "
+                  f"{s['bytes_written'] / args.seconds / 1e3:.1f} kB/s of ride) in {s['chunks']} chunks, "
+                  f"dropped {s['dropped']}")
+            start = time.perf_counter()
+            read = list(read_session(path))
+            elapsed = time.perf_counter() - start
+            matches = len(read) == len(events) and all(same(a, b) for a, b in zip(events, read))
+            print(f"        read back {len(read)} records in {elapsed:.2f}s, identical: {matches}")
+            ok = ok and matches and s['dropped'] == 0
+
+        path = f"{tmp}/zlib"
+        r1, fused1, elapsed = replay(path, None)
+        r2, fused2, _ = replay(path, None)
+        print(f"  replay at max speed: {r1.records} records in {elapsed:.2f}s ({r1.records / elapsed:,.0f}/s, "
+              f"{args.seconds / elapsed:.0f}x real time)")
+        n_can = sum(1 for e in events if e[0] == REC_CAN)
+        frames = sum(s['frames'] for s in r1.can.get_stats()['ids'].values())
+        deterministic = fused1 == fused2 and len(fused1) == r1.gps.fixes
+        print(f"        CAN frames {frames}/{n_can}, GPS fixes {r1.gps.fixes}, IMU samples {r1.imu.samples}, "
+              f"fused lean identical across runs: {deterministic}")
+        ok = ok and frames == n_can and deterministic and r1.records == len(events)
+
+        short = f"{tmp}/short"
+        record(short, synthetic_ride(2), True)
+        for speed in (1.0, args.speed):
+            r, _, elapsed = replay(short, speed)
+            expected = 2.0 / speed
+            print(f"  replay 2s slice at {speed:g}x: took {elapsed:.3f}s (expected ~{expected:.3f}s), "
+                  f"max lag {r.lag_max_ms:.2f} ms")
+            ok = ok and abs(elapsed - expected) < 0.1 + 0.05 * expected
+    finally:
+        shutil.rmtree(tmp)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Checks that the display never sees fields from two different frames. A writer thread
+applies full frames, in which every field is derived from the same counter, as fast as
+it can; the main thread reads rpm, speed, gear and seq with some work in between, the
+way the render loop does, and counts reads where they disagree. Done once with the old
+shared dict, updated in place by utils/frame.apply(), and once with utils/state.py's
+StateStore, then times each side.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_state --seconds 3
+Exits non-zero if the state store produced a torn read.
+"""
+import argparse
+import sys
+import threading
+import time
+
+from utils import frame
+from utils.state import FrameState, StateStore
+
+
+def encoded(n):
+    return frame.pack_frame(n, time.monotonic_ns(), n % 16000, n % 300, n % 7, 0.0)
+
+
+def _draw():
+    # Stands in for the widget work the render loop does between reading one field and the next
+    x = 0
+    for i in range(200):
+        x += i
+    return x
+
+
+def consistent(seq, rpm, speed, gear):
+    return rpm == seq % 16000 and speed == seq % 300 and gear == seq % 7
+
+
+def run(kind, seconds):
+    frames = [encoded(n) for n in range(1, 4097)]
+    live = {"rpm": 0, "speed": 0, "gear": 0, "lean_angle": 0.0, "gps_lat": None, "gps_lon": None,
+            "timestamp": None, "seq": 0, "sampled": None}
+    store = StateStore(FrameState(seq=0, gear=0))
+    stop = threading.Event()
+    writes = [0]
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            buf = frames[i & 4095]
+            if kind == "dict":
+                frame.apply(buf, live)
+            else:
+                store.update(**frame.decode(buf))
+            i += 1
+        writes[0] = i
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    reads = torn = skipped = 0
+    last_version = None
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        if kind == "dict":
+            seq = live["seq"]
+            rpm = live["rpm"]
+            _draw()
+            speed = live["speed"]
+            _draw()
+            gear = live["gear"]
+        else:
+            snap = store.snapshot
+            if snap.version == last_version:
+                skipped += 1
+                continue
+            last_version = snap.version
+            seq = snap.seq
+            rpm = snap.rpm
+            _draw()
+            speed = snap.speed
+            _draw()
+            gear = snap.gear
+        reads += 1
+        if seq and not consistent(seq, rpm, speed, gear):
+            torn += 1
+    stop.set()
+    thread.join()
+    return reads, torn, skipped, writes[0]
+
+
+def time_ops(n=200_000):
+    buf = encoded(12345)
+    live = {}
+    store = StateStore(FrameState())
+    t = time.perf_counter()
+    for _ in range(n):
+        frame.apply(buf, live)
+    apply_us = (time.perf_counter() - t) / n * 1e6
+    t = time.perf_counter()
+    for _ in range(n):
+        store.update(**frame.decode(buf))
+    update_us = (time.perf_counter() - t) / n * 1e6
+    t = time.perf_counter()
+    for _ in range(n):
+        snap = store.snapshot
+        snap.rpm, snap.speed, snap.gear, snap.lean_angle
+    read_us = (time.perf_counter() - t) / n * 1e6
+    return apply_us, update_us, read_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    # A short switch interval makes the GIL hand over mid-update as often as it can
+    sys.setswitchinterval(1e-6)
+    results = {}
+    for kind in ("dict", "store"):
+        reads, torn, skipped, writes = run(kind, args.seconds)
+        results[kind] = torn
+        print(f"{kind:<6} writes {writes:9d}  reads {reads:9d}  torn {torn:7d}  skipped (same version) {skipped}")
+    sys.setswitchinterval(0.005)
+    apply_us, update_us, read_us = time_ops()
+    print(f"writer: dict apply {apply_us:.2f} us, store update {update_us:.2f} us per frame")
+    print(f"reader: snapshot + 4 fields {read_us:.3f} us")
+    ok = results["store"] == 0
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
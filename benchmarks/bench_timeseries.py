@@ -0,0 +1,138 @@
+"""
+Columnar ride history vs the sensor_data table. Builds a telemetry.db in a temporary
+directory holding several rides (50 Hz sensor rows with text timestamps, 10 Hz GPS),
+migrates it into a TimeSeriesStore, then times the same questions against both:
+a one-minute raw window from the middle of a ride, and a whole-season chart of
+per-minute max/mean rpm. Results are cross-checked against each other and against
+numpy over the raw rows.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_timeseries --rides 6 --minutes 60
+Exits non-zero if the store disagrees with SQLite or with its own raw data.
+"""
+import argparse
+import math
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from storage import sqlite_logger
+from storage.timeseries import NS, TimeSeriesStore, migrate_sqlite
+
+
+def build_db(path, rides, minutes, rate=50):
+    conn = sqlite_logger.get_connection(path)
+    sqlite_logger.create_tables(conn)
+    start = datetime(2024, 5, 1, 9, 0, tzinfo=timezone.utc)
+    n = 0
+    for ride in range(rides):
+        t0 = start + timedelta(days=ride * 3)
+        rows = []
+        gps = []
+        for i in range(minutes * 60 * rate):
+            t = t0 + timedelta(microseconds=i * 1_000_000 // rate)
+            phase = i / rate
+            rows.append((t.isoformat(), int(8000 + 4000 * math.sin(phase / 3)), int(100 + 50 * math.sin(phase / 20)),
+                         1 + int(phase / 5) % 6, 40 * math.sin(phase / 7)))
+            if i % (rate // 10) == 0:
+                gps.append((1, t.isoformat(), 48.2 + 0.001 * math.sin(phase / 60), 11.6 + 0.001 * math.cos(phase / 60)))
+        conn.executemany("INSERT INTO sensor_data (timestamp, rpm, speed, gear, lean_angle) VALUES (?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO gps_path (lap_id, timestamp, latitude, longitude) VALUES (?, ?, ?, ?)", gps)
+        n += len(rows)
+    conn.commit()
+    conn.close()
+    return n, start
+
+
+def du(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rides", type=int, default=6)
+    parser.add_argument("--minutes", type=int, default=60, help="length of each ride")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="r3_ts_")
+    ok = True
+    try:
+        db = os.path.join(tmp, "telemetry.db")
+        start = time.perf_counter()
+        rows, first = build_db(db, args.rides, args.minutes)
+        print(f"telemetry.db: {rows} sensor rows over {args.rides} rides, {du(db) / 1e6:.1f} MB "
+              f"(built in {time.perf_counter() - start:.1f}s)")
+
+        store = TimeSeriesStore(os.path.join(tmp, "ts"))
+        start = time.perf_counter()
+        sessions = migrate_sqlite(db, store)
+        elapsed = time.perf_counter() - start
+        print(f"  migrated into {len(sessions)} sessions in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s), "
+              f"store {du(store.root) / 1e6:.1f} MB")
+        ok = ok and len(sessions) == args.rides
+
+        # One raw minute from the middle of the middle ride
+        mid = args.rides // 2
+        w0 = first + timedelta(days=mid * 3, minutes=args.minutes // 2)
+        w1 = w0 + timedelta(minutes=1)
+        conn = sqlite3.connect(db)
+        sql_rows, sql_t = timed(lambda: conn.execute(
+            "SELECT timestamp, rpm FROM sensor_data WHERE timestamp BETWEEN ? AND ?",
+            (w0.isoformat(), w1.isoformat())).fetchall())
+        session = sessions[mid]
+        q0, q1 = int(w0.timestamp() * NS), int(w1.timestamp() * NS)
+        window, ts_t = timed(lambda: store.query(session, 'sensor', ['rpm'], q0, q1))
+        print(f"  1 min raw window: sqlite {sql_t * 1e3:.2f} ms ({len(sql_rows)} rows), "
+              f"store {ts_t * 1e3:.2f} ms ({len(window['t'])} rows)")
+        ok = ok and len(sql_rows) == len(window['t']) and np.array_equal([r[1] for r in sql_rows], window['rpm'])
+
+        # Per-minute max and mean rpm over the whole season
+        sql_chart, sql_t = timed(lambda: conn.execute(
+            "SELECT substr(timestamp, 1, 16) AS minute, MAX(rpm), AVG(rpm) FROM sensor_data GROUP BY minute ORDER BY minute"
+        ).fetchall(), repeat=1)
+        charts, ts_t = timed(lambda: [store.rollup(s, 'sensor', 'rpm', 60) for s in sessions])
+        buckets = sum(len(c['t']) for c in charts)
+        print(f"  season chart (1 min max/mean rpm): sqlite {sql_t * 1e3:.0f} ms ({len(sql_chart)} minutes), "
+              f"store {ts_t * 1e3:.2f} ms ({buckets} minutes)")
+        sql_max = np.array([r[1] for r in sql_chart], dtype='f8')
+        sql_mean = np.array([r[2] for r in sql_chart], dtype='f8')
+        ts_max = np.concatenate([c['max'] for c in charts])
+        ts_mean = np.concatenate([c['mean'] for c in charts])
+        ok = ok and buckets == len(sql_chart) and np.array_equal(sql_max, ts_max) and np.allclose(sql_mean, ts_mean)
+
+        # Rollups against numpy over the raw rows of one ride
+        raw = store.query(session, 'sensor', ['lean_angle'])
+        for level in (1, 10, 60):
+            r = store.rollup(session, 'sensor', 'lean_angle', level)
+            bucket = raw['t'] // (level * NS)
+            _, first_idx = np.unique(bucket, return_index=True)
+            expect_max = np.maximum.reduceat(raw['lean_angle'], first_idx)
+            good = len(r['t']) == len(first_idx) and np.allclose(r['max'], expect_max) and r['count'].sum() == len(raw['t'])
+            print(f"  {level:>2}s rollup of ride {mid}: {len(r['t'])} buckets, matches raw: {good}")
+            ok = ok and good
+        conn.close()
+    finally:
+        shutil.rmtree(tmp)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
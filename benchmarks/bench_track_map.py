@@ -0,0 +1,127 @@
+"""
+Headless (SDL dummy driver) benchmark of the track map. Generates a synthetic circuit
+(10 Hz fixes, a few metres of GPS noise), times the one-off set_track() (projection,
+Douglas-Peucker, pre-render) and checks the simplified lines stay within tolerance and
+under max_vertices, then compares per-frame cost as the session grows: TrackMapWidget
+(cached surface + bounded trail) against drawing the whole session path every frame.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_track_map --laps 40
+Exits non-zero if the simplification is out of bounds or the widget's frame cost grows
+with the session.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import math
+import random
+import statistics
+import sys
+import time
+
+import pygame
+
+from display.trackmode.track_map import TrackMapWidget
+from display.widgets import WidgetLayer
+from utils.helpers import project_onto_segment, simplify_polyline
+
+RECT = (440, 200, 340, 260)
+
+
+def circuit(laps, fixes_per_lap=900, noise_m=2.0, seed=1):
+    """
+    (lat, lon) fixes around a ~4 km circuit with a few kinks, laps times.
+    """
+    rng = random.Random(seed)
+    lat0, lon0 = 43.997, 11.371
+    points = []
+    for lap in range(laps):
+        for i in range(fixes_per_lap):
+            a = 2 * math.pi * i / fixes_per_lap
+            r = 600 + 120 * math.sin(3 * a) + 40 * math.sin(7 * a)
+            x = r * math.cos(a) + rng.gauss(0, noise_m)
+            y = 0.6 * r * math.sin(a) + rng.gauss(0, noise_m)
+            points.append((lat0 + y / 111195.0, lon0 + x / (111195.0 * math.cos(math.radians(lat0)))))
+    return points
+
+
+def max_deviation(original, simplified):
+    """
+    Largest distance from an original vertex to the simplified polyline.
+    """
+    worst = 0.0
+    for p in original:
+        worst = max(worst, min(project_onto_segment(p, a, b)[1] for a, b in zip(simplified, simplified[1:])))
+    return math.sqrt(worst)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--laps", type=int, default=40, help="session length in laps (900 fixes each)")
+    parser.add_argument("--max-vertices", type=int, default=400)
+    args = parser.parse_args()
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((800, 480))
+    ok = True
+
+    best = circuit(1, seed=2)
+    outline = circuit(5, seed=3)
+    widget = TrackMapWidget(RECT, max_vertices=args.max_vertices)
+    start = time.perf_counter()
+    widget.set_track(outline, best)
+    elapsed = time.perf_counter() - start
+    print(f"set_track: {len(outline)} outline + {len(best)} best-lap fixes -> "
+          f"{widget.vertices[0]} + {widget.vertices[1]} vertices in {elapsed * 1e3:.0f} ms")
+    ok = ok and max(widget.vertices) <= args.max_vertices
+
+    # Douglas-Peucker guarantee on the best lap in pixel space
+    px = [widget._to_px(*widget.projection.to_xy(lat, lon)) for lat, lon in best]
+    for eps in (0.5, 2.0):
+        simplified = simplify_polyline(px, eps)
+        dev = max_deviation(px, simplified)
+        print(f"  epsilon {eps} px: {len(px)} -> {len(simplified)} vertices, max deviation {dev:.3f} px")
+        ok = ok and dev <= eps + 1e-9
+
+    session = circuit(args.laps, seed=4)
+    layer = WidgetLayer([widget])
+    layer.draw(screen)
+    marks = [n for n in (1000, 5000, 10000, 20000, len(session)) if n <= len(session)]
+    widget_ms, naive_ms = {}, {}
+    path = []
+    seen = 0
+    for n in marks:
+        times_w, times_n = [], []
+        for k, (lat, lon) in enumerate(session[seen:n], seen):
+            t0 = time.perf_counter()
+            widget.set_position(lat, lon)
+            rects = layer.draw(screen)
+            if rects:
+                pygame.display.update(rects)
+            times_w.append(time.perf_counter() - t0)
+            path.append(widget._to_px(*widget.projection.to_xy(lat, lon)))
+            if k >= n - 200:
+                # Naive: redraw the whole session path every frame
+                t0 = time.perf_counter()
+                screen.fill((0, 0, 0), RECT)
+                pygame.draw.lines(screen, (255, 200, 0), False, path, 3)
+                pygame.display.update(pygame.Rect(RECT))
+                times_n.append(time.perf_counter() - t0)
+                widget.dirty = True  # the naive draw painted over the map
+        # Only the last 200 frames of each span, i.e. the cost at that session length
+        widget_ms[n] = statistics.mean(times_w[-200:]) * 1e3
+        naive_ms[n] = statistics.mean(times_n) * 1e3
+        seen = n
+        print(f"  after {n:>6} fixes: track map {widget_ms[n]:.3f} ms/frame, whole path redraw {naive_ms[n]:.3f} ms/frame")
+    growth = widget_ms[marks[-1]] / widget_ms[marks[0]]
+    print(f"  track map cost ratio last/first: {growth:.2f}, whole path: {naive_ms[marks[-1]] / naive_ms[marks[0]]:.2f}")
+    ok = ok and growth < 2.0
+    pygame.quit()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Compares end-to-end latency and CPU cost of the shared memory ring, the direct socket
+hub (utils/pubsub.py: binary frames sent straight to the display socket) and the
+original socket chain (JSON -> /tmp/dashboard.sock -> forwarder -> display socket).
+Also checks that the hub never blocks on a subscriber that stops reading.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_transport --samples 2000 --rate 100
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+from utils import frame
+from utils.pubsub import FrameHub
+from utils.shm_ring import ShmRingReader, ShmRingWriter
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _pace(start, i, period):
+    delay = start + i * period - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def _shm_writer(path, samples, period, ready, results):
+    cpu_start = _cpu_seconds()
+    ring = ShmRingWriter(path)
+    ready.wait()
+    start = time.monotonic()
+    for i in range(samples):
+        _pace(start, i, period)
+        ring.write_sample(i, time.monotonic_ns(), 8000 + i % 4000, 120, 4, 12.5, 45.0, 25.0)
+    results.put(("writer", _cpu_seconds() - cpu_start, None))
+    ring.close()
+
+
+def _shm_reader(path, samples, poll, ready, results):
+    cpu_start = _cpu_seconds()
+    ring = None
+    while ring is None:
+        ring = ShmRingReader.attach(path)
+    ready.set()
+    latencies = []
+    deadline = time.monotonic() + samples * 0.1 + 5
+    while len(latencies) < samples and time.monotonic() < deadline:
+        sample = ring.read_new()
+        if sample is not None:
+            latencies.append(time.monotonic_ns() - sample[4])
+        else:
+            time.sleep(poll)
+    results.put(("reader", _cpu_seconds() - cpu_start, latencies))
+
+
+def _sock_sender(src, samples, period, ready, results):
+    cpu_start = _cpu_seconds()
+    ready.wait()
+    start = time.monotonic()
+    for i in range(samples):
+        _pace(start, i, period)
+        msg = json.dumps({
+            "rpm": 8000 + i % 4000, "speed": 120, "gear": 4, "lean_angle": 12.5,
+            "gps_lat": 45.0, "gps_lon": 25.0, "timestamp": time.monotonic_ns()
+        })
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as s:
+            s.connect(src)
+            s.send(msg.encode())
+    results.put(("writer", _cpu_seconds() - cpu_start, None))
+
+
+def _sock_forwarder(src, dest, samples, ready, results):
+    cpu_start = _cpu_seconds()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(src)
+    sock.settimeout(5)
+    ready.set()
+    try:
+        for _ in range(samples):
+            data, _ = sock.recvfrom(1024)
+            if os.path.exists(dest):
+                with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as out:
+                    out.connect(dest)
+                    out.send(data)
+    except socket.timeout:
+        pass
+    results.put(("forwarder", _cpu_seconds() - cpu_start, None))
+
+
+def _sock_receiver(dest, samples, ready, results):
+    cpu_start = _cpu_seconds()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(dest)
+    sock.settimeout(5)
+    ready.set()
+    latencies = []
+    try:
+        while len(latencies) < samples:
+            data, _ = sock.recvfrom(1024)
+            msg = json.loads(data.decode())
+            latencies.append(time.monotonic_ns() - msg["timestamp"])
+    except socket.timeout:
+        pass
+    results.put(("reader", _cpu_seconds() - cpu_start, latencies))
+
+
+def _hub_sender(hub_path, dest, samples, period, ready, results):
+    cpu_start = _cpu_seconds()
+    hub = FrameHub(hub_path, subscribers=[dest])
+    ready.wait()
+    start = time.monotonic()
+    for i in range(samples):
+        _pace(start, i, period)
+        hub.publish(frame.pack_frame(i, time.monotonic_ns(), 8000 + i % 4000, 120, 4, 12.5, 45.0, 25.0))
+    results.put(("writer", _cpu_seconds() - cpu_start, None))
+    hub.close()
+
+
+def _hub_receiver(dest, samples, ready, results):
+    cpu_start = _cpu_seconds()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(dest)
+    sock.settimeout(5)
+    ready.set()
+    latencies = []
+    rx = bytearray(frame.MAX_MESSAGE_SIZE)
+    view = memoryview(rx)
+    try:
+        while len(latencies) < samples:
+            nbytes = sock.recv_into(rx)
+            latencies.append(time.monotonic_ns() - frame.unpack_frame(view[:nbytes])[4])
+    except socket.timeout:
+        pass
+    results.put(("reader", _cpu_seconds() - cpu_start, latencies))
+
+
+def _collect(procs, results):
+    for p in procs:
+        p.start()
+    out = {}
+    for _ in procs:
+        name, cpu, latencies = results.get()
+        out[name] = (cpu, latencies)
+    for p in procs:
+        p.join()
+    return out
+
+
+def run_shm(tmp, samples, rate, poll):
+    path = os.path.join(tmp, "ring")
+    ready = mp.Event()
+    results = mp.Queue()
+    ShmRingWriter(path).close()
+    procs = [
+        mp.Process(target=_shm_writer, args=(path, samples, 1.0 / rate, ready, results)),
+        mp.Process(target=_shm_reader, args=(path, samples, poll, ready, results)),
+    ]
+    return _collect(procs, results)
+
+
+def run_socket(tmp, samples, rate):
+    src = os.path.join(tmp, "dashboard.sock")
+    dest = os.path.join(tmp, "dashboard_display.sock")
+    fwd_ready, recv_ready = mp.Event(), mp.Event()
+    results = mp.Queue()
+    procs = [
+        mp.Process(target=_sock_receiver, args=(dest, samples, recv_ready, results)),
+        mp.Process(target=_sock_forwarder, args=(src, dest, samples, fwd_ready, results)),
+    ]
+    for p in procs:
+        p.start()
+    recv_ready.wait()
+    fwd_ready.wait()
+    go = mp.Event()
+    go.set()
+    sender = mp.Process(target=_sock_sender, args=(src, samples, 1.0 / rate, go, results))
+    sender.start()
+    out = {}
+    for _ in range(3):
+        name, cpu, latencies = results.get()
+        out[name] = (cpu, latencies)
+    for p in procs + [sender]:
+        p.join()
+    return out
+
+
+def run_hub(tmp, samples, rate):
+    dest = os.path.join(tmp, "hub_display.sock")
+    ready = mp.Event()
+    results = mp.Queue()
+    procs = [
+        mp.Process(target=_hub_receiver, args=(dest, samples, ready, results)),
+        mp.Process(target=_hub_sender, args=(os.path.join(tmp, "hub.sock"), dest, samples, 1.0 / rate, ready, results)),
+    ]
+    return _collect(procs, results)
+
+
+def stalled_subscriber(tmp, frames=2000):
+    """
+    Publishes to a bound socket nobody reads: every publish must return immediately and
+    the overflow must show up as drops.
+    """
+    dest = os.path.join(tmp, "stalled.sock")
+    stalled = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    stalled.bind(dest)
+    hub = FrameHub(os.path.join(tmp, "hub2.sock"), subscribers=[dest])
+    msg = frame.pack_frame(0, 0, 8000, 120, 4, 12.5)
+    worst = 0.0
+    for _ in range(frames):
+        start = time.perf_counter()
+        hub.publish(msg)
+        worst = max(worst, time.perf_counter() - start)
+    stats = hub.stats()[dest]
+    print(f"stalled subscriber: {stats['sent']} queued, {stats['dropped']} dropped of {frames}, "
+          f"slowest publish {worst * 1e6:.0f} us")
+    hub.close()
+    stalled.close()
+    return stats['sent'] + stats['dropped'] == frames and stats['dropped'] > 0
+
+
+def report(name, out, samples):
+    latencies = sorted(out["reader"][1])
+    cpu = {k: v[0] for k, v in out.items()}
+    print(f"{name}:")
+    if latencies:
+        us = [x / 1000.0 for x in latencies]
+        print(f"  delivered   {len(us)}/{samples}")
+        print(f"  latency us  mean={statistics.mean(us):.1f} p50={us[len(us) // 2]:.1f} "
+              f"p99={us[int(len(us) * 0.99) - 1]:.1f} max={us[-1]:.1f}")
+    else:
+        print("  no samples delivered")
+    for proc, seconds in sorted(cpu.items()):
+        print(f"  cpu {proc:<10} {seconds * 1000:.1f} ms ({seconds * 1e6 / samples:.1f} us/sample)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=100.0, help="samples per second")
+    parser.add_argument("--poll", type=float, default=0.001, help="shm reader poll interval in seconds")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        report("shared memory ring", run_shm(tmp, args.samples, args.rate, args.poll), args.samples)
+        report("socket hub (direct)", run_hub(tmp, args.samples, args.rate), args.samples)
+        report("socket chain (json + forwarder)", run_socket(tmp, args.samples, args.rate), args.samples)
+        ok = stalled_subscriber(tmp)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,19 +6,123 @@ CONFIG = {
     "can_speed_id": 0x101,
     "can_gear_id": 0x102,
     "can_poll_interval_ms": 200,
+    "can_mode": "notifier",  # "notifier" (event-driven, every frame updates state) or "poll"
+    # Signal table (see sensors/can_signals.py). Either a DBC file, or a list of dicts such as
+    # {"name": "coolant", "can_id": 0x200, "start_bit": 0, "length": 8, "byte_order": "little", "offset": -40}.
+    # Add "extended": True for a 29-bit ID at or below 0x7FF. When both are unset, rpm/speed/gear
+    # are decoded from the IDs above.
+    "can_dbc_file": None,
+    "can_signals": None,
     "can_enabled": False,  # Disable CAN for WSL/dev
 
     # IMU (MPU6050) settings
     "mpu_address": 0x68,
     "imu_poll_interval_ms": 200,
+    "imu_sample_rate_hz": 250,  # Dedicated sampler thread rate (200-500 Hz)
+    "imu_decimation": 5,  # Publish every Nth fused sample (250 Hz / 5 = 50 Hz)
+    "imu_filter_tau_s": 0.5,  # Complementary filter time constant (gyro vs reference)
     "imu_enabled": False,  # Disable IMU for WSL/dev
 
     # GPS settings
     "gps_device": "/dev/serial0",
-    "gps_poll_interval_ms": 1000,
+    "gps_backend": "nmea",  # "nmea" (read the serial device directly) or "gpsd"
+    "gps_baudrate": 9600,  # Receiver's power-on baud rate
+    "gps_rate_hz": 10,  # Fix rate requested from the receiver (10-25 Hz), needs gps_chipset
+    "gps_chipset": None,  # "ublox" or "mtk" to send rate/baud commands; None leaves the receiver as is
+    "gps_rate_baudrate": 115200,  # Baud rate switched to before raising the fix rate
+    "gps_poll_interval_ms": 100,  # Fixes are pushed as they arrive; this only bounds the shutdown wait
+    "scheduler_stagger_ms": 5,  # Offset between the acquisition tasks' tick grids, so they are not all due at once
+
+    # Track / lap timing settings
+    "track_name": None,
+    "track_start_line": None,  # ((lat1, lon1), (lat2, lon2)); lap timing is off while unset
+    "track_checkpoints": [],  # [("name", ((lat1, lon1), (lat2, lon2))), ...] in the order they are crossed
+    "lap_min_time_s": 20,  # Start/finish crossings sooner than this after the lap start are ignored
 
     # Logging settings
     "logging_enabled": True,
+    "log_interval_ms": 20,  # Sample rate of the sensor_data log (50 Hz)
+    "log_flush_size": 100,  # Rows per executemany batch
+    "log_flush_interval_ms": 1000,  # Max time a row waits in memory before being written
+    "log_queue_size": 5000,  # Rows buffered before new samples are dropped
+    "log_backend": "both",  # Sensor samples go to "sqlite" (sensor_data table), "timeseries" (storage/timeseries.py) or "both"
+    "ts_root": "data/timeseries",  # Columnar ride history: one directory per session plus index.db
+    "ts_chunk_rows": 65536,  # Rows per sealed chunk (~22 min at 50 Hz)
+
+    # Session recording / replay
+    "record_enabled": False,  # Capture raw CAN frames, IMU samples and GPS fixes (storage/session_log.py)
+    "record_dir": "sessions",  # One subdirectory per run
+    "record_chunk_mb": 16,  # Start a new chunk file after this many MB
+    "record_compress": True,  # zlib-compress each block
+    "replay_path": None,  # Session directory to replay instead of reading the sensors
+    "replay_speed": 1.0,  # 1.0 = real time, N = N x faster, 0 = as fast as possible
+    "replay_loop": False,
+
+    # Display settings
+    "display_fps": 60,
+    "display_idle_fps": 10,  # Frame rate once nothing on screen has changed for display_idle_after_s
+    "display_idle_after_s": 0.5,
+    "display_vsync": False,  # Present on vblank (needs pygame's SCALED renderer); otherwise frames are timed on the clock
+    "gauge_smoothing": "damp",  # rpm/speed between samples: "damp" (critically damped), "interpolate" (one sample late) or "off"
+    "gauge_smooth_time_s": 0.08,  # Damping time constant
+    "show_fps": True,
+    "rpm_max": 16000,
+    "rpm_style": "gradient",  # "gradient" (colour by bar position) or "bands" (whole bar takes the current band colour)
+    "rpm_gradient_stops": [(0.0, (0, 200, 0)), (0.7, (255, 200, 0)), (0.9, (255, 0, 0))],
+    "rpm_redline": 14000,  # Marker drawn on the bar background
+    "rpm_shift_light": 13000,  # Bar flashes at or above this rpm (None disables)
+    "rpm_shift_flash_hz": 8,
+    "rpm_peak_hold_s": 1.5,
+    "track_map_enabled": True,  # Track map with position and trail (M toggles it); drawn from the logged best lap
+    "track_map_rect": (440, 200, 340, 260),
+    "track_map_max_vertices": 400,  # Per polyline, after Douglas-Peucker simplification
+    "track_map_trail": 50,  # Recent positions drawn behind the marker
+    "history_seconds": 300,  # In-memory history of rpm/speed/gear/lean/lat/lon kept by the display (utils/history.py)
+    "trace_enabled": True,  # Live rpm/lean trace drawn from the history (R toggles it)
+    "trace_rect": (20, 340, 400, 120),
+    "trace_seconds": 10,  # Time span across the trace
+    "trace_lean_max": 60,  # Lean angle (degrees either way) at the top/bottom edge of the trace
+
+    # Transport between acquisition and display
+    "transport": "shm",  # "shm" (shared memory ring) or "socket" (Unix datagram fallback)
+    "shm_path": "/dev/shm/r3_dashboard",
+    "shm_slots": 16,
+    "broadcast_mode": "change",  # "change" (publish on sensor updates, deltas + keyframes) or "periodic"
+    "broadcast_max_hz": {"can": 60, "imu": 30, "gps": 25},  # Per-channel publish rate cap in change mode
+    "keyframe_interval_ms": 1000,  # Full frame for late-joining subscribers in change mode
+    "broadcast_interval_ms": 100,  # Full frame rate in periodic mode (10 Hz)
+    "wire_format": "binary",  # "binary" frames (utils/frame.py) or "json" for human-readable debugging
+    "hub_socket": "/tmp/dashboard.sock",  # Subscribers send b"SUB" here to receive frames (utils/pubsub.py)
+    "display_socket": "/tmp/dashboard_display.sock",
+    "debug_socket": "/tmp/dashboard_debug.sock",
+    "hub_retry_s": 1.0,  # Reconnect interval for a configured subscriber whose socket is missing
+    "hub_max_full": 100,  # Consecutive frames a runtime subscriber may miss before it is dropped
+
+    # Latency metrics (utils/metrics.py); query with python3 -m utils.metrics <socket>
+    "metrics_enabled": True,
+    "metrics_socket": "/tmp/r3_metrics.sock",  # data_acquisition: CAN handling, sample age, broadcast jitter
+    "display_metrics_socket": "/tmp/r3_display_metrics.sock",  # display_gui: transport, sensor-to-glass, render
+
+    # Process supervisor (supervisor.py): one process per service. cpus is the sched_setaffinity
+    # CPU list, nice -20..19, fifo_priority 1-99 for SCHED_FIFO (needs root / CAP_SYS_NICE) or None.
+    # Core 0 is left to the kernel and interrupts. With the storage process enabled (and the shm
+    # transport), the sensor log runs there instead of in acquisition.
+    "processes": {
+        "acquisition": {"enabled": True, "cpus": [1], "nice": -5, "fifo_priority": None},
+        "storage": {"enabled": True, "cpus": [3], "nice": 10, "fifo_priority": None},
+        "display": {"enabled": True, "cpus": [2], "nice": -5, "fifo_priority": None},
+    },
+    "restart_backoff_s": 1.0,  # Delay before restarting a crashed child, doubling per crash
+    "restart_backoff_max_s": 30.0,
+    "stop_timeout_s": 5.0,  # Per child on shutdown, before it is killed
+
+    # Cold boot: with fast_boot, acquisition brings up the transport, CAN and IMU first and starts
+    # GPS, logging and the stats socket only after the first frame with rpm is published; the
+    # display opens its stats socket and loads the track map after its first frame is drawn
+    "fast_boot": True,
+    "boot_defer_timeout_s": 2.0,  # Start the deferred subsystems anyway if no rpm arrives by then
+    "boot_schema_timeout_s": 5.0,  # Max wait for the SQLite schema before GPS (and lap logging) starts
+    "startup_report": None,  # Append each process's startup phase timings here as JSON lines
 
     # Debug settings
     "debug_socket_enabled": False,  # Enable/disable sending to dashboard_debug.sock
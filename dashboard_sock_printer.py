@@ -1,16 +1,44 @@
 import socket
 import os
+import time
+from config import CONFIG
+from utils.shm_ring import ShmRingReader
+from utils import frame
+from utils.pubsub import subscribe
 
-SOCKET_PATH = "/tmp/dashboard_debug.sock"
+SOCKET_PATH = CONFIG.get("debug_socket", "/tmp/dashboard_debug.sock")
+HUB_PATH = CONFIG.get("hub_socket", "/tmp/dashboard.sock")
+
+ring = ShmRingReader.attach(CONFIG.get("shm_path", "/dev/shm/r3_dashboard")) if CONFIG.get("transport", "shm") == "shm" else None
+
+if ring is not None:
+    print(f"Reading samples from shared memory ring {CONFIG.get('shm_path', '/dev/shm/r3_dashboard')}...")
+    while True:
+        sample = ring.read_new()
+        if sample is not None:
+            print(frame.frame_to_dict(sample))
+        time.sleep(0.01)
 
 if os.path.exists(SOCKET_PATH):
     os.remove(SOCKET_PATH)
 
 sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
 sock.bind(SOCKET_PATH)
+sock.settimeout(2.0)
 
 print(f"Listening for messages on {SOCKET_PATH}...")
 
+# Ask the acquisition hub for frames, and again whenever they stop (e.g. it restarted)
+subscribe(sock, HUB_PATH)
+rx = bytearray(frame.MAX_MESSAGE_SIZE)
+view = memoryview(rx)
 while True:
-    data, _ = sock.recvfrom(1024)
-    print(data.decode())
\ No newline at end of file
+    try:
+        nbytes = sock.recv_into(rx)
+    except socket.timeout:
+        subscribe(sock, HUB_PATH)
+        continue
+    try:
+        print(frame.decode(view[:nbytes]))
+    except ValueError as e:
+        print(f"Undecodable message ({nbytes} bytes): {e}")
\ No newline at end of file
@@ -1,13 +1,26 @@
 import asyncio
-import socket
-import json
+import os
+import threading
 import time
 import random
-from sensors.can_reader import CANReader
-from sensors.imu_reader import IMUReader
+from datetime import datetime, timezone
+from sensors.can_signals import load_signals
+from sensors.imu_sampler import IMUSampler
 from sensors.gps_reader import GPSReader
 from config import CONFIG
+from storage.sqlite_writer import SQLiteWriter
 from storage import sqlite_logger
+from display.trackmode.lap_timer import LapTimer
+from utils.shm_ring import ShmRingWriter
+from utils.pubsub import FrameHub, Coalescer
+from utils.metrics import Metrics, StatsServer
+from utils.scheduler import Scheduler
+from utils.startup import StartupProfile
+from utils.state import CanState, GpsState, ImuState, LapState, SensorSnapshot, StateStore
+from utils import frame
+from utils.helpers import parse_fix_time
+# Hardware drivers (python-can, mpu6050), the replay/recording stack and numpy (time-series
+# store) are imported where they are used, so a cold boot only loads the enabled backends
 
 class MockCANReader:
     def __init__(self):
@@ -46,11 +59,16 @@ class MockCANReader:
             'gear': self.gear
         }
 
+    def stop(self):
+        pass
+
 class MockIMUReader:
     def get_accel_data(self):
         return {'x': 0.0, 'y': 0.0, 'z': 9.8}
     def get_gyro_data(self):
         return {'x': 0.0, 'y': 0.0, 'z': 0.0}
+    def read_burst(self):
+        return (0.0, 0.0, 9.8), (0.0, 0.0, 0.0)
     def get_lean_angle(self):
         return 0.0
     def get_all_data(self):
@@ -59,158 +77,489 @@ class MockIMUReader:
             'acceleration': self.get_accel_data(),
             'gyroscope': self.get_gyro_data()
         }
+    def stop(self):
+        pass
 
 class DataAcquisition:
-    def __init__(self):
-        if CONFIG.get("can_enabled", True):
-            self.can_reader = CANReader(
-                channel=CONFIG["can_interface"],
-                bitrate=CONFIG["can_bitrate"],
-                rpm_id=CONFIG["can_rpm_id"],
-                speed_id=CONFIG["can_speed_id"],
-                gear_id=CONFIG["can_gear_id"]
+    def __init__(self, log_sensors=True, ts_session=None, profile=None):
+        """
+        log_sensors=False leaves the high-rate sensor log to a separate process reading the
+        shm ring (storage/ring_logger.py, started by supervisor.py); GPS points and laps are
+        still logged here. ts_session continues an existing time-series session. profile
+        collects the startup phase timings (utils/startup.py).
+        """
+        self.profile = profile or StartupProfile("acquisition")
+        # Latest record of every channel, replaced (never mutated) on each update; readers on
+        # other threads (the IMU sampler's speed source) take one consistent snapshot
+        self.state = StateStore(SensorSnapshot())
+        self.replay = None
+        self.gps_reader = None
+        with self.profile.phase("sensors"):
+            if CONFIG.get("replay_path"):
+                from sensors.replay import SessionReplay
+                # Recorded session stands in for all three readers (see sensors/replay.py)
+                self.replay = SessionReplay(
+                    CONFIG["replay_path"],
+                    speed=CONFIG.get("replay_speed", 1.0),
+                    loop=CONFIG.get("replay_loop", False),
+                    signals=load_signals(CONFIG),
+                    decimation=CONFIG.get("imu_decimation", 5),
+                    tau=CONFIG.get("imu_filter_tau_s", 0.5)
+                )
+                self.can_blocking = False
+                self.can_reader = self.replay.can
+                self.imu_reader = self.replay.imu
+                self.gps_reader = self.replay.gps
+            else:
+                self.can_blocking = False
+                if CONFIG.get("can_enabled", True):
+                    from sensors.can_reader import CANReader
+                    self.can_reader = CANReader(
+                        channel=CONFIG["can_interface"],
+                        bitrate=CONFIG["can_bitrate"],
+                        rpm_id=CONFIG["can_rpm_id"],
+                        speed_id=CONFIG["can_speed_id"],
+                        gear_id=CONFIG["can_gear_id"],
+                        signals=load_signals(CONFIG)
+                    )
+                    if CONFIG.get("can_mode", "notifier") == "notifier":
+                        self.can_reader.start_listener()
+                    else:
+                        # read_can_data() waits on the bus, so it gets its own thread
+                        self.can_blocking = True
+                else:
+                    self.can_reader = MockCANReader()
+                if CONFIG.get("imu_enabled", True):
+                    from sensors.imu_reader import IMUReader
+                    # High-rate fused sampling on its own thread; the imu task only picks up the decimated output
+                    self.imu_reader = IMUSampler(
+                        IMUReader(address=CONFIG["mpu_address"]),
+                        rate_hz=CONFIG.get("imu_sample_rate_hz", 250),
+                        decimation=CONFIG.get("imu_decimation", 5),
+                        tau=CONFIG.get("imu_filter_tau_s", 0.5),
+                        speed_source=self._speed_ms
+                    )
+                else:
+                    self.imu_reader = MockIMUReader()
+        self.recorder = None
+        if CONFIG.get("record_enabled", False) and self.replay is None:
+            from storage.session_log import SessionRecorder
+            path = os.path.join(CONFIG.get("record_dir", "sessions"), datetime.now().strftime("%Y%m%d-%H%M%S"))
+            self.recorder = SessionRecorder(
+                path,
+                chunk_bytes=CONFIG.get("record_chunk_mb", 16) << 20,
+                compress=CONFIG.get("record_compress", True)
+            )
+            for reader in (self.can_reader, self.imu_reader):
+                # The mock readers produce no raw input worth keeping
+                if hasattr(reader, 'recorder'):
+                    reader.recorder = self.recorder
+            print(f"Recording session to {path}")
+        self._seq = 0
+        self.ring = None
+        with self.profile.phase("transport"):
+            if CONFIG.get("transport", "shm") == "shm":
+                try:
+                    self.ring = ShmRingWriter(CONFIG.get("shm_path", "/dev/shm/r3_dashboard"), slots=CONFIG.get("shm_slots", 16))
+                except OSError as e:
+                    print(f"Shared memory ring unavailable, falling back to socket transport: {e}")
+            # The display and debug sockets are fed directly when there is no ring; other
+            # processes can always subscribe at runtime (see utils/pubsub.py)
+            static = []
+            if self.ring is None:
+                static.append(CONFIG.get("display_socket", "/tmp/dashboard_display.sock"))
+                if CONFIG.get("debug_socket_enabled", False):
+                    static.append(CONFIG.get("debug_socket", "/tmp/dashboard_debug.sock"))
+            self.hub = FrameHub(
+                CONFIG.get("hub_socket", "/tmp/dashboard.sock"),
+                subscribers=static,
+                retry_s=CONFIG.get("hub_retry_s", 1.0),
+                max_full=CONFIG.get("hub_max_full", 100)
+            )
+        # Per-stage latency histograms, served on metrics_socket (python3 -m utils.metrics)
+        self.metrics = Metrics()
+        if hasattr(self.can_reader, 'metrics'):
+            self.can_reader.metrics = self.metrics
+        self._encoding = CONFIG.get("wire_format", "binary")
+        # "change": publish as soon as a sensor updates (coalesced per channel, only changed
+        # fields on the sockets) plus periodic keyframes; "periodic": full frame per interval
+        self._last_values = None
+        self._published_version = None
+        self.coalescer = None
+        if CONFIG.get("broadcast_mode", "change") == "change":
+            # A user config may cap only some channels; the rest keep their defaults
+            max_hz = {"can": 60, "imu": 30, "gps": 25}
+            max_hz.update(CONFIG.get("broadcast_max_hz") or {})
+            self.coalescer = Coalescer(lambda: self._publish(keyframe=False), max_hz)
+        self.log_sensors = log_sensors
+        self.log_backend = CONFIG.get("log_backend", "both")
+        self._ts_session = ts_session
+        # Started by _start_deferred (see there)
+        self.writer = None
+        self.ts_sensor = None
+        self.ts_gps = None
+        self._sqlite_rows = False
+        self.lap_timer = None
+        self.lap_id = None
+        self.stats_server = None
+        self.scheduler = Scheduler(self.metrics, stagger_s=CONFIG.get("scheduler_stagger_ms", 5) / 1000.0)
+        self._schedule()
+        self._stop_event = asyncio.Event()
+        self._first_rpm = asyncio.Event()
+        # A replay only starts playing once the GPS loop runs, so it cannot wait for rpm first
+        self.fast_boot = CONFIG.get("fast_boot", True) and self.replay is None
+        if not self.fast_boot:
+            self._start_deferred()
+
+    def _start_deferred(self):
+        """
+        Brings up what the first frame does not need: the SQLite writer (and its schema),
+        the time-series store, lap timing, the GPS stack and the stats socket. With
+        fast_boot this runs on a worker thread once the first frame with rpm is out (or
+        boot_defer_timeout_s passed without CAN data); otherwise from __init__.
+        """
+        logging = CONFIG.get("logging_enabled", True)
+        if logging:
+            with self.profile.phase("sqlite"):
+                self.writer = SQLiteWriter(
+                    flush_size=CONFIG.get("log_flush_size", 100),
+                    flush_interval=CONFIG.get("log_flush_interval_ms", 1000) / 1000.0,
+                    queue_size=CONFIG.get("log_queue_size", 5000)
+                )
+                self._sqlite_rows = self.log_sensors and self.log_backend in ("sqlite", "both")
+        if logging and self.log_backend in ("timeseries", "both"):
+            with self.profile.phase("timeseries"):
+                from storage.timeseries import TimeSeriesStore
+                store = TimeSeriesStore(CONFIG.get("ts_root"))
+                session_id = self._ts_session or store.create_session(source="replay" if self.replay is not None else "live")
+                chunk_rows = CONFIG.get("ts_chunk_rows", 65536)
+                self.ts_gps = store.writer(session_id, 'gps', chunk_rows)
+                if self.log_sensors:
+                    self.ts_sensor = store.writer(session_id, 'sensor', chunk_rows)
+        if CONFIG.get("track_start_line"):
+            self.lap_timer = LapTimer(
+                CONFIG["track_start_line"],
+                checkpoints=CONFIG.get("track_checkpoints", []),
+                min_lap_s=CONFIG.get("lap_min_time_s", 20)
+            )
+        if self.gps_reader is None:
+            with self.profile.phase("gps"):
+                self.gps_reader = GPSReader(
+                    device=CONFIG["gps_device"],
+                    backend=CONFIG.get("gps_backend", "nmea"),
+                    baudrate=CONFIG.get("gps_baudrate", 9600),
+                    rate_hz=CONFIG.get("gps_rate_hz"),
+                    chipset=CONFIG.get("gps_chipset"),
+                    rate_baudrate=CONFIG.get("gps_rate_baudrate")
+                )
+                if self.recorder is not None:
+                    self.gps_reader.recorder = self.recorder
+        if CONFIG.get("metrics_enabled", True):
+            self.stats_server = StatsServer(CONFIG.get("metrics_socket", "/tmp/r3_metrics.sock"), self.metrics, self._stats)
+        if self.writer is not None:
+            # Lap rows are written directly (see _handle_lap_events), so the schema must
+            # exist before the first fix can cross the start line
+            with self.profile.phase("sqlite_schema"):
+                self.writer.ready.wait(CONFIG.get("boot_schema_timeout_s", 5.0))
+
+    def _schedule(self):
+        """
+        Periodic acquisition work, ticked on absolute deadlines by utils/scheduler.py.
+        GPS fixes are pushed as they arrive and are handled by _gps_loop instead.
+        """
+        can_interval = CONFIG["can_poll_interval_ms"] / 1000.0
+        if self.can_blocking:
+            self.scheduler.every_in_thread(
+                "can", can_interval, lambda: self.can_reader.read_can_data(timeout=can_interval / 2), self._on_can
             )
         else:
-            self.can_reader = MockCANReader()
-        if CONFIG.get("imu_enabled", True):
-            self.imu_reader = IMUReader(address=CONFIG["mpu_address"])
+            self.scheduler.every("can", can_interval, lambda: self._on_can(self.can_reader.read_can_data()))
+        self.scheduler.every("imu", CONFIG["imu_poll_interval_ms"] / 1000.0, self._imu_tick)
+        if self.log_sensors:
+            self.scheduler.every("log", CONFIG.get("log_interval_ms", 20) / 1000.0, self._log_tick)
+        if self.coalescer is not None:
+            # Lets late-joining subscribers (and any that dropped a delta) resync
+            self.scheduler.every("keyframe", CONFIG.get("keyframe_interval_ms", 1000) / 1000.0, self._publish)
         else:
-            self.imu_reader = MockIMUReader()
-        self.gps_reader = GPSReader(device=CONFIG["gps_device"])
-        self.data = {
-            'can': {},
-            'imu': {},
-            'gps': {}
-        }
-        self.socket_path = "/tmp/dashboard.sock"
-        self._stop_event = asyncio.Event()
+            self.scheduler.every("broadcast", CONFIG.get("broadcast_interval_ms", 100) / 1000.0, self._publish)
 
-    async def _can_loop(self, interval=None):
-        interval = interval or CONFIG["can_poll_interval_ms"] / 1000.0
-        while not self._stop_event.is_set():
-            self.data['can'] = self.can_reader.read_can_data(timeout=interval/2)
-            await asyncio.sleep(interval)
+    def _reader_callback(self, loop, refresh):
+        """
+        on_update hook for a reader thread: runs refresh on the event loop, with at most
+        one call pending however fast the reader updates.
+        """
+        pending = threading.Event()
 
-    async def _imu_loop(self, interval=None):
-        interval = interval or CONFIG["imu_poll_interval_ms"] / 1000.0
-        while not self._stop_event.is_set():
-            self.data['imu'] = self.imu_reader.get_all_data()
-            await asyncio.sleep(interval)
+        def run():
+            pending.clear()
+            refresh()
+
+        def notify():
+            if not pending.is_set():
+                pending.set()
+                try:
+                    loop.call_soon_threadsafe(run)
+                except RuntimeError:
+                    # Loop already closed during shutdown
+                    pass
+        return notify
+
+    def _stats(self):
+        """
+        Reader and transport counters served next to the latency histograms.
+        """
+        stats = {'hub': self.hub.stats(), 'scheduler': self.scheduler.stats()}
+        if self.coalescer is not None:
+            stats['changes'] = self.coalescer.stats()
+        if self.writer is not None:
+            stats['writer'] = self.writer.stats()
+        for name, reader in (('can', self.can_reader), ('imu', self.imu_reader), ('gps', self.gps_reader)):
+            if hasattr(reader, 'get_stats'):
+                stats[name] = reader.get_stats()
+        return stats
+
+    def _speed_ms(self):
+        """
+        Current road speed in m/s for the lean estimator (CAN first, then GPS), or None.
+        """
+        snap = self.state.snapshot
+        if snap.can.speed is not None:
+            return snap.can.speed / 3.6
+        return snap.gps.speed
+
+    def _on_can(self, data):
+        if data.get('rpm') is None:
+            # Silent bus or engine off: keep the last rpm's time (None before any) so the
+            # first_rpm mark, fast_boot and logging wait for a real rpm
+            sampled = self.state.snapshot.can.sampled
+        else:
+            # Age frames from when the rpm came off the bus; polled and mock readers only know the read time
+            timestamps = getattr(self.can_reader, 'timestamps', None)
+            sampled = (timestamps or {}).get('rpm') or time.monotonic_ns()
+        self.state.update(can=CanState.from_reading(data, sampled))
+        if self.coalescer is not None:
+            self.coalescer.changed('can')
+
+    def _imu_tick(self):
+        self.state.update(imu=ImuState.from_reading(self.imu_reader.get_all_data()))
+        if self.coalescer is not None:
+            self.coalescer.changed('imu')
+
+    @staticmethod
+    def _fix_epoch(gps):
+        """
+        Seconds since the epoch of a GPS fix, falling back to the local clock when the
+        receiver does not report a time.
+        """
+        t = parse_fix_time(gps.get('fix_time'))
+        return t if t is not None else time.time()
 
     async def _gps_loop(self, interval=None):
+        # Fixes are pushed from the reader thread as they arrive; the timeout only bounds
+        # how long shutdown waits when the receiver is silent
         interval = interval or CONFIG["gps_poll_interval_ms"] / 1000.0
+        loop = asyncio.get_running_loop()
+        fixes = asyncio.Queue()
+        self.gps_reader.on_fix = lambda fix: loop.call_soon_threadsafe(fixes.put_nowait, fix)
+        if self.replay is not None:
+            # Only start playing once fixes have somewhere to go
+            self.replay.start()
         while not self._stop_event.is_set():
-            self.data['gps'] = self.gps_reader.get_gps_data()
-            await asyncio.sleep(interval)
-
-    async def _log_loop(self, interval=1.0):
-        while not self._stop_event.is_set():
-            if not CONFIG.get("logging_enabled", True):
-                await asyncio.sleep(interval)
+            try:
+                gps = await asyncio.wait_for(fixes.get(), interval)
+            except asyncio.TimeoutError:
                 continue
-            can = self.data['can']
-            imu = self.data['imu']
-            # Log only if we have meaningful data
-            if all(k in can for k in ('rpm', 'speed', 'gear')) and 'lean_angle' in imu:
-                await asyncio.to_thread(
-                    sqlite_logger.log_sensor_data,
-                    can.get('rpm'),
-                    can.get('speed'),
-                    can.get('gear'),
-                    imu.get('lean_angle')
-                )
-            gps = self.data['gps']
-            # Optionally log GPS points if you have a lap_id (add logic as needed)
-            # await asyncio.to_thread(sqlite_logger.log_gps_point, lap_id, timestamp, gps.get('lat'), gps.get('lon'))
-            await asyncio.sleep(interval)
+            self.state.update(gps=GpsState.from_fix(gps))
+            if self.coalescer is not None:
+                self.coalescer.changed('gps')
+            lat, lon = gps.get('lat'), gps.get('lon')
+            if self.lap_timer is not None and lat is not None and lon is not None:
+                t = self._fix_epoch(gps)
+                events = self.lap_timer.update(t, lat, lon)
+                if events:
+                    await self._handle_lap_events(events)
+                if self.lap_id is not None and self.writer is not None:
+                    self.writer.log_gps_point(self.lap_id, self._iso(t), lat, lon)
+                self.state.update(lap=LapState(**self.lap_timer.status(t)))
+            if self.ts_gps is not None and lat is not None and lon is not None:
+                if self.ts_gps.append(int(self._fix_epoch(gps) * 1e9), (lat, lon, self.lap_id)):
+                    await asyncio.to_thread(self.ts_gps.flush)
+        self.gps_reader.on_fix = None
 
-    async def _broadcast_loop(self, interval=0.1):
-        # Send data to the forwarder (which binds to /tmp/dashboard.sock)
-        while not self._stop_event.is_set():
-            try:
-                msg = json.dumps({
-                    "rpm": self.data['can'].get('rpm', 0),
-                    "speed": self.data['can'].get('speed', 0),
-                    "gear": self.data['can'].get('gear', 1),
-                    "lean_angle": self.data['imu'].get('lean_angle', 0.0),
-                    "gps_lat": self.data['gps'].get('lat'),
-                    "gps_lon": self.data['gps'].get('lon'),
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-                })
-                try:
-                    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as s:
-                        s.connect(self.socket_path)
-                        s.send(msg.encode())
-                except Exception as e:
-                    print(f"Failed to send to dashboard.sock: {e}")
-            except Exception as e:
-                print(f"Failed to broadcast data: {e}")
-            await asyncio.sleep(interval)
-
-    async def _forwarder_loop(self, interval=0.1):
-        """
-        Forward all messages received on /tmp/dashboard.sock to /tmp/dashboard_display.sock and /tmp/dashboard_debug.sock (if enabled).
-        Only send to a destination if its socket file exists.
-        """
-        SRC = "/tmp/dashboard.sock"
-        DESTS = ["/tmp/dashboard_display.sock"]
-        if CONFIG.get("debug_socket_enabled", True):
-            DESTS.append("/tmp/dashboard_debug.sock")
-        import os
-        if os.path.exists(SRC):
-            os.remove(SRC)
-        src_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
-        try:
-            src_sock.bind(SRC)
-        except OSError:
-            os.remove(SRC)
-            src_sock.bind(SRC)
-        src_sock.setblocking(True)  # Blocking mode for thread executor
-        print(f"Forwarder running: {SRC} -> {DESTS}")
-        loop = asyncio.get_running_loop()
-        while not self._stop_event.is_set():
+    @staticmethod
+    def _iso(t):
+        return datetime.fromtimestamp(t, timezone.utc).isoformat()
+
+    async def _handle_lap_events(self, events):
+        """
+        Record lap timer events in the laps/checkpoints tables. These are rare, so they are
+        written directly (off the event loop) rather than through the batching writer.
+        """
+        if not CONFIG.get("logging_enabled", True):
+            return
+        track = CONFIG.get("track_name")
+        for event in events:
+            ts = self._iso(event.t)
             try:
-                # Use run_in_executor to avoid blocking the event loop
-                data, addr = await loop.run_in_executor(None, src_sock.recvfrom, 1024)
-                for dest in DESTS:
-                    if os.path.exists(dest):
-                        try:
-                            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as out:
-                                out.connect(dest)
-                                out.send(data)
-                        except Exception as e:
-                            print(f"Forwarder failed to send to {dest}: {e}")
-                    else:
-                        print(f"Forwarder: destination socket {dest} does not exist, skipping.")
+                if event.kind == 'lap_start':
+                    self.lap_id = await asyncio.to_thread(sqlite_logger.start_lap, track, ts)
+                elif self.lap_id is None:
+                    continue
+                elif event.kind == 'lap_end':
+                    await asyncio.to_thread(sqlite_logger.end_lap, self.lap_id, ts)
+                    if event.best:
+                        await asyncio.to_thread(sqlite_logger.set_best_lap, self.lap_id, track)
+                    print(f"Lap {event.lap}: {event.elapsed:.3f}s" + (" (best)" if event.best else ""))
+                elif event.kind == 'checkpoint':
+                    await asyncio.to_thread(sqlite_logger.log_checkpoint, self.lap_id, event.name, ts, event.delta)
             except Exception as e:
-                print(f"Forwarder error: {e}")
+                print(f"Failed to record lap event {event.kind}: {e}")
+
+    async def _log_tick(self):
+        if not CONFIG.get("logging_enabled", True):
+            return
+        snap = self.state.snapshot
+        can, imu = snap.can, snap.imu
+        # Log only once both CAN and the IMU have reported
+        if can.sampled is not None and imu.sampled is not None:
+            if self._sqlite_rows:
+                # Only queues the row; the writer thread batches it into SQLite
+                self.writer.log_sensor_data(can.rpm, can.speed, can.gear, imu.lean_angle)
+            if self.ts_sensor is not None:
+                row = (can.rpm, can.speed, can.gear, imu.lean_angle)
+                if self.ts_sensor.append(time.time_ns(), row):
+                    # A full chunk: write it out (and its rollups) off the event loop
+                    await asyncio.to_thread(self.ts_sensor.flush)
+        # GPS points are logged per fix in _gps_loop, tagged with the current lap
+
+    def _publish(self, keyframe=True):
+        """
+        Publishes the current state into the shared memory ring and/or straight to the hub's
+        subscriber sockets: a full frame for keyframes, otherwise (change mode) a delta of the
+        fields that changed since the last publish, or nothing if none did. The ring always
+        holds full frames.
+        """
+        snap = self.state.snapshot
+        if not keyframe and snap.version == self._published_version:
+            # Nothing was updated since the last publish
+            return
+        self._published_version = snap.version
+        now_ns = time.monotonic_ns()
+        sample_ns = snap.can.sampled or now_ns
+        values = frame.frame_values(
+            self._seq + 1,
+            now_ns,
+            snap.can.rpm,
+            snap.can.speed,
+            snap.can.gear,
+            snap.imu.lean_angle,
+            snap.gps.lat,
+            snap.gps.lon,
+            sample_ns
+        )
+        mask = frame.changed_mask(self._last_values, values)
+        if not keyframe and not mask:
+            return
+        self._seq = values[3]
+        self._last_values = values
+        self.metrics.record('sample_age', now_ns - sample_ns)
+        if self.ring is not None:
+            self.ring.write(*values)
+        if self.hub.subscribers:
+            if keyframe:
+                self.hub.publish(frame.encode(values, self._encoding))
+            else:
+                self.hub.publish(frame.encode_delta(values, mask, self._encoding))
+        self.metrics.record('publish', time.monotonic_ns() - now_ns)
+        if not self._first_rpm.is_set():
+            self.profile.mark("first_frame")
+            if snap.can.sampled is not None:
+                self.profile.mark("first_rpm")
+                self._first_rpm.set()
+
+    async def _boot(self):
+        """
+        With fast_boot, waits for the first frame with rpm to be published and only then
+        starts the deferred subsystems (off the event loop, so CAN and IMU keep flowing),
+        prints the startup report and runs the GPS loop.
+        """
+        if self.fast_boot:
+            waits = [asyncio.ensure_future(self._first_rpm.wait()), asyncio.ensure_future(self._stop_event.wait())]
+            # Engine off or ECU silent: bring the rest up anyway rather than wait forever
+            await asyncio.wait(waits, timeout=CONFIG.get("boot_defer_timeout_s", 2.0), return_when=asyncio.FIRST_COMPLETED)
+            for w in waits:
+                w.cancel()
+            if self._stop_event.is_set():
+                return
+            with self.profile.phase("deferred"):
+                await asyncio.to_thread(self._start_deferred)
+        if self.stats_server is not None:
+            self.stats_server.start()
+        self.profile.mark("ready")
+        print(self.profile.report())
+        self.profile.dump(CONFIG.get("startup_report"))
+        await self._gps_loop()
 
     async def start(self):
         self._stop_event.clear()
-        # Start the forwarder loop first to ensure /tmp/dashboard.sock is bound
-        forwarder_task = asyncio.create_task(self._forwarder_loop())
-        # Wait a short moment to ensure the forwarder is ready
-        await asyncio.sleep(0.2)
+        # Bound and registered synchronously, so subscribers can register from the first frame
+        with self.profile.phase("hub_start"):
+            self.hub.start()
+        if self.coalescer is not None:
+            # Readers with their own threads announce updates instead of waiting to be polled
+            loop = asyncio.get_running_loop()
+            if hasattr(self.can_reader, 'on_update'):
+                self.can_reader.on_update = self._reader_callback(loop, lambda: self._on_can(self.can_reader.read_can_data()))
+            if hasattr(self.imu_reader, 'on_update'):
+                self.imu_reader.on_update = self._reader_callback(loop, self._imu_tick)
         await asyncio.gather(
-            self._can_loop(),
-            self._imu_loop(),
-            self._gps_loop(),
-            self._log_loop(),
-            self._broadcast_loop(),
-            forwarder_task
+            self._boot(),
+            self.scheduler.run(self._stop_event)
         )
 
+    def request_stop(self):
+        """
+        Makes start() return once the running ticks finish; call stop() afterwards to
+        release the readers and flush the logs. Safe to use as a signal handler.
+        """
+        self._stop_event.set()
+
     def stop(self):
         self._stop_event.set()
-        self.gps_reader.stop()
+        # Reader threads must be out of read_can_data() before the bus is shut down
+        self.scheduler.stop()
+        self.can_reader.stop()
+        self.imu_reader.stop()
+        if self.gps_reader is not None:
+            self.gps_reader.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+        for series in (self.ts_sensor, self.ts_gps):
+            if series is not None:
+                # Seal the partial last chunk so the end of the ride is queryable
+                series.close()
+        if self.writer is not None:
+            # Flush queued rows so nothing sampled before shutdown is lost
+            self.writer.close()
+        if self.ring is not None:
+            self.ring.close()
+        self.hub.close()
+        if self.stats_server is not None:
+            self.stats_server.close()
 
     def get_all_data(self):
         """
-        Returns the latest combined data from CAN, IMU, and GPS as a dictionary.
+        Returns the latest combined data from CAN, IMU, GPS and the lap timer as a dictionary,
+        all from one snapshot. self.state.snapshot gives the same without building dicts.
         """
-        return self.data.copy()
+        return self.state.snapshot.as_dict()
 
 
 if __name__ == "__main__":
     daq = DataAcquisition()
-    asyncio.run(daq.start())
\ No newline at end of file
+    try:
+        asyncio.run(daq.start())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daq.stop()
\ No newline at end of file
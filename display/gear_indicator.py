@@ -1,4 +1,5 @@
 import pygame
+from display.text_cache import render_text
 
 def draw_gear_indicator(screen, gear, pos=(700, 100), size=80):
     """
@@ -10,7 +11,13 @@ def draw_gear_indicator(screen, gear, pos=(700, 100), size=80):
     """
     x, y = pos
     pygame.draw.circle(screen, (30, 30, 30), (x, y), size // 2)
-    font = pygame.font.SysFont(None, size, bold=True)
-    text = font.render(str(gear), True, (255, 255, 0))
+    text = render_text(str(gear), size, (255, 255, 0), True)
     text_rect = text.get_rect(center=(x, y))
     screen.blit(text, text_rect)
+
+def gear_indicator_rect(pos=(700, 100), size=80):
+    """
+    Screen area covered by draw_gear_indicator.
+    """
+    x, y = pos
+    return pygame.Rect(x - size // 2, y - size // 2, size, size)
@@ -0,0 +1,226 @@
+import time
+
+# SmoothedValue modes
+DAMP = "damp"  # Critically damped spring toward the newest sample: eases steps, no added latency
+INTERPOLATE = "interpolate"  # Linear from the shown value to the newest sample over one sample interval
+OFF = "off"  # Newest sample as is
+
+
+class SmoothedValue:
+    """
+    A gauge value that moves smoothly between timestamped samples arriving slower than the
+    frame rate. set() takes each new sample, update(now_ns) returns what to draw at now_ns.
+    moving is False once the drawn value has reached the newest sample, which lets the
+    render loop drop to its idle rate.
+    """
+    def __init__(self, mode=DAMP, smooth_time_s=0.08, max_interval_s=0.25, epsilon=0.5):
+        if mode not in (DAMP, INTERPOLATE, OFF):
+            raise ValueError(f"Smoothing mode must be '{DAMP}', '{INTERPOLATE}' or '{OFF}'")
+        self.mode = mode
+        self.smooth_time_s = max(smooth_time_s, 1e-3)
+        self.max_interval_ns = int(max_interval_s * 1e9)
+        self.epsilon = epsilon
+        self.value = None
+        self.target = None
+        self.velocity = 0.0
+        self.moving = False
+        self._start = None
+        self._start_ns = 0
+        self._sample_ns = None
+        self._interval_ns = 0
+        self._last_ns = None
+
+    def set(self, target, t_ns):
+        """
+        New sample target taken at t_ns (time.monotonic_ns()).
+        """
+        if target is None:
+            return
+        if self.value is None or self.mode == OFF:
+            self.value = self.target = target
+            self._sample_ns = t_ns
+            return
+        self._interval_ns = min(max(t_ns - self._sample_ns, 0), self.max_interval_ns) if self._sample_ns is not None else 0
+        self._sample_ns = t_ns
+        if not self.moving:
+            # Coming to life after resting: the spring's clock starts with the sample
+            self._last_ns = t_ns
+        self._start = self.value
+        self._start_ns = t_ns
+        self.target = target
+        self.moving = target != self.value
+
+    def update(self, now_ns):
+        """
+        Value to draw at now_ns; None before the first sample.
+        """
+        last_ns, self._last_ns = self._last_ns, now_ns
+        if not self.moving:
+            return self.value
+        if self.mode == INTERPOLATE:
+            progress = (now_ns - self._start_ns) / self._interval_ns if self._interval_ns else 1.0
+            if progress >= 1.0:
+                self._settle()
+            else:
+                self.value = self._start + (self.target - self._start) * max(progress, 0.0)
+            return self.value
+        # Critically damped spring, integrated exactly for the elapsed time (Game Programming Gems 4, 1.10)
+        dt = min(max(now_ns - last_ns, 0), self.max_interval_ns) / 1e9 if last_ns is not None else 0.0
+        omega = 2.0 / self.smooth_time_s
+        x = omega * dt
+        decay = 1.0 / (1.0 + x + 0.48 * x * x + 0.235 * x * x * x)
+        change = self.value - self.target
+        temp = (self.velocity + omega * change) * dt
+        self.velocity = (self.velocity - omega * temp) * decay
+        self.value = self.target + (change + temp) * decay
+        if abs(self.value - self.target) < self.epsilon and abs(self.velocity) * self.smooth_time_s < self.epsilon:
+            self._settle()
+        return self.value
+
+    def _settle(self):
+        self.value = self.target
+        self.velocity = 0.0
+        self.moving = False
+
+
+class FramePacer:
+    """
+    Render loop pacing on absolute frame deadlines (time.monotonic_ns). While anything is
+    active (new data, a moving gauge, input) frames are due every 1/fps; after idle_after_s
+    without activity, every 1/idle_fps, with wait() polling wake() every poll_s so new data
+    or input brings the next frame forward. A frame that runs long is not followed by
+    back-to-back catch-up frames: the missed deadlines are skipped and counted as dropped,
+    and the next frame keeps to the original grid. With vsync, the flip does the waiting
+    while active. within_budget() tells the loop whether there is time left in the frame
+    for optional work.
+    """
+    def __init__(self, fps=60, idle_fps=10, idle_after_s=0.5, vsync=False, poll_s=0.005, metrics=None):
+        self.period_ns = 1_000_000_000 // fps
+        self.idle_period_ns = 1_000_000_000 // max(min(idle_fps, fps), 1)
+        self.idle_after_ns = int(idle_after_s * 1e9)
+        self.vsync = vsync
+        self.poll_s = poll_s
+        self.metrics = metrics
+        self.idle = False
+        self.frames = 0
+        self.idle_frames = 0
+        self.dropped = 0
+        self.achieved_fps = 0.0
+        self.frame_start_ns = None
+        self._deadline = None
+        self._active_until = 0
+        self._last_flip = None
+        self._woken = False
+        self._window_start = None
+        self._window_frames = 0
+
+    def begin(self):
+        """
+        Call at the top of each frame; returns its start time.
+        """
+        now = time.monotonic_ns()
+        if self._deadline is not None and not (self.idle or self.vsync) and self.metrics is not None:
+            self.metrics.record('frame_jitter', max(now - self._deadline, 0))
+        self.frame_start_ns = now
+        return now
+
+    def within_budget(self, fraction=0.5):
+        """
+        True while less than fraction of the frame period has been spent on this frame.
+        """
+        return time.monotonic_ns() - self.frame_start_ns < self.period_ns * fraction
+
+    def end(self, active):
+        """
+        Call once the frame is on the glass. active: something on screen is still changing
+        (or new data arrived), so the next frame is due at the full rate.
+        """
+        now = time.monotonic_ns()
+        self.frames += 1
+        if self.metrics is not None:
+            self.metrics.record('frame_time', now - self.frame_start_ns)
+        if active:
+            self._active_until = now + self.idle_after_ns
+        was_idle = self.idle
+        self.idle = now >= self._active_until
+        if self.idle:
+            self.idle_frames += 1
+        elif not (was_idle or self._woken) and self._last_flip is not None:
+            # Frames that should have been shown between this one and the previous
+            missed = (now - self._last_flip + self.period_ns // 2) // self.period_ns - 1
+            if missed > 0:
+                self.dropped += missed
+        self._last_flip = now
+        self._woken = False
+        self._count(now)
+        period = self.idle_period_ns if self.idle else self.period_ns
+        if self._deadline is None or was_idle != self.idle:
+            self._deadline = now + period
+            return
+        self._deadline += period
+        if self._deadline <= now:
+            # Overran: stay on the grid and skip the slots already gone
+            self._deadline += ((now - self._deadline) // period + 1) * period
+
+    def _count(self, now):
+        if self._window_start is None:
+            self._window_start = now
+        self._window_frames += 1
+        elapsed = now - self._window_start
+        if elapsed >= 1_000_000_000:
+            self.achieved_fps = self._window_frames * 1e9 / elapsed
+            self._window_start = now
+            self._window_frames = 0
+
+    def wake_now(self):
+        """
+        Makes the next frame due immediately at the full rate.
+        """
+        now = time.monotonic_ns()
+        self._active_until = now + self.idle_after_ns
+        self.idle = False
+        self._woken = True
+        self._deadline = now
+
+    def wait(self, wake=None, until_ns=None):
+        """
+        Sleeps until the next frame is due. While idle, returns early (and switches back to
+        the full rate) as soon as wake() returns True, or at until_ns for a single frame when
+        something on screen is due to change by itself then.
+        """
+        if self._deadline is None or (self.vsync and not self.idle):
+            return
+        deadline = self._deadline
+        if self.idle and until_ns is not None:
+            deadline = min(deadline, until_ns)
+        while True:
+            remaining = deadline - time.monotonic_ns()
+            if remaining <= 0:
+                return
+            if self.idle and wake is not None:
+                if wake():
+                    self.wake_now()
+                    return
+                time.sleep(min(remaining / 1e9, self.poll_s))
+            else:
+                time.sleep(remaining / 1e9)
+
+    def as_dict(self):
+        return {
+            'target_fps': round(1e9 / (self.idle_period_ns if self.idle else self.period_ns), 1),
+            'achieved_fps': round(self.achieved_fps, 1),
+            'idle': self.idle,
+            'frames': self.frames,
+            'idle_frames': self.idle_frames,
+            'dropped': self.dropped,
+        }
+
+# Example usage:
+# rpm = SmoothedValue(DAMP, smooth_time_s=0.08)
+# pacer = FramePacer(fps=60, idle_fps=10)
+# while running:
+#     now = pacer.begin()
+#     rpm.set(sample_rpm, sample_ns)
+#     draw(rpm.update(now))
+#     pacer.end(active=rpm.moving)
+#     pacer.wait(wake=lambda: data_arrived())
@@ -1,4 +1,5 @@
 import pygame
+from display.text_cache import get_font, render_text
 
 def draw_rpm_bar(screen, rpm, max_rpm=16000, pos=(50, 100), size=(600, 40)):
     """
@@ -24,6 +25,14 @@ def draw_rpm_bar(screen, rpm, max_rpm=16000, pos=(50, 100), size=(600, 40)):
         color = (255, 0, 0)
     pygame.draw.rect(screen, color, (x, y, fill_width, height), border_radius=8)
     # Draw RPM text
-    font = pygame.font.SysFont(None, 32)
-    text = font.render(f"RPM: {rpm}", True, (255, 255, 255))
+    text = render_text(f"RPM: {rpm}", 32, (255, 255, 255))
     screen.blit(text, (x + width + 20, y))
+
+def rpm_bar_rect(pos=(50, 100), size=(600, 40)):
+    """
+    Screen area covered by draw_rpm_bar, including the RPM readout for up to five digits.
+    """
+    x, y = pos
+    width, height = size
+    text_width, text_height = get_font(32).size("RPM: 88888")
+    return pygame.Rect(x, y, width + 20 + text_width, max(height, text_height))
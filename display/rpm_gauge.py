@@ -0,0 +1,161 @@
+import time
+import pygame
+from display.rpm_bar import rpm_bar_rect
+from display.text_cache import GlyphNumber
+from display.widgets import Widget
+
+DEFAULT_STOPS = ((0.0, (0, 200, 0)), (0.7, (255, 200, 0)), (0.9, (255, 0, 0)))
+
+
+def gradient_color(stops, ratio):
+    """
+    Linearly interpolated colour for ratio (0..1) along a list of (ratio, (r, g, b)) stops.
+    """
+    if ratio <= stops[0][0]:
+        return stops[0][1]
+    for (r0, c0), (r1, c1) in zip(stops, stops[1:]):
+        if ratio <= r1:
+            t = (ratio - r0) / (r1 - r0) if r1 > r0 else 1.0
+            return tuple(int(a + (b - a) * t) for a, b in zip(c0, c1))
+    return stops[-1][1]
+
+
+class RpmGauge(Widget):
+    """
+    RPM bar drawn from pre-rendered sprites. The background and the fully lit bar are
+    rendered once (at startup and on resize); each frame only blits a clipped sub-rect of
+    the lit bar, so the cost does not depend on rpm.
+    style 'gradient' colours the bar by position along a multi-stop gradient, 'bands'
+    colours the whole bar by the band the current rpm is in (the original behaviour).
+    """
+    opaque = True
+
+    def __init__(self, pos=(50, 100), size=(600, 40), max_rpm=16000, stops=DEFAULT_STOPS, style='gradient',
+                 redline_rpm=None, shift_rpm=None, flash_hz=8.0, flash_color=(80, 160, 255), peak_hold_s=1.5):
+        super().__init__(rpm_bar_rect(pos, size))
+        self.max_rpm = max_rpm
+        self.stops = tuple(stops)
+        self.style = style
+        self.redline_rpm = redline_rpm
+        self.shift_rpm = shift_rpm
+        self.flash_half_period = 0.5 / flash_hz if flash_hz else None
+        self.flash_color = flash_color
+        self.peak_hold_s = peak_hold_s
+        self.rpm = None
+        self.flash_on = False
+        self.peak_rpm = 0
+        self._peak_time = 0.0
+        self._now = 0.0
+        self.resize(pos, size)
+
+    def resize(self, pos, size):
+        """
+        Re-renders all sprites for a new position/size.
+        """
+        self.pos = pos
+        self.size = size
+        self.rect = rpm_bar_rect(pos, size)
+        self.bar_rect = pygame.Rect(pos, size)
+        self._build()
+        self.dirty = True
+
+    def _rounded(self, fill):
+        """
+        Copy of the background with fill (a colour, or a surface) clipped to the rounded bar shape.
+        """
+        width, height = self.size
+        shape = pygame.Surface(self.size, pygame.SRCALPHA)
+        pygame.draw.rect(shape, (255, 255, 255, 255), (0, 0, width, height), border_radius=8)
+        if isinstance(fill, pygame.Surface):
+            layer = fill.convert_alpha()
+        else:
+            layer = pygame.Surface(self.size, pygame.SRCALPHA)
+            layer.fill(fill)
+        layer.blit(shape, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+        surface = self.background_surface.copy()
+        surface.blit(layer, (0, 0))
+        return surface
+
+    def _build(self):
+        width, height = self.size
+        # Covers the whole widget (bar and readout area) so render() never needs a clear
+        background = pygame.Surface(self.rect.size)
+        background.fill(self.background)
+        pygame.draw.rect(background, (50, 50, 50), (0, 0, width, height), border_radius=8)
+        if self.redline_rpm:
+            x = int(width * min(self.redline_rpm / self.max_rpm, 1.0))
+            pygame.draw.line(background, (255, 0, 0), (x, 0), (x, height - 1), 2)
+        self.widget_background = background.convert()
+        self.background_surface = self.widget_background.subsurface((0, 0, width, height))
+
+        if self.style == 'bands':
+            # One fully lit bar per colour band, indexed by the band's starting ratio
+            self.band_surfaces = [(ratio, self._rounded(color).convert()) for ratio, color in self.stops]
+        else:
+            gradient = pygame.Surface(self.size)
+            for x in range(width):
+                pygame.draw.line(gradient, gradient_color(self.stops, x / max(width - 1, 1)), (x, 0), (x, height - 1))
+            self.band_surfaces = [(0.0, self._rounded(gradient).convert())]
+        self.flash_surface = self._rounded(self.flash_color).convert()
+        self.peak_surface = pygame.Surface((3, height))
+        self.peak_surface.fill((255, 255, 255))
+        # Reused every frame instead of allocating new rects
+        self._area = pygame.Rect(0, 0, 0, height)
+        self._text_pos = (self.bar_rect.right + 20, self.bar_rect.y)
+        self._readout = GlyphNumber(32, (255, 255, 255), prefix="RPM: ")
+
+    def set_rpm(self, rpm, now):
+        """
+        Updates rpm, shift-light phase and peak-hold state for time now (seconds, monotonic);
+        marks the gauge dirty only if something visible changed.
+        """
+        self._now = now
+        flash_on = False
+        if self.shift_rpm and rpm >= self.shift_rpm:
+            flash_on = self.flash_half_period is None or int(now / self.flash_half_period) % 2 == 0
+        peak = self.peak_rpm
+        if rpm >= peak or now - self._peak_time > self.peak_hold_s:
+            peak = rpm
+            self._peak_time = now
+        if rpm != self.rpm or flash_on != self.flash_on or peak != self.peak_rpm:
+            self.rpm = rpm
+            self.flash_on = flash_on
+            self.peak_rpm = peak
+            self.value = rpm
+            self.dirty = True
+
+    def set_value(self, value):
+        self.set_rpm(value, time.monotonic())
+
+    def next_change(self):
+        """
+        Monotonic time (seconds) at which the gauge changes without new rpm: the next shift
+        light toggle or the held peak dropping. None if nothing is pending.
+        """
+        if self.rpm is None:
+            return None
+        if self.shift_rpm and self.flash_half_period is not None and self.rpm >= self.shift_rpm:
+            return (int(self._now / self.flash_half_period) + 1) * self.flash_half_period
+        if self.peak_rpm > self.rpm:
+            return self._peak_time + self.peak_hold_s
+        return None
+
+    def _lit_surface(self, ratio):
+        surface = self.band_surfaces[0][1]
+        for start, band in self.band_surfaces:
+            if ratio >= start:
+                surface = band
+        return surface
+
+    def render(self, screen):
+        rpm = self.rpm
+        width = self.size[0]
+        ratio = min(rpm / self.max_rpm, 1.0)
+        screen.blit(self.widget_background, self.rect)
+        self._area.width = int(width * ratio)
+        lit = self.flash_surface if self.flash_on else self._lit_surface(ratio)
+        screen.blit(lit, self.bar_rect, self._area)
+        if self.peak_rpm > rpm:
+            peak_x = int(width * min(self.peak_rpm / self.max_rpm, 1.0))
+            screen.blit(self.peak_surface, (self.bar_rect.x + min(peak_x, width - 3), self.bar_rect.y))
+        self._readout.draw(screen, rpm, self._text_pos)
@@ -1,4 +1,5 @@
 import pygame
+from display.text_cache import get_font, render_text
 
 def draw_speed_display(screen, speed, pos=(50, 180), font_size=72):
     """
@@ -8,6 +9,12 @@ def draw_speed_display(screen, speed, pos=(50, 180), font_size=72):
     :param pos: (x, y) position
     :param font_size: font size for display
     """
-    font = pygame.font.SysFont(None, font_size, bold=True)
-    text = font.render(f"{speed} km/h", True, (0, 200, 255))
+    text = render_text(f"{speed} km/h", font_size, (0, 200, 255), True)
     screen.blit(text, pos)
+
+def speed_display_rect(pos=(50, 180), font_size=72):
+    """
+    Screen area covered by draw_speed_display for any speed up to three digits.
+    """
+    width, height = get_font(font_size, True).size("888 km/h")
+    return pygame.Rect(pos[0], pos[1], width, height)
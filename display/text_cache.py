@@ -0,0 +1,57 @@
+import functools
+import pygame
+
+
+@functools.lru_cache(maxsize=32)
+def get_font(size, bold=False):
+    """
+    Returns a cached system font. pygame.font.SysFont scans and loads the font file on
+    every call, which is far too slow to do per widget per frame.
+    """
+    return pygame.font.SysFont(None, size, bold=bold)
+
+
+@functools.lru_cache(maxsize=512)
+def render_text(text, size, color, bold=False):
+    """
+    Returns a cached rendered text surface keyed by its value and style. Dashboard values
+    repeat constantly (gears, speeds, rpm steps), so most frames hit the cache.
+    The returned surface is shared and must not be drawn on.
+    """
+    return get_font(size, bold).render(text, True, color)
+
+
+def clear_caches():
+    render_text.cache_clear()
+    get_font.cache_clear()
+
+
+class GlyphNumber:
+    """
+    Draws integers from pre-rendered digit glyphs with a fixed (tabular) advance, so a
+    value that changes every frame costs a few small blits instead of a text render.
+    """
+    def __init__(self, size, color, prefix="", bold=False):
+        font = get_font(size, bold)
+        self.prefix = font.render(prefix, True, color) if prefix else None
+        self.glyphs = [font.render(str(d), True, color) for d in range(10)]
+        self.minus = font.render("-", True, color)
+        self.advance = max(g.get_width() for g in self.glyphs)
+        self.prefix_width = self.prefix.get_width() if self.prefix else 0
+
+    def draw(self, screen, value, pos):
+        x, y = pos
+        if self.prefix:
+            screen.blit(self.prefix, pos)
+            x += self.prefix_width
+        value = int(value)
+        if value < 0:
+            screen.blit(self.minus, (x, y))
+            x += self.minus.get_width()
+            value = -value
+        digits = str(value)
+        glyphs = self.glyphs
+        advance = self.advance
+        for ch in digits:
+            screen.blit(glyphs[ord(ch) - 48], (x, y))
+            x += advance
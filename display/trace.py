@@ -0,0 +1,62 @@
+import numpy as np
+import pygame
+
+from display.widgets import Widget
+
+
+class TraceWidget(Widget):
+    """
+    Live trace of utils/history.py channels over the last `seconds`. traces is a sequence
+    of (channel, low, high, colour): each channel is scaled so low..high spans the widget
+    height. Every redraw resamples the history to one point per pixel column with a single
+    vectorized search on its contiguous timestamp view, so the cost depends on the widget
+    width, not on how much history is kept. Only redrawn when a new sample was pushed.
+    """
+    opaque = True
+
+    def __init__(self, rect, history, traces, seconds=10.0, background=(0, 0, 0), grid_color=(50, 50, 50),
+                 line_width=2):
+        super().__init__(rect, background)
+        self.history = history
+        self.traces = list(traces)
+        self.seconds = seconds
+        self.grid_color = grid_color
+        self.line_width = line_width
+        width = max(self.rect.width, 2)
+        # Time of each pixel column relative to the newest sample, and its x coordinate
+        self._offsets = np.linspace(-seconds * 1e9, 0, width).astype(np.int64)
+        self._xs = np.arange(width) + self.rect.x
+
+    def update(self):
+        """
+        Call once per frame: marks the widget dirty if the history moved on.
+        """
+        self.set_value(self.history.pushed or None)
+
+    def render(self, screen):
+        rect = self.rect
+        screen.fill(self.background, rect)
+        for y in (rect.top, rect.centery, rect.bottom - 1):
+            pygame.draw.line(screen, self.grid_color, (rect.left, y), (rect.right - 1, y))
+        h = self.history
+        times = h.times()
+        if len(times) < 2:
+            return
+        # Newest sample at or before each column; -1 for columns older than the history
+        idx = np.searchsorted(times, times[-1] + self._offsets, side='right') - 1
+        covered = idx >= 0
+        idx = idx[covered]
+        xs = self._xs[covered]
+        for channel, low, high, color in self.traces:
+            values = h.values(channel)[idx]
+            ys = rect.bottom - 1 - (values - low) * ((rect.height - 1) / (high - low))
+            keep = np.isfinite(ys)
+            if np.count_nonzero(keep) < 2:
+                continue
+            points = np.column_stack((xs[keep], np.clip(ys[keep], rect.top, rect.bottom - 1)))
+            pygame.draw.lines(screen, color, False, points.tolist(), self.line_width)
+
+# Example usage:
+# trace = TraceWidget((20, 340, 400, 120), history, [("rpm", 0, 16000, (255, 200, 0)), ("lean_angle", -60, 60, (0, 200, 255))])
+# trace.update()
+# layer = WidgetLayer([..., trace])
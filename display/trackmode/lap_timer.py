@@ -0,0 +1,211 @@
+import bisect
+import math
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from utils.helpers import LocalProjection, project_onto_segment, segment_intersection
+
+LatLon = Tuple[float, float]
+
+
+class LapEvent(NamedTuple):
+    kind: str  # 'lap_start', 'lap_end' or 'checkpoint'
+    t: float  # interpolated crossing time, same clock as LapTimer.update()
+    lap: int
+    name: Optional[str] = None  # checkpoint name
+    elapsed: Optional[float] = None  # lap time for 'lap_end', split time for 'checkpoint'
+    delta: Optional[float] = None  # vs best lap (negative = faster)
+    best: bool = False  # 'lap_end' only: this lap is the new best
+
+
+class ReferenceLap:
+    """
+    A completed lap as a polyline in local metres with elapsed time and distance along
+    track per vertex. A uniform grid over the vertices finds the nearest point to a
+    position without scanning the whole lap, and distance -> time lookups use bisect.
+    """
+    def __init__(self, points: Sequence[Tuple[float, float, float]], cell_size: float = 25.0):
+        self.xy = [(x, y) for x, y, _ in points]
+        self.elapsed = [e for _, _, e in points]
+        self.distance = [0.0]
+        for (x0, y0), (x1, y1) in zip(self.xy, self.xy[1:]):
+            self.distance.append(self.distance[-1] + math.hypot(x1 - x0, y1 - y0))
+        self.length = self.distance[-1]
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for i, (x, y) in enumerate(self.xy):
+            self.cells.setdefault(self._cell(x, y), []).append(i)
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def _candidates(self, x, y, max_rings=4):
+        # The 3x3 block around the cell always, since the nearest segment may start in a
+        # neighbouring cell; further rings only while nothing has been found
+        cx, cy = self._cell(x, y)
+        found = []
+        for ring in range(max_rings + 1):
+            for gx in range(cx - ring, cx + ring + 1):
+                for gy in range(cy - ring, cy + ring + 1):
+                    if ring and abs(gx - cx) != ring and abs(gy - cy) != ring:
+                        continue
+                    found.extend(self.cells.get((gx, gy), ()))
+            if found and ring >= 1:
+                break
+        return found
+
+    def locate(self, x, y, hint_elapsed=None, window=10.0):
+        """
+        Nearest point on the reference polyline to (x, y). Returns (distance along track,
+        elapsed time) or None if the position is far from the reference lap.
+        hint_elapsed (the current lap time) disambiguates places where the track passes
+        close to itself, e.g. the start and end of the lap at the finish line.
+        """
+        candidates = self._candidates(x, y)
+        if not candidates:
+            return None
+        if hint_elapsed is not None:
+            near = [i for i in candidates if abs(self.elapsed[i] - hint_elapsed) <= window]
+            if near:
+                candidates = near
+        # Segments touching a candidate vertex
+        last = len(self.xy) - 1
+        segments = {a for i in candidates for a in (i - 1, i) if 0 <= a < last}
+        best = None
+        p = (x, y)
+        xy = self.xy
+        for a in segments:
+            t, d2 = project_onto_segment(p, xy[a], xy[a + 1])
+            if best is None or d2 < best[0]:
+                best = (d2, a, t)
+        if best is None:
+            return self.distance[candidates[0]], self.elapsed[candidates[0]]
+        _, a, t = best
+        distance = self.distance[a] + t * (self.distance[a + 1] - self.distance[a])
+        elapsed = self.elapsed[a] + t * (self.elapsed[a + 1] - self.elapsed[a])
+        return distance, elapsed
+
+    def elapsed_at_distance(self, distance):
+        i = bisect.bisect_right(self.distance, distance)
+        if i <= 0:
+            return self.elapsed[0]
+        if i >= len(self.distance):
+            return self.elapsed[-1]
+        d0, d1 = self.distance[i - 1], self.distance[i]
+        t = (distance - d0) / (d1 - d0) if d1 > d0 else 0.0
+        return self.elapsed[i - 1] + t * (self.elapsed[i] - self.elapsed[i - 1])
+
+
+class LapTimer:
+    """
+    Detects start/finish and checkpoint crossings from consecutive GPS fixes by segment
+    intersection, interpolating the crossing time between fixes, keeps the best lap as
+    a ReferenceLap and computes the live delta against it.
+    Lines are given as ((lat1, lon1), (lat2, lon2)); checkpoints must be crossed in order.
+    """
+    def __init__(self, start_line: Tuple[LatLon, LatLon], checkpoints: Sequence[Tuple[str, Tuple[LatLon, LatLon]]] = (),
+                 min_lap_s: float = 20.0, cell_size: float = 25.0):
+        (lat1, lon1), (lat2, lon2) = start_line
+        self.proj = LocalProjection((lat1 + lat2) / 2, (lon1 + lon2) / 2)
+        self.start_line = (self.proj.to_xy(lat1, lon1), self.proj.to_xy(lat2, lon2))
+        self.checkpoints = [
+            (name, (self.proj.to_xy(*a), self.proj.to_xy(*b))) for name, (a, b) in checkpoints
+        ]
+        self.min_lap_s = min_lap_s
+        self.cell_size = cell_size
+        self.lap = 0
+        self.lap_start_t = None
+        self.best_lap_time = None
+        self.last_lap_time = None
+        self.reference: Optional[ReferenceLap] = None
+        self.best_splits: Dict[str, float] = {}
+        self.delta = None
+        self._splits: Dict[str, float] = {}
+        self._next_checkpoint = 0
+        self._points: List[Tuple[float, float, float]] = []
+        self._prev = None
+
+    def _start_lap(self, tc, x, y, events):
+        self.lap += 1
+        self.lap_start_t = tc
+        self._points = [(x, y, 0.0)]
+        self._splits = {}
+        self._next_checkpoint = 0
+        self.delta = 0.0 if self.reference is not None else None
+        events.append(LapEvent('lap_start', tc, self.lap))
+
+    def _end_lap(self, tc, x, y, events):
+        lap_time = tc - self.lap_start_t
+        self._points.append((x, y, lap_time))
+        best = self.best_lap_time is None or lap_time < self.best_lap_time
+        delta = None if self.best_lap_time is None else lap_time - self.best_lap_time
+        if best:
+            self.best_lap_time = lap_time
+            self.best_splits = dict(self._splits)
+            self.reference = ReferenceLap(self._points, self.cell_size)
+        self.last_lap_time = lap_time
+        events.append(LapEvent('lap_end', tc, self.lap, elapsed=lap_time, delta=delta, best=best))
+
+    def update(self, t: float, lat: float, lon: float) -> List[LapEvent]:
+        """
+        Feed one GPS fix (t in seconds). Returns the events it triggered, in time order.
+        """
+        x, y = self.proj.to_xy(lat, lon)
+        events: List[LapEvent] = []
+        prev = self._prev
+        self._prev = (x, y, t)
+        if prev is None or t <= prev[2]:
+            return events
+        px, py, pt = prev
+        moved = ((px, py), (x, y))
+
+        def crossing(line):
+            hit = segment_intersection(moved[0], moved[1], line[0], line[1])
+            if hit is None:
+                return None
+            s = hit[0]
+            return pt + s * (t - pt), px + s * (x - px), py + s * (y - py)
+
+        if self.lap_start_t is not None and self._next_checkpoint < len(self.checkpoints):
+            name, line = self.checkpoints[self._next_checkpoint]
+            hit = crossing(line)
+            if hit is not None:
+                tc = hit[0]
+                split = tc - self.lap_start_t
+                self._splits[name] = split
+                self._next_checkpoint += 1
+                best_split = self.best_splits.get(name)
+                events.append(LapEvent('checkpoint', tc, self.lap, name=name, elapsed=split,
+                                       delta=None if best_split is None else split - best_split))
+
+        hit = crossing(self.start_line)
+        if hit is not None:
+            tc, cx, cy = hit
+            if self.lap_start_t is None:
+                self._start_lap(tc, cx, cy, events)
+            elif tc - self.lap_start_t >= self.min_lap_s:
+                self._end_lap(tc, cx, cy, events)
+                self._start_lap(tc, cx, cy, events)
+
+        if self.lap_start_t is not None and t > self.lap_start_t:
+            elapsed = t - self.lap_start_t
+            self._points.append((x, y, elapsed))
+            if self.reference is not None:
+                located = self.reference.locate(x, y, elapsed)
+                if located is not None:
+                    self.delta = elapsed - located[1]
+        return events
+
+    def status(self, t: float) -> Dict[str, Optional[float]]:
+        return {
+            'lap': self.lap,
+            'lap_time': None if self.lap_start_t is None else t - self.lap_start_t,
+            'last_lap': self.last_lap_time,
+            'best_lap': self.best_lap_time,
+            'delta': self.delta,
+        }
+
+# Example usage:
+# timer = LapTimer(((48.0001, 11.0), (47.9999, 11.0)), checkpoints=[("T3", ((48.001, 11.004), (48.0012, 11.004)))])
+# for event in timer.update(time.time(), lat, lon):
+#     print(event)
+# print(timer.status(time.time())['delta'])
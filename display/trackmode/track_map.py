@@ -0,0 +1,154 @@
+import sqlite3
+from collections import deque
+
+import pygame
+
+from display.widgets import Widget
+from utils.helpers import LocalProjection, simplify_to
+
+
+def load_track(db_path, track_name=None, outline_laps=5):
+    """
+    Reads the polylines for the track map from gps_path: the best lap of track_name (the
+    most recent lap if none is marked best) and the last outline_laps laps for the outline.
+    Returns (outline, best_lap) as lists of (lat, lon); both empty if nothing was logged.
+    """
+    where, args = "end_time IS NOT NULL", []
+    if track_name:
+        where += " AND track_name = ?"
+        args.append(track_name)
+    try:
+        with sqlite3.connect(db_path) as conn:
+            laps = conn.execute(f"SELECT id, best FROM laps WHERE {where} ORDER BY id DESC", args).fetchall()
+            if not laps:
+                return [], []
+            best_id = next((lap_id for lap_id, best in laps if best), laps[0][0])
+            path = lambda lap_ids: conn.execute(
+                f"SELECT latitude, longitude FROM gps_path WHERE lap_id IN ({','.join('?' * len(lap_ids))}) "
+                "ORDER BY timestamp", lap_ids).fetchall()
+            return path([lap_id for lap_id, _ in laps[:outline_laps]]), path([best_id])
+    except sqlite3.Error as e:
+        print(f"Track map load error: {e}")
+        return [], []
+
+
+class TrackMapWidget(Widget):
+    """
+    Track map with the rider's position. The track outline and best-lap line are
+    projected to pixels and simplified (Douglas-Peucker, at most max_vertices each) once in
+    set_track() and rendered to a cached surface; each frame blits that surface and draws
+    only the marker and the last trail_length positions, so the cost stays the same however
+    long the session gets.
+    Without a track, the map is centred on the first fix and spans default_span_m.
+    """
+    opaque = True
+
+    def __init__(self, rect, max_vertices=400, trail_length=50, trail_step_px=2, padding=12, default_span_m=1500,
+                 outline_color=(70, 70, 70), outline_width=9, best_color=(0, 200, 255), trail_color=(255, 200, 0),
+                 marker_color=(255, 60, 60), marker_radius=5):
+        super().__init__(rect)
+        self.max_vertices = max_vertices
+        self.padding = padding
+        self.default_span_m = default_span_m
+        self.trail_step2 = trail_step_px * trail_step_px
+        self.outline_color = outline_color
+        self.outline_width = outline_width
+        self.best_color = best_color
+        self.trail_color = trail_color
+        self.marker_color = marker_color
+        self.marker_radius = marker_radius
+        self.trail = deque(maxlen=trail_length)
+        self.projection = None
+        self.vertices = (0, 0)
+        self._surface = None
+        self._transform = None
+        self.set_track([], [])
+
+    def set_track(self, outline, best_lap=()):
+        """
+        Projects, fits, simplifies and pre-renders the track. outline and best_lap are
+        sequences of (lat, lon). Call again when a new best lap is set.
+        """
+        points = list(outline) + list(best_lap)
+        self.trail.clear()
+        self.value = None
+        if not points:
+            self.projection = None
+            self._transform = None
+            self._render_base((), ())
+            return
+        lat0 = sum(p[0] for p in points) / len(points)
+        lon0 = sum(p[1] for p in points) / len(points)
+        self.projection = LocalProjection(lat0, lon0)
+        xy = [self.projection.to_xy(lat, lon) for lat, lon in points]
+        xs = [p[0] for p in xy]
+        ys = [p[1] for p in xy]
+        self._fit(min(xs), max(xs), min(ys), max(ys))
+        # Detail finer than half a pixel is invisible, so start from there
+        outline_px = simplify_to([self._to_px(x, y) for x, y in xy[:len(outline)]], self.max_vertices, 0.5)
+        best_px = simplify_to([self._to_px(x, y) for x, y in xy[len(outline):]], self.max_vertices, 0.5)
+        self._render_base(outline_px, best_px)
+
+    def _fit(self, x0, x1, y0, y1):
+        width = max(self.rect.width - 2 * self.padding, 1)
+        height = max(self.rect.height - 2 * self.padding, 1)
+        scale = min(width / max(x1 - x0, 1.0), height / max(y1 - y0, 1.0))
+        # Centre the track in the widget; screen y grows downwards
+        cx = self.rect.x + self.rect.width / 2 - (x0 + x1) / 2 * scale
+        cy = self.rect.y + self.rect.height / 2 + (y0 + y1) / 2 * scale
+        self._transform = (scale, cx, cy)
+
+    def _to_px(self, x, y):
+        scale, cx, cy = self._transform
+        return cx + x * scale, cy - y * scale
+
+    def _render_base(self, outline_px, best_px):
+        surface = pygame.Surface(self.rect.size)
+        surface.fill(self.background)
+        offset = (-self.rect.x, -self.rect.y)
+        local = lambda pts: [(x + offset[0], y + offset[1]) for x, y in pts]
+        if len(outline_px) > 1:
+            pygame.draw.lines(surface, self.outline_color, False, local(outline_px), self.outline_width)
+            # Round the joints of the wide line
+            for p in local(outline_px):
+                pygame.draw.circle(surface, self.outline_color, p, self.outline_width // 2)
+        if len(best_px) > 1:
+            pygame.draw.aalines(surface, self.best_color, False, local(best_px))
+        self._surface = surface.convert() if pygame.display.get_surface() else surface
+        self.vertices = (len(outline_px), len(best_px))
+        self.dirty = True
+
+    def set_position(self, lat, lon):
+        """
+        Moves the marker; marks the widget dirty only if it moved by a whole pixel.
+        """
+        if lat is None or lon is None:
+            return
+        if self.projection is None:
+            self.projection = LocalProjection(lat, lon)
+            half = self.default_span_m / 2
+            self._fit(-half, half, -half, half)
+        px = self._to_px(*self.projection.to_xy(lat, lon))
+        pos = (int(px[0]), int(px[1]))
+        if pos == self.value:
+            return
+        trail = self.trail
+        if not trail or (pos[0] - trail[-1][0]) ** 2 + (pos[1] - trail[-1][1]) ** 2 >= self.trail_step2:
+            trail.append(pos)
+        self.value = pos
+        self.dirty = True
+
+    def set_value(self, value):
+        self.set_position(*value)
+
+    def render(self, screen):
+        screen.blit(self._surface, self.rect)
+        if len(self.trail) > 1:
+            pygame.draw.lines(screen, self.trail_color, False, self.trail, 3)
+        pygame.draw.circle(screen, self.marker_color, self.value, self.marker_radius)
+
+# Example usage:
+# track_map = TrackMapWidget((440, 200, 340, 260))
+# track_map.set_track(*load_track("telemetry.db", "Mugello"))
+# track_map.set_position(43.997, 11.371)
+# layer = WidgetLayer([track_map])
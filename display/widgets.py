@@ -0,0 +1,135 @@
+from abc import ABC, abstractmethod
+
+import pygame
+from display.rpm_bar import draw_rpm_bar, rpm_bar_rect
+from display.speed_display import draw_speed_display, speed_display_rect
+from display.gear_indicator import draw_gear_indicator, gear_indicator_rect
+from display.text_cache import render_text
+
+
+class Widget(ABC):
+    """
+    A screen region that is redrawn only when its value changes. Drawing is clipped to
+    rect, so the rect is exactly the area that has to be pushed to the display.
+    Widgets whose render() paints every pixel of rect set opaque so the layer skips clearing them.
+    Subclasses must implement render(); one that does not fails when constructed.
+    """
+    opaque = False
+
+    def __init__(self, rect, background=(0, 0, 0)):
+        self.rect = pygame.Rect(rect)
+        self.background = background
+        self.value = None
+        self.visible = True
+        self.dirty = True
+
+    def set_value(self, value):
+        if value != self.value:
+            self.value = value
+            self.dirty = True
+
+    def set_visible(self, visible):
+        if visible != self.visible:
+            self.visible = visible
+            self.dirty = True
+
+    @abstractmethod
+    def render(self, screen):
+        """
+        Draws the current value onto screen within rect.
+        """
+
+
+class RpmBarWidget(Widget):
+    def __init__(self, pos=(50, 100), size=(600, 40), max_rpm=16000):
+        super().__init__(rpm_bar_rect(pos, size))
+        self.pos = pos
+        self.size = size
+        self.max_rpm = max_rpm
+
+    def render(self, screen):
+        draw_rpm_bar(screen, self.value, self.max_rpm, self.pos, self.size)
+
+
+class SpeedWidget(Widget):
+    def __init__(self, pos=(50, 180), font_size=72):
+        super().__init__(speed_display_rect(pos, font_size))
+        self.pos = pos
+        self.font_size = font_size
+
+    def render(self, screen):
+        draw_speed_display(screen, self.value, self.pos, self.font_size)
+
+
+class GearWidget(Widget):
+    def __init__(self, pos=(700, 100), size=80):
+        super().__init__(gear_indicator_rect(pos, size))
+        self.pos = pos
+        self.size = size
+
+    def render(self, screen):
+        draw_gear_indicator(screen, self.value, self.pos, self.size)
+
+
+class TextLinesWidget(Widget):
+    """
+    Fixed-area block of text lines, used for the TAB debug overlay.
+    """
+    def __init__(self, rect, font_size=36, line_height=32, color=(255, 255, 255)):
+        super().__init__(rect)
+        self.font_size = font_size
+        self.line_height = line_height
+        self.color = color
+
+    def render(self, screen):
+        for i, line in enumerate(self.value or ()):
+            screen.blit(render_text(line, self.font_size, self.color), (self.rect.x, self.rect.y + i * self.line_height))
+
+
+class WidgetLayer:
+    """
+    Draws a stack of widgets (bottom to top) and returns only the rects that changed,
+    for pygame.display.update(rects).
+    """
+    def __init__(self, widgets, background=(0, 0, 0)):
+        self.widgets = list(widgets)
+        self.background = background
+        self._full_redraw = True
+
+    def invalidate(self):
+        """
+        Forces a full redraw on the next frame (first frame, resize, mode switch).
+        """
+        self._full_redraw = True
+
+    def draw(self, screen):
+        if self._full_redraw:
+            screen.fill(self.background)
+            for w in self.widgets:
+                w.dirty = True
+        dirty = [w for w in self.widgets if w.dirty]
+        if not dirty:
+            return []
+        # Clearing a widget also wipes whatever overlaps it, so overlapping widgets must be redrawn too
+        changed = True
+        while changed:
+            changed = False
+            for w in self.widgets:
+                if not w.dirty and any(w.rect.colliderect(d.rect) for d in dirty):
+                    w.dirty = True
+                    dirty.append(w)
+                    changed = True
+        for w in dirty:
+            if not (w.opaque and w.visible and w.value is not None):
+                screen.fill(w.background, w.rect)
+        for w in self.widgets:
+            if w.dirty:
+                if w.visible and w.value is not None:
+                    screen.set_clip(w.rect)
+                    w.render(screen)
+                    screen.set_clip(None)
+                w.dirty = False
+        if self._full_redraw:
+            self._full_redraw = False
+            return [screen.get_rect()]
+        return [w.rect for w in dirty]
@@ -1,24 +1,58 @@
-import pygame
-from config import CONFIG
-from display.rpm_bar import draw_rpm_bar
-from display.speed_display import draw_speed_display
-from display.gear_indicator import draw_gear_indicator
 import socket
-import json
 import threading
 import os
+import signal
 import time
+from utils.startup import StartupProfile
 
-pygame.init()
-screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-clock = pygame.time.Clock()
-font = pygame.font.SysFont(None, 36)
+# Created before the heavy imports so they are counted in the startup report
+profile = StartupProfile("display")
+with profile.phase("imports"):
+    import pygame
+    from config import CONFIG
+    from display.widgets import SpeedWidget, GearWidget, TextLinesWidget, WidgetLayer
+    from display.rpm_gauge import RpmGauge
+    from display.trackmode.track_map import TrackMapWidget, load_track
+    from display.trace import TraceWidget
+    from storage.sqlite_logger import DB_PATH
+    from utils.shm_ring import ShmRingReader
+    from utils import frame
+    from utils.pubsub import subscribe
+    from utils.metrics import Metrics, StatsServer
+    from utils.state import FrameState, StateStore
+    from utils.history import History
+    from display.pacing import SmoothedValue, FramePacer
+
+with profile.phase("display_init"):
+    # Only the subsystems the dash uses: pygame.init() also brings up audio and joysticks,
+    # which can take seconds on a Pi without a sound device
+    pygame.display.init()
+    pygame.font.init()
+vsync = CONFIG.get("display_vsync", False)
+with profile.phase("set_mode"):
+    screen = None
+    if vsync:
+        # vsync needs pygame's renderer (SCALED) and an explicit size
+        info = pygame.display.Info()
+        try:
+            screen = pygame.display.set_mode((info.current_w, info.current_h), pygame.FULLSCREEN | pygame.SCALED, vsync=1)
+        except pygame.error as e:
+            print(f"vsync not available, pacing on the clock instead: {e}")
+            vsync = False
+    if screen is None:
+        screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+
+# supervisor.py (or systemd) stops the display with SIGTERM: leave the loop and clean up as on ESC
+signal.signal(signal.SIGTERM, lambda *_: pygame.event.post(pygame.event.Event(pygame.QUIT)))
 
 show_fps = CONFIG.get("show_fps", True)
 target_fps = CONFIG.get("display_fps", 60)
 
 # Set up Unix socket for receiving data
-SOCKET_PATH = "/tmp/dashboard_display.sock"
+SOCKET_PATH = CONFIG.get("display_socket", "/tmp/dashboard_display.sock")
+HUB_PATH = CONFIG.get("hub_socket", "/tmp/dashboard.sock")
+# With the shm ring, frames come from shared memory and the socket is only a fallback
+subscribe_hub = CONFIG.get("transport", "shm") != "shm"
 if os.path.exists(SOCKET_PATH):
     os.remove(SOCKET_PATH)
 
@@ -30,57 +64,251 @@ except OSError:
     os.remove(SOCKET_PATH)
     sock.bind(SOCKET_PATH)
 
-# Shared data for live updates
-live_data = {"rpm": 0, "speed": 0, "gear": 1, "lean_angle": 0.0, "gps_lat": None, "gps_lon": None, "timestamp": None}
+# Latest received frame, written by the socket listener thread and poll_ring. Each message
+# publishes a new snapshot, so the render loop never draws fields from two different frames
+state = StateStore(FrameState())
 
 show_debug = False
 
+# The last history_seconds of what was shown, one sample per frame with new data, for the
+# trace and windowed stats without going back to the database
+history = History(max(int(CONFIG.get("history_seconds", 300) * target_fps), 2))
+peak_rpm = history.window("rpm", 10.0)
+lean_range = history.window("lean_angle", 10.0)
+
+# Per-stage latency histograms for this process (see utils/metrics.py); the stats socket
+# is only opened after the first frame (start_deferred)
+metrics = Metrics()
+stats_server = None
+
 def socket_listener():
+    rx = bytearray(frame.MAX_MESSAGE_SIZE)
+    view = memoryview(rx)
+    # Register with the acquisition hub, and again whenever frames stop (e.g. it restarted)
+    sock.settimeout(2.0)
+    if subscribe_hub:
+        subscribe(sock, HUB_PATH)
     while True:
         try:
-            data, _ = sock.recvfrom(1024)
-            msg = json.loads(data.decode())
-            for k in ("rpm", "speed", "gear", "lean_angle", "gps_lat", "gps_lon", "timestamp"):
-                if k in msg:
-                    live_data[k] = msg[k]
+            nbytes = sock.recv_into(rx)
+        except socket.timeout:
+            if subscribe_hub:
+                subscribe(sock, HUB_PATH)
+            continue
+        except OSError:
+            continue
+        try:
+            # Full frames replace every field, deltas only the ones that changed
+            snap = state.update(**frame.decode(view[:nbytes]))
+            if snap.timestamp:
+                metrics.record('transport', time.monotonic_ns() - snap.timestamp)
         except Exception:
             continue
 
-# Start socket listener in a background thread
+# Start socket listener in a background thread; it stays up as the fallback transport
 threading.Thread(target=socket_listener, daemon=True).start()
 
+# Shared memory ring written by data_acquisition (attached lazily, acquisition may start later)
+use_shm = CONFIG.get("transport", "shm") == "shm"
+shm_path = CONFIG.get("shm_path", "/dev/shm/r3_dashboard")
+ring = None
+
+def poll_ring():
+    global ring
+    if ring is None:
+        # Attaching is the readiness check: it succeeds on the first frame after acquisition
+        # has written the ring header, and a miss is one failed open()
+        ring = ShmRingReader.attach(shm_path)
+        if ring is None:
+            return
+    sample = ring.read_new()
+    if sample is not None:
+        snap = state.update(**frame.frame_to_dict(sample))
+        metrics.record('transport', time.monotonic_ns() - snap.timestamp)
+
+# Widgets redraw only when their value changes; only their rects are pushed to the display
+with profile.phase("widgets"):
+    rpm_widget = RpmGauge(
+        max_rpm=CONFIG.get("rpm_max", 16000),
+        stops=CONFIG.get("rpm_gradient_stops", ((0.0, (0, 200, 0)), (0.7, (255, 200, 0)), (0.9, (255, 0, 0)))),
+        style=CONFIG.get("rpm_style", "gradient"),
+        redline_rpm=CONFIG.get("rpm_redline"),
+        shift_rpm=CONFIG.get("rpm_shift_light"),
+        flash_hz=CONFIG.get("rpm_shift_flash_hz", 8),
+        peak_hold_s=CONFIG.get("rpm_peak_hold_s", 1.5)
+    )
+    speed_widget = SpeedWidget()
+    gear_widget = GearWidget()
+    track_map = TrackMapWidget(
+        CONFIG.get("track_map_rect", (440, 200, 340, 260)),
+        max_vertices=CONFIG.get("track_map_max_vertices", 400),
+        trail_length=CONFIG.get("track_map_trail", 50)
+    )
+    show_map = CONFIG.get("track_map_enabled", True)
+    lean_max = CONFIG.get("trace_lean_max", 60)
+    trace_widget = TraceWidget(
+        CONFIG.get("trace_rect", (20, 340, 400, 120)), history,
+        (("rpm", 0, CONFIG.get("rpm_max", 16000), (255, 200, 0)), ("lean_angle", -lean_max, lean_max, (0, 200, 255))),
+        seconds=CONFIG.get("trace_seconds", 10)
+    )
+    show_trace = CONFIG.get("trace_enabled", True)
+    debug_widget = TextLinesWidget((20, 60, 760, 10 * 32))
+    layer = WidgetLayer([rpm_widget, speed_widget, gear_widget, track_map, trace_widget, debug_widget])
+
+# The track is read from the database off the render thread and applied by the main loop
+loaded_track = None
+
+def load_track_map():
+    global loaded_track
+    loaded_track = load_track(DB_PATH, CONFIG.get("track_name"))
+
+def start_deferred():
+    """
+    What the first frame does not need: the stats socket and the track map, which reads
+    the laps database. Started once the first frame is on the glass.
+    """
+    global stats_server
+    if CONFIG.get("metrics_enabled", True):
+        stats_server = StatsServer(CONFIG.get("display_metrics_socket", "/tmp/r3_display_metrics.sock"), metrics,
+                                   lambda: {'frames': pacer.as_dict()})
+        stats_server.start_thread()
+    if show_map:
+        threading.Thread(target=load_track_map, daemon=True).start()
+
+def latency_line(label, name):
+    h = metrics.histogram(name)
+    if not h.count:
+        return f"{label}: -"
+    return f"{label}: p50 {h.percentile(0.5) / 1000:.1f} / p99 {h.percentile(0.99) / 1000:.1f} ms"
+
+def peak_line():
+    if peak_rpm.max() is None:
+        return "Last 10 s: -"
+    lean = max(abs(lean_range.min()), abs(lean_range.max()))
+    return f"Last 10 s: peak {peak_rpm.max():.0f} rpm, max lean {lean:.1f}°, mean {peak_rpm.mean():.0f} rpm"
+
+def frames_line():
+    stats = pacer.as_dict()
+    dropped = stats['dropped'] / max(stats['frames'] - stats['idle_frames'], 1) * 100
+    mode = "idle" if stats['idle'] else "active"
+    return (f"FPS: {stats['achieved_fps']:.0f} ({mode}, target {stats['target_fps']:.0f}), "
+            f"dropped {stats['dropped']} ({dropped:.1f}%)")
+
+# Data arrives slower than the frame rate: the gauges ease between samples instead of
+# stepping, and frames drop to the idle rate once nothing on screen moves
+smoothing = CONFIG.get("gauge_smoothing", "damp")
+smooth_time_s = CONFIG.get("gauge_smooth_time_s", 0.08)
+rpm_value = SmoothedValue(smoothing, smooth_time_s)
+speed_value = SmoothedValue(smoothing, smooth_time_s)
+pacer = FramePacer(target_fps, CONFIG.get("display_idle_fps", 10), CONFIG.get("display_idle_after_s", 0.5),
+                   vsync=vsync, metrics=metrics)
+
+def wake():
+    """
+    Polled while idle: new data or input brings the next frame forward.
+    """
+    if use_shm:
+        poll_ring()
+    return state.snapshot.version != shown_version or pygame.event.peek()
+
+shown_seq = None
+shown_version = None
+booting = True
 running = True
 while running:
-    for event in pygame.event.get():
+    frame_start = pacer.begin()
+    events = pygame.event.get()
+    for event in events:
         if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
             running = False
         elif event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
             show_debug = not show_debug
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_m:
+            show_map = not show_map
+            if show_map:
+                # Pick up laps (and a new best lap) logged since the map was last loaded
+                threading.Thread(target=load_track_map, daemon=True).start()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+            show_trace = not show_trace
+
+    if use_shm:
+        poll_ring()
+
+    # Draw live sensor data; one snapshot per frame
+    snap = state.snapshot
+    new_data = snap.version != shown_version
+    shown_version = snap.version
+    if new_data:
+        sample_ns = snap.timestamp or frame_start
+        rpm_value.set(snap.rpm, sample_ns)
+        speed_value.set(snap.speed, sample_ns)
+        gear_widget.set_value(snap.gear)
+        if snap.timestamp:
+            history.push(snap.timestamp, (snap.rpm, snap.speed, snap.gear, snap.lean_angle, snap.gps_lat, snap.gps_lon))
+
+    # The gauge is fed every frame: its shift light flash and peak hold run on the clock
+    rpm_widget.set_rpm(round(rpm_value.update(frame_start)), frame_start / 1e9)
+    speed = speed_value.update(frame_start)
+    speed_widget.set_value(round(speed) if speed is not None else None)
 
-    screen.fill((0, 0, 0))
+    track_loaded = loaded_track is not None
+    if track_loaded:
+        track_map.set_track(*loaded_track)
+        loaded_track = None
+    track_map.set_visible(show_map)
+    if show_map and new_data:
+        track_map.set_position(snap.gps_lat, snap.gps_lon)
 
-    # Draw live sensor data
-    draw_rpm_bar(screen, live_data["rpm"])
-    draw_speed_display(screen, live_data["speed"])
-    draw_gear_indicator(screen, live_data["gear"])
+    # The trace and the overlay are extras: a frame already running late leaves them to the next one
+    trace_widget.set_visible(show_trace)
+    if show_trace and pacer.within_budget():
+        trace_widget.update()
 
-    if show_debug:
-        debug_lines = [
-            f"Lean Angle: {live_data['lean_angle']:.2f}°",
-            f"GPS: {live_data['gps_lat']}, {live_data['gps_lon']}",
-            f"Timestamp: {live_data['timestamp']}",
-            f"Frame Time: {clock.get_time()} ms",
-            f"FPS: {int(clock.get_fps())}"
-        ]
-        for i, line in enumerate(debug_lines):
-            debug_text = font.render(line, True, (255, 255, 255))
-            screen.blit(debug_text, (20, 60 + i * 32))
+    debug_widget.set_visible(show_debug)
+    if show_debug and pacer.within_budget():
+        debug_widget.set_value((
+            f"Lean Angle: {snap.lean_angle:.2f}°",
+            f"GPS: {snap.gps_lat}, {snap.gps_lon}",
+            peak_line(),
+            f"Timestamp: {snap.timestamp} (seq {snap.seq})",
+            frames_line(),
+            latency_line("Frame time", "frame_time"),
+            latency_line("Sensor->glass", "glass"),
+            latency_line("Transport", "transport"),
+            latency_line("Render", "render"),
+            latency_line("Frame jitter", "frame_jitter")
+        ))
 
-    pygame.display.flip()
-    clock.tick(target_fps)
+    render_start = time.monotonic_ns()
+    dirty_rects = layer.draw(screen)
+    if dirty_rects:
+        pygame.display.update(dirty_rects)
+    now_ns = time.monotonic_ns()
+    metrics.record('render', now_ns - render_start)
+    if snap.seq != shown_seq and snap.sampled:
+        # First frame on screen carrying this sample
+        shown_seq = snap.seq
+        metrics.record('glass', now_ns - snap.sampled)
+    if booting:
+        if "first_frame" not in profile.marks:
+            profile.mark("first_frame")
+            start_deferred()
+        if shown_seq is not None:
+            profile.mark("first_rpm")
+            booting = False
+            print(profile.report())
+            profile.dump(CONFIG.get("startup_report"))
+    pacer.end(new_data or events or track_loaded or booting or rpm_value.moving or speed_value.moving)
+    # The shift light flash and the peak hold change the gauge between samples
+    gauge_change = rpm_widget.next_change()
+    pacer.wait(wake, int(gauge_change * 1e9) if gauge_change is not None else None)
 
 # Cleanup on exit
 try:
+    if ring is not None:
+        ring.close()
+    if stats_server is not None:
+        stats_server.close()
     sock.close()
     if os.path.exists(SOCKET_PATH):
         os.remove(SOCKET_PATH)
@@ -1,46 +1,230 @@
-import can
-from typing import Dict, Optional
+import threading
+import time
+from typing import Dict, List, Optional
+from sensors.can_signals import Signal, SignalDecoder, default_signals
+
+
+RESEED_GAPS = 8  # Gaps that seed an ID's period, and outlying gaps in a row that re-seed it
+
+
+class FrameStats:
+    """
+    Per arbitration ID reception statistics, updated from the notifier thread.
+    'missed' is an estimate of frames lost on the bus or in the kernel queue, inferred from
+    gaps much longer than the ID's usual broadcast period. Gaps are taken between frame
+    timestamps (the kernel's receive time where the interface provides one). The period is
+    seeded from the median of the first RESEED_GAPS gaps, so a burst of queued frames at
+    start-up does not set it, and is re-seeded when the gaps stay off it (the ID changed
+    rate, or the seed was wrong). A long gap only counts as lost frames once the gaps are
+    back on the period, and only by the whole periods they span together: a late frame is
+    followed by a gap as much shorter, or by a burst, and adds none.
+    """
+    __slots__ = ('frames', 'missed', 'rate_hz', 'last_ns', 'interval_ns', '_last_stamp', '_outliers',
+                 '_outlier_kind', '_window_start', '_window_frames')
+
+    def __init__(self):
+        self.frames = 0
+        self.missed = 0
+        self.rate_hz = 0.0
+        self.last_ns = None
+        self.interval_ns = None
+        self._last_stamp = None
+        self._outliers = []
+        self._outlier_kind = 0  # 1 while collecting long gaps, -1 short ones
+        self._window_start = None
+        self._window_frames = 0
+
+    def update(self, now_ns, stamp_ns=None):
+        """
+        now_ns: time.monotonic_ns() on reception. stamp_ns: the frame's own timestamp in ns,
+        on any clock, used for the gaps when given.
+        """
+        self.frames += 1
+        stamp_ns = now_ns if stamp_ns is None else stamp_ns
+        if self._last_stamp is not None and stamp_ns > self._last_stamp:
+            self._gap(stamp_ns - self._last_stamp)
+        self._last_stamp = stamp_ns
+        self.last_ns = now_ns
+        if self._window_start is None:
+            self._window_start = now_ns
+        self._window_frames += 1
+        elapsed = now_ns - self._window_start
+        if elapsed >= 1_000_000_000:
+            self.rate_hz = self._window_frames * 1e9 / elapsed
+            self._window_start = now_ns
+            self._window_frames = 0
+
+    def _gap(self, dt):
+        if self.interval_ns is None:
+            self._outliers.append(dt)
+            if len(self._outliers) == RESEED_GAPS:
+                self._reseed()
+            return
+        if dt > self.interval_ns * 1.5:
+            kind = 1
+        elif dt < self.interval_ns * 0.5:
+            kind = -1
+        else:
+            kind = 0
+        if kind != self._outlier_kind:
+            if self._outlier_kind == 1 and kind == 0:
+                # Back on the period: periods the long gaps and this one span beyond the frames
+                # seen were lost. Up to 3/4 of a period over is a late frame and adds none.
+                span = sum(self._outliers) + dt
+                self.missed += max(int(span / self.interval_ns + 0.25) - len(self._outliers) - 1, 0)
+            self._outliers.clear()
+            self._outlier_kind = kind
+        if kind:
+            self._outliers.append(dt)
+            # Long gaps re-seed after RESEED_GAPS in a row. Short ones only once they span that
+            # many periods: queued frames delivered back to back cover almost no time at all.
+            if kind == 1:
+                reseed = len(self._outliers) == RESEED_GAPS
+            else:
+                reseed = sum(self._outliers) >= self.interval_ns * RESEED_GAPS
+            if reseed:
+                self._reseed()
+        else:
+            self.interval_ns += (dt - self.interval_ns) / 16
+
+    def _reseed(self):
+        self.interval_ns = sorted(self._outliers)[len(self._outliers) // 2]
+        self._outliers.clear()
+        self._outlier_kind = 0
+
 
 class CANReader:
     def __init__(self, channel: str = 'can0', bustype: str = 'socketcan', bitrate: int = 500000,
-                 rpm_id: int = 0x100, speed_id: int = 0x101, gear_id: int = 0x102):
+                 rpm_id: int = 0x100, speed_id: int = 0x101, gear_id: int = 0x102,
+                 signals: Optional[List[Signal]] = None):
         """
         Initialize CAN bus interface. Default values provided, can be overridden on init.
-        CAN IDs can be passed as arguments.
+        CAN IDs can be passed as arguments, or a full signal table (see sensors/can_signals.py)
+        to decode more than rpm/speed/gear. Only IDs carrying a signal are accepted; on
+        socketcan the filter is applied by the kernel, so other traffic never reaches Python.
         """
-        self.bus = can.interface.Bus(channel=channel, bustype=bustype, bitrate=bitrate)
         self.RPM_CAN_ID = rpm_id
         self.SPEED_CAN_ID = speed_id
         self.GEAR_CAN_ID = gear_id
+        self.decoder = SignalDecoder(signals if signals is not None else default_signals(rpm_id, speed_id, gear_id))
+        ids = self.decoder.ids()
+        filters = [
+            {"can_id": can_id, "can_mask": 0x1FFFFFFF if can_id in self.decoder.extended else 0x7FF,
+             "extended": can_id in self.decoder.extended}
+            for can_id in ids
+        ]
+        # python-can is imported here rather than at module level: it is the slowest import
+        # on the boot path, and replay/mock setups never need it
+        import can
+        self.bus = can.interface.Bus(channel=channel, bustype=bustype, bitrate=bitrate, can_filters=filters)
+        self.channel = channel
+        self.bustype = bustype
+        self.latest = {name: None for name in self.decoder.names}
+        self.timestamps = {name: None for name in self.decoder.names}
+        self.frame_stats = {can_id: FrameStats() for can_id in ids}
+        self.error_frames = 0
+        self.recorder = None  # SessionRecorder capturing every received frame
+        self.metrics = None  # utils.metrics.Metrics; records per-frame handling time as 'can_handle'
+        self.on_update = None  # Called from the notifier thread after a frame updated any signal
+        self._notifier = None
+        self._lock = threading.Lock()
+
+    def _on_message(self, msg):
+        now_ns = time.monotonic_ns()
+        if msg.is_error_frame:
+            self.error_frames += 1
+            return
+        if self.recorder is not None:
+            self.recorder.record_can(now_ns, msg.arbitration_id, msg.data, msg.is_extended_id)
+        stats = self.frame_stats.get(msg.arbitration_id)
+        if stats is None:
+            return
+        # msg.timestamp is the kernel's receive time on socketcan; 0 where the interface sets none
+        stats.update(now_ns, int(msg.timestamp * 1e9) if msg.timestamp else None)
+        with self._lock:
+            updated = self.decoder.decode(msg.arbitration_id, msg.data, self.latest)
+            for signal in updated:
+                self.timestamps[signal.name] = now_ns
+        if updated and self.on_update is not None:
+            self.on_update()
+        if self.metrics is not None:
+            self.metrics.record('can_handle', time.monotonic_ns() - now_ns)
+
+    def start_listener(self):
+        """
+        Switch to event-driven ingestion: a python-can Notifier thread receives every frame
+        as it arrives and updates the latest-value state, so read_can_data() never blocks.
+        """
+        if self._notifier is None:
+            import can
+            self._notifier = can.Notifier(self.bus, [self._on_message], timeout=0.1)
 
     def read_can_data(self, timeout: float = 1.0) -> Dict[str, Optional[int]]:
         """
-        Reads CAN messages for RPM, Speed, and GEAR. Returns a dictionary with the latest values.
-        Timeout is in seconds.
+        Reads CAN messages for every configured signal (RPM, Speed, and GEAR by default).
+        Returns a dictionary with the latest values.
+        Timeout is in seconds. When the listener is running the latest values are returned
+        immediately and timeout is ignored.
         """
-        result = {'rpm': None, 'speed': None, 'gear': None}
+        if self._notifier is not None:
+            with self._lock:
+                return self.latest.copy()
+
+        result = dict.fromkeys(self.decoder.names)
+
+        end_time = time.time() + timeout
 
-        end_time = can.util.time.time() + timeout
-        
-        while can.util.time.time() < end_time:
+        while time.time() < end_time:
             msg = self.bus.recv(timeout=0.1)
             if msg is None:
                 continue
-            if msg.arbitration_id == self.RPM_CAN_ID:
-                # Example: RPM is in bytes 0-1, big endian
-                result['rpm'] = int.from_bytes(msg.data[0:2], byteorder='big')
-            elif msg.arbitration_id == self.SPEED_CAN_ID:
-                # Example: Speed is in byte 0
-                result['speed'] = msg.data[0]
-            elif msg.arbitration_id == self.GEAR_CAN_ID:
-                # Example: Gear is in byte 0
-                result['gear'] = msg.data[0]
+            if self.recorder is not None and not msg.is_error_frame:
+                self.recorder.record_can(time.monotonic_ns(), msg.arbitration_id, msg.data, msg.is_extended_id)
+            self.decoder.decode(msg.arbitration_id, msg.data, result)
             # If all values are read, break early
             if all(v is not None for v in result.values()):
                 break
         return result
 
+    def get_stats(self) -> Dict[str, object]:
+        """
+        Returns per-ID frame counts, achieved rate, estimated missed frames and age of the last
+        frame, plus the number of error frames seen on the bus and, on socketcan, the
+        interface's own drop counters (frames the driver actually discarded).
+        """
+        now_ns = time.monotonic_ns()
+        ids = {}
+        for can_id, s in self.frame_stats.items():
+            ids[hex(can_id)] = {
+                'frames': s.frames,
+                'rate_hz': round(s.rate_hz, 1),
+                'missed_est': s.missed,
+                'age_ms': None if s.last_ns is None else (now_ns - s.last_ns) / 1e6,
+            }
+        stats = {'ids': ids, 'error_frames': self.error_frames}
+        if self.bustype == 'socketcan':
+            stats['interface'] = self._interface_drops()
+        return stats
+
+    def _interface_drops(self) -> Dict[str, Optional[int]]:
+        drops = {}
+        for counter in ('rx_dropped', 'rx_over_errors', 'rx_fifo_errors'):
+            try:
+                with open(f"/sys/class/net/{self.channel}/statistics/{counter}") as f:
+                    drops[counter] = int(f.read())
+            except (OSError, ValueError):
+                drops[counter] = None
+        return drops
+
+    def stop(self):
+        if self._notifier is not None:
+            self._notifier.stop()
+            self._notifier = None
+        self.bus.shutdown()
+
 # Example usage:
 # can_reader = CANReader()
+# can_reader.start_listener()
 # data = can_reader.read_can_data()
-# print(data)  # {'rpm': 1234, 'speed': 56, 'gear': 3}
\ No newline at end of file
+# print(data)  # {'rpm': 1234, 'speed': 56, 'gear': 3}
+# print(can_reader.get_stats())
\ No newline at end of file
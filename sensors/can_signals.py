@@ -0,0 +1,268 @@
+import re
+import struct
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class Signal(NamedTuple):
+    """
+    One signal inside a CAN frame, described the way a DBC file does.
+    start_bit follows DBC numbering: for 'little' (Intel) it is the LSB of the signal,
+    for 'big' (Motorola) it is the MSB, counted 7..0 within byte 0, 15..8 within byte 1, ...
+    extended marks a 29-bit ID; IDs above 0x7FF are extended whether or not it is set.
+    """
+    name: str
+    can_id: int
+    start_bit: int
+    length: int
+    byte_order: str = 'big'
+    scale: float = 1
+    offset: float = 0
+    signed: bool = False
+    extended: bool = False
+
+
+class CompiledSignal(NamedTuple):
+    name: str
+    unpack_from: Optional[object]  # struct.Struct.unpack_from for byte-aligned signals
+    byte_offset: int
+    little: bool
+    shift: int
+    mask: int
+    sign_bit: int
+    scale: float
+    offset: float
+    min_len: int
+
+
+_STRUCT_CODES = {8: 'b', 16: 'h', 32: 'i', 64: 'q'}
+
+
+def _lsb_position(sig: Signal) -> int:
+    """
+    Bit position of the signal's LSB inside the 8-byte payload read as one integer
+    (little endian integer for Intel signals, big endian integer for Motorola signals).
+    """
+    if sig.byte_order == 'little':
+        return sig.start_bit
+    byte, bit = divmod(sig.start_bit, 8)
+    msb = (7 - byte) * 8 + bit
+    return msb - sig.length + 1
+
+
+def compile_signal(sig: Signal) -> CompiledSignal:
+    if sig.byte_order not in ('big', 'little'):
+        raise ValueError(f"Signal {sig.name}: byte_order must be 'big' or 'little'")
+    if not 0 < sig.length <= 64:
+        raise ValueError(f"Signal {sig.name}: length must be 1..64 bits")
+    little = sig.byte_order == 'little'
+    shift = _lsb_position(sig)
+    if shift < 0 or shift + sig.length > 64:
+        raise ValueError(f"Signal {sig.name}: bits fall outside an 8-byte payload")
+    unpack_from = None
+    byte_offset = 0
+    code = _STRUCT_CODES.get(sig.length)
+    # Byte-aligned 8/16/32/64-bit fields are read with a precompiled struct instead of bit math
+    if code and shift % 8 == 0:
+        if little:
+            byte_offset = shift // 8
+        else:
+            byte_offset = 8 - (shift + sig.length) // 8
+        fmt = ('<' if little else '>') + (code if sig.signed else code.upper())
+        unpack_from = struct.Struct(fmt).unpack_from
+    if little:
+        min_len = (shift + sig.length + 7) // 8
+    else:
+        min_len = 8 - shift // 8
+    return CompiledSignal(
+        name=sig.name,
+        unpack_from=unpack_from,
+        byte_offset=byte_offset,
+        little=little,
+        shift=shift,
+        mask=(1 << sig.length) - 1,
+        sign_bit=(1 << (sig.length - 1)) if sig.signed else 0,
+        scale=sig.scale,
+        offset=sig.offset,
+        min_len=min_len,
+    )
+
+
+def _build_extractor(can_id: int, signals: Tuple[CompiledSignal, ...]):
+    """
+    Generates one straight-line function per arbitration ID that decodes all of its
+    signals from a full 8-byte payload, so the hot path has no loops or per-signal branching.
+    """
+    namespace = {}
+    body = []
+    if any(s.unpack_from is None and s.little for s in signals):
+        body.append("    raw_le = int.from_bytes(data, 'little')")
+    if any(s.unpack_from is None and not s.little for s in signals):
+        body.append("    raw_be = int.from_bytes(data, 'big')")
+    for i, s in enumerate(signals):
+        if s.unpack_from is not None and s.mask == 0xFF and not s.sign_bit:
+            expr = f"data[{s.byte_offset}]"
+        elif s.unpack_from is not None:
+            namespace[f"_unpack{i}"] = s.unpack_from
+            expr = f"_unpack{i}(data, {s.byte_offset})[0]"
+        else:
+            expr = f"(({'raw_le' if s.little else 'raw_be'} >> {s.shift}) & {s.mask})"
+            if s.sign_bit:
+                body.append(f"    v = {expr}")
+                body.append(f"    if v & {s.sign_bit}: v -= {s.mask + 1}")
+                expr = "v"
+        if s.scale != 1:
+            expr = f"{expr} * {s.scale!r}"
+        if s.offset != 0:
+            expr = f"{expr} + {s.offset!r}"
+        body.append(f"    out[{s.name!r}] = {expr}")
+    source = f"def decode_{can_id:x}(data, out):\n" + "\n".join(body)
+    exec(source, namespace)
+    return namespace[f"decode_{can_id:x}"]
+
+
+class SignalDecoder:
+    """
+    Signal table compiled into a dict keyed by arbitration ID, so decoding a frame is one
+    dict lookup followed by a generated extractor for that frame's signals.
+    """
+    def __init__(self, signals: List[Signal]):
+        grouped: Dict[int, List[CompiledSignal]] = {}
+        names = set()
+        for sig in signals:
+            if sig.name in names:
+                raise ValueError(f"Duplicate CAN signal name: {sig.name}")
+            names.add(sig.name)
+            grouped.setdefault(sig.can_id, []).append(compile_signal(sig))
+        self.table: Dict[int, Tuple[object, Tuple[CompiledSignal, ...]]] = {}
+        for can_id, compiled in grouped.items():
+            compiled = tuple(compiled)
+            self.table[can_id] = (_build_extractor(can_id, compiled), compiled)
+        self.names = tuple(sig.name for sig in signals)
+        # IDs above 0x7FF only fit an extended frame
+        self.extended = frozenset(sig.can_id for sig in signals if sig.extended or sig.can_id > 0x7FF)
+
+    def ids(self) -> List[int]:
+        return list(self.table)
+
+    def decode(self, can_id: int, data, out: Dict[str, object]) -> Tuple[CompiledSignal, ...]:
+        """
+        Decodes every signal carried by the frame into out. Returns the compiled signals
+        of that ID (empty if the ID is unknown).
+        """
+        entry = self.table.get(can_id)
+        if entry is None:
+            return ()
+        extractor, signals = entry
+        n = len(data)
+        if n == 8:
+            extractor(data, out)
+        elif n > 8:
+            # CAN FD payload: compile_signal keeps every signal within the first 8 bytes
+            extractor(data[:8], out)
+        else:
+            _decode_short(signals, data, out)
+        return signals
+
+
+def _decode_short(signals: Tuple[CompiledSignal, ...], data, out: Dict[str, object]):
+    """
+    Slow path for frames shorter than 8 bytes: signals that do not fit are skipped.
+    """
+    n = len(data)
+    raw_le = raw_be = None
+    for s in signals:
+        if n < s.min_len:
+            continue
+        if s.unpack_from is not None:
+            value = s.unpack_from(data, s.byte_offset)[0]
+        else:
+            if s.little:
+                if raw_le is None:
+                    raw_le = int.from_bytes(data, 'little')
+                value = (raw_le >> s.shift) & s.mask
+            else:
+                if raw_be is None:
+                    # Align short payloads so positions stay relative to an 8-byte frame
+                    raw_be = int.from_bytes(data, 'big') << (8 * (8 - n))
+                value = (raw_be >> s.shift) & s.mask
+            if value & s.sign_bit:
+                value -= s.mask + 1
+        if s.scale != 1 or s.offset != 0:
+            value = value * s.scale + s.offset
+        out[s.name] = value
+
+
+def default_signals(rpm_id: int = 0x100, speed_id: int = 0x101, gear_id: int = 0x102) -> List[Signal]:
+    """
+    The original hard-coded layout: RPM in bytes 0-1 big endian, speed and gear in byte 0.
+    """
+    return [
+        Signal('rpm', rpm_id, start_bit=7, length=16, byte_order='big'),
+        Signal('speed', speed_id, start_bit=7, length=8, byte_order='big'),
+        Signal('gear', gear_id, start_bit=7, length=8, byte_order='big'),
+    ]
+
+
+_BO_RE = re.compile(r"^BO_\s+(\d+)\s+\w+\s*:")
+_SG_RE = re.compile(
+    r"^SG_\s+(\w+)\s*(?:\w+\s*)?:\s*(\d+)\|(\d+)@([01])([+-])\s*\(\s*([^,]+?)\s*,\s*([^)]+?)\s*\)"
+)
+
+
+def parse_dbc(text: str) -> List[Signal]:
+    """
+    Minimal DBC reader: picks up BO_ messages and their SG_ signals, ignoring everything else
+    (value tables, comments, multiplexing).
+    """
+    signals = []
+    can_id = None
+    for line in text.splitlines():
+        line = line.strip()
+        m = _BO_RE.match(line)
+        if m:
+            # Bit 31 flags extended IDs in DBC files
+            raw_id = int(m.group(1))
+            can_id = raw_id & 0x1FFFFFFF
+            extended = bool(raw_id & 0x80000000)
+            continue
+        m = _SG_RE.match(line)
+        if m and can_id is not None:
+            name, start, length, order, sign, scale, offset = m.groups()
+            scale, offset = float(scale), float(offset)
+            signals.append(Signal(
+                name=name,
+                can_id=can_id,
+                start_bit=int(start),
+                length=int(length),
+                byte_order='little' if order == '1' else 'big',
+                scale=int(scale) if scale.is_integer() else scale,
+                offset=int(offset) if offset.is_integer() else offset,
+                signed=sign == '-',
+                extended=extended,
+            ))
+    return signals
+
+
+def load_signals(config: Dict[str, object]) -> List[Signal]:
+    """
+    Signal table from config: a DBC file ('can_dbc_file'), an inline list of dicts
+    ('can_signals'), or the default rpm/speed/gear layout built from the configured IDs.
+    """
+    dbc_file = config.get("can_dbc_file")
+    if dbc_file:
+        with open(dbc_file) as f:
+            return parse_dbc(f.read())
+    inline = config.get("can_signals")
+    if inline:
+        return [Signal(**entry) for entry in inline]
+    return default_signals(
+        config.get("can_rpm_id", 0x100),
+        config.get("can_speed_id", 0x101),
+        config.get("can_gear_id", 0x102),
+    )
+
+# Example usage:
+# decoder = SignalDecoder(parse_dbc(open("r3.dbc").read()))
+# out = {}
+# decoder.decode(0x100, bytes([0x1F, 0x40, 0, 0, 0, 0, 0, 0]), out)
+# print(out)  # {'rpm': 8000}
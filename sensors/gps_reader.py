@@ -1,56 +1,198 @@
 import threading
 import time
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict
+from sensors.nmea import NMEAParser, rate_commands
 
 class GPSReader:
     """
-    Generic GPS reader for Raspberry Pi. Uses 'gpsd' via the 'gps' library if available, but can be extended for other modules.
+    GPS reader for Raspberry Pi. The 'nmea' backend reads NMEA straight from the serial device
+    (or from any binary file-like stream, e.g. a recorded capture), the 'gpsd' backend goes
+    through gpsd via the 'gps' library. Either way every fix is published the moment it
+    arrives, stamped with a monotonic receive time (t_ns), and passed to on_fix if given.
     """
-    def __init__(self, device: str = '/dev/serial0'):
+    def __init__(self, device: str = '/dev/serial0', backend: str = 'nmea', baudrate: int = 9600,
+                 rate_hz: Optional[float] = None, chipset: Optional[str] = None, rate_baudrate: Optional[int] = None,
+                 stream=None, on_fix: Optional[Callable[[Dict], None]] = None):
         self.device = device
+        self.backend = backend
+        self.baudrate = baudrate
+        self.rate_hz = rate_hz
+        self.chipset = chipset
+        self.rate_baudrate = rate_baudrate
+        self.on_fix = on_fix
+        self.recorder = None  # SessionRecorder capturing every fix
+        self.data = {'lat': None, 'lon': None, 'alt': None, 'speed': None, 'fix_time': None}
+        self.parser = NMEAParser()
+        self.fixes = 0
+        self.achieved_hz = 0.0
+        self._window_start = time.monotonic_ns()
+        self._window_fixes = 0
+        self.stream = stream
+        self._owns_stream = stream is None
+        self.session = None
+        self._open_failed = False
+        self._stop_event = threading.Event()
+        if backend == 'gpsd':
+            target = self._gpsd_loop
+            self._open_gpsd()
+        elif backend == 'nmea':
+            target = self._nmea_loop
+        else:
+            raise ValueError(f"Unknown GPS backend {backend!r} (expected 'nmea' or 'gpsd')")
+        self._thread = threading.Thread(target=target, name=f"gps-{backend}", daemon=True)
+        self._thread.start()
+
+    def _open_gpsd(self):
         try:
             import gps
-            self.gps = gps
-            self.session = gps.gps(mode=gps.WATCH_ENABLE)
-            self.backend = 'gpsd'
         except ImportError:
-            self.gps = None
+            print("GPS backend 'gpsd' needs the 'gps' module; no fixes will be available")
+            return
+        try:
+            self.session = gps.gps(mode=gps.WATCH_ENABLE)
+            if self.rate_hz:
+                self.session.send('?DEVICE={"cycle":%.3f}' % (1.0 / self.rate_hz))
+        except Exception as e:
+            print(f"Failed to connect to gpsd: {e}")
             self.session = None
-            self.backend = None
-            # Could add other backends here (e.g., serial, pynmea2, etc.)
-        self.data = {'lat': None, 'lon': None, 'alt': None, 'speed': None, 'fix_time': None}
-        self._stop_event = threading.Event()
-        self._thread = threading.Thread(target=self._update_loop, daemon=True)
-        self._thread.start()
 
-    def _update_loop(self):
+    def _open_serial(self):
+        """
+        Opens the serial device and, when a chipset is configured, switches the receiver
+        to rate_hz (raising the baud rate first, as 10+ Hz of RMC/GGA does not fit in 9600).
+        """
+        try:
+            import serial
+        except ImportError:
+            print("pyserial not installed, reading the GPS device with its current port settings")
+            return open(self.device, 'rb', buffering=0)
+        port = serial.Serial(self.device, baudrate=self.baudrate, timeout=0.1)
+        if self.rate_hz and self.chipset:
+            commands = rate_commands(self.chipset, self.rate_hz, self.rate_baudrate)
+            if self.rate_baudrate:
+                port.write(commands.pop(0))
+                port.flush()
+                time.sleep(0.1)
+                port.baudrate = self.rate_baudrate
+            for command in commands:
+                port.write(command)
+            port.flush()
+        return port
+
+    def _publish(self, fix):
+        # Replace rather than mutate so readers never see a half-updated fix
+        self.data = fix
+        self.fixes += 1
+        if self.recorder is not None:
+            self.recorder.record_gps(fix['t_ns'], fix)
+        self._window_fixes += 1
+        now = fix['t_ns']
+        if now - self._window_start >= 1_000_000_000:
+            self.achieved_hz = self._window_fixes * 1e9 / (now - self._window_start)
+            self._window_start = now
+            self._window_fixes = 0
+        if self.on_fix is not None:
+            self.on_fix(fix)
+
+    def _nmea_loop(self):
         while not self._stop_event.is_set():
-            if self.backend == 'gpsd' and self.session:
+            if self.stream is None:
                 try:
-                    report = self.session.next()
-                    if report['class'] == 'TPV':
-                        self.data['lat'] = getattr(report, 'lat', None)
-                        self.data['lon'] = getattr(report, 'lon', None)
-                        self.data['alt'] = getattr(report, 'alt', None)
-                        self.data['speed'] = getattr(report, 'speed', None)
-                        self.data['fix_time'] = getattr(report, 'time', None)
-                except Exception:
-                    pass
-            time.sleep(0.5)
+                    self.stream = self._open_serial()
+                except (OSError, ValueError) as e:
+                    if not self._open_failed:
+                        print(f"Failed to open GPS device {self.device}, retrying every second: {e}")
+                        self._open_failed = True
+                    self._stop_event.wait(1.0)
+                    continue
+            stream = self.stream
+            is_serial = hasattr(stream, 'in_waiting')
+            read1 = getattr(stream, 'read1', None)
+            try:
+                if is_serial:
+                    # Blocks until the first byte (or timeout), then takes whatever else is buffered
+                    chunk = stream.read(stream.in_waiting or 1)
+                elif read1 is not None:
+                    chunk = read1(4096)
+                else:
+                    # Unbuffered files (raw tty) return whatever is available
+                    chunk = stream.read(4096)
+            except OSError as e:
+                print(f"GPS read error: {e}")
+                if self._owns_stream:
+                    self._close_stream()
+                self._stop_event.wait(1.0)
+                continue
+            if not chunk:
+                if is_serial:
+                    continue
+                break  # End of a recorded stream
+            t_ns = time.monotonic_ns()
+            for fix in self.parser.feed(chunk, t_ns):
+                self._publish(fix)
+
+    def _gpsd_loop(self):
+        while not self._stop_event.is_set():
+            if self.session is None:
+                self._stop_event.wait(1.0)
+                continue
+            try:
+                # Blocks until gpsd sends the next report
+                report = self.session.next()
+            except StopIteration:
+                print("gpsd connection closed")
+                self.session = None
+                continue
+            except Exception:
+                continue
+            if report['class'] == 'TPV' and getattr(report, 'mode', 0) >= 2:
+                self._publish({
+                    'lat': getattr(report, 'lat', None),
+                    'lon': getattr(report, 'lon', None),
+                    'alt': getattr(report, 'alt', None),
+                    'speed': getattr(report, 'speed', None),
+                    'track': getattr(report, 'track', None),
+                    'fix_time': getattr(report, 'time', None),
+                    't_ns': time.monotonic_ns()
+                })
+
+    def _close_stream(self):
+        if self.stream is not None:
+            try:
+                self.stream.close()
+            except OSError:
+                pass
+            self.stream = None
 
     def get_gps_data(self) -> Dict[str, Optional[float]]:
         """
-        Returns the latest GPS data as a dictionary: lat, lon, alt, speed, fix_time.
-        If no data is available, values will be None.
+        Returns the latest GPS fix as a dictionary: lat, lon, alt, speed (m/s), fix_time and
+        t_ns (monotonic receive time). If no fix is available yet, values will be None.
         """
         return self.data.copy()
 
+    def get_stats(self):
+        return {
+            'backend': self.backend,
+            'fixes': self.fixes,
+            'achieved_hz': round(self.achieved_hz, 1),
+            'sentences': self.parser.sentences,
+            'checksum_errors': self.parser.checksum_errors,
+            'parse_errors': self.parser.parse_errors,
+        }
+
     def stop(self):
         self._stop_event.set()
-        self._thread.join()
+        # A raw (non-pyserial) device read can block indefinitely, so don't wait forever
+        self._thread.join(timeout=1.0)
+        if self._owns_stream:
+            self._close_stream()
 
 # Example usage:
-# gps_reader = GPSReader()
+# gps_reader = GPSReader(device='/dev/serial0', rate_hz=10, chipset='ublox', rate_baudrate=115200)
 # time.sleep(2)  # Wait for initial data
-# print(gps_reader.get_gps_data())
-# gps_reader.stop()
\ No newline at end of file
+# print(gps_reader.get_gps_data(), gps_reader.get_stats())
+# gps_reader.stop()
+#
+# Replaying a capture:
+# GPSReader(stream=open('capture.nmea', 'rb'), on_fix=print)
@@ -1,9 +1,17 @@
 from mpu6050 import mpu6050
 import math
+import struct
+
+# ACCEL_XOUT_H .. GYRO_ZOUT_L: accel xyz, temperature, gyro xyz as big endian int16
+BURST_REGISTER = 0x3B
+BURST = struct.Struct(">7h")
 
 class IMUReader:
     def __init__(self, address=0x68):
         self.sensor = mpu6050(address)
+        # Ranges only change when we configure them, so read the scale factors once
+        self.accel_scale = mpu6050.GRAVITIY_MS2 * self.sensor.read_accel_range() / 32768.0
+        self.gyro_scale = self.sensor.read_gyro_range() / 32768.0
 
     def get_accel_data(self):
         return self.sensor.get_accel_data()
@@ -11,32 +19,47 @@ class IMUReader:
     def get_gyro_data(self):
         return self.sensor.get_gyro_data()
 
-    def get_lean_angle(self):
-        accel = self.get_accel_data()
+    def read_burst(self):
+        """
+        Reads accelerometer and gyroscope in a single 14-byte I2C transaction, so both come
+        from the same sample instant. Returns (ax, ay, az) in m/s^2 and (gx, gy, gz) in deg/s.
+        """
+        raw = bytes(self.sensor.bus.read_i2c_block_data(self.sensor.address, BURST_REGISTER, 14))
+        ax, ay, az, _, gx, gy, gz = BURST.unpack(raw)
+        a = self.accel_scale
+        g = self.gyro_scale
+        return (ax * a, ay * a, az * a), (gx * g, gy * g, gz * g)
+
+    @staticmethod
+    def lean_from_accel(accel):
         # Calculate lean angle (roll) in degrees
-        x = accel['x']
         y = accel['y']
         z = accel['z']
         # Prevent division by zero
         z = z if z != 0 else 0.0001  # Avoid division by zero
 
         # Roll angle calculation
-        roll = math.atan2(y, z) * 180 / math.pi
-        return roll
+        return math.atan2(y, z) * 180 / math.pi
+
+    def get_lean_angle(self):
+        return self.lean_from_accel(self.get_accel_data())
 
     def get_all_data(self):
         accel = self.get_accel_data()
         gyro = self.get_gyro_data()
-        lean_angle = self.get_lean_angle()
+        lean_angle = self.lean_from_accel(accel)
         return {
             'lean_angle': lean_angle,
             'acceleration': accel,
             'gyroscope': gyro
         }
 
+    def stop(self):
+        pass
+
 # Example usage:
 # imu = IMUReader()
 # data = imu.get_all_data()
 # print(f"Lean Angle: {data['lean_angle']:.2f} degrees")
 # print(f"Acceleration: {data['acceleration']}")
-# print(f"Gyroscope: {data['gyroscope']}")
\ No newline at end of file
+# print(f"Gyroscope: {data['gyroscope']}")
@@ -0,0 +1,142 @@
+import math
+import threading
+import time
+from sensors.lean_estimator import ComplementaryLeanFilter
+
+
+class IMUSampler:
+    """
+    Samples an IMUReader at a fixed rate (200-500 Hz) on its own thread using absolute
+    deadlines, fuses every sample with a complementary filter and publishes a decimated
+    result (accel/gyro averaged over the decimation window) for the rest of the system.
+    Exposes the same get_all_data()/stop() interface as IMUReader.
+    """
+    def __init__(self, reader, rate_hz=250, decimation=5, tau=0.5, speed_source=None):
+        self.reader = reader
+        self.rate_hz = rate_hz
+        self.period_ns = int(1e9 / rate_hz)
+        self.decimation = max(1, int(decimation))
+        self.filter = ComplementaryLeanFilter(tau=tau)
+        self.speed_source = speed_source
+        self.recorder = None  # SessionRecorder capturing every raw sample
+        self.on_update = None  # Called from the sampler thread after each decimated publish
+        self.data = {
+            'lean_angle': 0.0,
+            'pitch': 0.0,
+            'acceleration': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+            'gyroscope': {'x': 0.0, 'y': 0.0, 'z': 0.0}
+        }
+        self.samples = 0
+        self.read_errors = 0
+        self.overruns = 0
+        self.achieved_hz = 0.0
+        self._late_sum_ns = 0
+        self._late_max_ns = 0
+        self._period_n = 0
+        self._period_mean = 0.0
+        self._period_m2 = 0.0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="imu-sampler", daemon=True)
+        self._thread.start()
+
+    def _record_period(self, period_ns):
+        # Welford's running mean/variance of the actual sample period
+        self._period_n += 1
+        delta = period_ns - self._period_mean
+        self._period_mean += delta / self._period_n
+        self._period_m2 += delta * (period_ns - self._period_mean)
+
+    def _run(self):
+        period_ns = self.period_ns
+        next_ns = time.monotonic_ns()
+        last_ns = None
+        window_start = next_ns
+        window_samples = 0
+        acc = [0.0] * 6
+        acc_n = 0
+        while not self._stop_event.is_set():
+            now = time.monotonic_ns()
+            if now < next_ns:
+                time.sleep((next_ns - now) / 1e9)
+                now = time.monotonic_ns()
+            late = now - next_ns
+            self._late_sum_ns += late
+            if late > self._late_max_ns:
+                self._late_max_ns = late
+            try:
+                accel, gyro = self.reader.read_burst()
+            except OSError:
+                self.read_errors += 1
+                next_ns += period_ns
+                continue
+            if self.recorder is not None:
+                self.recorder.record_imu(now, accel, gyro)
+            dt = period_ns / 1e9 if last_ns is None else (now - last_ns) / 1e9
+            if last_ns is not None:
+                self._record_period(now - last_ns)
+            last_ns = now
+            speed = self.speed_source() if self.speed_source is not None else None
+            lean, pitch = self.filter.update(accel, gyro, dt, speed)
+            self.samples += 1
+            for i, v in enumerate(accel + gyro):
+                acc[i] += v
+            acc_n += 1
+            if acc_n >= self.decimation:
+                # Publish a new dict so readers never see a half-updated sample
+                self.data = {
+                    'lean_angle': lean,
+                    'pitch': pitch,
+                    'acceleration': {'x': acc[0] / acc_n, 'y': acc[1] / acc_n, 'z': acc[2] / acc_n},
+                    'gyroscope': {'x': acc[3] / acc_n, 'y': acc[4] / acc_n, 'z': acc[5] / acc_n},
+                    't_ns': now
+                }
+                acc = [0.0] * 6
+                acc_n = 0
+                if self.on_update is not None:
+                    self.on_update()
+            window_samples += 1
+            if now - window_start >= 1_000_000_000:
+                self.achieved_hz = window_samples * 1e9 / (now - window_start)
+                window_start = now
+                window_samples = 0
+            next_ns += period_ns
+            behind = time.monotonic_ns() - next_ns
+            if behind > period_ns:
+                # Fell more than a period behind: skip the missed ticks instead of bursting
+                missed = behind // period_ns
+                self.overruns += missed
+                next_ns += missed * period_ns
+
+    def get_all_data(self):
+        return self.data
+
+    def get_lean_angle(self):
+        return self.data['lean_angle']
+
+    def get_stats(self):
+        """
+        Achieved rate and timing jitter of the sampling thread.
+        """
+        n = max(self.samples, 1)
+        return {
+            'target_hz': self.rate_hz,
+            'achieved_hz': round(self.achieved_hz, 1),
+            'samples': self.samples,
+            'read_errors': self.read_errors,
+            'overruns': self.overruns,
+            'mean_late_us': self._late_sum_ns / n / 1000,
+            'max_late_us': self._late_max_ns / 1000,
+            'period_mean_us': self._period_mean / 1000,
+            'period_stdev_us': math.sqrt(self._period_m2 / self._period_n) / 1000 if self._period_n else 0.0,
+        }
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+        self.reader.stop()
+
+# Example usage:
+# sampler = IMUSampler(IMUReader(), rate_hz=250, decimation=5)
+# time.sleep(1)
+# print(sampler.get_all_data()['lean_angle'], sampler.get_stats())
+# sampler.stop()
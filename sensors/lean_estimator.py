@@ -0,0 +1,121 @@
+import math
+
+GRAVITY = 9.80665
+DEG = 180.0 / math.pi
+RAD = math.pi / 180.0
+
+
+class ComplementaryLeanFilter:
+    """
+    Fuses gyro and accelerometer into lean (roll) and pitch angles in degrees.
+    Axes follow the sensor mounted flat: x forward, y left, z up; positive lean is to the right.
+
+    The gyro is integrated for short-term motion and pulled towards a reference angle with
+    time constant tau. In a coordinated turn the accelerometer's gravity vector stays aligned
+    with the bike, so atan2(ay, az) reads ~0 at any lean; when the road speed is known the
+    reference is therefore the kinematic lean atan(v * yaw_rate / g) instead.
+    """
+    def __init__(self, tau=0.5, min_speed=3.0):
+        self.tau = tau
+        self.min_speed = min_speed
+        self.lean = 0.0
+        self.pitch = 0.0
+        self._initialized = False
+
+    def reset(self):
+        self.lean = 0.0
+        self.pitch = 0.0
+        self._initialized = False
+
+    def update(self, accel, gyro, dt, speed=None):
+        """
+        accel: (ax, ay, az) in m/s^2, gyro: (gx, gy, gz) in deg/s, dt in seconds,
+        speed in m/s (None if unknown). Returns (lean, pitch) in degrees.
+        """
+        ax, ay, az = accel
+        gx, gy, gz = gyro
+        accel_lean = math.atan2(ay, az if az != 0 else 0.0001) * DEG
+        accel_pitch = math.atan2(-ax, math.hypot(ay, az)) * DEG
+        lean_rad = self.lean * RAD
+        if speed is not None and speed >= self.min_speed:
+            # Yaw rate about the world vertical, from the body rates and the current lean
+            yaw_rate = (gy * math.sin(lean_rad) + gz * math.cos(lean_rad)) * RAD
+            reference = math.atan2(-speed * yaw_rate, GRAVITY) * DEG
+        else:
+            reference = accel_lean
+        if not self._initialized:
+            self.lean = reference
+            self.pitch = accel_pitch
+            self._initialized = True
+            return self.lean, self.pitch
+        alpha = self.tau / (self.tau + dt)
+        # Leaned over, body y no longer lies along the pitch axis and picks up yaw rate:
+        # integrate the Euler pitch rate instead of gy
+        pitch_rate = gy * math.cos(lean_rad) - gz * math.sin(lean_rad)
+        self.lean = alpha * (self.lean + gx * dt) + (1.0 - alpha) * reference
+        self.pitch = alpha * (self.pitch + pitch_rate * dt) + (1.0 - alpha) * accel_pitch
+        return self.lean, self.pitch
+
+
+def estimate_trace(samples, tau=0.5):
+    """
+    Runs the filter offline over recorded or synthetic samples, each a tuple of
+    (t_seconds, accel, gyro, speed_or_None). Returns a list of (t, lean, pitch).
+    """
+    f = ComplementaryLeanFilter(tau=tau)
+    out = []
+    last_t = None
+    for t, accel, gyro, speed in samples:
+        dt = 0.0 if last_t is None else t - last_t
+        last_t = t
+        lean, pitch = f.update(accel, gyro, dt, speed)
+        out.append((t, lean, pitch))
+    return out
+
+
+def synthetic_corner_trace(rate_hz=250, speed=25.0, max_lean=45.0, entry_s=1.0, hold_s=3.0, exit_s=1.0,
+                           gyro_bias=(0.5, -0.3, 0.2), noise=0.05, seed=1):
+    """
+    Generates IMU samples for a straight -> right-hand corner -> straight manoeuvre in a
+    coordinated turn (no slip) on a level road, so the true pitch is 0 throughout.
+    Returns (samples, true_leans) for use with estimate_trace().
+    """
+    import random
+    rng = random.Random(seed)
+    dt = 1.0 / rate_hz
+    total = entry_s + hold_s + exit_s + 2.0
+    samples = []
+    truth = []
+    n = int(total * rate_hz)
+    prev_lean = 0.0
+    for i in range(n):
+        t = i * dt
+        if t < 1.0:
+            lean = 0.0
+        elif t < 1.0 + entry_s:
+            lean = max_lean * (t - 1.0) / entry_s
+        elif t < 1.0 + entry_s + hold_s:
+            lean = max_lean
+        elif t < 1.0 + entry_s + hold_s + exit_s:
+            lean = max_lean * (1.0 - (t - 1.0 - entry_s - hold_s) / exit_s)
+        else:
+            lean = 0.0
+        phi = lean * RAD
+        # Coordinated turn: world yaw rate from tan(lean) = v * omega / g (right turn is negative yaw)
+        omega = -GRAVITY * math.tan(phi) / speed
+        roll_rate = (lean - prev_lean) / dt if i else 0.0
+        prev_lean = lean
+        # Specific force is aligned with the bike's z axis with magnitude g / cos(lean)
+        accel = (
+            rng.gauss(0, noise),
+            rng.gauss(0, noise),
+            GRAVITY / math.cos(phi) + rng.gauss(0, noise),
+        )
+        gyro = (
+            roll_rate + gyro_bias[0] + rng.gauss(0, noise),
+            omega * math.sin(phi) * DEG + gyro_bias[1] + rng.gauss(0, noise),
+            omega * math.cos(phi) * DEG + gyro_bias[2] + rng.gauss(0, noise),
+        )
+        samples.append((t, accel, gyro, speed))
+        truth.append(lean)
+    return samples, truth
@@ -0,0 +1,204 @@
+import struct
+from functools import reduce
+from operator import xor
+
+KNOTS_TO_MS = 1852.0 / 3600.0
+KMH_TO_MS = 1.0 / 3.6
+MAX_LINE = 256  # NMEA 0183 caps sentences at 82 characters; anything longer is line noise
+
+
+def checksum(body):
+    return reduce(xor, body, 0)
+
+
+def _coord(value, hemisphere):
+    # ddmm.mmmm / dddmm.mmmm -> signed decimal degrees
+    if not value:
+        return None
+    dot = value.find('.')
+    if dot < 0:
+        dot = len(value)
+    degrees = int(value[:dot - 2] or 0) + float(value[dot - 2:]) / 60.0
+    return -degrees if hemisphere in ('S', 'W') else degrees
+
+
+def _float(value):
+    return float(value) if value else None
+
+
+class NMEAParser:
+    """
+    Incremental NMEA 0183 parser for RMC, GGA and VTG sentences from any talker (GP, GN, ...).
+    feed() takes raw bytes as they arrive, keeps a partial trailing line for the next call
+    and returns a fix dict for every new epoch. A fix is published on the first position
+    sentence (RMC or GGA) of an epoch, so it is not held back waiting for the rest of the
+    burst; fields only present in later sentences (alt/sats from GGA, VTG speed) are merged
+    into the state and carried by the next fix.
+    """
+    def __init__(self):
+        self._partial = b''
+        self.date = None  # (yyyy, mm, dd) from the last RMC, GGA carries no date
+        self.state = {
+            'lat': None, 'lon': None, 'alt': None, 'speed': None, 'track': None,
+            'fix_time': None, 'sats': None, 'hdop': None, 't_ns': None
+        }
+        self._epoch = None
+        self.sentences = 0
+        self.checksum_errors = 0
+        self.parse_errors = 0
+        self.unknown = 0
+        self.fixes = 0
+
+    def feed(self, data, t_ns=None):
+        """
+        Parse a chunk of bytes. t_ns is the monotonic receive time stamped onto any fix
+        completed by this chunk. Returns a (possibly empty) list of fix dicts.
+        """
+        lines = (self._partial + data).split(b'\n')
+        partial = lines.pop()
+        self._partial = partial if len(partial) <= MAX_LINE else b''
+        fixes = []
+        for line in lines:
+            fix = self.parse_line(line, t_ns)
+            if fix is not None:
+                fixes.append(fix)
+        return fixes
+
+    def parse_line(self, line, t_ns=None):
+        start = line.find(b'$')
+        star = line.rfind(b'*')
+        if start < 0 or star < start:
+            return None
+        body = line[start + 1:star]
+        try:
+            if int(line[star + 1:star + 3], 16) != checksum(body):
+                self.checksum_errors += 1
+                return None
+        except ValueError:
+            self.checksum_errors += 1
+            return None
+        self.sentences += 1
+        fields = body.decode('ascii', 'replace').split(',')
+        kind = fields[0][-3:]
+        try:
+            if kind == 'RMC':
+                return self._rmc(fields, t_ns)
+            if kind == 'GGA':
+                return self._gga(fields, t_ns)
+            if kind == 'VTG':
+                self._vtg(fields)
+                return None
+        except (ValueError, IndexError):
+            self.parse_errors += 1
+            return None
+        self.unknown += 1
+        return None
+
+    def _fix_time(self, hhmmss):
+        if not hhmmss or self.date is None:
+            return None
+        year, month, day = self.date
+        seconds = float(hhmmss[4:]) if len(hhmmss) > 4 else 0.0
+        return f"{year:04d}-{month:02d}-{day:02d}T{hhmmss[0:2]}:{hhmmss[2:4]}:{seconds:06.3f}Z"
+
+    def _publish(self, epoch, t_ns):
+        if epoch == self._epoch:
+            return None
+        self._epoch = epoch
+        self.fixes += 1
+        state = self.state
+        state['t_ns'] = t_ns
+        return state.copy()
+
+    def _rmc(self, f, t_ns):
+        # $xxRMC,time,status,lat,N/S,lon,E/W,knots,course,ddmmyy,...
+        date = f[9]
+        if len(date) == 6:
+            yy = int(date[4:6])
+            self.date = (2000 + yy if yy < 80 else 1900 + yy, int(date[2:4]), int(date[0:2]))
+        if f[2] != 'A':
+            return None
+        state = self.state
+        state['lat'] = _coord(f[3], f[4])
+        state['lon'] = _coord(f[5], f[6])
+        if f[7]:
+            state['speed'] = float(f[7]) * KNOTS_TO_MS
+        state['track'] = _float(f[8])
+        state['fix_time'] = self._fix_time(f[1])
+        return self._publish(f[1], t_ns)
+
+    def _gga(self, f, t_ns):
+        # $xxGGA,time,lat,N/S,lon,E/W,quality,sats,hdop,alt,M,...
+        if not f[6] or f[6] == '0':
+            return None
+        state = self.state
+        state['lat'] = _coord(f[2], f[3])
+        state['lon'] = _coord(f[4], f[5])
+        state['sats'] = int(f[7]) if f[7] else None
+        state['hdop'] = _float(f[8])
+        state['alt'] = _float(f[9])
+        if f[1] != self._epoch:
+            state['fix_time'] = self._fix_time(f[1])
+        return self._publish(f[1], t_ns)
+
+    def _vtg(self, f):
+        # $xxVTG,course,T,course,M,knots,N,km/h,K,mode
+        if f[7]:
+            self.state['speed'] = float(f[7]) * KMH_TO_MS
+        elif f[5]:
+            self.state['speed'] = float(f[5]) * KNOTS_TO_MS
+        if f[1]:
+            self.state['track'] = float(f[1])
+
+
+def sentence(body):
+    """
+    Frames a sentence body (without '$' and checksum) as bytes ready to write.
+    """
+    data = body.encode('ascii')
+    return b'$' + data + b'*%02X\r\n' % checksum(data)
+
+
+def pmtk_rate_commands(rate_hz, baudrate=None):
+    """
+    MediaTek (PMTK) commands: optional baud rate change, then the fix interval.
+    """
+    commands = []
+    if baudrate:
+        commands.append(sentence(f"PMTK251,{baudrate}"))
+    commands.append(sentence(f"PMTK220,{int(round(1000 / rate_hz))}"))
+    return commands
+
+
+def _ubx(cls, msg_id, payload):
+    frame = struct.pack('<BBH', cls, msg_id, len(payload)) + payload
+    ck_a = ck_b = 0
+    for b in frame:
+        ck_a = (ck_a + b) & 0xFF
+        ck_b = (ck_b + ck_a) & 0xFF
+    return b'\xb5\x62' + frame + bytes((ck_a, ck_b))
+
+
+def ubx_rate_commands(rate_hz, baudrate=None):
+    """
+    u-blox (UBX) commands: optional UART1 baud rate change (CFG-PRT, 8N1, UBX+NMEA in,
+    UBX+NMEA out), then the measurement rate (CFG-RATE, one fix per measurement, GPS time).
+    """
+    commands = []
+    if baudrate:
+        commands.append(_ubx(0x06, 0x00, struct.pack('<BBHIIHHHH', 1, 0, 0, 0x08D0, baudrate, 0x0003, 0x0003, 0, 0)))
+    commands.append(_ubx(0x06, 0x08, struct.pack('<HHH', int(round(1000 / rate_hz)), 1, 1)))
+    return commands
+
+
+def rate_commands(chipset, rate_hz, baudrate=None):
+    if chipset == 'mtk':
+        return pmtk_rate_commands(rate_hz, baudrate)
+    if chipset == 'ublox':
+        return ubx_rate_commands(rate_hz, baudrate)
+    raise ValueError(f"Unknown GPS chipset {chipset!r} (expected 'mtk' or 'ublox')")
+
+# Example usage:
+# parser = NMEAParser()
+# for fix in parser.feed(b"$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A\r\n"):
+#     print(fix['lat'], fix['lon'], fix['speed'])
@@ -0,0 +1,222 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sensors.can_reader import FrameStats
+from sensors.can_signals import Signal, SignalDecoder, default_signals
+from sensors.lean_estimator import ComplementaryLeanFilter
+from storage.session_log import REC_CAN, REC_GPS, REC_IMU, read_session
+
+
+class SessionReplay:
+    """
+    Plays a recorded session (storage/session_log.py) back in recorded order on one thread
+    and feeds three stand-ins for the live readers: .can (CANReader), .imu (IMUSampler) and
+    .gps (GPSReader). speed is a time scale (1.0 = real time, 4.0 = 4x); None or 0 replays
+    as fast as possible. Nothing is emitted until start() is called.
+    """
+    def __init__(self, path, speed=1.0, loop=False, signals: Optional[List[Signal]] = None,
+                 decimation=5, tau=0.5, speed_source=None):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.can = ReplayCANReader(self, signals)
+        self.imu = ReplayIMUReader(self, decimation, tau, speed_source or self._speed_ms)
+        self.gps = ReplayGPSReader(self)
+        self.records = 0
+        self.lag_max_ms = 0.0
+        self.finished = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-replay", daemon=True)
+
+    def _speed_ms(self):
+        # Road speed from the replayed state itself, so the lean filter sees the same input
+        # no matter how often DataAcquisition polls
+        speed = self.can.latest.get('speed')
+        if speed is not None:
+            return speed / 3.6
+        return self.gps.data.get('speed')
+
+    def start(self):
+        if not self._thread.is_alive() and not self.finished.is_set():
+            self._thread.start()
+
+    def _run(self):
+        dispatch = {REC_CAN: self.can._on_record, REC_IMU: self.imu._on_record, REC_GPS: self.gps._on_record}
+        while not self._stop_event.is_set():
+            t0 = None
+            wall0 = time.monotonic_ns()
+            for kind, t_ns, payload in read_session(self.path):
+                if self._stop_event.is_set():
+                    break
+                if t0 is None:
+                    t0 = t_ns
+                if self.speed:
+                    # Pace against the session start rather than the previous record, so
+                    # scheduling delays do not accumulate over a long ride
+                    due = wall0 + int((t_ns - t0) / self.speed)
+                    ahead = due - time.monotonic_ns()
+                    if ahead > 200_000:
+                        self._stop_event.wait(ahead / 1e9)
+                    elif ahead < 0 and -ahead / 1e6 > self.lag_max_ms:
+                        self.lag_max_ms = -ahead / 1e6
+                dispatch[kind](t_ns, payload)
+                self.records += 1
+            if not self.loop:
+                break
+            self.imu.filter.reset()
+        self.finished.set()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the session has been played to the end (never returns with loop=True).
+        """
+        return self.finished.wait(timeout)
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+class ReplayCANReader:
+    """
+    CANReader stand-in: decodes replayed frames with the same signal table and keeps the
+    latest values, like CANReader with its listener running.
+    """
+    def __init__(self, replay, signals=None):
+        self.replay = replay
+        self.decoder = SignalDecoder(signals if signals is not None else default_signals())
+        self.latest = {name: None for name in self.decoder.names}
+        self.timestamps = {name: None for name in self.decoder.names}
+        self.frame_stats = {can_id: FrameStats() for can_id in self.decoder.ids()}
+        self.error_frames = 0
+        self.on_update = None
+        self._lock = threading.Lock()
+
+    def _on_record(self, t_ns, payload):
+        can_id, _, data = payload
+        now_ns = time.monotonic_ns()
+        stats = self.frame_stats.get(can_id)
+        if stats is None:
+            return
+        stats.update(now_ns, t_ns)
+        with self._lock:
+            updated = self.decoder.decode(can_id, data, self.latest)
+            for signal in updated:
+                self.timestamps[signal.name] = now_ns
+        if updated and self.on_update is not None:
+            self.on_update()
+
+    def start_listener(self):
+        pass
+
+    def read_can_data(self, timeout: float = 1.0) -> Dict[str, Optional[int]]:
+        with self._lock:
+            return self.latest.copy()
+
+    def get_stats(self):
+        now_ns = time.monotonic_ns()
+        ids = {}
+        for can_id, s in self.frame_stats.items():
+            ids[hex(can_id)] = {
+                'frames': s.frames,
+                'rate_hz': round(s.rate_hz, 1),
+                'missed_est': s.missed,
+                'age_ms': None if s.last_ns is None else (now_ns - s.last_ns) / 1e6,
+            }
+        return {'ids': ids, 'error_frames': self.error_frames}
+
+    def stop(self):
+        self.replay.stop()
+
+
+class ReplayIMUReader:
+    """
+    IMUSampler stand-in: runs the recorded raw samples through the lean filter using their
+    recorded timestamps, so the fused output is identical at any replay speed.
+    """
+    def __init__(self, replay, decimation=5, tau=0.5, speed_source=None):
+        self.replay = replay
+        self.decimation = max(1, int(decimation))
+        self.filter = ComplementaryLeanFilter(tau=tau)
+        self.speed_source = speed_source
+        self.data = {
+            'lean_angle': 0.0,
+            'pitch': 0.0,
+            'acceleration': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+            'gyroscope': {'x': 0.0, 'y': 0.0, 'z': 0.0}
+        }
+        self.samples = 0
+        self.on_update = None
+        self._last_t = None
+        self._acc = [0.0] * 6
+        self._acc_n = 0
+
+    def _on_record(self, t_ns, payload):
+        accel, gyro = payload
+        self.samples += 1
+        dt = 0.0 if self._last_t is None else (t_ns - self._last_t) / 1e9
+        self._last_t = t_ns
+        speed = self.speed_source() if self.speed_source is not None else None
+        lean, pitch = self.filter.update(accel, gyro, dt, speed)
+        acc = self._acc
+        for i, v in enumerate(accel + gyro):
+            acc[i] += v
+        self._acc_n += 1
+        if self._acc_n >= self.decimation:
+            n = self._acc_n
+            self.data = {
+                'lean_angle': lean,
+                'pitch': pitch,
+                'acceleration': {'x': acc[0] / n, 'y': acc[1] / n, 'z': acc[2] / n},
+                'gyroscope': {'x': acc[3] / n, 'y': acc[4] / n, 'z': acc[5] / n},
+                't_ns': time.monotonic_ns()
+            }
+            self._acc = [0.0] * 6
+            self._acc_n = 0
+            if self.on_update is not None:
+                self.on_update()
+
+    def get_all_data(self):
+        return self.data
+
+    def get_lean_angle(self):
+        return self.data['lean_angle']
+
+    def stop(self):
+        self.replay.stop()
+
+
+class ReplayGPSReader:
+    """
+    GPSReader stand-in: pushes each replayed fix to on_fix. fix_time is the recorded GPS
+    time, so lap timing gives the same results at any replay speed; t_ns is the replay clock.
+    """
+    def __init__(self, replay):
+        self.replay = replay
+        self.on_fix = None
+        self.data = {'lat': None, 'lon': None, 'alt': None, 'speed': None, 'fix_time': None}
+        self.fixes = 0
+
+    def _on_record(self, t_ns, payload):
+        fix = dict(payload, t_ns=time.monotonic_ns())
+        self.data = fix
+        self.fixes += 1
+        if self.on_fix is not None:
+            self.on_fix(fix)
+
+    def get_gps_data(self):
+        return self.data.copy()
+
+    def get_stats(self):
+        return {'backend': 'replay', 'fixes': self.fixes}
+
+    def stop(self):
+        self.replay.stop()
+
+# Example usage:
+# replay = SessionReplay("sessions/20240601-101500", speed=4.0)
+# replay.gps.on_fix = print
+# replay.start()
+# replay.wait()
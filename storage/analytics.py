@@ -0,0 +1,430 @@
+import argparse
+import csv
+import os
+import sqlite3
+
+import numpy as np
+
+from storage import sqlite_logger
+from storage.timeseries import NS, TimeSeriesStore, iso_to_ns
+
+COLUMNS = ('rpm', 'speed', 'gear', 'lean_angle')
+DEFAULT_OUT = os.path.join("data", "analytics")
+
+
+def iter_sqlite(db_path, start=None, end=None, chunk_rows=200000):
+    """
+    Streams sensor_data rows in [start, end) (ISO strings, either open) as dicts of arrays
+    't' (int64 ns) plus COLUMNS, chunk_rows at a time.
+    """
+    sql = "SELECT timestamp, rpm, speed, gear, lean_angle FROM sensor_data"
+    where, args = [], []
+    if start:
+        where.append("timestamp >= ?")
+        args.append(start)
+    if end:
+        where.append("timestamp < ?")
+        args.append(end)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(sql + " ORDER BY timestamp", args)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            stamps, *columns = zip(*rows)
+            chunk = {'t': iso_to_ns(stamps)}
+            for name, values in zip(COLUMNS, columns):
+                chunk[name] = np.array(values, dtype='f8')
+            yield chunk
+    finally:
+        conn.close()
+
+
+def iter_store(store, session_id, start_ns=None, end_ns=None):
+    """
+    Streams a TimeSeriesStore session chunk by chunk, in the same shape as iter_sqlite().
+    """
+    for part in store.iter_query(session_id, 'sensor', list(COLUMNS), start_ns, end_ns):
+        yield {name: np.asarray(values, dtype='i8' if name == 't' else 'f8') for name, values in part.items()}
+
+
+def load_gps(db_path, start=None, end=None):
+    sql = "SELECT timestamp, latitude, longitude, lap_id FROM gps_path"
+    where, args = [], []
+    if start:
+        where.append("timestamp >= ?")
+        args.append(start)
+    if end:
+        where.append("timestamp < ?")
+        args.append(end)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(sql + " ORDER BY timestamp", args).fetchall()
+    if not rows:
+        return {'t': np.empty(0, dtype='i8'), 'lat': np.empty(0), 'lon': np.empty(0)}
+    stamps, lat, lon, _ = zip(*rows)
+    return {'t': iso_to_ns(stamps), 'lat': np.array(lat, dtype='f8'), 'lon': np.array(lon, dtype='f8')}
+
+
+def load_laps(db_path, start_ns=None, end_ns=None):
+    """
+    Completed laps overlapping the range, with their checkpoints, as column arrays.
+    """
+    with sqlite3.connect(db_path) as conn:
+        laps = conn.execute(
+            "SELECT id, start_time, end_time, best, track_name FROM laps WHERE end_time IS NOT NULL ORDER BY start_time"
+        ).fetchall()
+        checkpoints = conn.execute(
+            "SELECT lap_id, checkpoint_name, timestamp, delta_vs_best FROM checkpoints ORDER BY lap_id, timestamp"
+        ).fetchall()
+    if laps:
+        ids, starts, ends, best, tracks = zip(*laps)
+        lap_cols = {
+            'lap_id': np.array(ids, dtype='i8'),
+            'start': iso_to_ns(starts),
+            'end': iso_to_ns(ends),
+            'best': np.array(best, dtype=bool),
+            'track': np.array([t or '' for t in tracks]),
+        }
+        keep = np.ones(len(ids), dtype=bool)
+        if start_ns is not None:
+            keep &= lap_cols['end'] >= start_ns
+        if end_ns is not None:
+            keep &= lap_cols['start'] < end_ns
+        lap_cols = {k: v[keep] for k, v in lap_cols.items()}
+    else:
+        lap_cols = {'lap_id': np.empty(0, dtype='i8'), 'start': np.empty(0, dtype='i8'), 'end': np.empty(0, dtype='i8'),
+                    'best': np.empty(0, dtype=bool), 'track': np.empty(0, dtype=str)}
+    return lap_cols, checkpoints
+
+
+class Analyzer:
+    """
+    Post-ride statistics over a stream of sensor chunks. Every feed() is vectorized over
+    its chunk; the last sample and any corner still in progress are carried to the next
+    one, so results do not depend on where the chunks are cut.
+    Durations are the time each sample's value was held (up to max_gap_s, so logging gaps
+    do not count as riding).
+    """
+    def __init__(self, laps=None, rpm_band=1000, rpm_max=16000, speed_bin=10, speed_max=250, max_gear=6,
+                 lean_threshold=20.0, min_corner_s=0.5, max_gap_s=0.5):
+        self.rpm_edges = np.arange(0, rpm_max + rpm_band, rpm_band, dtype='f8')
+        self.rpm_seconds = np.zeros(len(self.rpm_edges) - 1)
+        self.speed_edges = np.arange(0, speed_max + speed_bin, speed_bin, dtype='f8')
+        self.max_gear = max_gear
+        self.gear_speed_seconds = np.zeros((max_gear + 1, len(self.speed_edges) - 1))
+        self.gear_speed_max = np.zeros(max_gear + 1)
+        self.gear_speed_time = np.zeros(max_gear + 1)
+        self.lean_threshold = lean_threshold
+        self.min_corner_ns = int(min_corner_s * NS)
+        self.max_gap_ns = int(max_gap_s * NS)
+        self.samples = 0
+        self.seconds = 0.0
+        self.shifts = []  # per chunk: (t, from_gear, to_gear, rpm, speed)
+        self.corners = []  # per chunk: (start, end, apex_t, lean, speed, gear)
+        self._open = None  # corner in progress at the end of the last chunk
+        self._prev = None  # last sample of the last chunk
+        self.laps = laps
+        if laps is not None:
+            n = len(laps['lap_id'])
+            self.lap_samples = np.zeros(n, dtype='i8')
+            self.lap_seconds = np.zeros(n)
+            self.lap_speed_time = np.zeros(n)
+            self.lap_max = {name: np.full(n, np.nan) for name in ('rpm', 'speed', 'lean_left', 'lean_right')}
+
+    def feed(self, chunk):
+        n = len(chunk['t'])
+        if n == 0:
+            return
+        self.samples += n
+        if self._prev is not None:
+            ext = {k: np.concatenate(([self._prev[k]], chunk[k])) for k in chunk}
+        else:
+            ext = chunk
+        self._prev = {k: v[-1] for k, v in chunk.items()}
+        self._corners(chunk)
+        if self.laps is not None:
+            self._lap_samples(chunk)
+        t = ext['t']
+        if len(t) < 2:
+            return
+        dt_ns = np.minimum(np.diff(t), self.max_gap_ns)
+        dt = dt_ns / NS
+        # Values held over each interval are those of its first sample
+        rpm = ext['rpm'][:-1]
+        speed = ext['speed'][:-1]
+        gear = ext['gear'][:-1]
+        self.seconds += dt.sum()
+
+        self.rpm_seconds += np.histogram(rpm, self.rpm_edges, weights=dt)[0]
+
+        g = np.nan_to_num(gear, nan=0).astype('i8')
+        in_gear = (g >= 1) & (g <= self.max_gear)
+        speed_bins = np.clip(np.digitize(speed, self.speed_edges) - 1, 0, len(self.speed_edges) - 2)
+        np.add.at(self.gear_speed_seconds, (g[in_gear], speed_bins[in_gear]), dt[in_gear])
+        np.fmax.at(self.gear_speed_max, g[in_gear], speed[in_gear])
+        np.add.at(self.gear_speed_time, g[in_gear], np.nan_to_num(speed[in_gear]) * dt[in_gear])
+
+        # Up-shifts: the gear goes up by one between consecutive samples; the shift point is
+        # the rpm/speed just before the change
+        g_all = np.nan_to_num(ext['gear'], nan=0).astype('i8')
+        up = np.flatnonzero((g_all[1:] == g_all[:-1] + 1) & (g_all[:-1] >= 1))
+        if len(up):
+            self.shifts.append((t[up + 1], g_all[up], g_all[up + 1], ext['rpm'][up], ext['speed'][up]))
+
+        if self.laps is not None:
+            self._lap_intervals(t[:-1], dt, speed)
+
+    def _corners(self, chunk):
+        t = chunk['t']
+        lean = chunk['lean_angle']
+        active = np.abs(np.nan_to_num(lean)) >= self.lean_threshold
+        edges = np.diff(np.r_[0, active.astype('i1'), 0])
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)  # exclusive
+        if not len(starts):
+            if self._open is not None:
+                self._close_corner(self._open)
+                self._open = None
+            return
+        apex = _apex_indices(np.abs(lean), starts, ends)
+        runs = [
+            [t[a], t[b - 1], t[p], lean[p], chunk['speed'][p], chunk['gear'][p]]
+            for a, b, p in zip(starts, ends, apex)
+        ]
+        if self._open is not None:
+            if starts[0] == 0:
+                # The corner carried over from the last chunk continues
+                first = runs[0]
+                first[0] = self._open[0]
+                if abs(self._open[3]) >= abs(first[3]):
+                    first[2:] = self._open[2:]
+            else:
+                self._close_corner(self._open)
+            self._open = None
+        if ends[-1] == len(t):
+            self._open = runs.pop()
+        for run in runs:
+            self._close_corner(run)
+
+    def _close_corner(self, run):
+        if run[1] - run[0] >= self.min_corner_ns:
+            self.corners.append(run)
+
+    def _lap_index(self, t):
+        # Index into self.laps of the lap each time falls in, and which times fall in one
+        laps = self.laps
+        idx = np.searchsorted(laps['start'], t, 'right') - 1
+        valid = idx >= 0
+        valid[valid] &= t[valid] < laps['end'][idx[valid]]
+        return idx[valid], valid
+
+    def _lap_samples(self, chunk):
+        idx, valid = self._lap_index(chunk['t'])
+        if not len(idx):
+            return
+        self.lap_samples += np.bincount(idx, minlength=len(self.lap_samples))
+        lean = chunk['lean_angle'][valid]
+        values = {
+            'rpm': chunk['rpm'][valid],
+            'speed': chunk['speed'][valid],
+            'lean_left': np.where(lean < 0, -lean, np.nan),
+            'lean_right': np.where(lean > 0, lean, np.nan),
+        }
+        for name, v in values.items():
+            np.fmax.at(self.lap_max[name], idx, v)
+
+    def _lap_intervals(self, t, dt, speed):
+        idx, valid = self._lap_index(t)
+        if not len(idx):
+            return
+        n = len(self.lap_seconds)
+        self.lap_seconds += np.bincount(idx, weights=dt[valid], minlength=n)
+        self.lap_speed_time += np.bincount(idx, weights=np.nan_to_num(speed[valid]) * dt[valid], minlength=n)
+
+    def finish(self):
+        if self._open is not None:
+            self._close_corner(self._open)
+            self._open = None
+
+    def tables(self, checkpoints=()):
+        """
+        Results as {table name: {column: array}}.
+        """
+        self.finish()
+        tables = {}
+        centers = self.rpm_edges[:-1]
+        tables['rpm_bands'] = {
+            'rpm_from': centers, 'rpm_to': self.rpm_edges[1:], 'seconds': self.rpm_seconds,
+            'share': self.rpm_seconds / self.seconds if self.seconds else np.zeros_like(self.rpm_seconds),
+        }
+        gears, bins = np.nonzero(self.gear_speed_seconds)
+        tables['gear_speed'] = {
+            'gear': gears, 'speed_from': self.speed_edges[bins], 'speed_to': self.speed_edges[bins + 1],
+            'seconds': self.gear_speed_seconds[gears, bins],
+        }
+        seconds = self.gear_speed_seconds.sum(axis=1)
+        used = np.flatnonzero(seconds)
+        # Median speed per gear from the cumulative time histogram (bin resolution)
+        cumulative = np.cumsum(self.gear_speed_seconds[used], axis=1)
+        median_bin = (cumulative < cumulative[:, -1:] / 2).sum(axis=1)
+        tables['gear_summary'] = {
+            'gear': used, 'seconds': seconds[used], 'mean_speed': self.gear_speed_time[used] / seconds[used],
+            'median_speed': (self.speed_edges[median_bin] + self.speed_edges[median_bin + 1]) / 2,
+            'max_speed': self.gear_speed_max[used],
+        }
+        if self.shifts:
+            st, sf, sto, sr, ss = (np.concatenate(c) for c in zip(*self.shifts))
+        else:
+            st, sf, sto, sr, ss = (np.empty(0),) * 5
+        tables['shifts'] = {'t': st, 'from_gear': sf, 'to_gear': sto, 'rpm': sr, 'speed': ss}
+        summary = {'from_gear': [], 'count': [], 'rpm_p10': [], 'rpm_p50': [], 'rpm_p90': [], 'rpm_mean': []}
+        for gear in np.unique(sf):
+            rpm = sr[sf == gear]
+            p10, p50, p90 = np.nanpercentile(rpm, (10, 50, 90))
+            for key, value in zip(summary, (gear, len(rpm), p10, p50, p90, np.nanmean(rpm))):
+                summary[key].append(value)
+        tables['shift_points'] = {k: np.array(v) for k, v in summary.items()}
+        start, end, apex_t, lean, speed, gear = (list(c) for c in zip(*self.corners)) if self.corners else ([],) * 6
+        start, end, apex_t = (np.array(c, dtype='i8') for c in (start, end, apex_t))
+        tables['corners'] = {
+            'start': start, 'duration_s': (end - start) / NS, 'apex_t': apex_t,
+            'max_lean': np.array(lean, dtype='f8'), 'apex_speed': np.array(speed, dtype='f8'),
+            'apex_gear': np.array(gear, dtype='f8'),
+        }
+        if self.laps is not None:
+            laps = self.laps
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean_speed = self.lap_speed_time / self.lap_seconds
+            tables['laps'] = {
+                'lap_id': laps['lap_id'], 'track': laps['track'], 'start': laps['start'],
+                'lap_time_s': (laps['end'] - laps['start']) / NS, 'best': laps['best'],
+                'samples': self.lap_samples, 'mean_speed': mean_speed,
+                'max_speed': self.lap_max['speed'], 'max_rpm': self.lap_max['rpm'],
+                'max_lean_left': self.lap_max['lean_left'], 'max_lean_right': self.lap_max['lean_right'],
+            }
+            known = set(laps['lap_id'].tolist())
+            tables['checkpoints'] = {'lap_id': np.empty(0, dtype='i8'), 'checkpoint': np.empty(0, dtype=str),
+                                     'split_s': np.empty(0), 'delta_vs_best': np.empty(0)}
+            rows = [c for c in checkpoints if c[0] in known]
+            if rows:
+                lap_ids, names, stamps, deltas = zip(*rows)
+                lap_ids = np.array(lap_ids, dtype='i8')
+                t = iso_to_ns(stamps)
+                start_of = dict(zip(laps['lap_id'].tolist(), laps['start'].tolist()))
+                lap_start = np.array([start_of[i] for i in lap_ids.tolist()], dtype='i8')
+                tables['checkpoints'] = {
+                    'lap_id': lap_ids, 'checkpoint': np.array(names), 'split_s': (t - lap_start) / NS,
+                    'delta_vs_best': np.array([np.nan if d is None else d for d in deltas], dtype='f8'),
+                }
+        return tables
+
+
+def _apex_indices(abs_lean, starts, ends):
+    # Index of the largest |lean| in each [start, end) run: sort the runs' samples by
+    # (run, -|lean|) and take the first of each run
+    lengths = ends - starts
+    first = np.r_[0, np.cumsum(lengths)[:-1]]
+    idx = np.arange(lengths.sum()) + np.repeat(starts - first, lengths)
+    run_id = np.repeat(np.arange(len(starts)), lengths)
+    order = np.lexsort((-abs_lean[idx], run_id))
+    return idx[order[first]]
+
+
+def add_apex_positions(corners, gps):
+    """
+    Interpolates the GPS position at each corner's apex.
+    """
+    if len(gps['t']) and len(corners['apex_t']):
+        corners['apex_lat'] = np.interp(corners['apex_t'], gps['t'], gps['lat'])
+        corners['apex_lon'] = np.interp(corners['apex_t'], gps['t'], gps['lon'])
+
+
+def export(tables, out_dir, fmt='csv'):
+    """
+    Writes each table as CSV and/or a compressed .npz of its columns (a column store any
+    numpy/pandas script can load without parsing text).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for name, columns in tables.items():
+        if fmt in ('csv', 'both'):
+            path = os.path.join(out_dir, f"{name}.csv")
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns.keys())
+                writer.writerows(zip(*(np.asarray(c).tolist() for c in columns.values())))
+            written.append(path)
+        if fmt in ('npz', 'both'):
+            path = os.path.join(out_dir, f"{name}.npz")
+            np.savez_compressed(path, **{k: np.asarray(v) for k, v in columns.items()})
+            written.append(path)
+    return written
+
+
+def analyze(chunks, laps=None, checkpoints=(), gps=None, **options):
+    analyzer = Analyzer(laps=laps, **options)
+    for chunk in chunks:
+        analyzer.feed(chunk)
+    tables = analyzer.tables(checkpoints)
+    if gps is not None:
+        add_apex_positions(tables['corners'], gps)
+    return analyzer, tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Post-ride statistics from logged telemetry")
+    parser.add_argument("--db", default=sqlite_logger.DB_PATH, help="telemetry database (sensor_data, gps_path, laps)")
+    parser.add_argument("--store", help="read sensor samples from this TimeSeriesStore root instead of --db")
+    parser.add_argument("--session", type=int, help="TimeSeriesStore session id (default: latest)")
+    parser.add_argument("--start", help="ISO-8601 start of the range, e.g. 2024-06-01T08:00")
+    parser.add_argument("--end", help="ISO-8601 end of the range")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--format", choices=("csv", "npz", "both"), default="csv")
+    parser.add_argument("--lean-threshold", type=float, default=20.0, help="degrees of lean that make a corner")
+    parser.add_argument("--rpm-band", type=int, default=1000)
+    args = parser.parse_args()
+
+    start_ns = int(iso_to_ns([args.start])[0]) if args.start else None
+    end_ns = int(iso_to_ns([args.end])[0]) if args.end else None
+    if args.store:
+        store = TimeSeriesStore(args.store)
+        session = args.session or store.sessions()[-1]['id']
+        chunks = iter_store(store, session, start_ns, end_ns)
+    else:
+        chunks = iter_sqlite(args.db, args.start, args.end)
+    laps, checkpoints = load_laps(args.db, start_ns, end_ns)
+    gps = load_gps(args.db, args.start, args.end)
+    analyzer, tables = analyze(chunks, laps, checkpoints, gps,
+                               lean_threshold=args.lean_threshold, rpm_band=args.rpm_band)
+
+    print(f"{analyzer.samples} samples, {analyzer.seconds / 60:.1f} min riding")
+    bands = tables['rpm_bands']
+    for lo, hi, share in zip(bands['rpm_from'], bands['rpm_to'], bands['share']):
+        if share >= 0.005:
+            print(f"  {lo:6.0f}-{hi:<6.0f} rpm {share * 100:5.1f}%")
+    for row in zip(*tables['shift_points'].values()):
+        print(f"  shift {int(row[0])}->{int(row[0]) + 1}: {int(row[1])}x, median {row[3]:.0f} rpm (p10 {row[2]:.0f}, p90 {row[4]:.0f})")
+    corners = tables['corners']
+    if len(corners['max_lean']):
+        print(f"  {len(corners['max_lean'])} corners, max lean {np.abs(corners['max_lean']).max():.1f} deg")
+    if 'laps' in tables:
+        for lap_id, lap_time, best, vmax in zip(tables['laps']['lap_id'], tables['laps']['lap_time_s'],
+                                                tables['laps']['best'], tables['laps']['max_speed']):
+            print(f"  lap {lap_id}: {lap_time:.3f}s{' (best)' if best else ''}, top speed {vmax:.0f}")
+    for path in export(tables, args.out, args.format):
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
+
+# Example usage:
+# laps, checkpoints = load_laps("telemetry.db")
+# analyzer, tables = analyze(iter_sqlite("telemetry.db", start="2024-06-01"), laps, checkpoints)
+# print(tables['shift_points'])
+# export(tables, "data/analytics", fmt="both")
@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+from config import CONFIG
+from storage.sqlite_writer import SQLiteWriter
+from storage.timeseries import TimeSeriesStore
+from utils import frame
+from utils.scheduler import Scheduler
+from utils.shm_ring import ShmRingReader
+
+# Acquisition rewrites the ring at least once per keyframe interval, even with steady values
+STALE_KEYFRAMES = 3
+
+
+class RingLogger:
+    """
+    The sensor_data / time-series sensor log, run in its own process (see supervisor.py).
+    Samples the newest frame in the shm ring at log_interval_ms, the way
+    DataAcquisition._log_tick samples its state, so SQLite and chunk writes never
+    compete with sensor reads for the acquisition process's GIL. The writer counts as
+    down once the ring's sample count has not moved for stale_s (by default
+    STALE_KEYFRAMES keyframe intervals).
+    """
+    def __init__(self, ts_session=None, stale_s=None):
+        self.shm_path = CONFIG.get("shm_path", "/dev/shm/r3_dashboard")
+        self.ring = None
+        if stale_s is None:
+            stale_s = STALE_KEYFRAMES * CONFIG.get("keyframe_interval_ms", 1000) / 1000.0
+        self.stale_ns = int(stale_s * 1e9)
+        self._count = None
+        self._count_ns = None
+        self.logged = 0
+        self.stale = 0
+        backend = CONFIG.get("log_backend", "both")
+        self.writer = None
+        if backend in ("sqlite", "both"):
+            self.writer = SQLiteWriter(
+                flush_size=CONFIG.get("log_flush_size", 100),
+                flush_interval=CONFIG.get("log_flush_interval_ms", 1000) / 1000.0,
+                queue_size=CONFIG.get("log_queue_size", 5000)
+            )
+        self.ts_sensor = None
+        if backend in ("timeseries", "both"):
+            store = TimeSeriesStore(CONFIG.get("ts_root"))
+            session_id = ts_session or store.create_session()
+            self.ts_sensor = store.writer(session_id, 'sensor', CONFIG.get("ts_chunk_rows", 65536))
+        self.scheduler = Scheduler()
+        self.scheduler.every("log", CONFIG.get("log_interval_ms", 20) / 1000.0, self._tick)
+
+    def _sample(self):
+        if self.ring is None:
+            # Acquisition may not have created the ring yet; attach succeeds once it has
+            self.ring = ShmRingReader.attach(self.shm_path)
+            if self.ring is None:
+                return None
+        return self.ring.read_latest()
+
+    async def _tick(self):
+        values = self._sample()
+        if values is None:
+            return
+        # In change mode the newest frame can be a keyframe old while values hold steady;
+        # only a count that stops moving means acquisition is down
+        now_ns = time.monotonic_ns()
+        count = self.ring.last_count
+        if count != self._count:
+            self._count, self._count_ns = count, now_ns
+        elif now_ns - self._count_ns > self.stale_ns:
+            # Acquisition is down (or restarting): do not log its last frame over and over
+            self.stale += 1
+            return
+        _, flags, gear, _, _, rpm, speed, lean_angle, _, _, _ = values
+        # The frame encodes a missing reading as 0; log it as NULL like DataAcquisition does
+        rpm = rpm if flags & frame.FLAG_RPM_VALID else None
+        speed = speed if flags & frame.FLAG_SPEED_VALID else None
+        gear = gear if flags & frame.FLAG_GEAR_VALID else None
+        self.logged += 1
+        if self.writer is not None:
+            self.writer.log_sensor_data(rpm, speed, gear, lean_angle)
+        if self.ts_sensor is not None and self.ts_sensor.append(time.time_ns(), (rpm, speed, gear, lean_angle)):
+            await asyncio.to_thread(self.ts_sensor.flush)
+
+    async def run(self, stop_event):
+        await self.scheduler.run(stop_event)
+
+    def stats(self):
+        stats = {'logged': self.logged, 'stale': self.stale, 'scheduler': self.scheduler.stats()}
+        if self.writer is not None:
+            stats['writer'] = self.writer.stats()
+        return stats
+
+    def close(self):
+        if self.ts_sensor is not None:
+            self.ts_sensor.close()
+        if self.writer is not None:
+            self.writer.close()
+        if self.ring is not None:
+            self.ring.close()
+
+# Example usage:
+# logger = RingLogger()
+# asyncio.run(logger.run(asyncio.Event()))
+# logger.close()
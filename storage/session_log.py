@@ -0,0 +1,217 @@
+import glob
+import math
+import os
+import struct
+import threading
+import zlib
+from datetime import datetime, timezone
+
+from utils.helpers import parse_fix_time
+
+# A session is a directory of chunk files. Each chunk starts with a file header and holds
+# a sequence of blocks; a block is a batch of records, stored raw or zlib-compressed.
+# A block is only written whole, so a crash loses at most the last flush interval.
+MAGIC = b"R3SL"
+VERSION = 1
+FLAG_COMPRESSED = 1
+FILE_HEADER = struct.Struct("<4sHHq")  # magic, version, flags, wall clock at creation (ns)
+BLOCK_HEADER = struct.Struct("<BII")  # codec (0 raw, 1 zlib), raw length, stored length
+CHUNK_SUFFIX = ".r3s"
+
+REC_CAN = 1
+REC_IMU = 2
+REC_GPS = 3
+CAN_EXTENDED = 0x80000000
+# Records: type, monotonic t_ns, then the payload
+CAN_RECORD = struct.Struct("<BqIB")  # can_id (bit 31 = extended), dlc, followed by dlc data bytes
+IMU_RECORD = struct.Struct("<Bq6f")  # ax, ay, az (m/s^2), gx, gy, gz (deg/s)
+GPS_RECORD = struct.Struct("<Bqdddfff")  # lat, lon, fix time (epoch s), alt, speed, track; NaN = missing
+
+NAN = float("nan")
+
+
+def _opt(value):
+    return NAN if value is None else value
+
+
+def _none(value):
+    return None if math.isnan(value) else value
+
+
+class SessionRecorder:
+    """
+    Append-only recorder for raw sensor input: every CAN frame, IMU sample and GPS fix with
+    its monotonic timestamp. record_*() can be called from any reader thread; they only pack
+    the record into an in-memory buffer, and a background thread writes it out as one block
+    per flush interval, rotating to a new chunk file every chunk_bytes.
+    """
+    def __init__(self, path, chunk_bytes=16 << 20, flush_interval=1.0, compress=True, max_buffer=8 << 20):
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self.max_buffer = max_buffer
+        os.makedirs(path, exist_ok=True)
+        self.records = 0
+        self.dropped = 0
+        self.bytes_raw = 0
+        self.bytes_written = 0
+        self.chunks = 0
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._file = None
+        self._chunk_size = 0
+        self._chunk_index = len(glob.glob(os.path.join(path, "*" + CHUNK_SUFFIX)))
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-recorder", daemon=True)
+        self._thread.start()
+
+    def _append(self, record):
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                # Disk is not keeping up; drop rather than grow without bound
+                self.dropped += 1
+                return
+            self._buffer += record
+            self.records += 1
+
+    def record_can(self, t_ns, can_id, data, extended=False):
+        data = bytes(data[:8])
+        self._append(CAN_RECORD.pack(REC_CAN, t_ns, can_id | (CAN_EXTENDED if extended else 0), len(data)) + data)
+
+    def record_imu(self, t_ns, accel, gyro):
+        self._append(IMU_RECORD.pack(REC_IMU, t_ns, *accel, *gyro))
+
+    def record_gps(self, t_ns, fix):
+        self._append(GPS_RECORD.pack(
+            REC_GPS, t_ns,
+            _opt(fix.get('lat')), _opt(fix.get('lon')), _opt(parse_fix_time(fix.get('fix_time'))),
+            _opt(fix.get('alt')), _opt(fix.get('speed')), _opt(fix.get('track'))
+        ))
+
+    def _open_chunk(self):
+        if self._file is not None:
+            self._file.close()
+        name = os.path.join(self.path, f"{self._chunk_index:05d}{CHUNK_SUFFIX}")
+        self._chunk_index += 1
+        self.chunks += 1
+        self._file = open(name, "ab")
+        header = FILE_HEADER.pack(MAGIC, VERSION, FLAG_COMPRESSED if self.compress else 0,
+                                  int(datetime.now(timezone.utc).timestamp() * 1e9))
+        self._file.write(header)
+        self._chunk_size = len(header)
+
+    def flush(self):
+        with self._lock:
+            raw = bytes(self._buffer)
+            self._buffer = bytearray()
+        if not raw:
+            return
+        with self._io_lock:
+            if self._file is None or self._chunk_size >= self.chunk_bytes:
+                self._open_chunk()
+            if self.compress:
+                codec, stored = 1, zlib.compress(raw, 1)
+            else:
+                codec, stored = 0, raw
+            block = BLOCK_HEADER.pack(codec, len(raw), len(stored)) + stored
+            self._file.write(block)
+            self._file.flush()
+            self._chunk_size += len(block)
+            self.bytes_raw += len(raw)
+            self.bytes_written += len(block)
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Session recorder write failed: {e}")
+
+    def stats(self):
+        return {
+            'records': self.records,
+            'dropped': self.dropped,
+            'chunks': self.chunks,
+            'bytes_raw': self.bytes_raw,
+            'bytes_written': self.bytes_written,
+        }
+
+    def close(self):
+        self._stop_event.set()
+        self._thread.join()
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _records(raw):
+    offset = 0
+    end = len(raw)
+    while offset < end:
+        kind = raw[offset]
+        if kind == REC_CAN:
+            _, t_ns, can_id, dlc = CAN_RECORD.unpack_from(raw, offset)
+            offset += CAN_RECORD.size
+            yield REC_CAN, t_ns, (can_id & ~CAN_EXTENDED, bool(can_id & CAN_EXTENDED), raw[offset:offset + dlc])
+            offset += dlc
+        elif kind == REC_IMU:
+            _, t_ns, ax, ay, az, gx, gy, gz = IMU_RECORD.unpack_from(raw, offset)
+            offset += IMU_RECORD.size
+            yield REC_IMU, t_ns, ((ax, ay, az), (gx, gy, gz))
+        elif kind == REC_GPS:
+            _, t_ns, lat, lon, fix_epoch, alt, speed, track = GPS_RECORD.unpack_from(raw, offset)
+            offset += GPS_RECORD.size
+            fix_epoch = _none(fix_epoch)
+            yield REC_GPS, t_ns, {
+                'lat': _none(lat), 'lon': _none(lon), 'alt': _none(alt), 'speed': _none(speed), 'track': _none(track),
+                'fix_time': None if fix_epoch is None else datetime.fromtimestamp(fix_epoch, timezone.utc).isoformat(),
+            }
+        else:
+            raise ValueError(f"Unknown record type {kind} at offset {offset}")
+
+
+def read_chunk(filename):
+    """
+    Yields (kind, t_ns, payload) for every record in one chunk file. A block cut short by a
+    crash or a recorder that is still writing ends the chunk quietly.
+    """
+    with open(filename, "rb") as f:
+        header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            return
+        magic, version, _, _ = FILE_HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{filename} is not a version {VERSION} session chunk")
+        while True:
+            head = f.read(BLOCK_HEADER.size)
+            if len(head) < BLOCK_HEADER.size:
+                return
+            codec, raw_len, stored_len = BLOCK_HEADER.unpack(head)
+            stored = f.read(stored_len)
+            if len(stored) < stored_len:
+                return
+            raw = zlib.decompress(stored) if codec == 1 else stored
+            yield from _records(raw)
+
+
+def read_session(path):
+    """
+    Yields (kind, t_ns, payload) for every record of a session directory (or a single
+    chunk file), in recording order.
+    """
+    if os.path.isdir(path):
+        for filename in sorted(glob.glob(os.path.join(path, "*" + CHUNK_SUFFIX))):
+            yield from read_chunk(filename)
+    else:
+        yield from read_chunk(path)
+
+# Example usage:
+# recorder = SessionRecorder("sessions/2024-06-01-track")
+# recorder.record_can(time.monotonic_ns(), 0x100, b"\x1f\x40")
+# recorder.close()
+# for kind, t_ns, payload in read_session("sessions/2024-06-01-track"):
+#     print(kind, t_ns, payload)
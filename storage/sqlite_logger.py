@@ -3,10 +3,10 @@ from datetime import datetime, timezone
 
 DB_PATH = "telemetry.db"
 
-def get_connection():
-    return sqlite3.connect(DB_PATH)
+def get_connection(db_path=None):
+    return sqlite3.connect(db_path or DB_PATH)
 
-def create_tables():
+def create_tables(conn=None):
     SCHEMA = """
     CREATE TABLE IF NOT EXISTS sensor_data (
         timestamp    DATETIME PRIMARY KEY,
@@ -37,6 +37,10 @@ def create_tables():
         FOREIGN KEY(lap_id) REFERENCES laps(id)
     );
     """
+    if conn is not None:
+        conn.executescript(SCHEMA)
+        conn.commit()
+        return
     with get_connection() as conn:
         conn.executescript(SCHEMA)
         conn.commit()
@@ -78,5 +82,17 @@ def end_lap(lap_id, end_time=None):
         )
         conn.commit()
 
-# Optionally, call create_tables() on import to ensure DB is ready
-create_tables()
+def set_best_lap(lap_id, track_name):
+    # Only one lap per track carries the best flag
+    with get_connection() as conn:
+        conn.execute("UPDATE laps SET best = 0 WHERE track_name = ?", (track_name,))
+        conn.execute("UPDATE laps SET best = 1 WHERE id = ?", (lap_id,))
+        conn.commit()
+
+def log_checkpoint(lap_id, checkpoint_name, timestamp, delta_vs_best=None):
+    with get_connection() as conn:
+        conn.execute(
+            "INSERT INTO checkpoints (lap_id, checkpoint_name, timestamp, delta_vs_best) VALUES (?, ?, ?, ?)",
+            (lap_id, checkpoint_name, timestamp, delta_vs_best)
+        )
+        conn.commit()
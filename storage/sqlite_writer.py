@@ -0,0 +1,192 @@
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from storage import sqlite_logger
+
+INSERT_SENSOR_DATA = (
+    "INSERT OR IGNORE INTO sensor_data (timestamp, rpm, speed, gear, lean_angle) VALUES (?, ?, ?, ?, ?)"
+)
+INSERT_GPS_POINT = "INSERT INTO gps_path (lap_id, timestamp, latitude, longitude) VALUES (?, ?, ?, ?)"
+
+_STOP = object()
+
+
+class SQLiteWriter:
+    """
+    Background telemetry writer. Owns one long-lived WAL-mode SQLite connection on a
+    dedicated thread and drains a bounded in-memory queue in executemany batches.
+    Producers never touch the database, so logging at CAN/IMU rate does not stall the event loop.
+    If the database cannot be opened, error says why and the open is retried every retry_s.
+    """
+    def __init__(self, db_path=None, flush_size=100, flush_interval=1.0, queue_size=5000, retry_s=5.0):
+        self.db_path = db_path or sqlite_logger.DB_PATH
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.retry_s = retry_s
+        self._queue = queue.Queue(maxsize=queue_size)
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.ignored = 0
+        self.batches = 0
+        self.errors = 0
+        self.high_water = 0
+        self.error = None  # Why the database could not be opened, while it cannot
+        self._closed = False
+        self._closing = threading.Event()
+        # Set once the connection is open and the schema exists, or the first open failed
+        # (see error); until the connection is open rows just queue
+        self.ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, row):
+        """
+        Queue a single row for insertion. Never blocks: when the queue is full the row is
+        dropped and counted, so a slow SD card cannot back up into the sensor loops.
+        Returns True if the row was queued.
+        """
+        if self._closed:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait((sql, row))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        depth = self._queue.qsize()
+        if depth > self.high_water:
+            self.high_water = depth
+        return True
+
+    def log_sensor_data(self, rpm, speed, gear, lean_angle, timestamp=None):
+        timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+        return self.submit(INSERT_SENSOR_DATA, (timestamp, rpm, speed, gear, lean_angle))
+
+    def log_gps_point(self, lap_id, timestamp, lat, lon):
+        return self.submit(INSERT_GPS_POINT, (lap_id, timestamp, lat, lon))
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def under_pressure(self, ratio=0.8):
+        """
+        True when the queue is filling faster than the writer drains it.
+        """
+        return self._queue.qsize() >= self._queue.maxsize * ratio
+
+    def stats(self):
+        return {
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'ignored': self.ignored,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'errors': self.errors,
+            'pending': self.pending(),
+            'high_water': self.high_water,
+            'error': self.error,
+        }
+
+    def close(self, timeout=5.0):
+        """
+        Flush everything still queued, close the connection and stop the writer thread.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._closing.set()
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL only fsyncs at checkpoints instead of on every commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        sqlite_logger.create_tables(conn)
+        return conn
+
+    def _connect(self):
+        """
+        Opens the database, retrying until it works; returns None if close() is called first.
+        """
+        while True:
+            try:
+                conn = self._open()
+            except sqlite3.Error as e:
+                self.errors += 1
+                if str(e) != self.error:
+                    print(f"SQLite writer cannot open {self.db_path}: {e}; retrying every {self.retry_s:g}s")
+                self.error = str(e)
+                # Do not keep startup waiting on a database that may never open
+                self.ready.set()
+                if self._closing.wait(self.retry_s):
+                    return None
+                continue
+            self.error = None
+            self.ready.set()
+            return conn
+
+    def _flush(self, conn, batch):
+        if not batch:
+            return
+        before = conn.total_changes
+        try:
+            with conn:
+                # Group consecutive rows for the same statement into a single executemany
+                start = 0
+                for i in range(1, len(batch) + 1):
+                    if i == len(batch) or batch[i][0] != batch[start][0]:
+                        conn.executemany(batch[start][0], [row for _, row in batch[start:i]])
+                        start = i
+            # INSERT OR IGNORE skips rows whose timestamp key already exists
+            written = conn.total_changes - before
+            self.written += written
+            self.ignored += len(batch) - written
+            self.batches += 1
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"SQLite writer failed to flush {len(batch)} rows: {e}")
+        batch.clear()
+
+    def _run(self):
+        conn = self._connect()
+        if conn is None:
+            return
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    # Drain whatever producers managed to queue before close()
+                    while True:
+                        try:
+                            item = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if item is not _STOP:
+                            batch.append(item)
+                    self._flush(conn, batch)
+                    break
+                if item is not None:
+                    batch.append(item)
+                if len(batch) >= self.flush_size or time.monotonic() >= deadline:
+                    self._flush(conn, batch)
+                    deadline = time.monotonic() + self.flush_interval
+        finally:
+            conn.close()
+
+# Example usage:
+# writer = SQLiteWriter(flush_size=200, flush_interval=0.5)
+# writer.log_sensor_data(8000, 120, 4, 12.5)
+# writer.close()
+# print(writer.stats())
@@ -0,0 +1,409 @@
+import argparse
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+
+DEFAULT_ROOT = os.path.join("data", "timeseries")
+INDEX_NAME = "index.db"
+CHUNK_ROWS = 65536  # ~22 minutes of sensor rows at 50 Hz
+ROLLUP_LEVELS = (1, 10, 60)  # Bucket widths in seconds
+NS = 1_000_000_000
+
+# Columns per series (all share the series' int64 't' column, nanoseconds since the epoch).
+# Missing values are stored as NaN.
+SERIES = {
+    'sensor': (('rpm', 'f4'), ('speed', 'f4'), ('gear', 'f4'), ('lean_angle', 'f4')),
+    'gps': (('latitude', 'f8'), ('longitude', 'f8'), ('lap_id', 'f8')),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    name         TEXT,
+    source       TEXT,
+    start_ns     INTEGER,
+    end_ns       INTEGER
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    session_id   INTEGER,
+    series       TEXT,
+    level        INTEGER,
+    seq          INTEGER,
+    start_ns     INTEGER,
+    end_ns       INTEGER,
+    rows         INTEGER,
+    path         TEXT,
+    FOREIGN KEY(session_id) REFERENCES sessions(id)
+);
+CREATE INDEX IF NOT EXISTS chunks_range ON chunks (session_id, series, level, start_ns);
+"""
+
+
+def rollup(t, columns, seconds):
+    """
+    Per-bucket min/max/sum/count of each column over buckets of the given width, aligned
+    to the epoch. Returns (bucket start times, stats) where stats has 4 columns per input
+    column in that order. NaNs are left out of every statistic.
+    """
+    width = seconds * NS
+    bucket = t // width
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    stats = np.empty((len(starts), 4 * len(columns)), dtype='f8')
+    for i, values in enumerate(columns):
+        values = values.astype('f8', copy=False)
+        valid = ~np.isnan(values)
+        stats[:, 4 * i] = np.fmin.reduceat(values, starts)
+        stats[:, 4 * i + 1] = np.fmax.reduceat(values, starts)
+        stats[:, 4 * i + 2] = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        stats[:, 4 * i + 3] = np.add.reduceat(valid.astype('f8'), starts)
+    return bucket[starts] * width, stats
+
+
+def merge_rollups(t, stats):
+    """
+    A bucket that straddles two chunks has a partial entry in each; combine them.
+    """
+    if len(t) < 2 or not (t[1:] == t[:-1]).any():
+        return t, stats
+    starts = np.flatnonzero(np.r_[True, t[1:] != t[:-1]])
+    merged = np.empty((len(starts), stats.shape[1]), dtype='f8')
+    merged[:, 0::4] = np.fmin.reduceat(stats[:, 0::4], starts)
+    merged[:, 1::4] = np.fmax.reduceat(stats[:, 1::4], starts)
+    merged[:, 2::4] = np.add.reduceat(stats[:, 2::4], starts)
+    merged[:, 3::4] = np.add.reduceat(stats[:, 3::4], starts)
+    return t[starts], merged
+
+
+class SeriesWriter:
+    """
+    Buffers rows of one series in preallocated arrays and writes them out as a sealed chunk
+    (one .npy file per column, plus rollups at every level) every chunk_rows rows.
+    append() is cheap enough for the sampling loop; flush() does the file I/O.
+    """
+    def __init__(self, store, session_id, series, chunk_rows=CHUNK_ROWS):
+        self.store = store
+        self.session_id = session_id
+        self.series = series
+        self.columns = SERIES[series]
+        self.chunk_rows = chunk_rows
+        self.seq = store._next_seq(session_id, series)
+        self.rows = 0
+        self._alloc()
+
+    def _alloc(self):
+        self._t = np.empty(self.chunk_rows, dtype='i8')
+        self._values = [np.empty(self.chunk_rows, dtype=dtype) for _, dtype in self.columns]
+        self._n = 0
+
+    def append(self, t_ns, values):
+        """
+        Adds one row (values in column order, None for missing). Returns True once the
+        buffer is full and should be flushed.
+        """
+        i = self._n
+        self._t[i] = t_ns
+        for column, v in zip(self._values, values):
+            column[i] = np.nan if v is None else v
+        self._n = i + 1
+        self.rows += 1
+        return self._n >= self.chunk_rows
+
+    def append_many(self, t, columns):
+        """
+        Adds a block of rows (int64 ns array and one array per column), flushing full chunks.
+        """
+        offset = 0
+        total = len(t)
+        while offset < total:
+            take = min(self.chunk_rows - self._n, total - offset)
+            end = self._n + take
+            self._t[self._n:end] = t[offset:offset + take]
+            for dst, src in zip(self._values, columns):
+                dst[self._n:end] = src[offset:offset + take]
+            self._n = end
+            self.rows += take
+            offset += take
+            if self._n >= self.chunk_rows:
+                self.flush()
+
+    def flush(self):
+        n = self._n
+        if n == 0:
+            return
+        t, values = self._t[:n], [v[:n] for v in self._values]
+        self._alloc()
+        if n > 1 and (t[1:] < t[:-1]).any():
+            order = np.argsort(t, kind='stable')
+            t, values = t[order], [v[order] for v in values]
+        self.store._write_chunk(self.session_id, self.series, self.seq, t, values)
+        self.seq += 1
+
+    def close(self):
+        self.flush()
+
+
+class TimeSeriesStore:
+    """
+    Ride history as chunked columnar segments: root/<session>/<series>/<seq>/<column>.npy,
+    loaded memory-mapped. An SQLite index (root/index.db) lists sessions and the time range
+    of every chunk and rollup, so a range query only opens the chunks it overlaps.
+    """
+    def __init__(self, root=None):
+        self.root = root or DEFAULT_ROOT
+        os.makedirs(self.root, exist_ok=True)
+        self.index_path = os.path.join(self.root, INDEX_NAME)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.index_path)
+
+    def create_session(self, name=None, source='live'):
+        name = name or datetime.now().strftime("%Y%m%d-%H%M%S")
+        with self._connect() as conn:
+            return conn.execute("INSERT INTO sessions (name, source) VALUES (?, ?)", (name, source)).lastrowid
+
+    def writer(self, session_id, series, chunk_rows=CHUNK_ROWS):
+        return SeriesWriter(self, session_id, series, chunk_rows)
+
+    def sessions(self, source=None):
+        sql = "SELECT id, name, source, start_ns, end_ns FROM sessions"
+        args = ()
+        if source is not None:
+            sql += " WHERE source = ?"
+            args = (source,)
+        with self._connect() as conn:
+            return [
+                {'id': r[0], 'name': r[1], 'source': r[2], 'start_ns': r[3], 'end_ns': r[4]}
+                for r in conn.execute(sql + " ORDER BY start_ns", args)
+            ]
+
+    def _next_seq(self, session_id, series):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(seq) FROM chunks WHERE session_id = ? AND series = ? AND level = 0", (session_id, series)
+            ).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def _write_chunk(self, session_id, series, seq, t, values):
+        rel = os.path.join(str(session_id), series, f"{seq:05d}")
+        path = os.path.join(self.root, rel)
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "t.npy"), t)
+        for (name, _), column in zip(SERIES[series], values):
+            np.save(os.path.join(path, f"{name}.npy"), column)
+        rows = [(session_id, series, 0, seq, int(t[0]), int(t[-1]), len(t), rel)]
+        for level in ROLLUP_LEVELS:
+            bucket_t, stats = rollup(t, values, level)
+            np.save(os.path.join(path, f"r{level}_t.npy"), bucket_t)
+            np.save(os.path.join(path, f"r{level}_stats.npy"), stats)
+            rows.append((session_id, series, level, seq, int(bucket_t[0]), int(bucket_t[-1]) + level * NS - 1,
+                         len(bucket_t), rel))
+        # Index rows go in last, so a reader never sees a chunk whose files are incomplete
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO chunks (session_id, series, level, seq, start_ns, end_ns, rows, path) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute(
+                "UPDATE sessions SET start_ns = MIN(COALESCE(start_ns, ?), ?), end_ns = MAX(COALESCE(end_ns, ?), ?) WHERE id = ?",
+                (int(t[0]), int(t[0]), int(t[-1]), int(t[-1]), session_id)
+            )
+
+    def _chunks(self, session_id, series, level, start_ns, end_ns):
+        sql = "SELECT path FROM chunks WHERE session_id = ? AND series = ? AND level = ?"
+        args = [session_id, series, level]
+        if end_ns is not None:
+            sql += " AND start_ns <= ?"
+            args.append(end_ns)
+        if start_ns is not None:
+            sql += " AND end_ns >= ?"
+            args.append(start_ns)
+        with self._connect() as conn:
+            return [os.path.join(self.root, r[0]) for r in conn.execute(sql + " ORDER BY start_ns", args)]
+
+    def _load(self, path, name):
+        return np.load(os.path.join(path, name), mmap_mode='r')
+
+    def iter_query(self, session_id, series, columns=None, start_ns=None, end_ns=None):
+        """
+        Like query(), but yields one dict of (memory-mapped) arrays per chunk touched, so
+        a long session can be processed without loading it all at once.
+        """
+        columns = columns or [name for name, _ in SERIES[series]]
+        for path in self._chunks(session_id, series, 0, start_ns, end_ns):
+            t = self._load(path, "t.npy")
+            i0 = 0 if start_ns is None else np.searchsorted(t, start_ns, 'left')
+            i1 = len(t) if end_ns is None else np.searchsorted(t, end_ns, 'right')
+            if i0 >= i1:
+                continue
+            part = {'t': t[i0:i1]}
+            for name in columns:
+                part[name] = self._load(path, f"{name}.npy")[i0:i1]
+            yield part
+
+    def query(self, session_id, series, columns=None, start_ns=None, end_ns=None):
+        """
+        Raw rows of a series within [start_ns, end_ns] (either end open when None).
+        Returns a dict of arrays: 't' plus each requested column.
+        """
+        columns = columns or [name for name, _ in SERIES[series]]
+        parts = {name: [] for name in ['t'] + list(columns)}
+        for part in self.iter_query(session_id, series, columns, start_ns, end_ns):
+            for name, values in part.items():
+                parts[name].append(values)
+        dtypes = dict(SERIES[series], t='i8')
+        return {
+            name: np.concatenate(chunks) if chunks else np.empty(0, dtype=dtypes[name])
+            for name, chunks in parts.items()
+        }
+
+    def rollup(self, session_id, series, column, level, start_ns=None, end_ns=None):
+        """
+        Precomputed min/max/mean/count of one column in level-second buckets overlapping
+        [start_ns, end_ns]. Returns a dict of arrays: t (bucket start), min, max, mean, count.
+        """
+        if level not in ROLLUP_LEVELS:
+            raise ValueError(f"No rollup at {level}s (available: {ROLLUP_LEVELS})")
+        index = [name for name, _ in SERIES[series]].index(column)
+        ts, stats = [], []
+        width = level * NS
+        for path in self._chunks(session_id, series, level, start_ns, end_ns):
+            t = self._load(path, f"r{level}_t.npy")
+            i0 = 0 if start_ns is None else np.searchsorted(t, start_ns - width + 1, 'left')
+            i1 = len(t) if end_ns is None else np.searchsorted(t, end_ns, 'right')
+            ts.append(t[i0:i1])
+            stats.append(self._load(path, f"r{level}_stats.npy")[i0:i1, 4 * index:4 * index + 4])
+        if not ts:
+            t, s = np.empty(0, dtype='i8'), np.empty((0, 4))
+        else:
+            t, s = merge_rollups(np.concatenate(ts), np.concatenate(stats))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = s[:, 2] / s[:, 3]
+        return {'t': t, 'min': s[:, 0], 'max': s[:, 1], 'mean': mean, 'count': s[:, 3].astype('i8')}
+
+
+def iso_to_ns(timestamps):
+    """
+    ISO-8601 text timestamps (as written by sqlite_logger/SQLiteWriter) to int64 ns since
+    the epoch. UTC strings are parsed in bulk by numpy; other offsets go through datetime.
+    """
+    stripped = []
+    slow = []
+    for i, s in enumerate(timestamps):
+        if s.endswith('+00:00'):
+            stripped.append(s[:-6])
+        elif s.endswith('Z'):
+            stripped.append(s[:-1])
+        elif '+' in s[10:] or '-' in s[10:]:
+            stripped.append('NaT')
+            slow.append(i)
+        else:
+            stripped.append(s)
+    ns = np.array(stripped, dtype='datetime64[ns]').astype('i8')
+    for i in slow:
+        ns[i] = int(datetime.fromisoformat(timestamps[i]).timestamp() * NS)
+    return ns
+
+
+def migrate_sqlite(db_path, store, gap_s=600, batch=100000):
+    """
+    Copies sensor_data and gps_path from a telemetry.db into the store. The old schema has
+    no notion of a ride, so a new session starts wherever samples are more than gap_s apart.
+    Returns the ids of the sessions created (none if db_path was already migrated).
+    """
+    source = f"sqlite:{os.path.abspath(db_path)}"
+    if store.sessions(source=source):
+        print(f"{db_path} was already migrated, skipping")
+        return []
+    conn = sqlite3.connect(db_path)
+    gap_ns = gap_s * NS
+    sessions = []  # (session_id, start_ns)
+    writer = None
+    last = None
+    cursor = conn.execute("SELECT timestamp, rpm, speed, gear, lean_angle FROM sensor_data ORDER BY timestamp")
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            break
+        t = iso_to_ns([r[0] for r in rows])
+        columns = [np.array([r[i] for r in rows], dtype='f8') for i in range(1, 5)]
+        # Split the batch wherever a new ride starts
+        prev = np.r_[t[0] if last is None else last, t[:-1]]
+        breaks = np.flatnonzero(t - prev > gap_ns)
+        if last is None:
+            breaks = np.r_[0, breaks]
+        bounds = np.r_[0, breaks, len(t)]
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            if a == b:
+                continue
+            if writer is None or a in breaks:
+                if writer is not None:
+                    writer.close()
+                start = datetime.fromtimestamp(t[a] / NS, timezone.utc).strftime("%Y%m%d-%H%M%S")
+                session_id = store.create_session(start, source=source)
+                sessions.append((session_id, int(t[a])))
+                writer = store.writer(session_id, 'sensor')
+            writer.append_many(t[a:b], [c[a:b] for c in columns])
+        last = int(t[-1])
+    if writer is not None:
+        writer.close()
+
+    if sessions:
+        starts = np.array([s for _, s in sessions], dtype='i8')
+        writers = {}
+        cursor = conn.execute("SELECT timestamp, latitude, longitude, lap_id FROM gps_path ORDER BY timestamp")
+        while True:
+            rows = cursor.fetchmany(batch)
+            if not rows:
+                break
+            t = iso_to_ns([r[0] for r in rows])
+            columns = [np.array([(r[i] if r[i] is not None else np.nan) for r in rows], dtype='f8') for i in (1, 2, 3)]
+            # Points before the first ride belong to it; others to the latest ride started before them
+            owner = np.maximum(np.searchsorted(starts, t, 'right') - 1, 0)
+            for k in np.unique(owner):
+                sel = owner == k
+                session_id = sessions[k][0]
+                if session_id not in writers:
+                    writers[session_id] = store.writer(session_id, 'gps')
+                writers[session_id].append_many(t[sel], [c[sel] for c in columns])
+        for w in writers.values():
+            w.close()
+    conn.close()
+    return [s for s, _ in sessions]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar ride history store")
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="import sensor_data/gps_path from an SQLite telemetry database")
+    migrate.add_argument("--db", default="telemetry.db")
+    migrate.add_argument("--gap", type=float, default=600, help="seconds without samples that split two rides")
+    sub.add_parser("sessions", help="list stored sessions")
+    args = parser.parse_args()
+
+    store = TimeSeriesStore(args.root)
+    if args.command == "migrate":
+        created = migrate_sqlite(args.db, store, gap_s=args.gap)
+        print(f"Created {len(created)} sessions from {args.db}")
+    for s in store.sessions():
+        if s['start_ns'] is None:
+            continue
+        start = datetime.fromtimestamp(s['start_ns'] / NS, timezone.utc)
+        minutes = (s['end_ns'] - s['start_ns']) / NS / 60
+        print(f"{s['id']:>4}  {s['name']:<16} {start:%Y-%m-%d %H:%M} UTC  {minutes:7.1f} min  {s['source']}")
+
+
+if __name__ == "__main__":
+    main()
+
+# Example usage:
+# store = TimeSeriesStore()
+# session = store.create_session()
+# writer = store.writer(session, 'sensor')
+# writer.append(time.time_ns(), (9000, 120, 4, 35.0))
+# writer.close()
+# print(store.rollup(session, 'sensor', 'rpm', 60)['max'])
@@ -0,0 +1,208 @@
+import asyncio
+import multiprocessing as mp
+import multiprocessing.connection
+import os
+import signal
+import time
+
+from config import CONFIG
+from utils.startup import BOOT_ENV, StartupProfile, process_start_ns
+
+# Acquisition starts first so the ring exists for the others. On shutdown the display goes
+# first, acquisition flushes its GPS/lap log through DataAcquisition.stop(), and storage
+# logs the final samples and drains last.
+START_ORDER = ("acquisition", "storage", "display")
+STOP_ORDER = ("display", "acquisition", "storage")
+
+
+def _place(name, settings):
+    """
+    Applies a child's CPU affinity, nice value and SCHED_FIFO priority. Runs first thing in
+    the child, so every thread it starts inherits them. Failures (no CAP_SYS_NICE, CPU not
+    present) are reported and the child runs unpinned rather than not at all.
+    """
+    cpus = settings.get("cpus")
+    if cpus:
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError as e:
+            print(f"{name}: cannot pin to CPUs {cpus}: {e}")
+    nice = settings.get("nice")
+    if nice is not None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, nice)
+        except OSError as e:
+            print(f"{name}: cannot set nice {nice}: {e}")
+    fifo = settings.get("fifo_priority")
+    if fifo:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(fifo))
+        except OSError as e:
+            print(f"{name}: cannot set SCHED_FIFO priority {fifo}: {e}")
+
+
+def _child_signals():
+    # Ctrl-C reaches the whole process group; only the supervisor acts on it, and stops
+    # children one by one with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def run_acquisition(settings, ts_session, log_sensors):
+    _place("acquisition", settings)
+    _child_signals()
+    profile = StartupProfile("acquisition")
+    with profile.phase("imports"):
+        from data_acquisition import DataAcquisition
+    daq = DataAcquisition(log_sensors=log_sensors, ts_session=ts_session, profile=profile)
+
+    async def main():
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, daq.request_stop)
+        await daq.start()
+    try:
+        asyncio.run(main())
+    finally:
+        daq.stop()
+
+
+def run_storage(settings, ts_session):
+    _place("storage", settings)
+    _child_signals()
+    from storage.ring_logger import RingLogger
+    logger = RingLogger(ts_session=ts_session)
+    stop_event = asyncio.Event()
+
+    async def main():
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop_event.set)
+        await logger.run(stop_event)
+    try:
+        asyncio.run(main())
+    finally:
+        logger.close()
+        print(f"storage: {logger.stats()}")
+
+
+def run_display(settings):
+    _place("display", settings)
+    _child_signals()
+    # display_gui runs its render loop at import and handles SIGTERM like ESC
+    import display_gui  # noqa: F401
+
+
+class Child:
+    def __init__(self, name, target, args):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.backoff = 0.0
+        self.next_start = 0.0
+
+
+class Supervisor:
+    """
+    Runs acquisition, storage and display as separate processes, each with its own CPU
+    affinity and priority, so the render loop and CAN ingestion never wait on the GIL of a
+    logging stall. Sensor state is shared through the shm ring that acquisition writes and
+    the others read. A child that exits is restarted after a backoff that doubles per crash
+    (up to restart_backoff_max_s) and resets once it has stayed up for a minute.
+    """
+    STABLE_S = 60.0
+
+    def __init__(self, children, backoff_s=1.0, max_backoff_s=30.0, stop_timeout_s=5.0):
+        self.ctx = mp.get_context("spawn")
+        self.children = children
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.stop_timeout_s = stop_timeout_s
+        self._stopping = False
+
+    def _start(self, child):
+        child.process = self.ctx.Process(target=child.target, args=child.args, name=child.name)
+        child.process.start()
+        child.started_at = time.monotonic()
+        print(f"Started {child.name} (pid {child.process.pid})")
+
+    def _exited(self, child, now):
+        code = child.process.exitcode
+        child.process = None
+        if now - child.started_at >= self.STABLE_S:
+            child.backoff = 0.0
+        child.backoff = min(max(child.backoff * 2, self.backoff_s), self.max_backoff_s)
+        child.next_start = now + child.backoff
+        child.restarts += 1
+        print(f"{child.name} exited with code {code}, restarting in {child.backoff:.1f}s")
+
+    def request_stop(self, *_):
+        self._stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        for child in self.children:
+            self._start(child)
+        # Children started from here on (restarts) time their startup from their own start
+        os.environ.pop(BOOT_ENV, None)
+        try:
+            while not self._stopping:
+                running = [c.process.sentinel for c in self.children if c.process is not None]
+                # Short timeout: pending restarts and stop requests are checked between waits
+                multiprocessing.connection.wait(running, timeout=0.5)
+                now = time.monotonic()
+                for child in self.children:
+                    if child.process is not None and not child.process.is_alive():
+                        self._exited(child, now)
+                    if child.process is None and now >= child.next_start and not self._stopping:
+                        self._start(child)
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        for child in sorted(self.children, key=lambda c: STOP_ORDER.index(c.name)):
+            p = child.process
+            if p is None:
+                continue
+            p.terminate()
+            p.join(self.stop_timeout_s)
+            if p.is_alive():
+                print(f"{child.name} did not stop in {self.stop_timeout_s}s, killing it")
+                p.kill()
+                p.join()
+            print(f"Stopped {child.name} (exit code {p.exitcode})")
+            child.process = None
+
+
+def build_children():
+    processes = CONFIG.get("processes", {})
+    enabled = [name for name in START_ORDER if processes.get(name, {}).get("enabled", True)]
+    # The storage process logs from the shm ring; without the ring acquisition keeps logging
+    split_log = (
+        "storage" in enabled and CONFIG.get("logging_enabled", True) and CONFIG.get("transport", "shm") == "shm"
+    )
+    ts_session = None
+    if split_log and CONFIG.get("log_backend", "both") in ("timeseries", "both"):
+        # Both processes append to one session, and restarts continue it
+        from storage.timeseries import TimeSeriesStore
+        ts_session = TimeSeriesStore(CONFIG.get("ts_root")).create_session()
+    children = []
+    for name in enabled:
+        settings = processes.get(name, {})
+        if name == "acquisition":
+            children.append(Child(name, run_acquisition, (settings, ts_session, not split_log)))
+        elif name == "storage" and split_log:
+            children.append(Child(name, run_storage, (settings, ts_session)))
+        elif name == "display":
+            children.append(Child(name, run_display, (settings,)))
+    return children
+
+
+if __name__ == "__main__":
+    # Children report startup phases against the supervisor's start (utils/startup.py)
+    os.environ.setdefault(BOOT_ENV, str(process_start_ns()))
+    Supervisor(
+        build_children(),
+        backoff_s=CONFIG.get("restart_backoff_s", 1.0),
+        max_backoff_s=CONFIG.get("restart_backoff_max_s", 30.0),
+        stop_timeout_s=CONFIG.get("stop_timeout_s", 5.0)
+    ).run()
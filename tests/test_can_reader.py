@@ -0,0 +1,126 @@
+from sensors.can_reader import RESEED_GAPS, CANReader, FrameStats
+from sensors.can_signals import Signal
+
+MS = 1_000_000
+
+
+def feed(stats, stamps_ns):
+    for t in stamps_ns:
+        stats.update(t)
+
+
+def periodic(start_ns, count, period_ns):
+    return [start_ns + k * period_ns for k in range(count)]
+
+
+def test_steady_rate_counts_nothing_missed():
+    stats = FrameStats()
+    feed(stats, periodic(0, 500, 10 * MS))
+    assert stats.frames == 500
+    assert stats.missed == 0
+    assert abs(stats.interval_ns - 10 * MS) < 1000
+
+
+def test_startup_burst_does_not_seed_the_period():
+    # Five frames 20 us apart (a queue flushed as the listener starts), then 100 Hz
+    burst = periodic(0, 5, 20_000)
+    stats = FrameStats()
+    feed(stats, burst + periodic(burst[-1] + 10 * MS, 200, 10 * MS))
+    assert stats.missed == 0
+    assert abs(stats.interval_ns - 10 * MS) < 1000
+
+
+def test_long_startup_burst_reseeds():
+    # More burst gaps than the seed takes: the period starts out wrong and must recover
+    burst = periodic(0, 3 * RESEED_GAPS, 20_000)
+    stats = FrameStats()
+    feed(stats, burst + periodic(burst[-1] + 10 * MS, 200, 10 * MS))
+    assert stats.missed == 0
+    assert abs(stats.interval_ns - 10 * MS) < 1000
+
+
+def test_dropped_frames_are_counted():
+    stamps = periodic(0, 300, 10 * MS)
+    lost = {50, 120, 121, 122, 200}
+    stats = FrameStats()
+    feed(stats, [t for k, t in enumerate(stamps) if k not in lost])
+    assert stats.missed == len(lost)
+
+
+def test_late_frame_is_not_a_loss():
+    # One frame 7 ms late: a 17 ms gap followed by a 3 ms one, too short for the period
+    stamps = periodic(0, 100, 10 * MS)
+    stamps[60] += 7 * MS
+    stats = FrameStats()
+    feed(stats, stamps)
+    assert stats.missed == 0
+
+
+def test_jitter_does_not_count():
+    stamps = [t + (k * 7919 % 9 - 4) * 500_000 for k, t in enumerate(periodic(0, 1000, 10 * MS))]
+    stats = FrameStats()
+    feed(stats, stamps)
+    assert stats.missed == 0
+
+
+def test_period_change_reseeds_without_losses():
+    first = periodic(0, 100, 10 * MS)
+    stats = FrameStats()
+    feed(stats, first + periodic(first[-1] + 40 * MS, 100, 40 * MS))
+    assert stats.missed == 0
+    assert abs(stats.interval_ns - 40 * MS) < 1000
+
+
+def test_frame_timestamps_are_used_for_gaps():
+    # Delivered in batches (now_ns bunched up) but stamped on reception by the kernel
+    stats = FrameStats()
+    for k in range(200):
+        stats.update(now_ns=(k // 10) * 100 * MS, stamp_ns=k * 10 * MS)
+    assert stats.missed == 0
+    assert abs(stats.interval_ns - 10 * MS) < 1000
+    assert stats.last_ns == 19 * 100 * MS
+
+
+def test_frame_late_by_most_of_a_period_is_not_a_loss():
+    # 6.5 ms late: a 16.5 ms gap, then a 3.5 ms one that still passes for the period
+    stamps = periodic(0, 100, 10 * MS)
+    stamps[60] += 6_500_000
+    stats = FrameStats()
+    feed(stats, stamps)
+    assert stats.missed == 0
+
+
+def test_catch_up_burst_mid_stream_keeps_the_period():
+    # The sender stalls for 2.4 ms, then sends its backlog back to back
+    stamps = periodic(0, 100, 1 * MS)
+    stalled = [stamps[49] + 2_400_000 + k * 80_000 for k in range(12)]
+    resumed = periodic(stalled[-1] + 1 * MS, 100, 1 * MS)
+    stats = FrameStats()
+    feed(stats, stamps[:50] + stalled + resumed)
+    assert stats.missed == 0
+    assert abs(stats.interval_ns - 1 * MS) < 10_000
+
+
+def test_faster_rate_reseeds():
+    first = periodic(0, 100, 30 * MS)
+    stats = FrameStats()
+    feed(stats, first + periodic(first[-1] + 10 * MS, 300, 10 * MS))
+    assert abs(stats.interval_ns - 10 * MS) < 1000
+    assert stats.missed == 0
+
+
+def test_kernel_filters_follow_the_extended_flag():
+    import can
+    reader = CANReader(channel='filters', bustype='virtual', signals=[
+        Signal('ext', 0x100, 0, 8, 'little', extended=True), Signal('std', 0x101, 0, 8, 'little')])
+    sender = can.interface.Bus(channel='filters', interface='virtual')
+    try:
+        for can_id, extended in ((0x100, False), (0x100, True), (0x101, True), (0x101, False)):
+            sender.send(can.Message(arbitration_id=can_id, data=bytes(8), is_extended_id=extended))
+        received = []
+        while (msg := reader.bus.recv(0.1)) is not None:
+            received.append((msg.arbitration_id, msg.is_extended_id))
+        assert received == [(0x100, True), (0x101, False)]
+    finally:
+        sender.shutdown()
+        reader.bus.shutdown()
@@ -0,0 +1,218 @@
+import random
+
+import pytest
+
+from sensors.can_signals import Signal, SignalDecoder, compile_signal, default_signals, load_signals, parse_dbc
+
+DBC = """VERSION ""
+
+BU_: ECU DASH
+
+BO_ 256 ENGINE: 8 ECU
+ SG_ rpm : 7|16@0+ (1,0) [0|16000] "rpm" DASH
+ SG_ throttle : 16|10@1+ (0.1,0) [0|100] "%" DASH
+
+BO_ 2147484160 CHASSIS: 8 ECU
+ SG_ Mux M : 0|4@1+ (1,0) [0|15] "" DASH
+ SG_ lean m1 : 13|12@0- (0.05,-1.5) [-90|90] "deg" DASH
+ SG_ coolant : 32|8@1+ (1,-40) [-40|215] "C" DASH
+
+CM_ SG_ 256 rpm "Engine speed";
+VAL_ 256 rpm 0 "off" ;
+"""
+
+
+def reference(sig, data):
+    """
+    Bit-by-bit DBC decoding over a zero-padded 8-byte payload.
+    """
+    data = bytes(data) + bytes(8 - len(data))
+    bit = sig.start_bit
+    bits = []
+    for _ in range(sig.length):
+        bits.append((data[bit // 8] >> (bit % 8)) & 1)
+        if sig.byte_order == 'little':
+            bit += 1
+        else:
+            bit = bit + 15 if bit % 8 == 0 else bit - 1
+    if sig.byte_order == 'little':
+        bits.reverse()
+    raw = 0
+    for b in bits:
+        raw = raw << 1 | b
+    if sig.signed and raw >> (sig.length - 1):
+        raw -= 1 << sig.length
+    return raw * sig.scale + sig.offset
+
+
+def random_signals(rng, count):
+    signals = []
+    for i in range(count):
+        order = rng.choice(('little', 'big'))
+        length = rng.choice((1, 3, 8, 10, 12, 16, 21, 32, 40))
+        if order == 'little':
+            start = rng.randrange(0, 64 - length + 1)
+        else:
+            # MSB position in DBC numbering such that the signal ends inside the payload
+            msb = rng.randrange(length - 1, 64)
+            byte, bit = divmod(msb, 8)
+            start = (7 - byte) * 8 + bit
+        signals.append(Signal(f's{i}', 0x300 + i % 4, start, length, order, rng.choice((1, 0.5, 0.01)),
+                              rng.choice((0, -40, 12.5)), rng.random() < 0.5))
+    return signals
+
+
+def test_parse_dbc():
+    signals = {s.name: s for s in parse_dbc(DBC)}
+    assert set(signals) == {'rpm', 'throttle', 'Mux', 'lean', 'coolant'}
+    assert signals['rpm'] == Signal('rpm', 256, 7, 16, 'big', 1, 0, False)
+    assert signals['throttle'] == Signal('throttle', 256, 16, 10, 'little', 0.1, 0, False)
+    # Bit 31 of the DBC message ID flags an extended frame and is not part of the ID
+    assert signals['lean'] == Signal('lean', 0x200, 13, 12, 'big', 0.05, -1.5, True, extended=True)
+    assert not signals['rpm'].extended
+    assert signals['coolant'].can_id == 0x200 and signals['coolant'].offset == -40
+    assert isinstance(signals['rpm'].scale, int)
+
+
+def test_load_signals(tmp_path):
+    path = tmp_path / "r3.dbc"
+    path.write_text(DBC)
+    assert load_signals({"can_dbc_file": str(path)}) == parse_dbc(DBC)
+    inline = [{"name": "coolant", "can_id": 0x200, "start_bit": 0, "length": 8, "byte_order": "little",
+               "offset": -40}]
+    assert load_signals({"can_signals": inline}) == [Signal('coolant', 0x200, 0, 8, 'little', offset=-40)]
+    assert load_signals({"can_rpm_id": 0x10, "can_speed_id": 0x11, "can_gear_id": 0x12}) == \
+        default_signals(0x10, 0x11, 0x12)
+    assert [s.can_id for s in load_signals({})] == [0x100, 0x101, 0x102]
+
+
+def test_default_layout():
+    decoder = SignalDecoder(default_signals())
+    out = {}
+    decoder.decode(0x100, bytes([0x1F, 0x40, 0, 0, 0, 0, 0, 0]), out)
+    decoder.decode(0x101, bytes([88, 0, 0, 0, 0, 0, 0, 0]), out)
+    decoder.decode(0x102, bytes([3, 0, 0, 0, 0, 0, 0, 0]), out)
+    assert out == {'rpm': 8000, 'speed': 88, 'gear': 3}
+
+
+def test_signed_and_scaled():
+    decoder = SignalDecoder([
+        Signal('lat_g', 0x10, 0, 16, 'little', scale=0.001, signed=True),
+        Signal('temp', 0x10, 16, 8, 'little', offset=-40, signed=True),
+        Signal('trim', 0x10, 24, 5, 'little', signed=True),
+    ])
+    out = {}
+    decoder.decode(0x10, (-1234).to_bytes(2, 'little', signed=True) + bytes([0xF6, 0b10001, 0, 0, 0, 0]), out)
+    assert out['lat_g'] == pytest.approx(-1.234)
+    assert out['temp'] == -10 - 40
+    assert out['trim'] == -15
+
+
+def test_motorola_layout():
+    # 12-bit Motorola signal with its MSB at bit 13 (byte 1, bit 5): the low six bits of
+    # byte 1, then the top six of byte 2
+    sig = Signal('lean', 0x20, 13, 12, 'big', signed=True)
+    data = bytes([0, 0b00111111, 0b11111100, 0, 0, 0, 0, 0])
+    out = {}
+    SignalDecoder([sig]).decode(0x20, data, out)
+    assert out['lean'] == -1
+    data = bytes([0, 0b00101010, 0b10101111, 0, 0, 0, 0, 0])
+    SignalDecoder([sig._replace(signed=False)]).decode(0x20, data, out)
+    assert out['lean'] == 0b101010101011
+
+
+def test_non_byte_aligned_start_bits():
+    decoder = SignalDecoder([
+        Signal('a', 0x30, 3, 7, 'little'),
+        Signal('b', 0x30, 10, 9, 'little'),
+        Signal('c', 0x30, 36, 6, 'big'),
+    ])
+    rng = random.Random(5)
+    for _ in range(200):
+        data = rng.randbytes(8)
+        out = {}
+        decoder.decode(0x30, data, out)
+        assert out == {'a': reference(Signal('a', 0x30, 3, 7, 'little'), data),
+                       'b': reference(Signal('b', 0x30, 10, 9, 'little'), data),
+                       'c': reference(Signal('c', 0x30, 36, 6, 'big'), data)}
+
+
+def test_matches_bitwise_reference():
+    rng = random.Random(1)
+    for _ in range(20):
+        signals = random_signals(rng, 12)
+        decoder = SignalDecoder(signals)
+        for _ in range(50):
+            data = rng.randbytes(8)
+            for can_id in decoder.ids():
+                out = {}
+                decoder.decode(can_id, data, out)
+                for sig in signals:
+                    if sig.can_id == can_id:
+                        assert out[sig.name] == pytest.approx(reference(sig, data)), sig
+
+
+def test_short_frames_decode_what_fits():
+    rng = random.Random(2)
+    signals = random_signals(rng, 16)
+    decoder = SignalDecoder(signals)
+    for n in range(8):
+        data = rng.randbytes(n)
+        for can_id in decoder.ids():
+            out = {}
+            decoder.decode(can_id, data, out)
+            expected = {sig.name: reference(sig, data) for sig in signals
+                        if sig.can_id == can_id and compile_signal(sig).min_len <= n}
+            assert out.keys() == expected.keys()
+            assert all(out[k] == pytest.approx(v) for k, v in expected.items())
+
+
+def test_short_frame_default_layout():
+    decoder = SignalDecoder(default_signals())
+    out = {}
+    decoder.decode(0x101, bytes([42]), out)
+    decoder.decode(0x100, bytes([0x1F]), out)
+    assert out == {'speed': 42}
+    decoder.decode(0x100, bytes([0x1F, 0x40]), out)
+    assert out == {'speed': 42, 'rpm': 8000}
+
+
+def test_can_fd_payload_decodes_the_first_8_bytes():
+    rng = random.Random(3)
+    signals = random_signals(rng, 16)
+    decoder = SignalDecoder(signals)
+    for n in (12, 16, 64):
+        data = rng.randbytes(n)
+        for can_id in decoder.ids():
+            out, expected = {}, {}
+            decoder.decode(can_id, data, out)
+            decoder.decode(can_id, data[:8], expected)
+            assert out == expected
+    out = {}
+    SignalDecoder([Signal('x', 0x100, 3, 4)]).decode(0x100, bytes(range(12)), out)
+    assert out == {'x': reference(Signal('x', 0x100, 3, 4), bytes(range(8)))}
+
+
+def test_extended_ids():
+    decoder = SignalDecoder([Signal('a', 0x100, 0, 8, 'little', extended=True), Signal('b', 0x101, 0, 8, 'little'),
+                             Signal('c', 0x18FF0000, 0, 8, 'little')])
+    assert decoder.extended == {0x100, 0x18FF0000}
+
+
+def test_unknown_id_is_ignored():
+    decoder = SignalDecoder(default_signals())
+    out = {'rpm': 1}
+    assert decoder.decode(0x7FF, bytes(8), out) == ()
+    assert decoder.decode(0x7FF, bytes(3), out) == ()
+    assert out == {'rpm': 1}
+
+
+def test_invalid_tables_are_rejected():
+    with pytest.raises(ValueError):
+        SignalDecoder([Signal('a', 1, 0, 8, 'little'), Signal('a', 2, 0, 8, 'little')])
+    with pytest.raises(ValueError):
+        compile_signal(Signal('wide', 1, 60, 8, 'little'))
+    with pytest.raises(ValueError):
+        compile_signal(Signal('past_end', 1, 58, 16, 'big'))
+    with pytest.raises(ValueError):
+        compile_signal(Signal('order', 1, 0, 8, 'middle'))
@@ -0,0 +1,60 @@
+"""
+DataAcquisition state handling without running the loops. CAN readings without rpm
+(silent bus, engine off) must not count as the first rpm: the snapshot's sampled time,
+the first_rpm mark that releases fast_boot and sensor logging all wait for a reading
+that has one.
+"""
+import pytest
+
+from config import CONFIG
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    for key, value in {
+        "replay_path": None, "broadcast_mode": "periodic", "transport": "socket", "metrics_enabled": False,
+        "logging_enabled": False, "hub_socket": str(tmp_path / "hub.sock"),
+        "display_socket": str(tmp_path / "display.sock"), "debug_socket_enabled": False, "startup_report": None,
+    }.items():
+        monkeypatch.setitem(CONFIG, key, value)
+
+
+@pytest.fixture
+def daq(config):
+    from data_acquisition import DataAcquisition
+    daq = DataAcquisition()
+    yield daq
+    daq.stop()
+
+
+def test_reading_without_rpm_is_not_a_sample(daq):
+    daq._on_can({'rpm': None, 'speed': None, 'gear': None})
+    daq._publish()
+
+    assert daq.state.snapshot.can.sampled is None
+    assert not daq._first_rpm.is_set()
+
+
+def test_first_rpm_sets_sampled_and_later_gaps_keep_it(daq):
+    daq._on_can({'rpm': None, 'speed': None, 'gear': None})
+    daq._on_can({'rpm': 3000, 'speed': 40, 'gear': 2})
+    sampled = daq.state.snapshot.can.sampled
+    daq._publish()
+
+    assert sampled is not None
+    assert daq._first_rpm.is_set()
+
+    daq._on_can({'rpm': None, 'speed': None, 'gear': None})
+    assert daq.state.snapshot.can.rpm is None
+    assert daq.state.snapshot.can.sampled == sampled
+
+
+def test_partial_broadcast_caps_keep_the_defaults(config, monkeypatch):
+    from data_acquisition import DataAcquisition
+    monkeypatch.setitem(CONFIG, "broadcast_mode", "change")
+    monkeypatch.setitem(CONFIG, "broadcast_max_hz", {"can": 120})
+    daq = DataAcquisition()
+    try:
+        assert daq.coalescer.min_ns == {"can": int(1e9 / 120), "imu": int(1e9 / 30), "gps": int(1e9 / 25)}
+    finally:
+        daq.stop()
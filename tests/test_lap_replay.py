@@ -0,0 +1,181 @@
+"""
+Lap timing driven through the full acquisition path: a simulated ride around the oval
+from benchmarks/bench_lap_timer.py is recorded as a session, replayed by DataAcquisition
+(sensors/replay.py) into a temporary telemetry database, and the laps, checkpoints and
+gps_path rows written by _handle_lap_events and the GPS loop are checked against the
+exact values from the simulation.
+"""
+import asyncio
+import datetime
+import math
+import sqlite3
+import time
+
+import pytest
+
+from benchmarks.bench_lap_timer import LENGTH, ORIGIN, line_across, profile_elapsed, simulate
+from config import CONFIG
+from display.trackmode.lap_timer import LapTimer
+from storage import sqlite_logger
+from storage.session_log import SessionRecorder
+from utils.helpers import LocalProjection
+
+LAPS = 4
+RATE_HZ = 10.0
+TOLERANCE_S = 0.01
+START = datetime.datetime(2024, 6, 1, 10, 0, tzinfo=datetime.timezone.utc)
+
+
+def timing_lines():
+    proj = LocalProjection(*ORIGIN)
+    return line_across(proj, 0.0), [("half", line_across(proj, LENGTH / 2))]
+
+
+def parse(ts):
+    return datetime.datetime.fromisoformat(ts).timestamp()
+
+
+def fix_time(t):
+    return (START + datetime.timedelta(seconds=t)).isoformat()
+
+
+def record(path, fixes):
+    recorder = SessionRecorder(str(path), compress=False)
+    for t, lat, lon, *_ in fixes:
+        recorder.record_gps(int(t * 1e9), {'lat': lat, 'lon': lon, 'fix_time': fix_time(t), 'speed': 40.0})
+    recorder.close()
+
+
+def replay_into_db(tmp_path, monkeypatch, fixes):
+    """
+    Replays the recorded fixes through DataAcquisition with lap timing on; returns an open
+    connection to the database it wrote.
+    """
+    from data_acquisition import DataAcquisition
+    session = tmp_path / "session"
+    record(session, fixes)
+    start_line, checkpoints = timing_lines()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sqlite_logger, "DB_PATH", str(tmp_path / "telemetry.db"))
+    for key, value in {
+        "replay_path": str(session), "replay_speed": 0, "replay_loop": False,
+        "logging_enabled": True, "log_backend": "sqlite", "record_enabled": False,
+        "track_name": "oval", "track_start_line": start_line, "track_checkpoints": checkpoints,
+        "lap_min_time_s": 10, "transport": "socket", "metrics_enabled": False,
+        "hub_socket": str(tmp_path / "hub.sock"), "display_socket": str(tmp_path / "display.sock"),
+        "debug_socket_enabled": False, "startup_report": None,
+    }.items():
+        monkeypatch.setitem(CONFIG, key, value)
+
+    daq = DataAcquisition()
+    last_fix = parse(fix_time(fixes[-1][0]))
+
+    async def run():
+        task = asyncio.ensure_future(daq.start())
+        deadline = time.monotonic() + 60
+        # Played out, and the GPS loop has handled the last fix
+        while not (daq.replay.finished.is_set() and daq.state.snapshot.gps.fix_time
+                   and abs(parse(daq.state.snapshot.gps.fix_time) - last_fix) < 1e-3):
+            assert time.monotonic() < deadline, "replay did not finish"
+            await asyncio.sleep(0.05)
+        daq.request_stop()
+        await task
+
+    try:
+        asyncio.run(run())
+    finally:
+        daq.stop()
+    return sqlite3.connect(str(tmp_path / "telemetry.db"))
+
+
+@pytest.fixture(scope="module")
+def ride():
+    return simulate(LAPS, RATE_HZ, noise=0.0, seed=3)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch, ride):
+    conn = replay_into_db(tmp_path, monkeypatch, ride[0])
+    yield conn
+    conn.close()
+
+
+def test_laps_table(db, ride):
+    _, lap_times, _, _ = ride
+    rows = db.execute("SELECT id, start_time, end_time, best, track_name FROM laps ORDER BY id").fetchall()
+    # Every completed lap, plus the one started at the last crossing
+    assert len(rows) == LAPS + 1
+    assert rows[-1][2] is None
+    assert all(r[4] == "oval" for r in rows)
+    measured = [parse(end) - parse(start) for _, start, end, _, _ in rows[:-1]]
+    for got, exact in zip(measured, lap_times):
+        assert got == pytest.approx(exact, abs=TOLERANCE_S)
+    # Each lap starts where the previous one ended
+    assert all(rows[i][2] == rows[i + 1][1] for i in range(LAPS))
+    best = [r[0] for r in rows if r[3]]
+    assert best == [rows[min(range(LAPS), key=lambda i: lap_times[i])][0]]
+
+
+def test_checkpoints_and_delta_vs_best(db, ride):
+    _, lap_times, splits, _ = ride
+    laps = db.execute("SELECT id, start_time FROM laps ORDER BY id").fetchall()
+    rows = db.execute("SELECT lap_id, checkpoint_name, timestamp, delta_vs_best FROM checkpoints "
+                      "ORDER BY timestamp").fetchall()
+    assert len(rows) == LAPS
+    starts = dict(laps)
+    for i, (lap_id, name, ts, delta) in enumerate(rows):
+        assert name == "half"
+        assert lap_id == laps[i][0]
+        assert parse(ts) - parse(starts[lap_id]) == pytest.approx(splits[i], abs=TOLERANCE_S)
+        if i == 0:
+            assert delta is None
+        else:
+            # Against the split of the fastest lap completed before this one
+            best = min(range(i), key=lambda k: lap_times[k])
+            assert delta == pytest.approx(splits[i] - splits[best], abs=2 * TOLERANCE_S)
+
+
+def test_gps_path_tagged_with_laps(db, ride):
+    fixes = ride[0]
+    laps = db.execute("SELECT id, start_time, end_time FROM laps ORDER BY id").fetchall()
+    rows = db.execute("SELECT lap_id, timestamp, latitude, longitude FROM gps_path ORDER BY timestamp").fetchall()
+    # Every fix from the first crossing on is logged, none before it
+    assert len(rows) == sum(1 for fix in fixes if fix[3] >= 0)
+    windows = {lap_id: (parse(start), parse(end) if end else math.inf) for lap_id, start, end in laps}
+    for lap_id, ts, lat, lon in rows:
+        start, end = windows[lap_id]
+        assert start <= parse(ts) < end
+
+
+def test_live_delta_vs_best():
+    fixes, _, _, profiles = simulate(LAPS, RATE_HZ, noise=0.0, seed=3)
+    start_line, checkpoints = timing_lines()
+    timer = LapTimer(start_line, checkpoints=checkpoints, min_lap_s=10)
+    best_lap = None
+    errors = []
+    for t, lat, lon, lap, s, elapsed in fixes:
+        events = timer.update(t, lat, lon)
+        if best_lap is not None and timer.lap == lap + 1 and lap < len(profiles):
+            errors.append(timer.delta - (elapsed - profile_elapsed(profiles[best_lap], s)))
+        if any(e.kind == 'lap_end' and e.best for e in events):
+            best_lap = lap - 1
+    assert len(errors) > 100
+    assert max(abs(e) for e in errors) < TOLERANCE_S
+
+
+def test_gps_noise():
+    # 1 m (1 sigma) of position noise at ~40 m/s is ~25 ms per crossing; laps and splits
+    # must stay within a few sigma of the exact times and no crossing may be missed or doubled
+    fixes, lap_times, splits, _ = simulate(6, RATE_HZ, noise=1.0, seed=3)
+    start_line, checkpoints = timing_lines()
+    timer = LapTimer(start_line, checkpoints=checkpoints, min_lap_s=10)
+    laps, measured_splits = [], []
+    for t, lat, lon, *_ in fixes:
+        for event in timer.update(t, lat, lon):
+            if event.kind == 'lap_end':
+                laps.append(event.elapsed)
+            elif event.kind == 'checkpoint':
+                measured_splits.append(event.elapsed)
+    assert len(laps) == len(lap_times) and len(measured_splits) == len(splits)
+    assert max(abs(m - e) for m, e in zip(laps, lap_times)) < 0.05
+    assert max(abs(m - e) for m, e in zip(measured_splits, splits)) < 0.1
@@ -0,0 +1,14 @@
+from sensors.lean_estimator import estimate_trace, synthetic_corner_trace
+
+
+def test_corner_lean_tracks_truth():
+    samples, truth = synthetic_corner_trace(max_lean=50.0)
+    trace = estimate_trace(samples)
+    assert max(abs(lean - t) for (_, lean, _), t in zip(trace, truth)) < 1.0
+
+
+def test_level_corner_reports_no_pitch():
+    # Yaw rate reaches the leaned gyro's y axis; none of it may end up as pitch
+    for max_lean in (30.0, 45.0, 55.0):
+        samples, _ = synthetic_corner_trace(max_lean=max_lean)
+        assert max(abs(pitch) for _, _, pitch in estimate_trace(samples)) < 1.0
@@ -0,0 +1,34 @@
+"""
+Coalescer rate caps per channel, including channels the caps do not mention.
+"""
+import asyncio
+
+from utils.pubsub import Coalescer
+
+
+def test_unknown_channel_is_uncapped():
+    emitted = []
+    coalescer = Coalescer(lambda: emitted.append(1), {"can": 60})
+
+    async def run():
+        for _ in range(3):
+            coalescer.changed("imu")
+
+    asyncio.run(run())
+    assert len(emitted) == 3
+    assert coalescer.stats()["imu"] == {'changes': 3, 'publishes': 3}
+
+
+def test_capped_channel_folds_changes():
+    emitted = []
+    coalescer = Coalescer(lambda: emitted.append(1), {"can": 10})
+
+    async def run():
+        for _ in range(5):
+            coalescer.changed("can")
+        # The folded changes go out in one publish at the end of the 100 ms interval
+        await asyncio.sleep(0.15)
+
+    asyncio.run(run())
+    assert len(emitted) == 2
+    assert coalescer.stats() == {"can": {'changes': 5, 'publishes': 2}}
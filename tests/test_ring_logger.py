@@ -0,0 +1,69 @@
+"""
+RingLogger against a real ring file and a temporary database: a frame that is old but
+still the newest is logged, a writer whose sample count stops moving is not, and missing
+rpm/speed/gear are logged as NULL.
+"""
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from config import CONFIG
+from storage import sqlite_logger
+from storage.ring_logger import RingLogger
+from utils.shm_ring import ShmRingWriter
+
+
+@pytest.fixture
+def ring(tmp_path, monkeypatch):
+    monkeypatch.setitem(CONFIG, "shm_path", str(tmp_path / "ring"))
+    monkeypatch.setitem(CONFIG, "log_backend", "sqlite")
+    monkeypatch.setattr(sqlite_logger, "DB_PATH", str(tmp_path / "telemetry.db"))
+    writer = ShmRingWriter(str(tmp_path / "ring"))
+    yield writer
+    writer.close()
+
+
+def rows(logger):
+    logger.close()
+    conn = sqlite3.connect(sqlite_logger.DB_PATH)
+    try:
+        return conn.execute("SELECT rpm, speed, gear, lean_angle FROM sensor_data").fetchall()
+    finally:
+        conn.close()
+
+
+def test_steady_values_keep_logging_until_the_count_stops(ring):
+    logger = RingLogger(stale_s=0.2)
+    # Change mode only rewrites the ring on a change or keyframe: the newest frame may be old
+    ring.write_sample(1, time.monotonic_ns() - 2_000_000_000, 4000, 50, 3, 5.0)
+    asyncio.run(logger._tick())
+    asyncio.run(logger._tick())
+    assert (logger.logged, logger.stale) == (2, 0)
+
+    time.sleep(0.3)
+    asyncio.run(logger._tick())
+    assert (logger.logged, logger.stale) == (2, 1)
+
+    ring.write_sample(2, time.monotonic_ns(), 4100, 51, 3, 5.0)
+    asyncio.run(logger._tick())
+    assert (logger.logged, logger.stale) == (3, 1)
+    assert len(rows(logger)) == 3
+
+
+def test_stale_window_defaults_to_keyframe_intervals(ring, monkeypatch):
+    monkeypatch.setitem(CONFIG, "keyframe_interval_ms", 500)
+    logger = RingLogger()
+    assert logger.stale_ns == 1_500_000_000
+    logger.close()
+
+
+def test_missing_readings_are_logged_as_null(ring):
+    logger = RingLogger()
+    ring.write_sample(1, time.monotonic_ns(), None, None, None, 2.5)
+    asyncio.run(logger._tick())
+    ring.write_sample(2, time.monotonic_ns(), 0, 0, 0, 0.0)
+    asyncio.run(logger._tick())
+
+    assert rows(logger) == [(None, None, None, 2.5), (0, 0, 0, 0.0)]
@@ -0,0 +1,166 @@
+"""
+Scheduler timing on a simulated clock. utils.scheduler's time.monotonic_ns and the event
+loop's clock both read a virtual nanosecond counter that only moves when a tick does work
+(the tick advances it) or the loop waits (its selector advances it by the timeout, rounded
+up to whole milliseconds like epoll). Runs are deterministic and take no wall time.
+
+Each tick's offset is how far its start lies from its ideal time t0 + phase + n * period,
+where t0 is when the scheduler started and phase the task's stagger. Timer rounding and
+other tasks' work make every tick a little late; drift is that offset growing over the run,
+which absolute deadlines must rule out however late the individual ticks are.
+"""
+import asyncio
+import math
+import random
+import selectors
+import statistics
+
+import pytest
+
+from utils import scheduler as scheduler_mod
+from utils.scheduler import CATCH_UP, SKIP, Scheduler
+
+MS = 1_000_000
+# Each pass through the event loop costs this much virtual time
+LOOP_PASS_NS = 20_000
+# The acquisition task mix from data_acquisition.py
+TASKS = (("can", 0.2), ("imu", 0.2), ("log", 0.02), ("broadcast", 0.1))
+
+
+class FakeClock:
+    def __init__(self):
+        self.ns = 1_000_000_000
+
+    def monotonic_ns(self):
+        return self.ns
+
+
+class VirtualSelector(selectors.DefaultSelector):
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def select(self, timeout=None):
+        if timeout is None:
+            raise AssertionError("event loop would wait forever")
+        if timeout > 0:
+            self.clock.ns += math.ceil(timeout * 1e3) * MS
+        else:
+            self.clock.ns += LOOP_PASS_NS
+        return super().select(0)
+
+
+class VirtualLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock):
+        super().__init__(VirtualSelector(clock))
+        self.clock = clock
+
+    def time(self):
+        return self.clock.ns / 1e9
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler_mod, "time", clock)
+    return clock
+
+
+def run_for(clock, scheduler, seconds):
+    """
+    Runs scheduler for the given virtual seconds; returns t0, the clock when it started.
+    """
+    loop = VirtualLoop(clock)
+
+    async def main():
+        stop = asyncio.Event()
+        loop.call_later(seconds, stop.set)
+        t0 = clock.ns
+        await scheduler.run(stop)
+        return t0
+
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+def offsets_ms(starts, t0, task):
+    return [(t - t0 - task.phase_ns - n * task.period_ns) / MS for n, t in enumerate(starts)]
+
+
+def stalled_task(clock, policy):
+    """
+    A 10 ms task whose third tick stalls for 55 ms, run for 200 ms. Returns the task, t0
+    and each run's start in periods since t0.
+    """
+    scheduler = Scheduler()
+    starts = []
+
+    def tick():
+        starts.append(clock.ns)
+        if len(starts) == 3:
+            clock.ns += 55 * MS
+
+    task = scheduler.every("stall", 0.01, tick, policy=policy)
+    t0 = run_for(clock, scheduler, 0.2)
+    return task, t0, [(t - t0) / task.period_ns for t in starts]
+
+
+def test_no_drift_with_work_in_every_tick(clock):
+    rng = random.Random(7)
+    scheduler = Scheduler()
+    starts = {name: [] for name, _ in TASKS}
+    for name, interval in TASKS:
+        def tick(name=name):
+            starts[name].append(clock.ns)
+            clock.ns += int(rng.uniform(0, 3) * MS)
+        scheduler.every(name, interval, tick)
+
+    t0 = run_for(clock, scheduler, 20.0)
+
+    stats = scheduler.stats()
+    for name, task in scheduler.tasks.items():
+        offsets = offsets_ms(starts[name], t0, task)
+        tenth = len(offsets) // 10
+        # The tick due as the run ends may or may not get in
+        assert len(offsets) - round(20.0 * 1e9 / task.period_ns) in (0, 1)
+        assert task.stats.overruns == 0
+        assert min(offsets) >= 0, name
+        # The last tenth of the ticks start as close to the grid as the first tenth
+        assert abs(statistics.fmean(offsets[-tenth:]) - statistics.fmean(offsets[:tenth])) < 1.0, name
+        # TaskStats' start lateness is the same offset
+        assert stats[name]['mean_late_us'] / 1000 == pytest.approx(statistics.fmean(offsets))
+
+
+def test_tasks_are_staggered(clock):
+    scheduler = Scheduler(stagger_s=0.005)
+    starts = {name: [] for name, _ in TASKS}
+    for name, interval in TASKS:
+        scheduler.every(name, interval, lambda name=name: starts[name].append(clock.ns))
+
+    t0 = run_for(clock, scheduler, 0.1)
+
+    assert [task.phase_ns for task in scheduler.tasks.values()] == [0, 5 * MS, 10 * MS, 15 * MS]
+    for name, task in scheduler.tasks.items():
+        assert 0 <= starts[name][0] - t0 - task.phase_ns < MS
+
+
+def test_skip_drops_missed_ticks_and_stays_on_grid(clock):
+    task, _, slots = stalled_task(clock, SKIP)
+
+    # Slots 3-6 passed during the stall; slot 7 is due when it ends and runs late
+    assert task.stats.overruns == 4
+    assert [int(s) for s in slots] == [0, 1, 2, 7] + list(range(8, len(slots) + 4))
+    assert all(s % 1 < 0.1 for s in slots[4:])
+
+
+def test_catch_up_runs_missed_ticks_back_to_back(clock):
+    task, _, slots = stalled_task(clock, CATCH_UP)
+
+    # Run n is slot n's tick: slots 3-7 all run as soon as the stall ends (t0 + 75 ms),
+    # then the grid resumes
+    assert task.stats.overruns == 0
+    assert len(slots) >= 19
+    assert all(7.5 <= s < 7.6 for s in slots[3:8])
+    assert all(0 <= s - n < 0.1 for n, s in enumerate(slots) if not 3 <= n < 8)
@@ -0,0 +1,72 @@
+"""
+ShmRingWriter replacing a ring under attached readers: a new layout goes into a new file
+renamed over the path, so old mappings stay readable, and readers re-attach to it on
+their next check.
+"""
+import struct
+
+import pytest
+
+from utils import shm_ring
+from utils.frame import frame_to_dict
+from utils.shm_ring import ShmRingReader, ShmRingWriter
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    # Check the path on every read
+    monkeypatch.setattr(shm_ring, "RECHECK_NS", 0)
+    return str(tmp_path / "ring")
+
+
+def test_same_layout_restart_reuses_the_file(path):
+    writer = ShmRingWriter(path)
+    writer.write_sample(1, 10, 4000, 50, 3, 1.0)
+    reader = ShmRingReader.attach(path)
+    writer.close()
+
+    writer = ShmRingWriter(path)
+    writer.write_sample(2, 20, 4100, 51, 3, 1.0)
+    assert frame_to_dict(reader.read_latest())['rpm'] == 4100
+    assert reader.count() == 2
+    assert reader.reattached == 0
+    writer.close()
+    reader.close()
+
+
+def test_new_layout_is_renamed_in_and_readers_reattach(path):
+    writer = ShmRingWriter(path, slots=16)
+    writer.write_sample(1, 10, 4000, 50, 3, 1.0)
+    reader = ShmRingReader.attach(path)
+    old_buf = reader.buf
+    writer.close()
+
+    writer = ShmRingWriter(path, slots=32)
+    # The old mapping is still the old file at its old size
+    assert len(old_buf) == shm_ring.HEADER.size + 16 * writer.stride
+    assert frame_to_dict(shm_ring.FRAME.unpack_from(old_buf, shm_ring.HEADER.size + shm_ring.SEQ.size))['rpm'] == 4000
+
+    writer.write_sample(1, 20, 5000, 60, 4, 2.0)
+    assert frame_to_dict(reader.read_new())['rpm'] == 5000
+    assert (reader.slots, reader.reattached) == (32, 1)
+    writer.close()
+    reader.close()
+
+
+def test_same_size_foreign_layout_is_not_misread(path):
+    writer = ShmRingWriter(path, slots=16)
+    writer.write_sample(1, 10, 4000, 50, 3, 1.0)
+    reader = ShmRingReader.attach(path)
+    writer.close()
+
+    # Same total size, different slot count and payload
+    payload = struct.Struct(f"<{2 * shm_ring.FRAME.size + 8}s")
+    other = ShmRingWriter(path, slots=8, payload=payload)
+    assert other.size == shm_ring.HEADER.size + 16 * shm_ring._slot_stride(shm_ring.FRAME.size)
+    other.write(b"x" * payload.size)
+
+    # The reader cannot attach to it, so it keeps reading the old ring rather than garbage
+    assert frame_to_dict(reader.read_latest())['rpm'] == 4000
+    assert reader.reattached == 0
+    other.close()
+    reader.close()
@@ -0,0 +1,51 @@
+"""
+SQLiteWriter bookkeeping: rows dropped by INSERT OR IGNORE are not counted as written,
+and a database that cannot be opened is reported and retried instead of killing the
+writer thread.
+"""
+import sqlite3
+import time
+
+from storage.sqlite_writer import SQLiteWriter
+
+
+def test_ignored_rows_are_counted_separately(tmp_path):
+    writer = SQLiteWriter(str(tmp_path / "telemetry.db"))
+    writer.log_sensor_data(4000, 50, 3, 1.0, timestamp="2024-06-01T10:00:00+00:00")
+    writer.log_sensor_data(4100, 51, 3, 1.5, timestamp="2024-06-01T10:00:00+00:00")
+    writer.log_sensor_data(4200, 52, 3, 2.0, timestamp="2024-06-01T10:00:01+00:00")
+    writer.close()
+
+    stats = writer.stats()
+    assert (stats['enqueued'], stats['written'], stats['ignored']) == (3, 2, 1)
+    conn = sqlite3.connect(str(tmp_path / "telemetry.db"))
+    assert conn.execute("SELECT COUNT(*) FROM sensor_data").fetchone() == (2,)
+    conn.close()
+
+
+def test_unopenable_database_is_reported_and_retried(tmp_path):
+    db_dir = tmp_path / "missing"
+    writer = SQLiteWriter(str(db_dir / "telemetry.db"), flush_interval=0.05, retry_s=0.05)
+    try:
+        # Startup must not wait out boot_schema_timeout_s for a database that cannot open
+        assert writer.ready.wait(2.0)
+        assert writer.error is not None
+        assert writer.stats()['errors'] >= 1
+        writer.log_sensor_data(4000, 50, 3, 1.0)
+
+        db_dir.mkdir()
+        for _ in range(100):
+            if writer.error is None and writer.written:
+                break
+            time.sleep(0.05)
+        assert writer.error is None
+    finally:
+        writer.close()
+    assert writer.stats()['written'] == 1
+
+
+def test_close_while_retrying_returns(tmp_path):
+    writer = SQLiteWriter(str(tmp_path / "missing" / "telemetry.db"), retry_s=60)
+    assert writer.ready.wait(2.0)
+    writer.close(timeout=2.0)
+    assert not writer._thread.is_alive()
@@ -0,0 +1,239 @@
+import json
+import math
+import struct
+
+# Versioned, fixed-size dashboard frame shared by data_acquisition, display_gui and
+# dashboard_sock_printer. Little endian, no padding:
+#   version  B   frame layout version
+#   flags    B   FLAG_GPS_VALID when lat/lon carry a fix; FLAG_RPM/SPEED/GEAR_VALID when
+#                those fields hold a reading rather than the 0 they encode None as
+#   gear     B   0 = neutral / unknown
+#   (pad)    x
+#   seq      I   wrapping sequence number
+#   ts_ns    q   time.monotonic_ns() when the frame was published
+#   rpm      H
+#   speed    H   km/h
+#   lean     f   degrees
+#   lat      d
+#   lon      d
+#   sample   q   time.monotonic_ns() when the rpm in this frame was sampled (v2)
+# CLOCK_MONOTONIC is system wide, so receivers can age a frame against their own clock.
+FRAME_VERSION = 2
+FRAME = struct.Struct("<BBBxIqHHfddq")
+FRAME_SIZE = FRAME.size
+
+FLAG_GPS_VALID = 0x01
+# Full frames only (the shm ring, keyframes); deltas carry rpm/speed/gear without them
+FLAG_RPM_VALID = 0x02
+FLAG_SPEED_VALID = 0x04
+FLAG_GEAR_VALID = 0x08
+
+# Delta message: only the fields that changed since the previous message. Header:
+#   type     B   DELTA_TYPE (never a FRAME_VERSION, nor '{')
+#   mask     B   DELTA_* bits of the fields that follow, in this order:
+#   seq      I
+#   ts_ns    q
+#   sample   q
+# then rpm H, speed H, gear B, lean f, and for DELTA_GPS flags B lat d lon d.
+DELTA_TYPE = 0x81
+DELTA_HEADER = struct.Struct("<BBIqq")
+DELTA_RPM = 0x01
+DELTA_SPEED = 0x02
+DELTA_GEAR = 0x04
+DELTA_LEAN = 0x08
+DELTA_GPS = 0x10
+DELTA_ALL = 0x1F
+# mask bit, struct codes, indices into the FRAME tuple, dict keys
+_DELTA_FIELDS = (
+    (DELTA_RPM, "H", (5,), ("rpm",)),
+    (DELTA_SPEED, "H", (6,), ("speed",)),
+    (DELTA_GEAR, "B", (2,), ("gear",)),
+    (DELTA_LEAN, "f", (7,), ("lean_angle",)),
+    (DELTA_GPS, "Bdd", (1, 8, 9), ("gps_lat", "gps_lon")),
+)
+_delta_structs = {}
+
+# Big enough for the JSON debug encoding as well as binary frames
+MAX_MESSAGE_SIZE = 4096
+
+
+def frame_values(seq, ts_ns, rpm, speed, gear, lean_angle, lat=None, lon=None, sample_ns=None):
+    """
+    Normalizes raw sensor values into the tuple layout of FRAME. sample_ns defaults to ts_ns.
+    """
+    flags = 0
+    if lat is not None and lon is not None:
+        flags |= FLAG_GPS_VALID
+    else:
+        lat = lon = math.nan
+    if rpm is not None:
+        flags |= FLAG_RPM_VALID
+    if speed is not None:
+        flags |= FLAG_SPEED_VALID
+    if gear is not None:
+        flags |= FLAG_GEAR_VALID
+    return (
+        FRAME_VERSION, flags, int(gear or 0) & 0xFF, seq & 0xFFFFFFFF, ts_ns,
+        min(max(int(rpm or 0), 0), 0xFFFF), min(max(int(speed or 0), 0), 0xFFFF),
+        float(lean_angle or 0.0), lat, lon, ts_ns if sample_ns is None else sample_ns
+    )
+
+
+def pack_frame(*values):
+    return FRAME.pack(*frame_values(*values))
+
+
+def pack_frame_into(buf, offset, *values):
+    FRAME.pack_into(buf, offset, *frame_values(*values))
+
+
+def unpack_frame(buf, offset=0):
+    """
+    Unpacks a frame from any buffer (bytes, bytearray, memoryview, mmap) without copying it.
+    Raises ValueError on a short buffer or an unknown version.
+    """
+    if len(buf) - offset < FRAME_SIZE:
+        raise ValueError(f"Frame too short: {len(buf) - offset} bytes")
+    values = FRAME.unpack_from(buf, offset)
+    if values[0] != FRAME_VERSION:
+        raise ValueError(f"Unsupported frame version {values[0]}")
+    return values
+
+
+def _delta_struct(mask):
+    st = _delta_structs.get(mask)
+    if st is None:
+        st = _delta_structs[mask] = struct.Struct("<" + "".join(code for bit, code, _, _ in _DELTA_FIELDS if mask & bit))
+    return st
+
+
+def changed_mask(prev, values):
+    """
+    DELTA_* bits of the fields that differ between two FRAME tuples (all of them without prev).
+    """
+    if prev is None:
+        return DELTA_ALL
+    mask = 0
+    if values[5] != prev[5]:
+        mask |= DELTA_RPM
+    if values[6] != prev[6]:
+        mask |= DELTA_SPEED
+    if values[2] != prev[2]:
+        mask |= DELTA_GEAR
+    if values[7] != prev[7]:
+        mask |= DELTA_LEAN
+    # No-fix positions are NaN, which never compares equal; the flag covers them
+    if (values[1] ^ prev[1]) & FLAG_GPS_VALID or (values[1] & FLAG_GPS_VALID and (values[8] != prev[8] or values[9] != prev[9])):
+        mask |= DELTA_GPS
+    return mask
+
+
+def encode_delta(values, mask, encoding="binary"):
+    """
+    Encodes only the fields in mask of a FRAME tuple, plus seq and both timestamps.
+    """
+    if encoding == "json":
+        d = frame_to_dict(values)
+        for bit, _, _, keys in _DELTA_FIELDS:
+            if not mask & bit:
+                for k in keys:
+                    del d[k]
+        return json.dumps(d).encode()
+    fields = [values[i] for bit, _, indices, _ in _DELTA_FIELDS if mask & bit for i in indices]
+    return DELTA_HEADER.pack(DELTA_TYPE, mask, values[3], values[4], values[10]) + _delta_struct(mask).pack(*fields)
+
+
+def apply_values(values, target):
+    """
+    Writes a FRAME tuple into an existing dict with the keys of frame_to_dict().
+    """
+    _, flags, gear, seq, ts_ns, rpm, speed, lean_angle, lat, lon, sample_ns = values
+    gps_valid = flags & FLAG_GPS_VALID
+    target["rpm"] = rpm
+    target["speed"] = speed
+    target["gear"] = gear
+    target["lean_angle"] = lean_angle
+    target["gps_lat"] = lat if gps_valid else None
+    target["gps_lon"] = lon if gps_valid else None
+    target["timestamp"] = ts_ns
+    target["seq"] = seq
+    target["sampled"] = sample_ns
+
+
+def apply(buf, target):
+    """
+    Applies any received message (full frame, delta, or JSON) to target in place, so a
+    receiver keeps one state dict instead of building a new one per message.
+    """
+    if len(buf) and buf[0] == DELTA_TYPE:
+        if len(buf) < DELTA_HEADER.size:
+            raise ValueError(f"Delta too short: {len(buf)} bytes")
+        _, mask, seq, ts_ns, sample_ns = DELTA_HEADER.unpack_from(buf, 0)
+        fields = _delta_struct(mask).unpack_from(buf, DELTA_HEADER.size)
+        i = 0
+        for bit, code, _, keys in _DELTA_FIELDS:
+            if not mask & bit:
+                continue
+            if bit == DELTA_GPS:
+                valid = fields[i] & FLAG_GPS_VALID
+                target["gps_lat"] = fields[i + 1] if valid else None
+                target["gps_lon"] = fields[i + 2] if valid else None
+                i += 3
+            else:
+                target[keys[0]] = fields[i]
+                i += 1
+        target["timestamp"] = ts_ns
+        target["seq"] = seq
+        target["sampled"] = sample_ns
+    elif len(buf) and buf[0] == 0x7B:
+        target.update(json.loads(bytes(buf).decode()))
+    else:
+        apply_values(unpack_frame(buf), target)
+
+
+def frame_to_dict(values):
+    _, flags, gear, seq, ts_ns, rpm, speed, lean_angle, lat, lon, sample_ns = values
+    gps_valid = flags & FLAG_GPS_VALID
+    return {
+        "rpm": rpm,
+        "speed": speed,
+        "gear": gear,
+        "lean_angle": lean_angle,
+        "gps_lat": lat if gps_valid else None,
+        "gps_lon": lon if gps_valid else None,
+        "timestamp": ts_ns,
+        "seq": seq,
+        "sampled": sample_ns,
+    }
+
+
+def encode_json(values):
+    """
+    Opt-in debug encoding: the same frame as a JSON object.
+    """
+    return json.dumps(frame_to_dict(values)).encode()
+
+
+def encode(values, encoding="binary"):
+    if encoding == "json":
+        return encode_json(values)
+    return FRAME.pack(*values)
+
+
+def decode(buf):
+    """
+    Decodes a received message into a dict, accepting a binary frame, a delta (only the
+    changed fields) or the JSON debug encoding (which always starts with '{').
+    """
+    if len(buf) and buf[0] == 0x7B:
+        return json.loads(bytes(buf).decode())
+    if len(buf) and buf[0] == DELTA_TYPE:
+        d = {}
+        apply(buf, d)
+        return d
+    return frame_to_dict(unpack_frame(buf))
+
+# Example usage:
+# values = frame_values(1, time.monotonic_ns(), 8000, 120, 4, 12.5)
+# data = FRAME.pack(*values)
+# print(decode(data))
@@ -0,0 +1,110 @@
+import math
+from datetime import datetime
+
+EARTH_RADIUS_M = 6371008.8
+
+
+class LocalProjection:
+    """
+    Equirectangular projection of lat/lon to metres around an origin. Accurate to well
+    under a metre over the few kilometres of a race track, and much cheaper than haversine.
+    """
+    def __init__(self, lat0, lon0):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.kx = math.radians(1) * EARTH_RADIUS_M * math.cos(math.radians(lat0))
+        self.ky = math.radians(1) * EARTH_RADIUS_M
+
+    def to_xy(self, lat, lon):
+        return (lon - self.lon0) * self.kx, (lat - self.lat0) * self.ky
+
+    def to_latlon(self, x, y):
+        return self.lat0 + y / self.ky, self.lon0 + x / self.kx
+
+
+def segment_intersection(p1, p2, q1, q2):
+    """
+    Intersection of segments p1-p2 and q1-q2 (2D points). Returns (t, u), the fractions
+    along each segment, or None if they do not cross.
+    """
+    rx, ry = p2[0] - p1[0], p2[1] - p1[1]
+    sx, sy = q2[0] - q1[0], q2[1] - q1[1]
+    denom = rx * sy - ry * sx
+    if denom == 0:
+        return None
+    qpx, qpy = q1[0] - p1[0], q1[1] - p1[1]
+    t = (qpx * sy - qpy * sx) / denom
+    u = (qpx * ry - qpy * rx) / denom
+    if 0.0 <= t <= 1.0 and 0.0 <= u <= 1.0:
+        return t, u
+    return None
+
+
+def project_onto_segment(p, a, b):
+    """
+    Closest point to p on segment a-b. Returns (fraction along a-b, squared distance).
+    """
+    abx, aby = b[0] - a[0], b[1] - a[1]
+    length2 = abx * abx + aby * aby
+    if length2 == 0:
+        t = 0.0
+    else:
+        t = ((p[0] - a[0]) * abx + (p[1] - a[1]) * aby) / length2
+        t = min(max(t, 0.0), 1.0)
+    dx = a[0] + abx * t - p[0]
+    dy = a[1] + aby * t - p[1]
+    return t, dx * dx + dy * dy
+
+
+def simplify_polyline(points, epsilon):
+    """
+    Douglas-Peucker: the subset of points (2D, in order) such that no dropped point is
+    more than epsilon from the simplified line. Iterative, so long paths cannot hit the
+    recursion limit. The first and last points are always kept.
+    """
+    n = len(points)
+    if n < 3:
+        return list(points)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    eps2 = epsilon * epsilon
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        a, b = points[first], points[last]
+        worst, worst_d2 = None, eps2
+        for i in range(first + 1, last):
+            _, d2 = project_onto_segment(points[i], a, b)
+            if d2 > worst_d2:
+                worst, worst_d2 = i, d2
+        if worst is not None:
+            keep[worst] = True
+            stack.append((first, worst))
+            stack.append((worst, last))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def simplify_to(points, max_points, epsilon):
+    """
+    simplify_polyline() with epsilon grown by half each pass until at most max_points remain.
+    """
+    simplified = simplify_polyline(points, epsilon)
+    while len(simplified) > max_points and epsilon > 0:
+        epsilon *= 1.5
+        simplified = simplify_polyline(points, epsilon)
+    return simplified
+
+
+def parse_fix_time(fix_time):
+    """
+    Seconds since the epoch of a GPS fix_time (ISO 8601 string as sent by gpsd and the
+    NMEA parser, or a number), or None if it is missing or malformed.
+    """
+    if isinstance(fix_time, (int, float)):
+        return float(fix_time)
+    if isinstance(fix_time, str):
+        try:
+            return datetime.fromisoformat(fix_time.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    return None
@@ -0,0 +1,208 @@
+import math
+from collections import deque
+
+import numpy as np
+
+# Channels kept by display_gui, in push() order
+CHANNELS = ("rpm", "speed", "gear", "lean_angle", "lat", "lon")
+
+
+class History:
+    """
+    The last `capacity` samples of several channels with their time.monotonic_ns()
+    timestamps, in preallocated NumPy arrays (one row per channel). Every sample is written
+    twice, at i and i + capacity, so any trailing run of samples is one contiguous slice:
+    times() and values() return views, never copies. Running totals stored next to the
+    values give the mean over any window from two lookups; windows registered with
+    window() also keep their min and max current on every push. Missing values (None or
+    NaN, e.g. lat/lon without a fix) are stored as NaN and left out of the statistics.
+    """
+    def __init__(self, capacity, channels=CHANNELS):
+        if capacity < 2:
+            raise ValueError("History capacity must be at least 2")
+        self.capacity = capacity
+        self.channels = tuple(channels)
+        self._index = {name: i for i, name in enumerate(self.channels)}
+        n = len(self.channels)
+        self.t = np.zeros(2 * capacity, dtype=np.int64)
+        self.v = np.full((n, 2 * capacity), np.nan)
+        # Running sum and count of the finite values up to and including each sample
+        self._sum = np.zeros((n, 2 * capacity))
+        self._count = np.zeros((n, 2 * capacity), dtype=np.int64)
+        self._total = np.zeros(n)
+        self._finite = np.zeros(n, dtype=np.int64)
+        # Totals of the last overwritten sample, i.e. everything before the oldest one kept
+        self._evicted_sum = np.zeros(n)
+        self._evicted_count = np.zeros(n, dtype=np.int64)
+        self._row = np.empty(n)
+        self.pushed = 0  # Samples ever pushed; readers compare it to see if anything is new
+        self._windows = []
+
+    def __len__(self):
+        return min(self.pushed, self.capacity)
+
+    def channel(self, name):
+        return self._index[name]
+
+    def push(self, t_ns, row):
+        """
+        Appends one sample: t_ns (non-decreasing) and one value per channel.
+        """
+        k = self.pushed
+        cap = self.capacity
+        i = k % cap
+        values = self._row
+        values[:] = [math.nan if x is None else x for x in row]
+        finite = np.isfinite(values)
+        if k >= cap:
+            self._evicted_sum[:] = self._sum[:, i]
+            self._evicted_count[:] = self._count[:, i]
+        self._total += np.where(finite, values, 0.0)
+        self._finite += finite
+        for p in (i, i + cap):
+            self.t[p] = t_ns
+            self.v[:, p] = values
+            self._sum[:, p] = self._total
+            self._count[:, p] = self._finite
+        self.pushed = k + 1
+        for w in self._windows:
+            w._push(k, t_ns, values[w.c])
+
+    def _pos(self, k):
+        # Sample k in the upper copy; the `capacity` samples before it are contiguous below
+        return k % self.capacity + self.capacity
+
+    def _slice(self, n):
+        end = self._pos(self.pushed - 1) + 1
+        return slice(end - n, end)
+
+    def times(self, n=None):
+        """
+        Zero-copy view of the timestamps of the last n samples (all kept samples by default).
+        """
+        if not self.pushed:
+            return self.t[:0]
+        return self.t[self._slice(len(self) if n is None else min(n, len(self)))]
+
+    def values(self, channel, n=None):
+        """
+        Zero-copy view of the last n values of channel, aligned with times(n).
+        """
+        if not self.pushed:
+            return self.v[0, :0]
+        return self.v[self.channel(channel), self._slice(len(self) if n is None else min(n, len(self)))]
+
+    def latest_t(self):
+        return int(self.t[self._pos(self.pushed - 1)]) if self.pushed else None
+
+    def first_since(self, t_ns):
+        """
+        Index (counting every sample ever pushed) of the first kept sample at or after t_ns.
+        """
+        n = len(self)
+        return self.pushed - n + int(np.searchsorted(self.times(), t_ns))
+
+    def _totals_before(self, c, k):
+        """
+        Running (sum, count) of channel c over all samples before sample k, which must not
+        be older than the oldest kept sample.
+        """
+        if k == 0:
+            return 0.0, 0
+        if k - 1 < self.pushed - self.capacity:
+            return self._evicted_sum[c], self._evicted_count[c]
+        p = self._pos(k - 1)
+        return self._sum[c, p], self._count[c, p]
+
+    def _mean_between(self, c, first, last):
+        if first > last:
+            return None
+        p = self._pos(last)
+        sum_before, count_before = self._totals_before(c, first)
+        count = self._count[c, p] - count_before
+        return float((self._sum[c, p] - sum_before) / count) if count else None
+
+    def _window_bounds(self, seconds, now_ns):
+        if not self.pushed:
+            return 0, -1
+        now_ns = self.latest_t() if now_ns is None else now_ns
+        return self.first_since(now_ns - int(seconds * 1e9)), self.pushed - 1
+
+    def mean(self, channel, seconds, now_ns=None):
+        """
+        Mean over the last `seconds` (up to the newest sample, or now_ns): a binary search for
+        the window start, then two lookups in the running totals. None if the window is empty.
+        """
+        first, last = self._window_bounds(seconds, now_ns)
+        return self._mean_between(self.channel(channel), first, last)
+
+    def extremes(self, channel, seconds, now_ns=None):
+        """
+        (min, max) over the last `seconds`, for ad-hoc windows: one vectorized pass over the
+        window's view. Windows queried every frame should use window() instead.
+        """
+        first, last = self._window_bounds(seconds, now_ns)
+        if first > last:
+            return None, None
+        values = self.values(channel, last - first + 1)
+        finite = values[np.isfinite(values)]
+        if not len(finite):
+            return None, None
+        return float(finite.min()), float(finite.max())
+
+    def window(self, channel, seconds):
+        """
+        Registers a RollingWindow over the last `seconds` of channel, updated on every push.
+        """
+        w = RollingWindow(self, channel, seconds)
+        self._windows.append(w)
+        return w
+
+
+class RollingWindow:
+    """
+    Min, max and mean of one History channel over the last `seconds` before the newest
+    sample. Monotonic deques of candidate extremes make each push amortized O(1) and each
+    query O(1); the mean comes from the history's running totals.
+    """
+    def __init__(self, history, channel, seconds):
+        self.history = history
+        self.c = history.channel(channel)
+        self.span_ns = int(seconds * 1e9)
+        self.first = history.pushed  # Index of the oldest sample in the window
+        self._max = deque()  # (index, value), values decreasing
+        self._min = deque()  # (index, value), values increasing
+
+    def _push(self, k, t_ns, value):
+        if value == value:  # Not NaN
+            while self._max and self._max[-1][1] <= value:
+                self._max.pop()
+            self._max.append((k, value))
+            while self._min and self._min[-1][1] >= value:
+                self._min.pop()
+            self._min.append((k, value))
+        h = self.history
+        first = max(self.first, h.pushed - len(h))
+        cutoff = t_ns - self.span_ns
+        while first < k and h.t[h._pos(first)] < cutoff:
+            first += 1
+        self.first = first
+        while self._max and self._max[0][0] < first:
+            self._max.popleft()
+        while self._min and self._min[0][0] < first:
+            self._min.popleft()
+
+    def max(self):
+        return float(self._max[0][1]) if self._max else None
+
+    def min(self):
+        return float(self._min[0][1]) if self._min else None
+
+    def mean(self):
+        return self.history._mean_between(self.c, self.first, self.history.pushed - 1)
+
+# Example usage:
+# history = History(300 * 60)  # 5 minutes at 60 Hz
+# peak = history.window("rpm", 10.0)
+# history.push(time.monotonic_ns(), (8000, 120, 4, 12.5, None, None))
+# print(peak.max(), history.mean("speed", 60.0), history.values("rpm", 100))
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+from array import array
+
+# Log-linear buckets in microseconds: values below 2 * SUB_BUCKETS are exact, above that
+# each power of two is split into SUB_BUCKETS buckets (~3% relative error).
+SUB_BITS = 5
+SUB_BUCKETS = 1 << SUB_BITS
+MAX_US = 1 << 26  # ~67 s; longer values land in the last bucket
+
+
+def _bucket(us):
+    if us < 2 * SUB_BUCKETS:
+        return us
+    shift = us.bit_length() - SUB_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + (us >> shift) - SUB_BUCKETS
+
+
+def _bucket_value(index):
+    """
+    Midpoint (in us) of the values that fall into bucket index.
+    """
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    low = (index % SUB_BUCKETS + SUB_BUCKETS) << shift
+    return low + ((1 << shift) >> 1)
+
+
+class Histogram:
+    """
+    Fixed-memory latency histogram in the style of HdrHistogram. record() is an integer
+    bucket lookup and one array increment, cheap enough for every frame on every stage.
+    Readers in other threads may see a count one sample behind, which is fine for stats.
+    """
+    __slots__ = ('counts', 'count', 'total_us', 'min_us', 'max_us')
+
+    def __init__(self):
+        self.counts = array('Q', bytes(8 * (_bucket(MAX_US) + 1)))
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def record_ns(self, ns):
+        us = ns // 1000
+        if us < 0:
+            us = 0
+        elif us > MAX_US:
+            us = MAX_US
+        self.counts[_bucket(us)] += 1
+        self.count += 1
+        self.total_us += us
+        if self.min_us is None or us < self.min_us:
+            self.min_us = us
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile(self, q):
+        """
+        Value (us) at quantile q (0..1), or None when nothing has been recorded.
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            if n:
+                seen += n
+                if seen >= rank:
+                    return min(max(_bucket_value(index), self.min_us), self.max_us)
+        return self.max_us
+
+    def summary(self):
+        """
+        count plus min/mean/p50/p90/p99/max in milliseconds.
+        """
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'min_ms': self.min_us / 1000,
+            'mean_ms': round(self.total_us / self.count / 1000, 3),
+            'p50_ms': self.percentile(0.5) / 1000,
+            'p90_ms': self.percentile(0.9) / 1000,
+            'p99_ms': self.percentile(0.99) / 1000,
+            'max_ms': self.max_us / 1000,
+        }
+
+
+class Metrics:
+    """
+    Named histograms for one process, created on first use.
+    """
+    def __init__(self):
+        self.histograms = {}
+
+    def histogram(self, name):
+        h = self.histograms.get(name)
+        if h is None:
+            h = self.histograms[name] = Histogram()
+        return h
+
+    def record(self, name, ns):
+        self.histogram(name).record_ns(ns)
+
+    def snapshot(self):
+        return {name: h.summary() for name, h in list(self.histograms.items())}
+
+    def reset(self):
+        for h in list(self.histograms.values()):
+            h.reset()
+
+
+class StatsServer:
+    """
+    Local stats endpoint: a Unix datagram socket that answers b"STATS" with a JSON snapshot
+    of the metrics (plus whatever extra() returns) and b"RESET" by clearing them after the
+    reply. Served from the asyncio loop with add_reader, or from a daemon thread for
+    processes without one (display_gui).
+    """
+    def __init__(self, path, metrics, extra=None):
+        self.path = path
+        self.metrics = metrics
+        self.extra = extra
+        self.sock = None
+        self._loop = None
+
+    def _bind(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        self.sock = sock
+
+    def start(self, loop=None):
+        self._bind()
+        self.sock.setblocking(False)
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop.add_reader(self.sock.fileno(), self._on_request)
+
+    def start_thread(self):
+        self._bind()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        sock = self.sock
+        while True:
+            try:
+                data, addr = sock.recvfrom(64)
+            except OSError:
+                # Closed by close()
+                return
+            self._reply(sock, data, addr)
+
+    def _on_request(self):
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(64)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print(f"Stats socket error: {e}")
+                return
+            self._reply(self.sock, data, addr)
+
+    def _reply(self, sock, data, addr):
+        if not addr or data not in (b"STATS", b"RESET"):
+            return
+        stats = {'latency': self.metrics.snapshot()}
+        if self.extra is not None:
+            try:
+                stats.update(self.extra())
+            except Exception as e:
+                stats['error'] = str(e)
+        try:
+            sock.sendto(json.dumps(stats).encode(), addr)
+        except OSError:
+            pass
+        if data == b"RESET":
+            self.metrics.reset()
+
+    def close(self):
+        if self.sock is None:
+            return
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.remove_reader(self.sock.fileno())
+        sock, self.sock = self.sock, None
+        sock.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def query(path, command=b"STATS", timeout=1.0):
+    """
+    Client side: asks the StatsServer at path for a snapshot. Returns the decoded dict.
+    """
+    client_path = f"/tmp/r3_stats_client_{os.getpid()}.sock"
+    if os.path.exists(client_path):
+        os.remove(client_path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        sock.bind(client_path)
+        sock.settimeout(timeout)
+        sock.sendto(command, path)
+        return json.loads(sock.recv(1 << 20))
+    finally:
+        sock.close()
+        os.remove(client_path)
+
+
+if __name__ == "__main__":
+    # python3 -m utils.metrics [socket path] [STATS|RESET]
+    target = sys.argv[1] if len(sys.argv) > 1 else "/tmp/r3_metrics.sock"
+    command = sys.argv[2].encode() if len(sys.argv) > 2 else b"STATS"
+    print(json.dumps(query(target, command), indent=2))
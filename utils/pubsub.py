@@ -0,0 +1,228 @@
+import asyncio
+import os
+import socket
+import time
+
+# Control messages a subscriber sends (from its own bound datagram socket) to the hub path
+SUBSCRIBE = b"SUB"
+UNSUBSCRIBE = b"UNSUB"
+
+
+class Subscriber:
+    """
+    One destination socket path with a persistent, connected, non-blocking socket and
+    its delivery counters.
+    """
+    def __init__(self, path, static=False):
+        self.path = path
+        self.static = static  # From config: kept (and reconnected) even while its receiver is down
+        self.sock = None
+        self.sent = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.errors = 0
+        self.full_streak = 0
+        self.next_retry = 0.0
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            return False
+        self.sock = sock
+        self.full_streak = 0
+        return True
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class FrameHub:
+    """
+    Publishes each frame straight to every subscriber's Unix datagram socket. Sockets stay
+    connected between frames; a subscriber whose receive queue is full simply misses that
+    frame (a newer one follows), so a slow reader never stalls the publisher.
+    Subscribers are the static paths given here (reconnected at most every retry_s while
+    their receiver is down) plus any process that sends SUBSCRIBE to path, which is read
+    with loop.add_reader. A dynamic subscriber is dropped when its socket goes away or
+    after max_full consecutive frames it could not take.
+    """
+    def __init__(self, path="/tmp/dashboard.sock", subscribers=(), retry_s=1.0, max_full=100):
+        self.path = path
+        self.retry_s = retry_s
+        self.max_full = max_full
+        self.subscribers = {}
+        for dest in subscribers:
+            self.subscribers[dest] = Subscriber(dest, static=True)
+        self.sock = None
+        self._loop = None
+
+    def start(self, loop=None):
+        """
+        Binds the control socket and registers it with the event loop.
+        """
+        self._loop = loop or asyncio.get_running_loop()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        self.sock = sock
+        self._loop.add_reader(sock.fileno(), self._on_control)
+        print(f"Frame hub on {self.path}, subscribers: {list(self.subscribers)}")
+
+    def _on_control(self):
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(64)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print(f"Frame hub control error: {e}")
+                return
+            if not addr:
+                # Unbound sender: nowhere to deliver to
+                continue
+            if data == SUBSCRIBE:
+                self.subscribe(addr)
+            elif data == UNSUBSCRIBE:
+                self.unsubscribe(addr)
+
+    def subscribe(self, path, static=False):
+        sub = self.subscribers.get(path)
+        if sub is None:
+            sub = self.subscribers[path] = Subscriber(path, static)
+            print(f"Frame hub: {path} subscribed")
+        # A (re-)subscribe means the receiver is up now, so do not wait out a retry delay
+        sub.next_retry = 0.0
+        return sub
+
+    def unsubscribe(self, path):
+        sub = self.subscribers.pop(path, None)
+        if sub is not None:
+            sub.close()
+            print(f"Frame hub: {path} unsubscribed")
+
+    def publish(self, msg, now=None):
+        """
+        Sends msg to every subscriber without blocking. Returns the number delivered.
+        """
+        delivered = 0
+        for sub in list(self.subscribers.values()):
+            if sub.sock is None:
+                now = now or time.monotonic()
+                if now < sub.next_retry:
+                    continue
+                if not sub.connect():
+                    sub.next_retry = now + self.retry_s
+                    continue
+            try:
+                sub.sock.send(msg)
+            except BlockingIOError:
+                # Receive queue full: this frame is stale by the time it could be read
+                sub.dropped += 1
+                sub.full_streak += 1
+                if not sub.static and sub.full_streak >= self.max_full:
+                    print(f"Frame hub: dropping {sub.path}, not reading")
+                    self.unsubscribe(sub.path)
+                continue
+            except OSError:
+                # Receiver went away (socket removed or closed)
+                sub.errors += 1
+                sub.close()
+                if sub.static:
+                    sub.next_retry = (now or time.monotonic()) + self.retry_s
+                else:
+                    self.unsubscribe(sub.path)
+                continue
+            sub.sent += 1
+            sub.bytes += len(msg)
+            sub.full_streak = 0
+            delivered += 1
+        return delivered
+
+    def stats(self):
+        return {
+            path: {'sent': s.sent, 'bytes': s.bytes, 'dropped': s.dropped, 'errors': s.errors, 'connected': s.sock is not None}
+            for path, s in self.subscribers.items()
+        }
+
+    def close(self):
+        if self.sock is not None:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.remove_reader(self.sock.fileno())
+            self.sock.close()
+            self.sock = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        for sub in self.subscribers.values():
+            sub.close()
+
+
+class Coalescer:
+    """
+    Turns per-channel change notifications into publishes of at most max_hz per channel.
+    A change after a quiet period publishes immediately; changes that arrive sooner are
+    folded into one publish at the end of the channel's interval. emit() builds and sends
+    whatever is newest at that moment, so nothing is queued. Channels missing from
+    max_hz are not capped. Runs on the event loop.
+    """
+    def __init__(self, emit, max_hz, loop=None):
+        self.emit = emit
+        self.min_ns = {channel: int(1e9 / hz) if hz else 0 for channel, hz in max_hz.items()}
+        self.changes = dict.fromkeys(self.min_ns, 0)
+        self.publishes = dict.fromkeys(self.min_ns, 0)
+        self._last_ns = dict.fromkeys(self.min_ns, 0)
+        self._pending = set()
+        self._loop = loop
+
+    def changed(self, channel):
+        self.changes[channel] = self.changes.get(channel, 0) + 1
+        if channel in self._pending:
+            return
+        now = time.monotonic_ns()
+        wait_ns = self._last_ns.get(channel, 0) + self.min_ns.get(channel, 0) - now
+        if wait_ns <= 0:
+            self._flush(channel, now)
+            return
+        self._pending.add(channel)
+        loop = self._loop or asyncio.get_running_loop()
+        loop.call_later(wait_ns / 1e9, self._deferred, channel)
+
+    def _deferred(self, channel):
+        self._pending.discard(channel)
+        self._flush(channel, time.monotonic_ns())
+
+    def _flush(self, channel, now):
+        self._last_ns[channel] = now
+        self.publishes[channel] = self.publishes.get(channel, 0) + 1
+        try:
+            self.emit()
+        except Exception as e:
+            print(f"Failed to publish {channel} change: {e}")
+
+    def stats(self):
+        return {channel: {'changes': n, 'publishes': self.publishes.get(channel, 0)} for channel, n in self.changes.items()}
+
+
+def subscribe(sock, hub_path="/tmp/dashboard.sock", message=SUBSCRIBE):
+    """
+    Subscriber side: asks the hub to send frames to sock (a bound datagram socket).
+    Returns False if the hub is not running yet; callers simply try again later.
+    """
+    try:
+        sock.sendto(message, hub_path)
+        return True
+    except OSError:
+        return False
+
+# Example usage:
+# hub = FrameHub(subscribers=["/tmp/dashboard_display.sock"])
+# hub.start()  # inside the running event loop
+# hub.publish(frame.encode(values))
+# print(hub.stats())
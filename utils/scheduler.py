@@ -0,0 +1,257 @@
+import asyncio
+import inspect
+import math
+import threading
+import time
+
+# What a task does when it wakes up more than a whole period late
+SKIP = "skip"  # Drop the missed ticks and stay on the original grid
+CATCH_UP = "catch_up"  # Run the missed ticks back to back, then continue on the grid
+
+
+class TaskStats:
+    """
+    Timing of one periodic task: how late each tick started relative to its absolute
+    deadline, the period actually achieved and the number of ticks skipped by overruns.
+    """
+    def __init__(self, period_ns):
+        self.period_ns = period_ns
+        self.runs = 0
+        self.errors = 0
+        self.overruns = 0
+        self.achieved_hz = 0.0
+        self._late_sum_ns = 0
+        self._late_max_ns = 0
+        self._work_sum_ns = 0
+        self._period_n = 0
+        self._period_mean = 0.0
+        self._period_m2 = 0.0
+        self._last_ns = None
+        self._window_start = None
+        self._window_runs = 0
+
+    def tick(self, now_ns, late_ns):
+        self.runs += 1
+        self._late_sum_ns += late_ns
+        if late_ns > self._late_max_ns:
+            self._late_max_ns = late_ns
+        if self._last_ns is not None:
+            # Welford's running mean/variance of the actual period
+            period = now_ns - self._last_ns
+            self._period_n += 1
+            delta = period - self._period_mean
+            self._period_mean += delta / self._period_n
+            self._period_m2 += delta * (period - self._period_mean)
+        self._last_ns = now_ns
+        if self._window_start is None:
+            self._window_start = now_ns
+        self._window_runs += 1
+        elapsed = now_ns - self._window_start
+        if elapsed >= 1_000_000_000:
+            self.achieved_hz = self._window_runs * 1e9 / elapsed
+            self._window_start = now_ns
+            self._window_runs = 0
+
+    def as_dict(self):
+        n = max(self.runs, 1)
+        return {
+            'target_hz': round(1e9 / self.period_ns, 1),
+            'achieved_hz': round(self.achieved_hz, 1),
+            'runs': self.runs,
+            'errors': self.errors,
+            'overruns': self.overruns,
+            'mean_late_us': self._late_sum_ns / n / 1000,
+            'max_late_us': self._late_max_ns / 1000,
+            'mean_work_us': self._work_sum_ns / n / 1000,
+            'period_mean_us': self._period_mean / 1000,
+            'period_stdev_us': math.sqrt(self._period_m2 / self._period_n) / 1000 if self._period_n else 0.0,
+        }
+
+
+class PeriodicTask:
+    """
+    fn called every interval_s against absolute deadlines on the time.monotonic_ns grid,
+    so the time fn itself takes never accumulates into the period.
+    """
+    def __init__(self, name, interval_s, fn, policy=SKIP, metrics=None):
+        if policy not in (SKIP, CATCH_UP):
+            raise ValueError(f"Task {name}: policy must be '{SKIP}' or '{CATCH_UP}'")
+        self.name = name
+        self.period_ns = max(1, int(interval_s * 1e9))
+        self.fn = fn
+        self.policy = policy
+        self.phase_ns = 0  # First deadline, relative to when the scheduler starts
+        self.stats = TaskStats(self.period_ns)
+        # Start lateness goes into the metrics histograms as '<name>_jitter'
+        self._jitter = metrics.histogram(f"{name}_jitter") if metrics is not None else None
+
+    def _started(self, now_ns, deadline_ns):
+        late = now_ns - deadline_ns
+        self.stats.tick(now_ns, late)
+        if self._jitter is not None:
+            self._jitter.record_ns(late)
+
+    def _advance(self, deadline_ns):
+        """
+        Next deadline after the tick due at deadline_ns, applying the overrun policy.
+        """
+        deadline_ns += self.period_ns
+        behind = time.monotonic_ns() - deadline_ns
+        if behind > self.period_ns and self.policy == SKIP:
+            missed = behind // self.period_ns
+            self.stats.overruns += missed
+            deadline_ns += missed * self.period_ns
+        return deadline_ns
+
+    def _failed(self, e):
+        self.stats.errors += 1
+        print(f"Task {self.name} failed: {e}")
+
+
+class LoopTask(PeriodicTask):
+    """
+    Runs on the event loop; fn may be a plain function or a coroutine function. fn must
+    not block: anything that does belongs in a ThreadTask.
+    """
+    async def run(self, stop_event, start_ns=None):
+        is_coro = inspect.iscoroutinefunction(self.fn)
+        deadline = (time.monotonic_ns() if start_ns is None else start_ns) + self.phase_ns
+        while not stop_event.is_set():
+            now = time.monotonic_ns()
+            if now < deadline:
+                # The loop's epoll wait rounds up to whole milliseconds, so ticks start up to
+                # ~1 ms late; that lateness is per tick and never carries into the next deadline
+                await asyncio.sleep((deadline - now) / 1e9)
+                continue
+            self._started(now, deadline)
+            try:
+                if is_coro:
+                    await self.fn()
+                else:
+                    self.fn()
+            except Exception as e:
+                self._failed(e)
+            self.stats._work_sum_ns += time.monotonic_ns() - now
+            deadline = self._advance(deadline)
+            if deadline <= time.monotonic_ns():
+                # Catching up: still let other tasks run between back-to-back ticks
+                await asyncio.sleep(0)
+
+
+class ThreadTask(PeriodicTask):
+    """
+    Runs a blocking fn on a dedicated thread with its own deadlines and hands each result
+    to deliver(result) on the event loop.
+    """
+    def __init__(self, name, interval_s, fn, deliver, policy=SKIP, metrics=None):
+        super().__init__(name, interval_s, fn, policy, metrics)
+        self.deliver = deliver
+        self._stop = threading.Event()
+        self._thread = None
+        self._loop = None
+        self._start_ns = None
+
+    def start(self, loop, start_ns=None):
+        self._loop = loop
+        self._start_ns = time.monotonic_ns() if start_ns is None else start_ns
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"task-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        deadline = self._start_ns + self.phase_ns
+        while not self._stop.is_set():
+            now = time.monotonic_ns()
+            if now < deadline:
+                # Event.wait so stop() does not have to sit out the rest of the period
+                if self._stop.wait((deadline - now) / 1e9):
+                    return
+                now = time.monotonic_ns()
+            self._started(now, deadline)
+            try:
+                result = self.fn()
+            except Exception as e:
+                self._failed(e)
+            else:
+                try:
+                    self._loop.call_soon_threadsafe(self.deliver, result)
+                except RuntimeError:
+                    # Event loop closed under us during shutdown
+                    return
+            self.stats._work_sum_ns += time.monotonic_ns() - now
+            deadline = self._advance(deadline)
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+class Scheduler:
+    """
+    Shared periodic scheduler for the acquisition loops. Tasks tick on absolute deadlines,
+    so periods do not drift by the work done in each tick; a task that overruns either
+    skips or catches up on the missed ticks. Blocking work runs on dedicated threads with
+    results delivered to the event loop. Each task's grid is offset from the previous
+    one's by stagger_s, so tasks whose periods line up (every 200 ms all of the 20, 100 and
+    200 ms tasks are due) do not all fall due at once and start late behind each other.
+    """
+    def __init__(self, metrics=None, stagger_s=0.005):
+        self.metrics = metrics
+        self.stagger_ns = int(stagger_s * 1e9)
+        self.tasks = {}
+
+    def _add(self, task):
+        if task.name in self.tasks:
+            raise ValueError(f"Task {task.name} already scheduled")
+        task.phase_ns = len(self.tasks) * self.stagger_ns % task.period_ns
+        self.tasks[task.name] = task
+        return task
+
+    def every(self, name, interval_s, fn, policy=SKIP):
+        """
+        Runs fn (function or coroutine function) on the event loop every interval_s.
+        """
+        return self._add(LoopTask(name, interval_s, fn, policy, self.metrics))
+
+    def every_in_thread(self, name, interval_s, fn, deliver, policy=SKIP):
+        """
+        Runs blocking fn every interval_s on its own thread; deliver(result) is called on the loop.
+        """
+        return self._add(ThreadTask(name, interval_s, fn, deliver, policy, self.metrics))
+
+    async def run(self, stop_event):
+        """
+        Runs every task until stop_event is set (or the call is cancelled).
+        """
+        loop = asyncio.get_running_loop()
+        # One origin for every grid, so the staggered phases hold between tasks
+        start_ns = time.monotonic_ns()
+        for task in self.tasks.values():
+            if isinstance(task, ThreadTask):
+                task.start(loop, start_ns)
+        try:
+            await asyncio.gather(*(t.run(stop_event, start_ns) for t in self.tasks.values() if isinstance(t, LoopTask)),
+                                 self._wait_stop(stop_event))
+        finally:
+            self.stop()
+
+    @staticmethod
+    async def _wait_stop(stop_event):
+        await stop_event.wait()
+
+    def stop(self):
+        for task in self.tasks.values():
+            if isinstance(task, ThreadTask):
+                task.stop()
+
+    def stats(self):
+        return {name: task.stats.as_dict() for name, task in self.tasks.items()}
+
+# Example usage:
+# scheduler = Scheduler()
+# scheduler.every("broadcast", 0.1, publish)
+# scheduler.every_in_thread("can", 0.2, lambda: reader.read_can_data(timeout=0.1), on_can)
+# await scheduler.run(stop_event)
+# print(scheduler.stats())
@@ -0,0 +1,209 @@
+import mmap
+import os
+import struct
+import time
+
+from utils.frame import FRAME, frame_values
+
+# Header: magic, layout version, slot count, slot payload size, total samples written
+HEADER = struct.Struct("<4sHHIQ")
+MAGIC = b"R3DB"
+LAYOUT_VERSION = 2
+COUNT_OFFSET = 12
+COUNT = struct.Struct("<Q")
+SEQ = struct.Struct("<Q")
+# How often readers check that the file they mapped is still the ring at the path
+RECHECK_NS = 1_000_000_000
+
+
+def _slot_stride(payload_size):
+    # Keep every slot's sequence counter 8-byte aligned
+    return SEQ.size + ((payload_size + 7) & ~7)
+
+
+class ShmRingWriter:
+    """
+    Single-writer ring buffer in an mmap'd file under /dev/shm. Slots hold dashboard frames
+    (utils/frame.py) unless another payload struct is given. Each slot is protected by
+    a sequence lock: the counter is odd while the slot is being written, so readers never
+    need a lock and simply retry when they catch a write in progress.
+    """
+    def __init__(self, path="/dev/shm/r3_dashboard", slots=16, payload=FRAME):
+        self.path = path
+        self.slots = slots
+        self.payload = payload
+        self.stride = _slot_stride(payload.size)
+        self.size = HEADER.size + slots * self.stride
+        # Reuse an existing file of the same layout so attached readers keep working
+        # across acquisition restarts instead of holding a stale unlinked mapping.
+        self.buf = self._reuse()
+        if self.buf is None:
+            self.buf = self._create()
+        self._count = HEADER.unpack_from(self.buf, 0)[4]
+
+    def _reuse(self):
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except FileNotFoundError:
+            return None
+        try:
+            if os.fstat(fd).st_size != self.size:
+                return None
+            buf = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+        if HEADER.unpack_from(buf, 0)[:4] != (MAGIC, LAYOUT_VERSION, self.slots, self.payload.size):
+            buf.close()
+            return None
+        return buf
+
+    def _create(self):
+        """
+        Builds the ring in a new file and renames it over the path. Readers that mapped a
+        previous layout keep the old file's memory (no SIGBUS from a shrunk file) and pick
+        up the new one when they next check the path.
+        """
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, self.size)
+            buf = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+        HEADER.pack_into(buf, 0, MAGIC, LAYOUT_VERSION, self.slots, self.payload.size, 0)
+        os.rename(tmp, self.path)
+        return buf
+
+    def write(self, *values):
+        """
+        Publish a new sample into the next slot.
+        """
+        off = HEADER.size + (self._count % self.slots) * self.stride
+        seq = SEQ.unpack_from(self.buf, off)[0] | 1
+        SEQ.pack_into(self.buf, off, seq)
+        self.payload.pack_into(self.buf, off + SEQ.size, *values)
+        SEQ.pack_into(self.buf, off, seq + 1)
+        self._count += 1
+        COUNT.pack_into(self.buf, COUNT_OFFSET, self._count)
+
+    def write_sample(self, seq, ts_ns, rpm, speed, gear, lean_angle, lat=None, lon=None, sample_ns=None):
+        self.write(*frame_values(seq, ts_ns, rpm, speed, gear, lean_angle, lat, lon, sample_ns))
+
+    def close(self):
+        self.buf.close()
+
+    def unlink(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class ShmRingReader:
+    """
+    Lock-free reader for a ring created by ShmRingWriter. Values are unpacked straight out
+    of the shared mapping with struct.unpack_from, so no intermediate copy is made.
+    Attached by path, it checks every RECHECK_NS that the path still holds the file it
+    mapped with the expected header, and re-attaches when a writer has replaced it.
+    """
+    def __init__(self, buf, payload=FRAME, path=None, ino=None):
+        magic, version, slots, payload_size, _ = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION or payload_size != payload.size:
+            raise ValueError("Shared memory ring has an unexpected layout")
+        self.buf = buf
+        self.slots = slots
+        self.payload = payload
+        self.stride = _slot_stride(payload.size)
+        self.last_count = 0
+        self.path = path
+        self._ino = ino
+        self._checked_ns = time.monotonic_ns()
+        self.reattached = 0
+
+    @classmethod
+    def attach(cls, path="/dev/shm/r3_dashboard", payload=FRAME):
+        """
+        Map an existing ring read-only. Returns None if the writer has not created it yet.
+        """
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        try:
+            st = os.fstat(fd)
+            if st.st_size < HEADER.size:
+                return None
+            buf = mmap.mmap(fd, st.st_size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        try:
+            return cls(buf, payload, path, st.st_ino)
+        except ValueError:
+            buf.close()
+            return None
+
+    def _recheck(self):
+        """
+        Re-attaches if the path now holds a different file or the header no longer matches.
+        Until a valid replacement appears the old mapping is kept: it stays readable.
+        """
+        self._checked_ns = time.monotonic_ns()
+        try:
+            ino = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return
+        header = HEADER.unpack_from(self.buf, 0)
+        if ino == self._ino and header[:4] == (MAGIC, LAYOUT_VERSION, self.slots, self.payload.size):
+            return
+        fresh = ShmRingReader.attach(self.path, self.payload)
+        if fresh is None:
+            return
+        self.buf.close()
+        self.buf, self.slots, self.stride, self._ino = fresh.buf, fresh.slots, fresh.stride, fresh._ino
+        self.last_count = 0
+        self.reattached += 1
+
+    def count(self):
+        return COUNT.unpack_from(self.buf, COUNT_OFFSET)[0]
+
+    def read_latest(self, retries=8):
+        """
+        Returns the newest sample tuple, or None if nothing has been written yet or the
+        writer kept overwriting the slot while we were reading it.
+        """
+        if self.path is not None and time.monotonic_ns() - self._checked_ns >= RECHECK_NS:
+            self._recheck()
+        buf = self.buf
+        for _ in range(retries):
+            count = COUNT.unpack_from(buf, COUNT_OFFSET)[0]
+            if count == 0:
+                return None
+            off = HEADER.size + ((count - 1) % self.slots) * self.stride
+            seq = SEQ.unpack_from(buf, off)[0]
+            if seq & 1:
+                continue
+            values = self.payload.unpack_from(buf, off + SEQ.size)
+            if SEQ.unpack_from(buf, off)[0] == seq:
+                self.last_count = count
+                return values
+        return None
+
+    def read_new(self):
+        """
+        Like read_latest, but returns None when nothing was published since the last read.
+        """
+        if self.path is not None and time.monotonic_ns() - self._checked_ns >= RECHECK_NS:
+            self._recheck()
+        if COUNT.unpack_from(self.buf, COUNT_OFFSET)[0] == self.last_count:
+            return None
+        return self.read_latest()
+
+    def close(self):
+        self.buf.close()
+
+
+# Example usage:
+# writer = ShmRingWriter("/dev/shm/r3_dashboard")
+# writer.write_sample(1, time.monotonic_ns(), 8000, 120, 4, 12.5)
+# reader = ShmRingReader.attach("/dev/shm/r3_dashboard")
+# print(frame_to_dict(reader.read_latest()))
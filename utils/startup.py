@@ -0,0 +1,97 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# Set by supervisor.py so every child reports against the same start of boot
+BOOT_ENV = "R3_BOOT_NS"
+# Overrides the startup_report config key (benchmarks/bench_boot.py sets it for the children)
+REPORT_ENV = "R3_STARTUP_REPORT"
+
+
+def process_start_ns():
+    """
+    time.monotonic_ns() at which this process was started, from /proc/self/stat (10 ms
+    resolution), so the interpreter's own startup is counted. Falls back to now.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (starttime, in clock ticks since boot); comm may contain spaces
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        age_ns = time.clock_gettime_ns(time.CLOCK_BOOTTIME) - start_ticks * 1_000_000_000 // os.sysconf("SC_CLK_TCK")
+        return time.monotonic_ns() - max(age_ns, 0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.monotonic_ns()
+
+
+def boot_origin_ns():
+    origin = os.environ.get(BOOT_ENV)
+    if origin:
+        try:
+            return int(origin)
+        except ValueError:
+            pass
+    return process_start_ns()
+
+
+class StartupProfile:
+    """
+    Cold-boot timing of one process: how long each startup phase took and when each
+    milestone (first frame, first rpm on screen) was reached, both measured from the start
+    of boot. report() prints the table; dump() appends it as a JSON line for benchmarks.
+    """
+    def __init__(self, name, origin_ns=None):
+        self.name = name
+        self.origin_ns = boot_origin_ns() if origin_ns is None else origin_ns
+        self.phases = []  # (name, start ms, duration ms) in the order they ran
+        self.marks = {}  # milestone -> ms since origin
+
+    def _ms(self, ns):
+        return (ns - self.origin_ns) / 1e6
+
+    @contextmanager
+    def phase(self, name):
+        start = time.monotonic_ns()
+        try:
+            yield
+        finally:
+            end = time.monotonic_ns()
+            self.phases.append((name, self._ms(start), (end - start) / 1e6))
+
+    def mark(self, name):
+        """
+        Records a milestone the first time it is reached; later calls are ignored.
+        """
+        if name not in self.marks:
+            self.marks[name] = self._ms(time.monotonic_ns())
+
+    def as_dict(self):
+        return {
+            'process': self.name,
+            'phases': {name: round(duration, 3) for name, _, duration in self.phases},
+            'marks': {name: round(t, 3) for name, t in self.marks.items()},
+        }
+
+    def report(self):
+        lines = [f"{self.name} startup (ms since boot):"]
+        events = [(start, f"  {start:8.1f}  {name:<24} {duration:8.1f} ms") for name, start, duration in self.phases]
+        events += [(t, f"  {t:8.1f}  * {name}") for name, t in self.marks.items()]
+        lines += [line for _, line in sorted(events)]
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        path = os.environ.get(REPORT_ENV) or path
+        if not path:
+            return
+        try:
+            with open(path, "a") as f:
+                f.write(json.dumps(self.as_dict()) + "\n")
+        except OSError as e:
+            print(f"Cannot write startup report to {path}: {e}")
+
+# Example usage:
+# profile = StartupProfile("display")
+# with profile.phase("display_init"):
+#     pygame.display.init()
+# profile.mark("first_frame")
+# print(profile.report())
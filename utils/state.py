@@ -0,0 +1,126 @@
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+# Typed, immutable records of the live dashboard state: one per sensor channel, grouped
+# into a snapshot whose first field is a version. They are NamedTuples (plain tuples
+# underneath: no per-instance dict, field access by index). StateStore publishes a whole
+# new snapshot per update, so a reader holding one always sees values that belong together.
+
+
+class CanState(NamedTuple):
+    rpm: Optional[int] = None
+    speed: Optional[int] = None  # km/h
+    gear: Optional[int] = 1  # Before the first reading only; a reading without gear stores None
+    sampled: Optional[int] = None  # time.monotonic_ns() the last rpm came off the bus; None before any rpm
+    signals: Dict[str, Optional[float]] = {}  # Every decoded signal, including beyond rpm/speed/gear
+
+    @classmethod
+    def from_reading(cls, data, sampled):
+        return cls(data.get('rpm'), data.get('speed'), data.get('gear'), sampled, data)
+
+
+class ImuState(NamedTuple):
+    lean_angle: float = 0.0  # degrees
+    pitch: Optional[float] = None
+    acceleration: Optional[Dict[str, float]] = None  # m/s^2, x/y/z
+    gyroscope: Optional[Dict[str, float]] = None  # deg/s, x/y/z
+    sampled: Optional[int] = None
+
+    @classmethod
+    def from_reading(cls, data):
+        return cls(
+            data.get('lean_angle', 0.0), data.get('pitch'), data.get('acceleration'), data.get('gyroscope'),
+            data.get('t_ns') or time.monotonic_ns()
+        )
+
+
+class GpsState(NamedTuple):
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    alt: Optional[float] = None
+    speed: Optional[float] = None  # m/s
+    track: Optional[float] = None
+    fix_time: Optional[str] = None
+    sampled: Optional[int] = None
+
+    @classmethod
+    def from_fix(cls, fix):
+        return cls(
+            fix.get('lat'), fix.get('lon'), fix.get('alt'), fix.get('speed'), fix.get('track'),
+            fix.get('fix_time'), fix.get('t_ns') or time.monotonic_ns()
+        )
+
+
+class LapState(NamedTuple):
+    lap: Optional[int] = None
+    lap_time: Optional[float] = None
+    last_lap: Optional[float] = None
+    best_lap: Optional[float] = None
+    delta: Optional[float] = None
+
+
+class SensorSnapshot(NamedTuple):
+    """
+    DataAcquisition's state: the latest record of every channel.
+    """
+    version: int = 0
+    can: CanState = CanState()
+    imu: ImuState = ImuState()
+    gps: GpsState = GpsState()
+    lap: LapState = LapState()
+
+    def as_dict(self):
+        return {
+            'version': self.version,
+            'can': dict(self.can.signals, rpm=self.can.rpm, speed=self.can.speed, gear=self.can.gear),
+            'imu': self.imu._asdict(),
+            'gps': self.gps._asdict(),
+            'lap': self.lap._asdict(),
+        }
+
+
+class FrameState(NamedTuple):
+    """
+    What a frame receiver (display_gui) knows: the fields of utils/frame.py's
+    frame_to_dict(), updated by full frames and deltas alike.
+    """
+    version: int = 0
+    rpm: int = 0
+    speed: int = 0
+    gear: int = 1
+    lean_angle: float = 0.0
+    gps_lat: Optional[float] = None
+    gps_lon: Optional[float] = None
+    timestamp: Optional[int] = None
+    seq: Optional[int] = None
+    sampled: Optional[int] = None
+
+
+class StateStore:
+    """
+    Holds the current snapshot (a NamedTuple with a version field) and replaces it on
+    every update: copy-on-write. Publishing is a single reference assignment, so readers on
+    any thread take store.snapshot without a lock and get a consistent view without copying;
+    comparing its version with the last one they handled tells them whether anything changed.
+    Writers are serialized by a lock, so several threads may update.
+    """
+    def __init__(self, initial):
+        self.snapshot = initial
+        self._lock = threading.Lock()
+
+    def update(self, **fields):
+        """
+        Publishes a copy of the current snapshot with fields replaced and the version bumped.
+        Returns the new snapshot.
+        """
+        with self._lock:
+            snapshot = self.snapshot._replace(version=self.snapshot.version + 1, **fields)
+            self.snapshot = snapshot
+        return snapshot
+
+# Example usage:
+# store = StateStore(SensorSnapshot())
+# store.update(can=CanState.from_reading({'rpm': 8000, 'speed': 120, 'gear': 4}, time.monotonic_ns()))
+# snap = store.snapshot
+# print(snap.version, snap.can.rpm, snap.imu.lean_angle)